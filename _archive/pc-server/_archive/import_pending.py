@@ -10,7 +10,7 @@ from pathlib import Path
 from typing import Any
 from urllib import error, request
 
-from app.openclaw_ingest import build_legacy_event_id
+from app.openclaw_ingest import normalize_legacy_line
 
 
 def _read_env_api_key(env_path: Path) -> str | None:
@@ -91,33 +91,33 @@ def _candidate_files(pending_dir: Path) -> list[Path]:
     return files
 
 
-def _normalize_payload(obj: Any, file_name: str, line_no: int, raw_line: str) -> dict[str, Any]:
-    if not isinstance(obj, dict):
-        raise ValueError("line is not a JSON object")
-
-    payload = dict(obj)
-    event_id = payload.get("event_id") or payload.get("eventId")
-    if not isinstance(event_id, str) or not event_id.strip():
-        payload["event_id"] = build_legacy_event_id(file_name, line_no, raw_line)
-
-    if "source" not in payload:
-        payload["source"] = "openclaw"
-    return payload
+# Lines per POST to /api/openclaw/ingest/bulk (the server caps a request at 5000).
+BULK_CHUNK_SIZE = 500
 
 
 def process_file(path: Path, *, endpoint: str, api_key: str) -> list[str]:
-    errors_out: list[str] = []
+    errors_out: list[tuple[int, str]] = []
+    batch: list[tuple[int, dict[str, Any]]] = []
     raw = path.read_text(encoding="utf-8").splitlines()
     for line_no, line in enumerate(raw, start=1):
         if not line.strip():
             continue
         try:
-            parsed = json.loads(line)
-            payload = _normalize_payload(parsed, path.name, line_no, line)
-            _post_json(endpoint, api_key, payload)
+            batch.append((line_no, normalize_legacy_line(path.name, line_no, line)))
+        except Exception as exc:
+            errors_out.append((line_no, str(exc)))
+
+    for start in range(0, len(batch), BULK_CHUNK_SIZE):
+        chunk = batch[start : start + BULK_CHUNK_SIZE]
+        try:
+            resp = _post_json(endpoint, api_key, {"events": [payload for _, payload in chunk]})
         except Exception as exc:
-            errors_out.append(f"line {line_no}: {exc}")
-    return errors_out
+            errors_out.extend((line_no, str(exc)) for line_no, _ in chunk)
+            continue
+        for (line_no, _), result in zip(chunk, resp.get("results") or []):
+            if not result.get("ok"):
+                errors_out.append((line_no, str(result.get("error"))))
+    return [f"line {line_no}: {msg}" for line_no, msg in sorted(errors_out)]
 
 
 def archive_file(path: Path, pending_dir: Path) -> None:
@@ -151,7 +151,7 @@ def main() -> int:
     pending_dir.mkdir(parents=True, exist_ok=True)
 
     api_key = _resolve_api_key(script_dir, args.api_key)
-    endpoint = args.base_url.rstrip("/") + "/api/openclaw/ingest"
+    endpoint = args.base_url.rstrip("/") + "/api/openclaw/ingest/bulk"
 
     files = _candidate_files(pending_dir)
     if not files:
@@ -6,14 +6,13 @@ import unittest
 from pathlib import Path
 
 import import_pending
+from app.openclaw_ingest import normalize_legacy_line
 
 
 class PendingImporterTests(unittest.TestCase):
-    def test_normalize_payload_generates_legacy_event_id(self) -> None:
+    def test_normalize_legacy_line_generates_legacy_event_id(self) -> None:
         raw_line = json.dumps({"local_date": "2026-02-18", "items": [{"alias": "protein"}]})
-        payload = import_pending._normalize_payload(
-            json.loads(raw_line), "sample.jsonl", 3, raw_line
-        )
+        payload = normalize_legacy_line("sample.jsonl", 3, raw_line)
         self.assertIn("event_id", payload)
         self.assertTrue(str(payload["event_id"]).startswith("legacy:sample.jsonl:3:"))
         self.assertEqual(payload["source"], "openclaw")
@@ -48,21 +47,40 @@ class PendingImporterTests(unittest.TestCase):
             old_post = import_pending._post_json
             try:
                 def fake_post_json(url: str, api_key: str, payload: dict):
-                    if payload.get("event_id") == "ok:1":
-                        return {"ok": True}
-                    raise RuntimeError("boom")
+                    return {
+                        "results": [
+                            {"ok": True} if ev.get("event_id") == "ok:1" else {"ok": False, "error": "boom"}
+                            for ev in payload["events"]
+                        ]
+                    }
 
                 import_pending._post_json = fake_post_json
                 errs = import_pending.process_file(
                     path,
-                    endpoint="http://localhost:8765/api/openclaw/ingest",
+                    endpoint="http://localhost:8765/api/openclaw/ingest/bulk",
                     api_key="x",
                 )
             finally:
                 import_pending._post_json = old_post
 
-            self.assertEqual(len(errs), 1)
-            self.assertTrue(errs[0].startswith("line 1:"))
+            self.assertEqual(errs, ["line 1: boom"])
+
+    def test_process_file_reports_whole_chunk_on_network_error(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            path = Path(td) / "sample.jsonl"
+            path.write_text('{"event_id":"a","items":[]}\nnot json\n{"event_id":"b","items":[]}\n', encoding="utf-8")
+
+            old_post = import_pending._post_json
+            try:
+                def fake_post_json(url: str, api_key: str, payload: dict):
+                    raise RuntimeError("NETWORK: down")
+
+                import_pending._post_json = fake_post_json
+                errs = import_pending.process_file(path, endpoint="http://x/api/openclaw/ingest/bulk", api_key="x")
+            finally:
+                import_pending._post_json = old_post
+
+            self.assertEqual([e.split(":")[0] for e in errs], ["line 1", "line 2", "line 3"])
 
 
 if __name__ == "__main__":
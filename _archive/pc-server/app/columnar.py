@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Iterable
+
+
+def _is_date_series(key: str, value: Any) -> bool:
+    if not isinstance(value, list):
+        return False
+    if not value:
+        return key.endswith(("ByDate", "Daily"))
+    return all(isinstance(p, dict) and isinstance(p.get("date"), str) for p in value)
+
+
+def project_fields(summary: dict[str, Any], fields: Iterable[str] | None) -> dict[str, Any]:
+    """Keep only the requested top-level keys (unknown names are ignored)."""
+    if fields is None:
+        return summary
+    wanted = set(fields)
+    return {k: v for k, v in summary.items() if k in wanted}
+
+
+def parse_fields(raw: str | None) -> list[str] | None:
+    if raw is None:
+        return None
+    return [f.strip() for f in raw.split(",") if f.strip()]
+
+
+def to_columnar(summary: dict[str, Any]) -> dict[str, Any]:
+    """Re-encode the `[{"date": ..., <field>: ...}, ...]` series of a summary column-wise.
+
+    Every series shares one day axis (`axis.start`); a series carries either
+    `from` (first offset, when its days are contiguous) or explicit `offsets`,
+    plus one value array per field. A series identical to an earlier one is
+    emitted as `{"alias": "<earlier key>"}`. Non-series keys are passed through.
+    """
+    series_keys = [k for k, v in summary.items() if _is_date_series(k, v)]
+    all_days = [date.fromisoformat(p["date"]) for k in series_keys for p in summary[k]]
+    if not all_days:
+        rest = {k: v for k, v in summary.items() if k not in series_keys}
+        return {"format": "columnar", "axis": None, "series": {k: {"offsets": []} for k in series_keys}, **rest}
+
+    start = min(all_days)
+
+    out_series: dict[str, Any] = {}
+    seen: dict[int, list[tuple[str, list[dict[str, Any]]]]] = {}
+    for key in series_keys:
+        points = summary[key]
+        if not points:
+            out_series[key] = {"offsets": []}
+            continue
+        # Cheap identity bucket before the full comparison for aliases.
+        bucket = seen.setdefault(hash((len(points), points[0]["date"], points[-1]["date"])), [])
+        alias = next((k for k, other in bucket if other == points), None)
+        if alias is not None:
+            out_series[key] = {"alias": alias}
+            continue
+        bucket.append((key, points))
+
+        offsets = [(date.fromisoformat(p["date"]) - start).days for p in points]
+        field_names: list[str] = []
+        for p in points:
+            for name in p:
+                if name != "date" and name not in field_names:
+                    field_names.append(name)
+
+        col: dict[str, Any] = {}
+        if offsets == list(range(offsets[0], offsets[0] + len(offsets))):
+            col["from"] = offsets[0]
+        else:
+            col["offsets"] = offsets
+        for name in field_names:
+            col[name] = [p.get(name) for p in points]
+        out_series[key] = col
+
+    rest = {k: v for k, v in summary.items() if k not in out_series}
+    return {
+        "format": "columnar",
+        "axis": {"start": start.isoformat(), "unit": "day"},
+        "series": out_series,
+        **rest,
+    }
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Any
+
+from .db import db
+
+
+def total_record_count(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT COALESCE(SUM(record_count), 0) AS c FROM health_record_counters").fetchone()
+    return int(row["c"]) if row else 0
+
+
+def record_counts_by_type(conn: sqlite3.Connection) -> dict[str, int]:
+    """type -> record count (all devices), largest first."""
+    rows = conn.execute(
+        """
+        SELECT type, SUM(record_count) AS c
+        FROM health_record_counters
+        GROUP BY type
+        HAVING SUM(record_count) > 0
+        ORDER BY c DESC
+        """
+    ).fetchall()
+    return {r["type"]: int(r["c"]) for r in rows}
+
+
+def has_records(conn: sqlite3.Connection, *types: str) -> bool:
+    placeholders = ",".join("?" for _ in types)
+    row = conn.execute(
+        f"SELECT 1 FROM health_record_counters WHERE type IN ({placeholders}) AND record_count > 0 LIMIT 1",
+        types,
+    ).fetchone()
+    return row is not None
+
+
+def list_record_counters(conn: sqlite3.Connection) -> list[dict[str, Any]]:
+    rows = conn.execute(
+        """
+        SELECT type, device_id, record_count, first_seen_at, last_seen_at
+        FROM health_record_counters
+        WHERE record_count > 0
+        ORDER BY type, device_id
+        """
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def reconcile_record_counters(*, fix: bool = True) -> dict[str, Any]:
+    """Compare counters against real health_records counts.
+
+    Runs inside an IMMEDIATE transaction so ingest cannot interleave between the
+    scan and the rewrite. Returns the drifted keys; when `fix` is set the
+    counters table is rebuilt from the scan.
+    """
+    with db() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        actual_rows = conn.execute(
+            """
+            SELECT type, device_id, COUNT(*) AS c, MIN(ingested_at) AS first_seen_at, MAX(ingested_at) AS last_seen_at
+            FROM health_records
+            GROUP BY type, device_id
+            """
+        ).fetchall()
+        stored_rows = conn.execute(
+            "SELECT type, device_id, record_count FROM health_record_counters"
+        ).fetchall()
+
+        actual = {(r["type"], r["device_id"]): int(r["c"]) for r in actual_rows}
+        stored = {(r["type"], r["device_id"]): int(r["record_count"]) for r in stored_rows}
+
+        drift: list[dict[str, Any]] = []
+        for key in sorted(set(actual) | set(stored)):
+            a = actual.get(key, 0)
+            s = stored.get(key, 0)
+            if a != s:
+                drift.append({"type": key[0], "device_id": key[1], "counted": s, "actual": a})
+
+        if fix and drift:
+            conn.execute("DELETE FROM health_record_counters")
+            conn.executemany(
+                """
+                INSERT INTO health_record_counters(type, device_id, record_count, first_seen_at, last_seen_at)
+                VALUES(?,?,?,?,?)
+                """,
+                [
+                    (r["type"], r["device_id"], int(r["c"]), r["first_seen_at"], r["last_seen_at"])
+                    for r in actual_rows
+                ],
+            )
+
+    return {
+        "ok": not drift,
+        "checked": len(actual),
+        "drift": drift,
+        "fixed": bool(fix and drift),
+    }
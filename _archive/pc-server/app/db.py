@@ -1,20 +1,25 @@
 ﻿from __future__ import annotations
 
+import hashlib
 import json
 import os
 import sqlite3
 from contextlib import contextmanager
+from dataclasses import asdict
+from functools import lru_cache
 from datetime import datetime, timezone
 
 # Use local timezone for day-based aggregations (JST if the PC is set to JST)
 LOCAL_TZ = datetime.now().astimezone().tzinfo
-from typing import Any, Iterator
+from typing import Any, Callable, Iterator
+
+from .timing import TimedConnection
 
 DB_PATH = os.getenv("DB_PATH", os.path.join(os.path.dirname(__file__), "..", "hc_sync.db"))
 
 
-def _connect() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
+def _connect(check_same_thread: bool = True) -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH, check_same_thread=check_same_thread, factory=TimedConnection)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL;")
     conn.execute("PRAGMA synchronous=NORMAL;")
@@ -22,8 +27,10 @@ def _connect() -> sqlite3.Connection:
 
 
 @contextmanager
-def db() -> Iterator[sqlite3.Connection]:
-    conn = _connect()
+def db(*, check_same_thread: bool = True) -> Iterator[sqlite3.Connection]:
+    # check_same_thread=False is for streaming responses, whose generator is
+    # resumed on different worker threads (never concurrently).
+    conn = _connect(check_same_thread)
     try:
         yield conn
         conn.commit()
@@ -31,206 +38,889 @@ def db() -> Iterator[sqlite3.Connection]:
         conn.close()
 
 
-def init_db() -> None:
+# Bump by appending a step to _MIGRATIONS (never edit a released one).
+SCHEMA_VERSION = 8
+# Rows per transaction in background backfills (see run_backfills).
+BACKFILL_CHUNK_ROWS = 500
+
+
+def init_db() -> int:
+    """Bring the database up to SCHEMA_VERSION and return the number of
+    background backfills still pending (run them with run_backfills).
+
+    An up-to-date database costs a single SELECT: migration steps run only
+    when schema_version is behind, and the code-defined seeds (nutrient
+    keys, catalog) only when they changed.
+    """
+    seed_hash = _seed_fingerprint()
     with db() as conn:
-        conn.execute(
+        version, stored_seed_hash, pending = _schema_state(conn)
+        if version == SCHEMA_VERSION and stored_seed_hash == seed_hash:
+            return pending
+        _migrate(conn)
+        if _schema_state(conn)[1] != seed_hash:
+            _reseed(conn, seed_hash)
+        return _schema_state(conn)[2]
+
+
+def _schema_state(conn: sqlite3.Connection) -> tuple[int, str | None, int]:
+    """(schema version, seed fingerprint, pending backfills); version 0 for
+    new databases and those created before schema_version existed."""
+    try:
+        row = conn.execute(
             """
-            CREATE TABLE IF NOT EXISTS sync_runs (
-              sync_id TEXT PRIMARY KEY,
-              device_id TEXT NOT NULL,
-              synced_at TEXT NOT NULL,
-              range_start TEXT NOT NULL,
-              range_end TEXT NOT NULL,
-              received_at TEXT NOT NULL,
-              record_count INTEGER NOT NULL,
-              upserted_count INTEGER NOT NULL DEFAULT 0,
-              skipped_count INTEGER NOT NULL DEFAULT 0
-            );
+            SELECT version, seed_hash,
+                   (SELECT COUNT(*) FROM schema_backfills WHERE finished_at IS NULL) AS pending
+            FROM schema_version WHERE id = 1
             """
-        )
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return 0, None, 0
+    if row is None:
+        return 0, None, 0
+    return int(row["version"]), row["seed_hash"], int(row["pending"])
+
+
+@lru_cache(maxsize=1)
+def _seed_fingerprint() -> str:
+    # The seeds are code, so one hash per process is enough.
+    from .nutrient_keys import SEED_KEYS
+    from .nutrition import CATALOG
+
+    seeds = {
+        "nutrient_keys": [asdict(nk) for nk in SEED_KEYS],
+        "catalog": {alias: asdict(item) for alias, item in CATALOG.items()},
+    }
+    return hashlib.sha256(dumps_payload(seeds).encode("utf-8")).hexdigest()
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    """Apply the pending steps in order, each in its own transaction together
+    with its version bump, so an interrupted run resumes at the failed step."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+          id INTEGER PRIMARY KEY CHECK (id = 1),
+          version INTEGER NOT NULL,
+          seed_hash TEXT,
+          updated_at TEXT NOT NULL
+        );
+        """
+    )
+    # Row-by-row backfills queued by migration steps and run in chunks in the
+    # background; `cursor` is the last rowid done, committed with each chunk.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_backfills (
+          name TEXT PRIMARY KEY,
+          cursor INTEGER NOT NULL DEFAULT 0,
+          rows_done INTEGER NOT NULL DEFAULT 0,
+          queued_at TEXT NOT NULL,
+          finished_at TEXT
+        );
+        """
+    )
+    conn.commit()
+    for version, step in enumerate(_MIGRATIONS, start=1):
+        # BEGIN IMMEDIATE takes the write lock before re-reading the version,
+        # so a second process starting at the same time skips the done steps.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if _schema_state(conn)[0] < version:
+                step(conn)
+                conn.execute(
+                    """
+                    INSERT INTO schema_version(id, version, updated_at) VALUES(1, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET version = excluded.version, updated_at = excluded.updated_at
+                    """,
+                    (version, now_iso()),
+                )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+
+def _reseed(conn: sqlite3.Connection, seed_hash: str) -> None:
+    from .foods import seed_food_catalog
+    from .nutrition import seed_nutrient_keys
+
+    seed_nutrient_keys(conn)
+    seed_food_catalog(conn)
+    conn.execute("UPDATE schema_version SET seed_hash = ?, updated_at = ? WHERE id = 1", (seed_hash, now_iso()))
+    conn.commit()
+
+
+# ── Migration steps ──
+# Steps 1-6 are the schema as it stood before schema_version existed. They
+# are idempotent (IF NOT EXISTS, tolerated ALTERs, backfills guarded by an
+# emptiness check) so older databases, which start at version 0, replay them.
+
+def _m001_health_records(conn: sqlite3.Connection) -> None:
+    """Raw Health Connect records, sync runs and per-(type, device) counters."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sync_runs (
+          sync_id TEXT PRIMARY KEY,
+          device_id TEXT NOT NULL,
+          synced_at TEXT NOT NULL,
+          range_start TEXT NOT NULL,
+          range_end TEXT NOT NULL,
+          received_at TEXT NOT NULL,
+          record_count INTEGER NOT NULL,
+          upserted_count INTEGER NOT NULL DEFAULT 0,
+          skipped_count INTEGER NOT NULL DEFAULT 0
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS health_records (
+          record_key TEXT PRIMARY KEY,
+          device_id TEXT NOT NULL,
+          type TEXT NOT NULL,
+          record_id TEXT,
+          source TEXT,
+          start_time TEXT,
+          end_time TEXT,
+          time TEXT,
+          last_modified_time TEXT,
+          unit TEXT,
+          payload_json TEXT NOT NULL,
+          ingested_at TEXT NOT NULL
+        );
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_health_records_type ON health_records(type);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_health_records_ingested_at ON health_records(ingested_at);")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_health_records_type_ingested_at ON health_records(type, ingested_at);"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sync_runs_received_at ON sync_runs(received_at);")
+
+    # Per-(type, device) record counters. Kept in the same transaction as the
+    # health_records write via triggers so status endpoints never scan the table.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS health_record_counters (
+          type TEXT NOT NULL,
+          device_id TEXT NOT NULL,
+          record_count INTEGER NOT NULL DEFAULT 0,
+          first_seen_at TEXT,
+          last_seen_at TEXT,
+          PRIMARY KEY (type, device_id)
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_health_records_counter_insert
+        AFTER INSERT ON health_records
+        BEGIN
+          INSERT INTO health_record_counters(type, device_id, record_count, first_seen_at, last_seen_at)
+          VALUES (NEW.type, NEW.device_id, 1, NEW.ingested_at, NEW.ingested_at)
+          ON CONFLICT(type, device_id) DO UPDATE SET
+            record_count = record_count + 1,
+            first_seen_at = MIN(COALESCE(first_seen_at, excluded.first_seen_at), excluded.first_seen_at),
+            last_seen_at = MAX(COALESCE(last_seen_at, excluded.last_seen_at), excluded.last_seen_at);
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_health_records_counter_update
+        AFTER UPDATE OF ingested_at ON health_records
+        BEGIN
+          UPDATE health_record_counters
+          SET last_seen_at = MAX(COALESCE(last_seen_at, NEW.ingested_at), NEW.ingested_at)
+          WHERE type = NEW.type AND device_id = NEW.device_id;
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_health_records_counter_delete
+        AFTER DELETE ON health_records
+        BEGIN
+          UPDATE health_record_counters
+          SET record_count = MAX(record_count - 1, 0)
+          WHERE type = OLD.type AND device_id = OLD.device_id;
+        END;
+        """
+    )
+    # One-off backfill for DBs created before the counters table existed.
+    has_counters = conn.execute("SELECT 1 FROM health_record_counters LIMIT 1").fetchone()
+    has_records = conn.execute("SELECT 1 FROM health_records LIMIT 1").fetchone()
+    if has_records and not has_counters:
         conn.execute(
             """
-            CREATE TABLE IF NOT EXISTS health_records (
-              record_key TEXT PRIMARY KEY,
-              device_id TEXT NOT NULL,
-              type TEXT NOT NULL,
-              record_id TEXT,
-              source TEXT,
-              start_time TEXT,
-              end_time TEXT,
-              time TEXT,
-              last_modified_time TEXT,
-              unit TEXT,
-              payload_json TEXT NOT NULL,
-              ingested_at TEXT NOT NULL
-            );
+            INSERT INTO health_record_counters(type, device_id, record_count, first_seen_at, last_seen_at)
+            SELECT type, device_id, COUNT(*), MIN(ingested_at), MAX(ingested_at)
+            FROM health_records
+            GROUP BY type, device_id
             """
         )
 
-        # Manual nutrition/supplement logs
+
+def _m002_nutrition(conn: sqlite3.Connection) -> None:
+    """Nutrition log, normalized nutrients and their per-day totals."""
+    # Manual nutrition/supplement logs
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS nutrition_events (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          consumed_at TEXT NOT NULL,
+          local_date TEXT NOT NULL,
+          alias TEXT,
+          label TEXT NOT NULL,
+          count REAL NOT NULL DEFAULT 1,
+          unit TEXT,
+          kcal REAL,
+          protein_g REAL,
+          fat_g REAL,
+          carbs_g REAL,
+          micros_json TEXT,
+          note TEXT
+        );
+        """
+    )
+
+    # Normalized nutrients (preferred for graphing). Dual-write with micros_json.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS nutrient_keys (
+          key TEXT PRIMARY KEY,
+          unit TEXT,
+          display_name TEXT,
+          category TEXT
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS nutrition_nutrients (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          event_id INTEGER NOT NULL,
+          local_date TEXT NOT NULL,
+          nutrient_key TEXT NOT NULL,
+          value REAL NOT NULL,
+          unit TEXT,
+          FOREIGN KEY(event_id) REFERENCES nutrition_events(id)
+        );
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_nutrition_nutrients_local_date ON nutrition_nutrients(local_date);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_nutrition_nutrients_key ON nutrition_nutrients(nutrient_key);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_nutrition_nutrients_event_id ON nutrition_nutrients(event_id);")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_nutrition_nutrients_date_key ON nutrition_nutrients(local_date, nutrient_key);"
+    )
+
+    # Per-day nutrient totals (SUM(value) of nutrition_nutrients), maintained
+    # by triggers so logging and deletes keep it current without extra calls.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS nutrition_daily_totals (
+          local_date TEXT NOT NULL,
+          nutrient_key TEXT NOT NULL,
+          total REAL NOT NULL,
+          entries INTEGER NOT NULL,
+          PRIMARY KEY (local_date, nutrient_key)
+        ) WITHOUT ROWID;
+        """
+    )
+    add_total = """
+          INSERT INTO nutrition_daily_totals(local_date, nutrient_key, total, entries)
+          VALUES (NEW.local_date, NEW.nutrient_key, NEW.value, 1)
+          ON CONFLICT(local_date, nutrient_key) DO UPDATE SET
+            total = total + excluded.total,
+            entries = entries + 1;"""
+    remove_total = """
+          UPDATE nutrition_daily_totals
+          SET total = total - OLD.value, entries = entries - 1
+          WHERE local_date = OLD.local_date AND nutrient_key = OLD.nutrient_key;
+          DELETE FROM nutrition_daily_totals
+          WHERE local_date = OLD.local_date AND nutrient_key = OLD.nutrient_key AND entries <= 0;"""
+    for event, body in (
+        ("INSERT", add_total),
+        ("DELETE", remove_total),
+        ("UPDATE", remove_total + add_total),
+    ):
         conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS nutrition_events (
-              id INTEGER PRIMARY KEY AUTOINCREMENT,
-              consumed_at TEXT NOT NULL,
-              local_date TEXT NOT NULL,
-              alias TEXT,
-              label TEXT NOT NULL,
-              count REAL NOT NULL DEFAULT 1,
-              unit TEXT,
-              kcal REAL,
-              protein_g REAL,
-              fat_g REAL,
-              carbs_g REAL,
-              micros_json TEXT,
-              note TEXT
-            );
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_nutrition_daily_totals_{event.lower()}
+            AFTER {event} ON nutrition_nutrients
+            BEGIN{body}
+            END;
             """
         )
-
-        # Normalized nutrients (preferred for graphing). Dual-write with micros_json.
+    # One-off backfill for DBs created before the rollup existed.
+    has_totals = conn.execute("SELECT 1 FROM nutrition_daily_totals LIMIT 1").fetchone()
+    has_nutrients = conn.execute("SELECT 1 FROM nutrition_nutrients LIMIT 1").fetchone()
+    if has_nutrients and not has_totals:
         conn.execute(
             """
-            CREATE TABLE IF NOT EXISTS nutrient_keys (
-              key TEXT PRIMARY KEY,
-              unit TEXT,
-              display_name TEXT,
-              category TEXT
-            );
+            INSERT INTO nutrition_daily_totals(local_date, nutrient_key, total, entries)
+            SELECT local_date, nutrient_key, SUM(value), COUNT(*)
+            FROM nutrition_nutrients
+            GROUP BY local_date, nutrient_key
             """
         )
+    # Lightweight migration for older DBs
+    for ddl in (
+        "ALTER TABLE nutrition_events ADD COLUMN fat_g REAL;",
+        "ALTER TABLE nutrition_events ADD COLUMN carbs_g REAL;",
+        "ALTER TABLE nutrition_events ADD COLUMN micros_json TEXT;",
+    ):
+        try:
+            conn.execute(ddl)
+        except sqlite3.OperationalError:
+            pass
+
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_nutrition_events_local_date ON nutrition_events(local_date);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_nutrition_events_consumed_at ON nutrition_events(consumed_at);")
+
+
+def _m003_food_catalog(conn: sqlite3.Connection) -> None:
+    """Food/supplement catalog with its full-text index."""
+    # Food/supplement catalog: the static aliases plus every label ever logged,
+    # with per-unit nutrients from its latest use. Kept current by a trigger on
+    # nutrition_events; `rev` lets the in-memory suggest index refresh incrementally.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS food_catalog (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          label TEXT NOT NULL UNIQUE,
+          alias TEXT,
+          source TEXT NOT NULL DEFAULT 'history',
+          unit TEXT,
+          kcal REAL,
+          protein_g REAL,
+          fat_g REAL,
+          carbs_g REAL,
+          micros_json TEXT,
+          use_count INTEGER NOT NULL DEFAULT 0,
+          last_used_at TEXT,
+          rev INTEGER NOT NULL DEFAULT 0
+        );
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_food_catalog_rev ON food_catalog(rev);")
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_food_catalog_use_insert
+        AFTER INSERT ON nutrition_events
+        BEGIN
+          INSERT INTO food_catalog(
+            label, alias, unit, kcal, protein_g, fat_g, carbs_g, micros_json, use_count, last_used_at, rev
+          )
+          VALUES (
+            NEW.label, NEW.alias, NEW.unit, NEW.kcal, NEW.protein_g, NEW.fat_g, NEW.carbs_g, NEW.micros_json,
+            1, NEW.consumed_at, (SELECT COALESCE(MAX(rev), 0) + 1 FROM food_catalog)
+          )
+          ON CONFLICT(label) DO UPDATE SET
+            use_count = use_count + 1,
+            last_used_at = MAX(COALESCE(last_used_at, excluded.last_used_at), excluded.last_used_at),
+            unit = CASE WHEN source = 'history' THEN excluded.unit ELSE unit END,
+            kcal = CASE WHEN source = 'history' THEN excluded.kcal ELSE kcal END,
+            protein_g = CASE WHEN source = 'history' THEN excluded.protein_g ELSE protein_g END,
+            fat_g = CASE WHEN source = 'history' THEN excluded.fat_g ELSE fat_g END,
+            carbs_g = CASE WHEN source = 'history' THEN excluded.carbs_g ELSE carbs_g END,
+            micros_json = CASE WHEN source = 'history' THEN excluded.micros_json ELSE micros_json END,
+            rev = excluded.rev;
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_food_catalog_use_delete
+        AFTER DELETE ON nutrition_events
+        BEGIN
+          UPDATE food_catalog
+          SET use_count = MAX(use_count - 1, 0),
+              rev = (SELECT COALESCE(MAX(rev), 0) + 1 FROM food_catalog)
+          WHERE label = OLD.label;
+        END;
+        """
+    )
+    # Full-text search over labels (trigram: substring matches, Japanese included).
+    # Optional: builds without FTS5 fall back to LIKE in foods.search_foods.
+    try:
         conn.execute(
             """
-            CREATE TABLE IF NOT EXISTS nutrition_nutrients (
-              id INTEGER PRIMARY KEY AUTOINCREMENT,
-              event_id INTEGER NOT NULL,
-              local_date TEXT NOT NULL,
-              nutrient_key TEXT NOT NULL,
-              value REAL NOT NULL,
-              unit TEXT,
-              FOREIGN KEY(event_id) REFERENCES nutrition_events(id)
-            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS food_catalog_fts
+            USING fts5(label, content='food_catalog', content_rowid='id', tokenize='trigram');
             """
         )
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_nutrition_nutrients_local_date ON nutrition_nutrients(local_date);")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_nutrition_nutrients_key ON nutrition_nutrients(nutrient_key);")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_nutrition_nutrients_event_id ON nutrition_nutrients(event_id);")
-        # Lightweight migration for older DBs
-        for ddl in (
-            "ALTER TABLE nutrition_events ADD COLUMN fat_g REAL;",
-            "ALTER TABLE nutrition_events ADD COLUMN carbs_g REAL;",
-            "ALTER TABLE nutrition_events ADD COLUMN micros_json TEXT;",
-        ):
-            try:
-                conn.execute(ddl)
-            except sqlite3.OperationalError:
-                pass
-
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_nutrition_events_local_date ON nutrition_events(local_date);")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_nutrition_events_consumed_at ON nutrition_events(consumed_at);")
-
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_health_records_type ON health_records(type);")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_health_records_ingested_at ON health_records(ingested_at);")
         conn.execute(
             """
-            CREATE TABLE IF NOT EXISTS intake_calories_daily (
-              day TEXT PRIMARY KEY,
-              intake_kcal REAL NOT NULL,
-              source TEXT NOT NULL DEFAULT 'openclaw',
-              note TEXT,
-              updated_at TEXT NOT NULL
-            );
+            CREATE TRIGGER IF NOT EXISTS trg_food_catalog_fts_insert
+            AFTER INSERT ON food_catalog
+            BEGIN
+              INSERT INTO food_catalog_fts(rowid, label) VALUES (NEW.id, NEW.label);
+            END;
             """
         )
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_intake_calories_updated_at ON intake_calories_daily(updated_at);")
-
-        # OpenClaw ingest idempotency ledger
         conn.execute(
             """
-            CREATE TABLE IF NOT EXISTS openclaw_ingest_events (
-              event_id TEXT PRIMARY KEY,
-              ingested_at TEXT NOT NULL,
-              source TEXT,
-              payload_hash TEXT
-            );
+            CREATE TRIGGER IF NOT EXISTS trg_food_catalog_fts_delete
+            AFTER DELETE ON food_catalog
+            BEGIN
+              INSERT INTO food_catalog_fts(food_catalog_fts, rowid, label) VALUES ('delete', OLD.id, OLD.label);
+            END;
             """
         )
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_openclaw_ingest_events_ingested_at ON openclaw_ingest_events(ingested_at);")
-
-
         conn.execute(
             """
-            CREATE TABLE IF NOT EXISTS user_profile (
-              id INTEGER PRIMARY KEY,
-              name TEXT,
-              height_cm REAL,
-              birth_year INTEGER,
-              sex TEXT,
-              goal_weight_kg REAL,
-              sleep_goal_minutes INTEGER DEFAULT 420,
-              steps_goal INTEGER DEFAULT 8000,
-              updated_at TEXT NOT NULL
-            );
+            CREATE TRIGGER IF NOT EXISTS trg_food_catalog_fts_update
+            AFTER UPDATE OF label ON food_catalog
+            BEGIN
+              INSERT INTO food_catalog_fts(food_catalog_fts, rowid, label) VALUES ('delete', OLD.id, OLD.label);
+              INSERT INTO food_catalog_fts(rowid, label) VALUES (NEW.id, NEW.label);
+            END;
             """
         )
-        # Lightweight migration for older DBs
-        for ddl in (
-            "ALTER TABLE user_profile ADD COLUMN sleep_goal_minutes INTEGER DEFAULT 420;",
-            "ALTER TABLE user_profile ADD COLUMN steps_goal INTEGER DEFAULT 8000;",
-        ):
-            try:
-                conn.execute(ddl)
-            except sqlite3.OperationalError:
-                pass
-
+    except sqlite3.OperationalError:
+        pass
+    # One-off backfill for DBs created before the catalog existed.
+    has_history = conn.execute("SELECT 1 FROM food_catalog WHERE source = 'history' LIMIT 1").fetchone()
+    has_events = conn.execute("SELECT 1 FROM nutrition_events LIMIT 1").fetchone()
+    if has_events and not has_history:
+        # Bare columns come from the MAX(consumed_at) row, i.e. the latest use.
         conn.execute(
             """
-            CREATE TABLE IF NOT EXISTS ai_reports (
-              id INTEGER PRIMARY KEY AUTOINCREMENT,
-              report_date TEXT NOT NULL,
-              report_type TEXT NOT NULL,
-              prompt_used TEXT NOT NULL,
-              content TEXT NOT NULL,
-              created_at TEXT NOT NULL
-            );
+            INSERT INTO food_catalog(
+              label, alias, unit, kcal, protein_g, fat_g, carbs_g, micros_json, use_count, last_used_at, rev
+            )
+            SELECT label, alias, unit, kcal, protein_g, fat_g, carbs_g, micros_json,
+                   COUNT(*), MAX(consumed_at), 1
+            FROM nutrition_events
+            WHERE true
+            GROUP BY label
+            ON CONFLICT(label) DO UPDATE SET
+              use_count = excluded.use_count,
+              last_used_at = excluded.last_used_at
             """
         )
-        # Keep one report per (date, type). Clean older duplicates before enforcing.
+
+
+def _m004_intake_and_profile(conn: sqlite3.Connection) -> None:
+    """Intake calories, the OpenClaw ledger and the user profile."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS intake_calories_daily (
+          day TEXT PRIMARY KEY,
+          intake_kcal REAL NOT NULL,
+          source TEXT NOT NULL DEFAULT 'openclaw',
+          note TEXT,
+          updated_at TEXT NOT NULL
+        );
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_intake_calories_updated_at ON intake_calories_daily(updated_at);")
+
+    # OpenClaw ingest idempotency ledger
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS openclaw_ingest_events (
+          event_id TEXT PRIMARY KEY,
+          ingested_at TEXT NOT NULL,
+          source TEXT,
+          payload_hash TEXT
+        );
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_openclaw_ingest_events_ingested_at ON openclaw_ingest_events(ingested_at);")
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS user_profile (
+          id INTEGER PRIMARY KEY,
+          name TEXT,
+          height_cm REAL,
+          birth_year INTEGER,
+          sex TEXT,
+          goal_weight_kg REAL,
+          sleep_goal_minutes INTEGER DEFAULT 420,
+          steps_goal INTEGER DEFAULT 8000,
+          updated_at TEXT NOT NULL
+        );
+        """
+    )
+    # Lightweight migration for older DBs
+    for ddl in (
+        "ALTER TABLE user_profile ADD COLUMN sleep_goal_minutes INTEGER DEFAULT 420;",
+        "ALTER TABLE user_profile ADD COLUMN steps_goal INTEGER DEFAULT 8000;",
+    ):
+        try:
+            conn.execute(ddl)
+        except sqlite3.OperationalError:
+            pass
+
+
+def _m005_ai_reports(conn: sqlite3.Connection) -> None:
+    """AI reports with their search index, previews and sections."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ai_reports (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          report_date TEXT NOT NULL,
+          report_type TEXT NOT NULL,
+          prompt_used TEXT NOT NULL,
+          content TEXT NOT NULL,
+          created_at TEXT NOT NULL
+        );
+        """
+    )
+    # Keep one report per (date, type). Clean older duplicates before enforcing.
+    has_unique = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_ai_reports_date_type_unique'"
+    ).fetchone()
+    if not has_unique:
         conn.execute(
             """
             DELETE FROM ai_reports
-            WHERE id NOT IN (
+            WHERE id IN (
               SELECT id
               FROM (
-                SELECT id
-                FROM ai_reports r2
-                WHERE r2.report_date = ai_reports.report_date
-                  AND r2.report_type = ai_reports.report_type
-                ORDER BY r2.created_at DESC, r2.id DESC
-                LIMIT 1
+                SELECT id, ROW_NUMBER() OVER (
+                  PARTITION BY report_date, report_type ORDER BY created_at DESC, id DESC
+                ) AS rn
+                FROM ai_reports
               )
+              WHERE rn > 1
             );
             """
         )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ai_reports_date ON ai_reports(report_date);"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ai_reports_type ON ai_reports(report_type);"
+    )
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_ai_reports_date_type_unique ON ai_reports(report_date, report_type);"
+    )
+    # Keyset pagination for /api/reports (per type, newest first).
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ai_reports_type_date_id ON ai_reports(report_type, report_date DESC, id DESC);"
+    )
+    # Full-text search over report bodies (trigram, as food_catalog_fts).
+    # Optional: builds without FTS5 fall back to LIKE in reports.list_reports.
+    try:
+        fts_exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ai_reports_fts'"
+        ).fetchone()
         conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_ai_reports_date ON ai_reports(report_date);"
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS ai_reports_fts
+            USING fts5(content, content='ai_reports', content_rowid='id', tokenize='trigram');
+            """
         )
         conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_ai_reports_type ON ai_reports(report_type);"
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_ai_reports_fts_insert
+            AFTER INSERT ON ai_reports
+            BEGIN
+              INSERT INTO ai_reports_fts(rowid, content) VALUES (NEW.id, NEW.content);
+            END;
+            """
         )
         conn.execute(
-            "CREATE UNIQUE INDEX IF NOT EXISTS idx_ai_reports_date_type_unique ON ai_reports(report_date, report_type);"
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_ai_reports_fts_delete
+            AFTER DELETE ON ai_reports
+            BEGIN
+              INSERT INTO ai_reports_fts(ai_reports_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+            END;
+            """
         )
-
         conn.execute(
             """
-            CREATE TABLE IF NOT EXISTS summary_cache (
-                cache_key TEXT PRIMARY KEY,
-                data      TEXT NOT NULL,
-                cached_at TEXT NOT NULL
-            )
+            CREATE TRIGGER IF NOT EXISTS trg_ai_reports_fts_update
+            AFTER UPDATE OF content ON ai_reports
+            BEGIN
+              INSERT INTO ai_reports_fts(ai_reports_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content);
+              INSERT INTO ai_reports_fts(rowid, content) VALUES (NEW.id, NEW.content);
+            END;
             """
         )
+        # One-off backfill for DBs created before the index existed.
+        if not fts_exists:
+            conn.execute("INSERT INTO ai_reports_fts(ai_reports_fts) VALUES ('rebuild')")
+    except sqlite3.OperationalError:
+        pass
+    # Lightweight migration for older DBs: preview is filled by save_report
+    # (NULL = not parsed yet, see reports.index_report).
+    try:
+        conn.execute("ALTER TABLE ai_reports ADD COLUMN preview TEXT;")
+    except sqlite3.OperationalError:
+        pass
+    # Expert sections (<!--DOCTOR--> ...) split out of each report at save time.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS report_sections (
+          report_id INTEGER NOT NULL,
+          section TEXT NOT NULL,
+          body TEXT NOT NULL,
+          PRIMARY KEY (report_id, section)
+        );
+        """
+    )
+    # Writers that bypass save_report still leave no stale sections behind.
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_ai_reports_sections_delete
+        AFTER DELETE ON ai_reports
+        BEGIN
+          DELETE FROM report_sections WHERE report_id = OLD.id;
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_ai_reports_sections_update
+        AFTER UPDATE OF content ON ai_reports
+        BEGIN
+          DELETE FROM report_sections WHERE report_id = NEW.id;
+          UPDATE ai_reports SET preview = NULL WHERE id = NEW.id;
+        END;
+        """
+    )
+
+
+def _m006_derived(conn: sqlite3.Connection) -> None:
+    """Data versions and the tables of derived, regenerable results."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS summary_cache (
+            cache_key TEXT PRIMARY KEY,
+            data      TEXT NOT NULL,
+            cached_at TEXT NOT NULL
+        )
+        """
+    )
+
+    # Monotonic data versions. 'seq' is the global counter; 'day:YYYY-MM-DD',
+    # 'type:<RecordType>', 'profile' and 'sync' remember the seq of their last write.
+    # Maintained by triggers so every writer (sync, nutrition, OpenClaw, tests)
+    # invalidates derived snapshots without having to remember to.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS data_versions (
+          scope TEXT PRIMARY KEY,
+          version INTEGER NOT NULL
+        );
+        """
+    )
+    for table, stem, day_expr, extra_scope in _VERSIONED_WRITES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            row = "OLD" if event == "DELETE" else "NEW"
+            conn.execute(
+                _version_trigger_sql(
+                    table,
+                    stem,
+                    event,
+                    day_expr.replace("{row}", row) if day_expr else None,
+                    extra_scope.replace("{row}", row) if extra_scope else None,
+                )
+            )
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS home_snapshots (
+          local_day TEXT PRIMARY KEY,
+          data_version INTEGER NOT NULL,
+          json TEXT NOT NULL,
+          computed_at TEXT NOT NULL
+        );
+        """
+    )
+
+    # Independently cached response sections (e.g. /api/bootstrap), stamped
+    # with the data version they were built from.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS section_cache (
+          section TEXT NOT NULL,
+          cache_key TEXT NOT NULL,
+          data_version INTEGER NOT NULL,
+          data TEXT NOT NULL,
+          cached_at TEXT NOT NULL,
+          PRIMARY KEY (section, cache_key)
+        );
+        """
+    )
+    # Content-addressed results (prompts, nutrient targets), keyed by a hash
+    # of their exact inputs and evicted least-recently-used (see memo.py).
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS memo_cache (
+          key TEXT PRIMARY KEY,
+          kind TEXT NOT NULL,
+          data TEXT NOT NULL,
+          hits INTEGER NOT NULL DEFAULT 0,
+          created_at TEXT NOT NULL,
+          last_used_at TEXT NOT NULL
+        );
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_memo_cache_last_used_at ON memo_cache(last_used_at);")
+
+    # Generated "yesterday" report text per local day (see report.py), stamped
+    # with the data version it was built from.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS daily_text_reports (
+          local_day TEXT PRIMARY KEY,
+          data_version INTEGER NOT NULL,
+          text TEXT NOT NULL,
+          generated_at TEXT NOT NULL
+        );
+        """
+    )
+
+    # Last run of each background job (see jobs.py), shown by /api/jobs.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS job_runs (
+          name TEXT PRIMARY KEY,
+          last_started_at TEXT,
+          last_finished_at TEXT,
+          last_reason TEXT,
+          last_status TEXT,
+          last_error TEXT,
+          last_duration_ms INTEGER,
+          runs INTEGER NOT NULL DEFAULT 0,
+          failures INTEGER NOT NULL DEFAULT 0
+        );
+        """
+    )
+
+
+def _m007_queue_report_index(conn: sqlite3.Connection) -> None:
+    """Index reports saved before sections existed in the background
+    (until then get_report_section indexes them on first read)."""
+    if conn.execute("SELECT 1 FROM ai_reports WHERE preview IS NULL LIMIT 1").fetchone():
+        _queue_backfill(conn, "reportSections")
+
+
+def _m008_section_cache_eviction(conn: sqlite3.Connection) -> None:
+    """Index for evicting the oldest section_cache entries (see section_cache.py)."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_section_cache_cached_at ON section_cache(cached_at);")
+
+
+_MIGRATIONS: tuple[Callable[[sqlite3.Connection], None], ...] = (
+    _m001_health_records,
+    _m002_nutrition,
+    _m003_food_catalog,
+    _m004_intake_and_profile,
+    _m005_ai_reports,
+    _m006_derived,
+    _m007_queue_report_index,
+    _m008_section_cache_eviction,
+)
+
+
+# ── Background backfills ──
+
+def _queue_backfill(conn: sqlite3.Connection, name: str) -> None:
+    conn.execute(
+        """
+        INSERT INTO schema_backfills(name, queued_at) VALUES(?, ?)
+        ON CONFLICT(name) DO UPDATE SET cursor = 0, finished_at = NULL
+        """,
+        (name, now_iso()),
+    )
+
+
+def _backfill_report_sections(conn: sqlite3.Connection, cursor: int, limit: int) -> tuple[int, int]:
+    from .reports import index_report
+
+    rows = conn.execute(
+        "SELECT id, content FROM ai_reports WHERE id > ? AND preview IS NULL ORDER BY id LIMIT ?",
+        (cursor, limit),
+    ).fetchall()
+    for row in rows:
+        index_report(conn, int(row["id"]), str(row["content"]))
+    return (int(rows[-1]["id"]) if rows else cursor), len(rows)
+
+
+# name -> (conn, cursor, limit) -> (new cursor, rows done); fewer than `limit` rows means finished.
+_BACKFILLS: dict[str, Callable[[sqlite3.Connection, int, int], tuple[int, int]]] = {
+    "reportSections": _backfill_report_sections,
+}
+
+
+def run_backfills(*, chunk_rows: int = BACKFILL_CHUNK_ROWS, max_chunks: int | None = None) -> int:
+    """Run the queued backfills, one short transaction per chunk so requests
+    are never blocked for long. Returns the number of rows processed; stops
+    after `max_chunks` chunks (the rest resumes on the next run)."""
+    with db() as conn:
+        queued = [
+            (str(r["name"]), int(r["cursor"]))
+            for r in conn.execute(
+                "SELECT name, cursor FROM schema_backfills WHERE finished_at IS NULL ORDER BY queued_at, name"
+            )
+        ]
+    total = 0
+    chunks = 0
+    for name, cursor in queued:
+        fill = _BACKFILLS[name]
+        while max_chunks is None or chunks < max_chunks:
+            with db() as conn:
+                cursor, rows = fill(conn, cursor, chunk_rows)
+                conn.execute(
+                    """
+                    UPDATE schema_backfills
+                    SET cursor = ?, rows_done = rows_done + ?, finished_at = ?
+                    WHERE name = ?
+                    """,
+                    (cursor, rows, now_iso() if rows < chunk_rows else None, name),
+                )
+            chunks += 1
+            total += rows
+            if rows < chunk_rows:
+                break
+    return total
+
+
+# (table, trigger name stem, day expression, extra scope expression)
+_VERSIONED_WRITES: tuple[tuple[str, str, str | None, str | None], ...] = (
+    (
+        "health_records",
+        "health_records",
+        "date(COALESCE({row}.time, {row}.start_time, {row}.end_time))",
+        "'type:' || {row}.type",
+    ),
+    ("nutrition_events", "nutrition_events", "{row}.local_date", None),
+    ("intake_calories_daily", "intake", "{row}.day", None),
+    ("user_profile", "profile", None, "'profile'"),
+    ("sync_runs", "sync_runs", None, "'sync'"),
+)
+
+
+def _version_trigger_sql(
+    table: str, stem: str, event: str, day_expr: str | None, extra_scope: str | None
+) -> str:
+    stamp = """
+              INSERT INTO data_versions(scope, version)
+              SELECT {scope}, (SELECT version FROM data_versions WHERE scope = 'seq')
+              WHERE {scope} IS NOT NULL
+              ON CONFLICT(scope) DO UPDATE SET version = excluded.version;"""
+    body = """
+              INSERT INTO data_versions(scope, version) VALUES('seq', 1)
+              ON CONFLICT(scope) DO UPDATE SET version = version + 1;"""
+    if day_expr:
+        body += stamp.format(scope=f"'day:' || {day_expr}")
+    if extra_scope:
+        body += stamp.format(scope=extra_scope)
+    return f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{stem}_version_{event.lower()}
+            AFTER {event} ON {table}
+            BEGIN{body}
+            END;
+            """
 
 
 def iso(dt: datetime | None) -> str | None:
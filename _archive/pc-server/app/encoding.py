@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import json
+import zlib
+from contextvars import ContextVar
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .timing import timed_encode
+
+# Optional fast/binary encoders. Each is used only when installed.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None  # type: ignore[assignment]
+try:
+    import cbor2
+except ImportError:  # pragma: no cover - optional dependency
+    cbor2 = None  # type: ignore[assignment]
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None  # type: ignore[assignment]
+
+MSGPACK = "application/msgpack"
+CBOR = "application/cbor"
+
+# Bodies smaller than this are sent uncompressed.
+MIN_COMPRESS_SIZE = 1024
+
+_COMPRESSIBLE = (
+    "application/json",
+    "application/x-ndjson",
+    "application/msgpack",
+    "application/cbor",
+    "text/",
+)
+
+# Accept header of the current request, set by EncodingMiddleware.
+_accept: ContextVar[str] = ContextVar("accept", default="")
+
+
+def dumps_json(content: Any) -> bytes:
+    """Compact UTF-8 JSON; orjson when available, stdlib json otherwise."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def available_media_types() -> list[str]:
+    out = ["application/json"]
+    if msgpack is not None:
+        out.append(MSGPACK)
+    if cbor2 is not None:
+        out.append(CBOR)
+    return out
+
+
+def negotiate_media_type(accept: str) -> str:
+    """Pick msgpack/CBOR when explicitly accepted (and installed); JSON otherwise."""
+    accepted = [part.split(";")[0].strip().lower() for part in accept.split(",")]
+    for media_type in accepted:
+        if media_type == MSGPACK and msgpack is not None:
+            return MSGPACK
+        if media_type == CBOR and cbor2 is not None:
+            return CBOR
+    return "application/json"
+
+
+def encode(content: Any, media_type: str) -> bytes:
+    if media_type == MSGPACK:
+        return msgpack.packb(content, use_bin_type=True)
+    if media_type == CBOR:
+        return cbor2.dumps(content)
+    return dumps_json(content)
+
+
+class NegotiatedResponse(JSONResponse):
+    """Default response class: JSON, msgpack or CBOR according to the request's Accept header."""
+
+    def render(self, content: Any) -> bytes:
+        self.media_type = negotiate_media_type(_accept.get())
+        return timed_encode(encode, content, self.media_type)
+
+    def init_headers(self, headers: Any = None) -> None:
+        super().init_headers(headers)
+        MutableHeaders(raw=self.raw_headers).add_vary_header("Accept")
+
+
+def _coding_weights(accept_encoding: str) -> dict[str, float]:
+    """coding -> q from an Accept-Encoding header (q defaults to 1; bad q values drop the entry)."""
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, *params = (p.strip() for p in part.split(";"))
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = -1.0
+        if 0.0 <= q <= 1.0:
+            weights[name.lower()] = q
+    return weights
+
+
+def negotiate_coding(accept_encoding: str) -> str | None:
+    """The accepted coding with the highest q (br on a tie, if installed); None for identity.
+
+    `q=0` refuses a coding; `*` stands for any coding not listed.
+    """
+    weights = _coding_weights(accept_encoding)
+    wildcard = weights.get("*", 0.0)
+    best: tuple[float, str] | None = None
+    for coding in ("br", "gzip") if brotli is not None else ("gzip",):
+        q = weights.get(coding, wildcard)
+        if q > 0 and (best is None or q > best[0]):
+            best = (q, coding)
+    return best[1] if best else None
+
+
+class _Compressor:
+    def __init__(self, coding: str) -> None:
+        if coding == "br":
+            self._c = brotli.Compressor(quality=5)
+            self.process = self._c.process
+            self.finish = self._c.finish
+        else:
+            self._c = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+            self.process = self._c.compress
+            self.finish = self._c.flush
+
+
+class EncodingMiddleware:
+    """Expose the Accept header to NegotiatedResponse and compress eligible bodies.
+
+    Buffered responses are compressed when at least `minimum_size` bytes;
+    streaming responses (export, etc.) are compressed chunk by chunk. Bodies
+    that already carry a Content-Encoding, or are not text-like, pass through.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MIN_COMPRESS_SIZE) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        token = _accept.set(headers.get("accept", ""))
+        try:
+            coding = negotiate_coding(headers.get("accept-encoding", ""))
+            if coding is None:
+                await self.app(scope, receive, send)
+            else:
+                await self.app(scope, receive, _CompressingSend(send, coding, self.minimum_size))
+        finally:
+            _accept.reset(token)
+
+
+class _CompressingSend:
+    def __init__(self, send: Send, coding: str, minimum_size: int) -> None:
+        self.send = send
+        self.coding = coding
+        self.minimum_size = minimum_size
+        self.start: Message | None = None
+        self.compressor: _Compressor | None = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+
+        if self.start is not None:
+            start, self.start = self.start, None
+            headers = MutableHeaders(raw=start["headers"])
+            ctype = headers.get("content-type", "").split(";")[0].strip().lower()
+            if (
+                "content-encoding" in headers
+                or not ctype.startswith(_COMPRESSIBLE)
+                or ctype == "text/event-stream"  # events must not sit in the compressor
+                or (not more and len(body) < self.minimum_size)
+            ):
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+
+            self.compressor = _Compressor(self.coding)
+            headers["Content-Encoding"] = self.coding
+            headers.add_vary_header("Accept-Encoding")
+            data = self.compressor.process(body)
+            if not more:
+                data += self.compressor.finish()
+                headers["Content-Length"] = str(len(data))
+            elif "content-length" in headers:
+                del headers["content-length"]
+            await self.send(start)
+            await self.send({"type": "http.response.body", "body": data, "more_body": more})
+            return
+
+        if self.passthrough or self.compressor is None:
+            await self.send(message)
+            return
+        data = self.compressor.process(body)
+        if not more:
+            data += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": data, "more_body": more})
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import re
+from functools import lru_cache
 from math import isfinite
 from typing import Any, Optional
 
@@ -9,10 +11,6 @@ from typing import Any, Optional
 # Heuristic values are used for meals without nutrition labels.
 
 
-def _scale(d: dict[str, float], factor: float) -> dict[str, float]:
-    return {k: float(v) * factor for k, v in d.items()}
-
-
 def _normalize_numeric_micros(raw: Any) -> dict[str, float]:
     if not isinstance(raw, dict):
         return {}
@@ -82,6 +80,84 @@ KEYWORD_BONUS: list[tuple[list[str], dict[str, float]]] = [
 ]
 
 
+# Memoised estimates (same label + kcal + macros -> same result).
+ESTIMATE_CACHE_SIZE = 4096
+
+
+class KeywordMatcher:
+    """All KEYWORD_BONUS keywords compiled into one regex, matched in a single pass.
+
+    A zero-width lookahead tries every start position, with longer keywords
+    first, so overlapping hits are found. A keyword that starts at the same
+    position as a longer hit is its prefix; `_implied` maps each keyword to
+    the bonus rows of every keyword it contains, so those are not lost.
+    """
+
+    def __init__(self, table: list[tuple[list[str], dict[str, float]]]) -> None:
+        rows_by_keyword: dict[str, set[int]] = {}
+        for row, (keys, _) in enumerate(table):
+            for k in keys:
+                rows_by_keyword.setdefault(k.lower(), set()).add(row)
+        keywords = sorted(rows_by_keyword, key=len, reverse=True)
+        self._implied = {
+            kw: frozenset().union(*(rows for other, rows in rows_by_keyword.items() if other in kw))
+            for kw in keywords
+        }
+        self._pattern = re.compile("(?=(" + "|".join(re.escape(k) for k in keywords) + "))") if keywords else None
+        self.bonuses = [bonus for _, bonus in table]
+
+    def rows(self, label: str) -> list[int]:
+        """Indexes of the table rows whose keywords occur in the (lower-cased) label."""
+        if self._pattern is None:
+            return []
+        found: set[int] = set()
+        for m in self._pattern.finditer(label):
+            found |= self._implied[m.group(1)]
+        return sorted(found)
+
+
+_MATCHER = KeywordMatcher(KEYWORD_BONUS)
+
+
+def _number(value: Any) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+@lru_cache(maxsize=ESTIMATE_CACHE_SIZE)
+def _estimate_cached(
+    label: str,
+    kcal: float,
+    fat_g: Optional[float],
+    carbs_g: Optional[float],
+) -> dict[str, float]:
+    factor = kcal / 1000.0
+    out = {k: v * factor for k, v in BASE_PER_1000_KCAL.items()}
+
+    # Use provided macros as rough anchors when available.
+    if carbs_g is not None and carbs_g > 0:
+        c = carbs_g
+        out["sugar_g"] = max(out.get("sugar_g", 0.0), min(c * 0.45, c))
+        out["dietary_fiber_g"] = max(out.get("dietary_fiber_g", 0.0), c * 0.12)
+    if fat_g is not None and fat_g > 0:
+        out["saturated_fat_g"] = max(out.get("saturated_fat_g", 0.0), fat_g * 0.35)
+
+    # Keyword bonuses
+    for row in _MATCHER.rows(label):
+        for nk, nv in _MATCHER.bonuses[row].items():
+            out[nk] = out.get(nk, 0.0) + nv
+
+    # Derive salt equivalent from sodium if present (approx).
+    sodium = out.get("sodium_mg")
+    if sodium is not None and "salt_equivalent_g" not in out:
+        out["salt_equivalent_g"] = sodium * 2.54 / 1000.0
+
+    # Keep omega3 coherent when EPA/DHA are present.
+    if ("epa_mg" in out or "dha_mg" in out) and "omega3_mg" not in out:
+        out["omega3_mg"] = out.get("epa_mg", 0.0) + out.get("dha_mg", 0.0)
+
+    return {k: v for k, v in out.items() if isfinite(v) and v > 0}
+
+
 def estimate_micros(
     label: str,
     *,
@@ -93,39 +169,14 @@ def estimate_micros(
     """Return estimated micronutrients.
 
     If `kcal` is missing/0, estimation is skipped and `{}` is returned.
+    Results are memoised on the normalised label and numbers; protein does
+    not affect the estimate and is not part of the key.
     """
 
     if kcal is None or float(kcal) <= 0:
         return {}
-
-    factor = float(kcal) / 1000.0
-    out: dict[str, float] = _scale(BASE_PER_1000_KCAL, factor)
-
-    # Use provided macros as rough anchors when available.
-    if isinstance(carbs_g, (int, float)) and float(carbs_g) > 0:
-        c = float(carbs_g)
-        out["sugar_g"] = max(float(out.get("sugar_g", 0.0)), min(c * 0.45, c))
-        out["dietary_fiber_g"] = max(float(out.get("dietary_fiber_g", 0.0)), c * 0.12)
-    if isinstance(fat_g, (int, float)) and float(fat_g) > 0:
-        f = float(fat_g)
-        out["saturated_fat_g"] = max(float(out.get("saturated_fat_g", 0.0)), f * 0.35)
-
-    # Keyword bonuses
-    l = (label or "").strip().lower()
-    for keys, bonus in KEYWORD_BONUS:
-        if any(k in l for k in keys):
-            for nk, nv in bonus.items():
-                out[nk] = float(out.get(nk, 0.0)) + float(nv)
-
-    # Derive salt equivalent from sodium if present (approx).
-    if "sodium_mg" in out and "salt_equivalent_g" not in out:
-        out["salt_equivalent_g"] = float(out["sodium_mg"]) * 2.54 / 1000.0
-
-    # Keep omega3 coherent when EPA/DHA are present.
-    if ("epa_mg" in out or "dha_mg" in out) and "omega3_mg" not in out:
-        out["omega3_mg"] = float(out.get("epa_mg", 0.0)) + float(out.get("dha_mg", 0.0))
-
-    return {k: float(v) for k, v in out.items() if isfinite(float(v)) and float(v) > 0}
+    key_label = (label or "").strip().lower()
+    return dict(_estimate_cached(key_label, float(kcal), _number(fat_g), _number(carbs_g)))
 
 
 def merge_micros_with_estimate(
@@ -148,4 +199,4 @@ def merge_micros_with_estimate(
     provided = _normalize_numeric_micros(provided_micros)
     if provided:
         out.update(provided)
-    return out or None
\ No newline at end of file
+    return out or None
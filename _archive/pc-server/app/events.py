@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+from datetime import date, datetime, time, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from .db import LOCAL_TZ, db
+from .snapshots import get_home_summary, home_input_version
+from .versions import current_version
+
+# Seconds between keep-alive comments on an idle stream.
+HEARTBEAT_SECONDS = 15.0
+
+# Undelivered notices kept per subscriber; a slow client that overflows is
+# sent a fresh catch-up notice (computed from data_versions) instead.
+_QUEUE_SIZE = 64
+
+
+def _local_days(day: str) -> list[str]:
+    """Local dates overlapped by a 'day:' scope.
+
+    health_records stamp their UTC date while nutrition/intake stamp the local
+    date, so this may include one neighbouring day; clients only over-refresh.
+    """
+    d = date.fromisoformat(day)
+    first = datetime.combine(d, time.min, tzinfo=timezone.utc).astimezone(LOCAL_TZ).date()
+    last = datetime.combine(d, time.max, tzinfo=timezone.utc).astimezone(LOCAL_TZ).date()
+    return sorted({d.isoformat(), first.isoformat(), last.isoformat()})
+
+
+def changes_since(conn: sqlite3.Connection, version: int) -> dict[str, Any] | None:
+    """Change notice covering every tracked write after `version` (None if nothing changed)."""
+    latest = current_version(conn)
+    if latest <= version:
+        return None
+    rows = conn.execute(
+        "SELECT scope FROM data_versions WHERE version > ? AND scope != 'seq' ORDER BY scope",
+        (version,),
+    ).fetchall()
+    types: list[str] = []
+    days: set[str] = set()
+    scopes: list[str] = []
+    for row in rows:
+        kind, _, value = row["scope"].partition(":")
+        if kind == "type":
+            types.append(value)
+        elif kind == "day":
+            days.update(_local_days(value))
+        else:
+            scopes.append(row["scope"])
+    return {"version": latest, "types": types, "days": sorted(days), "scopes": scopes}
+
+
+def home_delta(previous: dict[str, Any] | None, current: dict[str, Any]) -> dict[str, Any]:
+    """Top-level home-summary keys whose value differs from `previous` (all keys if None)."""
+    if previous is None:
+        return dict(current)
+    return {k: v for k, v in current.items() if previous.get(k) != v}
+
+
+class _Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, want_home: bool) -> None:
+        self.loop = loop
+        self.want_home = want_home
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=_QUEUE_SIZE)
+        self.overflowed = False
+
+    def offer(self, event: dict[str, Any]) -> None:
+        # Runs on the subscriber's event loop.
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class EventBroker:
+    """In-process fan-out of change notices to connected /api/events streams.
+
+    Writers call publish_changes() (from any thread) after their commit; the
+    broker diffs data_versions against the last published version, so one
+    notice covers every write since the previous one.
+    """
+
+    def __init__(self) -> None:
+        # Guards the subscriber set and _published only; never held across DB work.
+        self._lock = threading.Lock()
+        # Serialises publishers so notices go out in version order.
+        self._publish_lock = threading.Lock()
+        self._subscribers: set[_Subscriber] = set()
+        self._published: int | None = None
+
+    def subscribe(self, loop: asyncio.AbstractEventLoop, *, want_home: bool = False) -> _Subscriber:
+        """Register a stream. Blocking (reads the DB); call via asyncio.to_thread."""
+        sub = _Subscriber(loop, want_home)
+        with db() as conn:
+            version = current_version(conn)
+        with self._lock:
+            if self._published is None:
+                self._published = version
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: _Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(sub)
+            if not self._subscribers:
+                self._published = None
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event: dict[str, Any]) -> None:
+        with self._lock:
+            subs = list(self._subscribers)
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, event)
+            except RuntimeError:
+                # Loop already closed: the stream is gone.
+                self.unsubscribe(sub)
+
+    def publish_changes(self, *, today: date | None = None) -> dict[str, Any] | None:
+        """Publish a notice for writes committed since the last one. Returns the notice."""
+        with self._publish_lock:
+            with self._lock:
+                if not self._subscribers or self._published is None:
+                    return None
+                want_home = any(s.want_home for s in self._subscribers)
+                since = self._published
+            with db() as conn:
+                notice = changes_since(conn, since)
+                if notice is None:
+                    return None
+                if want_home:
+                    day = today or date.today()
+                    if home_input_version(conn, day) > since:
+                        notice["homeSummary"] = get_home_summary(conn, day)
+            with self._lock:
+                if self._published is not None and notice["version"] > self._published:
+                    self._published = notice["version"]
+            self.publish(notice)
+        return notice
+
+
+broker = EventBroker()
+
+
+def publish_changes() -> None:
+    """Background-task entry point used by the write endpoints."""
+    broker.publish_changes()
+
+
+def format_event(event: str, data: dict[str, Any], event_id: int | None = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+    return "\n".join(lines) + "\n\n"
+
+
+async def event_stream(
+    is_disconnected: Callable[[], Awaitable[bool]],
+    *,
+    last_event_id: int | None = None,
+    include_home: bool = False,
+    heartbeat: float = HEARTBEAT_SECONDS,
+) -> AsyncIterator[str]:
+    """SSE body for /api/events.
+
+    Starts with `hello` (current version). A client reconnecting with
+    Last-Event-ID first receives one `change` covering what it missed. Then
+    one `change` per published notice, with `: keep-alive` comments when idle.
+    With include_home, `homeSummary` carries only the keys that changed since
+    the previous event on this stream (the full summary the first time).
+    """
+    sub = await asyncio.to_thread(broker.subscribe, asyncio.get_running_loop(), want_home=include_home)
+    sent_home: dict[str, Any] | None = None
+    try:
+        def _hello() -> tuple[int, dict[str, Any] | None, dict[str, Any] | None]:
+            with db() as conn:
+                version = current_version(conn)
+                missed = changes_since(conn, last_event_id) if last_event_id is not None else None
+                home = get_home_summary(conn, date.today()) if include_home else None
+            return version, missed, home
+
+        version, missed, home = await asyncio.to_thread(_hello)
+        yield format_event("hello", {"version": version}, version)
+        if missed is not None:
+            yield format_event("change", missed, missed["version"])
+        if home is not None:
+            sent_home = home
+            yield format_event("home", {"version": version, "homeSummary": home}, version)
+        last_sent = version
+
+        while True:
+            if await is_disconnected():
+                break
+            try:
+                notice = await asyncio.wait_for(sub.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if sub.overflowed:
+                sub.overflowed = False
+                while not sub.queue.empty():
+                    sub.queue.get_nowait()
+
+                def _catch_up() -> dict[str, Any] | None:
+                    with db() as conn:
+                        return changes_since(conn, last_sent)
+
+                notice = await asyncio.to_thread(_catch_up) or notice
+            if notice["version"] <= last_sent:
+                continue
+            data = {k: v for k, v in notice.items() if k != "homeSummary"}
+            if include_home and "homeSummary" in notice:
+                delta = home_delta(sent_home, notice["homeSummary"])
+                sent_home = notice["homeSummary"]
+                if delta:
+                    data["homeSummary"] = delta
+            last_sent = notice["version"]
+            yield format_event("change", data, last_sent)
+    finally:
+        broker.unsubscribe(sub)
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zlib
+from datetime import date, timedelta
+from typing import Any, Iterator
+
+from .db import db
+
+EXPORT_COLUMNS = (
+    "record_key",
+    "device_id",
+    "type",
+    "record_id",
+    "source",
+    "start_time",
+    "end_time",
+    "time",
+    "last_modified_time",
+    "unit",
+    "payload_json",
+    "ingested_at",
+)
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+BATCH_SIZE = 1000
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_query(
+    type: str | None,
+    device: str | None,
+    from_date: date | None,
+    to_date: date | None,
+) -> tuple[str, tuple[Any, ...]]:
+    """SELECT over health_records with optional filters, ordered by ingested_at.
+
+    from/to are inclusive UTC dates compared against the record's own timestamp
+    (time for instant records, start_time for intervals). Stored timestamps are
+    UTC ISO strings, so a plain string comparison is enough.
+    """
+    where: list[str] = []
+    params: list[Any] = []
+    if type:
+        where.append("type = ?")
+        params.append(type)
+    if device:
+        where.append("device_id = ?")
+        params.append(device)
+    if from_date is not None:
+        where.append("COALESCE(time, start_time) >= ?")
+        params.append(from_date.isoformat())
+    if to_date is not None:
+        where.append("COALESCE(time, start_time) < ?")
+        params.append((to_date + timedelta(days=1)).isoformat())
+    sql = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM health_records"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY ingested_at ASC"
+    return sql, tuple(params)
+
+
+def iter_record_batches(
+    type: str | None = None,
+    device: str | None = None,
+    from_date: date | None = None,
+    to_date: date | None = None,
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[list[tuple[Any, ...]]]:
+    """Yield matching rows in batches of `batch_size` without materialising the table."""
+    sql, params = _build_query(type, device, from_date, to_date)
+    with db(check_same_thread=False) as conn:
+        cur = conn.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [tuple(r) for r in rows]
+
+
+def iter_csv(batches: Iterator[list[tuple[Any, ...]]]) -> Iterator[bytes]:
+    out = io.StringIO()
+    w = csv.writer(out)
+    w.writerow(EXPORT_COLUMNS)
+    for rows in batches:
+        w.writerows(rows)
+        yield out.getvalue().encode("utf-8")
+        out.seek(0)
+        out.truncate()
+    if out.tell():
+        yield out.getvalue().encode("utf-8")
+
+
+def iter_ndjson(batches: Iterator[list[tuple[Any, ...]]]) -> Iterator[bytes]:
+    """One JSON object per record; payload_json is inlined as an object."""
+    payload_idx = EXPORT_COLUMNS.index("payload_json")
+    for rows in batches:
+        lines = []
+        for row in rows:
+            obj = dict(zip(EXPORT_COLUMNS, row))
+            try:
+                obj["payload"] = json.loads(row[payload_idx])
+                del obj["payload_json"]
+            except (TypeError, ValueError):
+                pass
+            lines.append(json.dumps(obj, ensure_ascii=False, separators=(",", ":")))
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back in chunks."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._pos = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        b = bytes(data)
+        self._chunks.append(b)
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_parquet(batches: Iterator[list[tuple[Any, ...]]]) -> Iterator[bytes]:
+    """Columnar export; one row group per batch. Requires the optional pyarrow package."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, pa.string()) for name in EXPORT_COLUMNS])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd") as writer:
+        for rows in batches:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays([pa.array(c, pa.string()) for c in columns], schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+
+def gzip_stream(chunks: Iterator[bytes], level: int = 6) -> Iterator[bytes]:
+    comp = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        data = comp.compress(chunk)
+        if data:
+            yield data
+    yield comp.flush()
+
+
+def stream_export(
+    fmt: str,
+    *,
+    type: str | None = None,
+    device: str | None = None,
+    from_date: date | None = None,
+    to_date: date | None = None,
+    gzip: bool = False,
+) -> Iterator[bytes]:
+    batches = iter_record_batches(type, device, from_date, to_date)
+    if fmt == "csv":
+        chunks = iter_csv(batches)
+    elif fmt == "ndjson":
+        chunks = iter_ndjson(batches)
+    elif fmt == "parquet":
+        chunks = iter_parquet(batches)
+    else:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return gzip_stream(chunks) if gzip else chunks
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+from typing import Any
+
+from .nutrition import CATALOG, NutritionEvent
+
+# Recency half-life for suggestion ranking: a food last eaten this many days
+# ago counts half as much per use as one eaten today.
+HALF_LIFE_DAYS = 30.0
+
+# Catalog supplements that were never logged still rank above nothing.
+_CATALOG_BASE_SCORE = 0.5
+
+_FOOD_COLUMNS = (
+    "id, label, alias, source, unit, kcal, protein_g, fat_g, carbs_g, micros_json, use_count, last_used_at, rev"
+)
+
+
+def normalize(text: str) -> str:
+    """NFKC + casefold so full-width/half-width and case differences match."""
+    return unicodedata.normalize("NFKC", text or "").casefold().strip()
+
+
+def seed_food_catalog(conn: sqlite3.Connection) -> None:
+    """Upsert nutrition.CATALOG into food_catalog (called from init_db)."""
+    rev = int(conn.execute("SELECT COALESCE(MAX(rev), 0) + 1 FROM food_catalog").fetchone()[0])
+    conn.executemany(
+        """
+        INSERT INTO food_catalog(label, alias, source, unit, kcal, protein_g, fat_g, carbs_g, micros_json, rev)
+        VALUES(?,?,'catalog',?,?,?,?,?,?,?)
+        ON CONFLICT(label) DO UPDATE SET
+          alias=excluded.alias,
+          source='catalog',
+          unit=excluded.unit,
+          kcal=excluded.kcal,
+          protein_g=excluded.protein_g,
+          fat_g=excluded.fat_g,
+          carbs_g=excluded.carbs_g,
+          micros_json=excluded.micros_json,
+          rev=excluded.rev
+        """,
+        [
+            (
+                item.label,
+                item.alias,
+                item.unit,
+                item.kcal,
+                item.protein_g,
+                item.fat_g,
+                item.carbs_g,
+                json.dumps(item.micros, ensure_ascii=False) if item.micros else None,
+                rev,
+            )
+            for item in CATALOG.values()
+        ],
+    )
+
+
+def _food_dict(row: sqlite3.Row) -> dict[str, Any]:
+    micros = None
+    if row["micros_json"]:
+        try:
+            micros = json.loads(row["micros_json"])
+        except ValueError:
+            micros = None
+    return {
+        "id": int(row["id"]),
+        "label": row["label"],
+        "alias": row["alias"],
+        "source": row["source"],
+        "unit": row["unit"],
+        "kcal": row["kcal"],
+        "protein_g": row["protein_g"],
+        "fat_g": row["fat_g"],
+        "carbs_g": row["carbs_g"],
+        "micros": micros,
+        "useCount": int(row["use_count"]),
+        "lastUsedAt": row["last_used_at"],
+    }
+
+
+def get_food(conn: sqlite3.Connection, food_id: int) -> dict[str, Any] | None:
+    row = conn.execute(f"SELECT {_FOOD_COLUMNS} FROM food_catalog WHERE id = ?", (food_id,)).fetchone()
+    return _food_dict(row) if row else None
+
+
+def food_event(
+    food: dict[str, Any],
+    *,
+    consumed_at: datetime | None = None,
+    count: float = 1.0,
+    note: str | None = None,
+) -> NutritionEvent:
+    """Re-log a catalog entry with its stored per-unit nutrients (no re-estimation)."""
+    return NutritionEvent(
+        consumed_at=consumed_at,
+        alias=food["alias"],
+        label=food["label"],
+        count=count,
+        unit=food["unit"],
+        kcal=food["kcal"],
+        protein_g=food["protein_g"],
+        fat_g=food["fat_g"],
+        carbs_g=food["carbs_g"],
+        micros=food["micros"],
+        note=note,
+    )
+
+
+def search_foods(conn: sqlite3.Connection, q: str, limit: int = 20) -> list[int]:
+    """Food ids whose label contains `q` (FTS5 trigram; LIKE when FTS5 is unavailable)."""
+    q = (q or "").strip()
+    if not q:
+        return []
+    try:
+        if len(q) >= 3:  # trigram tokens
+            rows = conn.execute(
+                "SELECT rowid AS id FROM food_catalog_fts WHERE food_catalog_fts MATCH ? ORDER BY rank LIMIT ?",
+                ('"' + q.replace('"', '""') + '"', limit),
+            ).fetchall()
+            return [int(r["id"]) for r in rows]
+    except sqlite3.OperationalError:
+        pass
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    rows = conn.execute(
+        "SELECT id FROM food_catalog WHERE label LIKE ? ESCAPE '\\' LIMIT ?",
+        (f"%{escaped}%", limit),
+    ).fetchall()
+    return [int(r["id"]) for r in rows]
+
+
+class SuggestIndex:
+    """In-memory prefix index over catalog labels for autocomplete.
+
+    Keys are the normalised full label and each whitespace-separated word,
+    kept sorted so a prefix lookup is a bisect plus a short scan. refresh()
+    only reads rows whose `rev` is newer than the last one seen.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._db: str | None = None
+        self._rev = 0
+        self._keys: list[tuple[str, int]] = []
+        self._foods: dict[int, dict[str, Any]] = {}
+
+    @staticmethod
+    def _index_keys(label: str) -> set[str]:
+        norm = normalize(label)
+        return {norm, *norm.split()}
+
+    def refresh(self, conn: sqlite3.Connection) -> None:
+        path = conn.execute("PRAGMA database_list").fetchone()["file"]
+        latest = int(conn.execute("SELECT COALESCE(MAX(rev), 0) FROM food_catalog").fetchone()[0])
+        with self._lock:
+            if path != self._db or latest < self._rev:
+                # Another database, or the catalog was rebuilt: start over.
+                self._db, self._rev, self._keys, self._foods = path, 0, [], {}
+            rows = conn.execute(
+                f"SELECT {_FOOD_COLUMNS} FROM food_catalog WHERE rev > ? ORDER BY rev",
+                (self._rev,),
+            ).fetchall()
+            for row in rows:
+                food = _food_dict(row)
+                old = self._foods.get(food["id"])
+                if old is None or old["label"] != food["label"]:
+                    if old is not None:
+                        for key in self._index_keys(old["label"]):
+                            self._keys.remove((key, food["id"]))
+                    for key in self._index_keys(food["label"]):
+                        insort(self._keys, (key, food["id"]))
+                self._foods[food["id"]] = food
+                self._rev = max(self._rev, int(row["rev"]))
+
+    def prefix(self, q: str) -> list[int]:
+        q = normalize(q)
+        with self._lock:
+            if not q:
+                return list(self._foods)
+            out: dict[int, None] = {}
+            i = bisect_left(self._keys, (q, -1))
+            while i < len(self._keys) and self._keys[i][0].startswith(q):
+                out[self._keys[i][1]] = None
+                i += 1
+            return list(out)
+
+    def foods(self, ids: list[int]) -> list[dict[str, Any]]:
+        with self._lock:
+            return [self._foods[i] for i in ids if i in self._foods]
+
+
+_index = SuggestIndex()
+
+
+def _score(food: dict[str, Any], now: datetime) -> float:
+    uses = food["useCount"]
+    if uses <= 0:
+        return _CATALOG_BASE_SCORE if food["source"] == "catalog" else 0.0
+    age_days = 0.0
+    if food["lastUsedAt"]:
+        try:
+            last = datetime.fromisoformat(str(food["lastUsedAt"]).replace("Z", "+00:00"))
+            if last.tzinfo is None:
+                last = last.replace(tzinfo=timezone.utc)
+            age_days = max((now - last).total_seconds() / 86400.0, 0.0)
+        except ValueError:
+            pass
+    return uses * 0.5 ** (age_days / HALF_LIFE_DAYS)
+
+
+def suggest_foods(conn: sqlite3.Connection, q: str, limit: int = 10) -> list[dict[str, Any]]:
+    """Autocomplete: prefix hits from the in-memory index, topped up with
+    full-text (infix) matches, ranked by recency-weighted use count."""
+    _index.refresh(conn)
+    ids = _index.prefix(q)
+    if len(ids) < limit and q.strip():
+        seen = set(ids)
+        ids += [i for i in search_foods(conn, q, limit * 2) if i not in seen]
+    now = datetime.now(timezone.utc)
+    candidates = [f for f in _index.foods(ids) if f["useCount"] > 0 or f["source"] == "catalog"]
+    candidates.sort(key=lambda f: (-_score(f, now), len(f["label"]), f["id"]))
+    return candidates[:limit]
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Protocol
+
+from .db import db
+from .prompt_compact import DEFAULT_TOKEN_BUDGET
+from .prompt_gen import build_prompt
+from .reports import save_report
+
+REPORT_TYPES = ("daily", "weekly", "monthly")
+# Generations sent to the backend at once.
+MAX_CONCURRENT_GENERATIONS = 2
+# Seconds to wait for one completion from an HTTP backend.
+HTTP_TIMEOUT_S = 180.0
+
+
+class GenerationBackend(Protocol):
+    """Turns a prompt into report text (blocking; called from worker threads)."""
+
+    name: str
+
+    def generate(self, prompt: str) -> str: ...
+
+
+class StubBackend:
+    """Deterministic local stand-in: the same prompt always yields the same
+    report, with every expert section, and no network access."""
+
+    name = "stub"
+
+    def generate(self, prompt: str) -> str:
+        digest = prompt_hash(prompt)[:12]
+        first_line = next((line for line in prompt.splitlines() if line.strip()), "")
+        return "\n".join(
+            [
+                f"<!--DOCTOR-->[stub {digest}] {first_line[:80]}",
+                f"<!--TRAINER-->[stub {digest}] プロンプト {len(prompt)} 文字",
+                f"<!--NUTRITIONIST-->[stub {digest}] ローカル生成",
+                "<!--END-->",
+            ]
+        )
+
+
+class OpenAICompatibleBackend:
+    """Chat completions over HTTP (OpenAI, or any server speaking its API)."""
+
+    name = "openai"
+
+    def __init__(self, base_url: str, model: str, api_key: str | None = None, timeout: float = HTTP_TIMEOUT_S) -> None:
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def generate(self, prompt: str) -> str:
+        body = json.dumps(
+            {"model": self.model, "messages": [{"role": "user", "content": prompt}]},
+            ensure_ascii=False,
+        ).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        req = urllib.request.Request(self.url, data=body, headers=headers, method="POST")
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as res:
+                data = json.loads(res.read().decode("utf-8"))
+        except urllib.error.HTTPError as exc:
+            detail = exc.read().decode("utf-8", errors="replace")[:300]
+            raise RuntimeError(f"LLM backend returned {exc.code}: {detail}") from exc
+        try:
+            content = data["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError) as exc:
+            raise RuntimeError("LLM backend returned no completion") from exc
+        if not isinstance(content, str) or not content.strip():
+            raise RuntimeError("LLM backend returned an empty completion")
+        return content
+
+
+def backend_from_env() -> GenerationBackend | None:
+    """LLM_BACKEND=openai (LLM_BASE_URL, LLM_MODEL, LLM_API_KEY) | stub; unset disables generation."""
+    kind = os.getenv("LLM_BACKEND", "").strip().lower()
+    if kind == "stub":
+        return StubBackend()
+    if kind == "openai":
+        return OpenAICompatibleBackend(
+            base_url=os.getenv("LLM_BASE_URL", "https://api.openai.com/v1"),
+            model=os.getenv("LLM_MODEL", "gpt-4o-mini"),
+            api_key=os.getenv("LLM_API_KEY") or None,
+        )
+    if kind:
+        raise ValueError(f"Unknown LLM_BACKEND: {kind}")
+    return None
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class GenerationResult:
+    report_type: str
+    report_date: str
+    status: str  # "generated" | "reused" | "error"
+    report_id: int | None = None
+    error: str | None = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _stored_report(report_date: str, report_type: str) -> tuple[int, str] | None:
+    with db() as conn:
+        row = conn.execute(
+            "SELECT id, prompt_used FROM ai_reports WHERE report_date = ? AND report_type = ?",
+            (report_date, report_type),
+        ).fetchone()
+    return (int(row["id"]), str(row["prompt_used"])) if row else None
+
+
+class ReportGenerator:
+    """Generates AI reports from build_prompt() through a backend.
+
+    At most `max_concurrency` generations run at once. A request for a
+    (date, type) already in flight joins it instead of generating twice, and
+    a stored report built from the same prompt is reused as is. A forced
+    request does not join a non-forced run (which may reuse); it is chained
+    to run once that one finishes, never alongside it. Prompts are
+    compacted to `token_budget` unless `compact` is off.
+    """
+
+    def __init__(
+        self,
+        backend: GenerationBackend,
+        *,
+        max_concurrency: int = MAX_CONCURRENT_GENERATIONS,
+        compact: bool = True,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+    ) -> None:
+        self.backend = backend
+        self.compact = compact
+        self.token_budget = token_budget
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="report-gen")
+        self._lock = threading.Lock()
+        # (date, type) -> (future, forced)
+        self._in_flight: dict[tuple[str, str], tuple[Future[GenerationResult], bool]] = {}
+
+    def submit(self, report_type: str, *, force: bool = False) -> Future[GenerationResult]:
+        if report_type not in REPORT_TYPES:
+            raise ValueError(f"Invalid report_type: {report_type}")
+        # Reports are dated the day they are written (as the app does).
+        key = (datetime.now().astimezone().date().isoformat(), report_type)
+        with self._lock:
+            running = self._in_flight.get(key)
+            if running is not None and (running[1] or not force):
+                return running[0]
+            if running is None:
+                future = self._executor.submit(self._generate, key[0], report_type, force)
+            else:
+                future = Future()
+                running[0].add_done_callback(lambda _: self._rerun_forced(future, key[0], report_type))
+            self._in_flight[key] = (future, force)
+            future.add_done_callback(lambda done, key=key: self._forget(key, done))
+        return future
+
+    def _rerun_forced(self, future: Future[GenerationResult], report_date: str, report_type: str) -> None:
+        inner = self._executor.submit(self._generate, report_date, report_type, True)
+        inner.add_done_callback(lambda done: future.set_result(done.result()))
+
+    def _forget(self, key: tuple[str, str], future: Future[GenerationResult]) -> None:
+        with self._lock:
+            if self._in_flight.get(key, (None, False))[0] is future:
+                del self._in_flight[key]
+
+    def generate_all(self, types: tuple[str, ...] = REPORT_TYPES, *, force: bool = False) -> list[GenerationResult]:
+        """Submit every type at once and wait for all (the nightly batch)."""
+        futures = [self.submit(t, force=force) for t in types]
+        return [f.result() for f in futures]
+
+    def _generate(self, report_date: str, report_type: str, force: bool) -> GenerationResult:
+        try:
+            prompt = build_prompt(report_type, compact=self.compact, token_budget=self.token_budget)
+            stored = _stored_report(report_date, report_type)
+            if stored and not force and stored[1] == prompt:
+                return GenerationResult(report_type, report_date, "reused", report_id=stored[0])
+            content = self.backend.generate(prompt)
+            report = save_report(
+                report_date=report_date,
+                report_type=report_type,
+                prompt_used=prompt,
+                content=content,
+            )
+            return GenerationResult(report_type, report_date, "generated", report_id=int(report["id"]))
+        except Exception as exc:
+            return GenerationResult(report_type, report_date, "error", error=f"{type(exc).__name__}: {exc}")
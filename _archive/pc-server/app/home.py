@@ -0,0 +1,845 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any
+
+from .counters import has_records
+from .db import LOCAL_TZ
+
+DEFAULT_SLEEP_TARGET_MIN = 420
+SLEEP_DEFICIT_PCT = 0.70
+SLEEP_WEEKLY_PCT = 0.80
+DEFAULT_STEPS_TARGET = 8000
+
+# Days of history (before the target day) the home rules look at.
+LOOKBACK_DAYS = 30
+
+SEVERITY_RANK = {"critical": 4, "warning": 3, "info": 2, "positive": 1}
+CATEGORY_RANK = {"threshold": 1, "trend": 2, "achievement": 3}
+
+
+def _parse_iso_dt(value: Any) -> datetime | None:
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def _to_local_day(value: Any) -> str | None:
+    dt = _parse_iso_dt(value)
+    if dt is None:
+        return None
+    return dt.astimezone(LOCAL_TZ).date().isoformat()
+
+
+def _to_float(value: Any) -> float | None:
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _find_number(value: Any, key_candidates: set[str], depth: int = 0) -> float | None:
+    if depth > 6 or value is None:
+        return None
+    if isinstance(value, dict):
+        for key in key_candidates:
+            if key in value:
+                num = _to_float(value.get(key))
+                if num is not None:
+                    return num
+        for nested in value.values():
+            hit = _find_number(nested, key_candidates, depth + 1)
+            if hit is not None:
+                return hit
+        return None
+    if isinstance(value, list):
+        for nested in value:
+            hit = _find_number(nested, key_candidates, depth + 1)
+            if hit is not None:
+                return hit
+        return None
+    return _to_float(value)
+
+
+def _load_payload(payload_json: str) -> Any:
+    try:
+        return json.loads(payload_json)
+    except Exception:
+        return None
+
+
+def _extract_weight_kg(payload: Any) -> float | None:
+    return _find_number(
+        payload,
+        {
+            "inKilograms",
+            "kilograms",
+            "kg",
+            "weight",
+            "value",
+            "inGrams",
+            "grams",
+        },
+    )
+
+
+def _extract_bp(payload: Any) -> tuple[float | None, float | None]:
+    sys = _find_number(payload, {"systolic", "inMillimetersOfMercury", "sys"})
+    dia = _find_number(payload, {"diastolic", "inMillimetersOfMercury", "dia"})
+    return (sys, dia)
+
+
+def _extract_spo2_pct(payload: Any) -> float | None:
+    return _find_number(payload, {"percentage", "pct", "spo2"})
+
+
+def _extract_bpm(payload: Any) -> float | None:
+    return _find_number(payload, {"beatsPerMinute", "bpm"})
+
+
+def _fmt_sleep(value_min: int | None) -> str | None:
+    if value_min is None or value_min <= 0:
+        return None
+    h, m = divmod(value_min, 60)
+    return f"{h}h{m:02d}m"
+
+
+def _series_avg(values: list[float | int | None]) -> float | None:
+    nums = [float(v) for v in values if isinstance(v, (int, float))]
+    if not nums:
+        return None
+    return sum(nums) / len(nums)
+
+
+@dataclass
+class _Point:
+    """Timestamped health record, pre-parsed once per load."""
+
+    sql_day: str  # date(time) as SQLite sees it (UTC date), used for window filters
+    local_day: str | None
+    value: Any
+
+
+@dataclass
+class _Sleep:
+    start_sql_day: str | None
+    end_sql_day: str | None
+    start_time: str | None
+    end_time: str | None
+
+
+@dataclass
+class HomeInputs:
+    """Rows needed to evaluate the home screen for every day in [start, end]."""
+
+    start: date
+    end: date
+    sleep: list[_Sleep] = field(default_factory=list)
+    steps: list[_Point] = field(default_factory=list)
+    weight: list[_Point] = field(default_factory=list)  # newest first
+    bp: list[_Point] = field(default_factory=list)  # newest first
+    spo2: list[_Point] = field(default_factory=list)  # newest first
+    hr: list[_Point] = field(default_factory=list)  # newest first
+    meals: dict[str, tuple[int, float | None]] = field(default_factory=dict)
+    intake: dict[str, float | None] = field(default_factory=dict)
+    bp_linked: bool = False
+    profile: dict[str, Any] | None = None
+
+
+def load_home_inputs(conn: sqlite3.Connection, start: date, end: date) -> HomeInputs:
+    """Fetch everything the home rules need for [start, end] in one pass per table.
+
+    The window is widened by LOOKBACK_DAYS before `start` and one day after `end`
+    so each day can be evaluated from the shared rows.
+    """
+    lo = (start - timedelta(days=LOOKBACK_DAYS)).isoformat()
+    hi = (end + timedelta(days=1)).isoformat()
+    end_s = end.isoformat()
+    out = HomeInputs(start=start, end=end)
+
+    # 睡眠候補
+    for row in conn.execute(
+        """SELECT start_time, end_time, date(start_time) AS sd, date(end_time) AS ed
+           FROM health_records
+           WHERE type='SleepSessionRecord'
+             AND (
+               (start_time IS NOT NULL AND date(start_time) BETWEEN ? AND ?)
+               OR
+               (end_time IS NOT NULL AND date(end_time) BETWEEN ? AND ?)
+             )
+           ORDER BY COALESCE(end_time, start_time) DESC""",
+        (lo, hi, lo, hi),
+    ):
+        out.sleep.append(_Sleep(row["sd"], row["ed"], row["start_time"], row["end_time"]))
+
+    # 歩数候補
+    for row in conn.execute(
+        """SELECT start_time, date(start_time) AS d, payload_json FROM health_records
+           WHERE type='StepsRecord'
+             AND start_time IS NOT NULL
+             AND date(start_time) BETWEEN ? AND ?""",
+        (lo, hi),
+    ):
+        payload = _load_payload(row["payload_json"])
+        if payload is None:
+            continue
+        out.steps.append(_Point(row["d"], _to_local_day(row["start_time"]), payload))
+
+    # 体重候補
+    for row in conn.execute(
+        """SELECT time, date(time) AS d, payload_json FROM health_records
+           WHERE type='WeightRecord'
+             AND time IS NOT NULL
+             AND date(time) BETWEEN ? AND ?
+           ORDER BY time DESC""",
+        (lo, hi),
+    ):
+        out.weight.append(_Point(row["d"], _to_local_day(row["time"]), _load_payload(row["payload_json"])))
+
+    # バイタル候補
+    for rec_type, bucket in (
+        ("BloodPressureRecord", out.bp),
+        ("OxygenSaturationRecord", out.spo2),
+        ("RestingHeartRateRecord", out.hr),
+    ):
+        for row in conn.execute(
+            """SELECT time, date(time) AS d, payload_json FROM health_records
+               WHERE type=?
+                 AND time IS NOT NULL
+                 AND date(time) BETWEEN ? AND ?
+               ORDER BY time DESC""",
+            (rec_type, lo, end_s),
+        ):
+            bucket.append(_Point(row["d"], _to_local_day(row["time"]), _load_payload(row["payload_json"])))
+
+    # 食事データ（nutrition_events + intake_calories_daily）
+    for row in conn.execute(
+        """SELECT local_date, COUNT(*) AS c, SUM(kcal) AS kcal FROM nutrition_events
+           WHERE local_date BETWEEN ? AND ?
+           GROUP BY local_date""",
+        (start.isoformat(), end_s),
+    ):
+        out.meals[row["local_date"]] = (int(row["c"] or 0), row["kcal"])
+    for row in conn.execute(
+        "SELECT day, intake_kcal FROM intake_calories_daily WHERE day BETWEEN ? AND ?",
+        (start.isoformat(), end_s),
+    ):
+        out.intake[row["day"]] = row["intake_kcal"]
+
+    out.bp_linked = has_records(conn, "BloodPressureRecord")
+
+    profile_row = conn.execute(
+        "SELECT goal_weight_kg, sleep_goal_minutes, steps_goal FROM user_profile LIMIT 1"
+    ).fetchone()
+    out.profile = dict(profile_row) if profile_row else None
+    return out
+
+
+def compute_home_summary(inputs: HomeInputs, target_date: date) -> dict[str, Any]:
+    """Evaluate status items, attention points and evidences for one day.
+
+    AI report fields are not included; see attach_home_reports().
+    """
+    date_s = target_date.isoformat()
+    next_date = (target_date + timedelta(days=1)).isoformat()
+    trend_14_start = (target_date - timedelta(days=13)).isoformat()
+    trend_30_start = (target_date - timedelta(days=LOOKBACK_DAYS)).isoformat()
+    sleep_window_start = (target_date - timedelta(days=8)).isoformat()
+
+    def _last_n_days(n: int) -> list[str]:
+        return [(target_date - timedelta(days=i)).isoformat() for i in range(n - 1, -1, -1)]
+
+    def _in(day: str | None, lo: str, hi: str) -> bool:
+        return day is not None and lo <= day <= hi
+
+    # ── 睡眠集計（起床日のローカル日付で当日判定）
+    sleep_by_day: dict[str, int] = {}
+    for row in inputs.sleep:
+        if not (
+            (row.start_time is not None and _in(row.start_sql_day, sleep_window_start, next_date))
+            or (row.end_time is not None and _in(row.end_sql_day, sleep_window_start, next_date))
+        ):
+            continue
+        start_dt = _parse_iso_dt(row.start_time)
+        end_dt = _parse_iso_dt(row.end_time)
+        anchor_dt = end_dt or start_dt
+        if anchor_dt is None or start_dt is None or end_dt is None or end_dt <= start_dt:
+            continue
+        local_day = anchor_dt.astimezone(LOCAL_TZ).date().isoformat()
+        if local_day > date_s:
+            continue
+        total_min = int((end_dt - start_dt).total_seconds() / 60)
+        if total_min <= 0:
+            continue
+        sleep_by_day[local_day] = sleep_by_day.get(local_day, 0) + total_min
+
+    sleep_today_min = sleep_by_day.get(date_s)
+    sleep_ok = bool(sleep_today_min and sleep_today_min > 0)
+    sleep_label = _fmt_sleep(sleep_today_min)
+
+    # ── 歩数集計（ローカル日付で合算）
+    steps_by_day: dict[str, float] = {}
+    for row in inputs.steps:
+        if not _in(row.sql_day, trend_14_start, next_date):
+            continue
+        local_day = row.local_day
+        if local_day is None or local_day > date_s:
+            continue
+        count = _find_number(row.value, {"count", "steps", "inCount"})
+        if count is None or count <= 0:
+            continue
+        steps_by_day[local_day] = steps_by_day.get(local_day, 0.0) + count
+
+    steps_val = steps_by_day.get(date_s)
+    steps_ok = bool(steps_val and steps_val >= 1000)
+    steps_label = f"{int(round(steps_val)):,}" if steps_val else None
+
+    # ── 体重集計（最新 <= 当日）
+    latest_weight_kg: float | None = None
+    weight_by_day: dict[str, float] = {}
+    weight_rows = [r for r in inputs.weight if _in(r.sql_day, trend_30_start, next_date)][:2000]
+    for row in weight_rows:
+        local_day = row.local_day
+        if local_day is None or local_day > date_s:
+            continue
+        kg = _extract_weight_kg(row.value)
+        if kg is None:
+            continue
+        if kg > 500:
+            kg = kg / 1000.0
+        if kg <= 0 or kg > 400:
+            continue
+        if latest_weight_kg is None:
+            latest_weight_kg = kg
+        if local_day not in weight_by_day:
+            weight_by_day[local_day] = kg
+
+    weight_ok = latest_weight_kg is not None
+    weight_label = f"{float(latest_weight_kg):.1f}kg" if latest_weight_kg is not None else None
+
+    # ── 食事充足（カロリー優先）
+    intake_raw = inputs.intake.get(date_s)
+    meal_c, meal_k = inputs.meals.get(date_s, (0, None))
+    intake_kcal = float(intake_raw) if intake_raw is not None else None
+    meal_kcal = float(meal_k) if meal_k is not None else None
+    meal_count = int(meal_c)
+    meal_total_kcal = intake_kcal if intake_kcal is not None else meal_kcal
+    meal_ok = bool((meal_total_kcal is not None and meal_total_kcal > 0) or meal_count > 0)
+    meal_label = f"{int(round(meal_total_kcal)):,}kcal" if meal_total_kcal is not None and meal_total_kcal > 0 else None
+
+    # ── バイタル（BP, SpO2, Resting HR）
+    def _vital_rows(rows: list[_Point]) -> list[_Point]:
+        return [r for r in rows if _in(r.sql_day, trend_30_start, date_s)][:4000]
+
+    bp_linked = inputs.bp_linked
+    bp_current_sys: float | None = None
+    bp_current_dia: float | None = None
+    bp_by_day: dict[str, tuple[float, float]] = {}
+    for row in _vital_rows(inputs.bp):
+        local_day = row.local_day
+        if local_day is None or local_day > date_s:
+            continue
+        sys, dia = _extract_bp(row.value)
+        if sys is None or dia is None:
+            continue
+        if bp_current_sys is None and bp_current_dia is None:
+            bp_current_sys, bp_current_dia = sys, dia
+        if local_day not in bp_by_day:
+            bp_by_day[local_day] = (sys, dia)
+
+    bp_ok = bp_current_sys is not None and bp_current_dia is not None
+    bp_label = f"{int(round(bp_current_sys))}/{int(round(bp_current_dia))}" if bp_ok else None
+    bp_warning = bool(bp_ok and (bp_current_sys >= 130 or bp_current_dia >= 85))
+
+    spo2_current: float | None = None
+    for row in _vital_rows(inputs.spo2):
+        local_day = row.local_day
+        if local_day is None or local_day > date_s:
+            continue
+        pct = _extract_spo2_pct(row.value)
+        if pct is None:
+            continue
+        spo2_current = pct
+        break
+
+    hr_current: float | None = None
+    hr_values: list[float] = []
+    for row in _vital_rows(inputs.hr):
+        local_day = row.local_day
+        if local_day is None or local_day > date_s:
+            continue
+        bpm = _extract_bpm(row.value)
+        if bpm is None or bpm <= 0:
+            continue
+        if hr_current is None:
+            hr_current = bpm
+        hr_values.append(bpm)
+
+    profile_row = inputs.profile
+    sleep_target_min = DEFAULT_SLEEP_TARGET_MIN
+    steps_target = DEFAULT_STEPS_TARGET
+    if profile_row:
+        if profile_row["sleep_goal_minutes"] is not None:
+            try:
+                val = int(profile_row["sleep_goal_minutes"])
+                if 120 <= val <= 720:
+                    sleep_target_min = val
+            except (TypeError, ValueError):
+                pass
+        if profile_row["steps_goal"] is not None:
+            try:
+                val = int(profile_row["steps_goal"])
+                if 1000 <= val <= 50000:
+                    steps_target = val
+            except (TypeError, ValueError):
+                pass
+
+    # ── 新UI: 充足ステータス（固定順）
+    status_items: list[dict[str, Any]] = [
+        {
+            "key": "sleep",
+            "label": "睡眠",
+            "value": sleep_label,
+            "ok": sleep_ok,
+            "tab": "health",
+            "innerTab": "sleep",
+            "tone": "normal",
+        },
+        {
+            "key": "steps",
+            "label": "歩数",
+            "value": steps_label,
+            "ok": steps_ok,
+            "tab": "exercise",
+            "tone": "normal",
+        },
+        {
+            "key": "meal",
+            "label": "食事",
+            "value": meal_label,
+            "ok": meal_ok,
+            "tab": "meal",
+            "tone": "normal",
+        },
+        {
+            "key": "weight",
+            "label": "体重",
+            "value": weight_label,
+            "ok": weight_ok,
+            "tab": "health",
+            "innerTab": "composition",
+            "tone": "normal",
+        },
+    ]
+    if bp_linked:
+        status_items.append(
+            {
+                "key": "bp",
+                "label": "BP",
+                "value": bp_label,
+                "ok": bp_ok,
+                "tab": "health",
+                "innerTab": "vital",
+                "tone": "warning" if bp_warning else "normal",
+            }
+        )
+
+    # ── 新UI: 注目ポイント（ルールベース）
+    points_by_source: dict[str, dict[str, Any]] = {}
+
+    def _add_point(
+        *,
+        rule_id: str,
+        icon: str,
+        message: str,
+        severity: str,
+        category: str,
+        tab: str,
+        subtab: str | None,
+        data_source: str,
+    ) -> None:
+        point = {
+            "id": f"{rule_id}-{date_s}",
+            "icon": icon,
+            "message": message[:60],
+            "severity": severity,
+            "category": category,
+            "navigateTo": {"tab": tab, **({"subTab": subtab} if subtab else {})},
+            "dataSource": data_source,
+        }
+        prev = points_by_source.get(data_source)
+        if prev is None:
+            points_by_source[data_source] = point
+            return
+        prev_score = (SEVERITY_RANK[prev["severity"]], -CATEGORY_RANK[prev["category"]])
+        new_score = (SEVERITY_RANK[severity], -CATEGORY_RANK[category])
+        if new_score > prev_score:
+            points_by_source[data_source] = point
+
+    if bp_ok and bp_current_sys is not None and bp_current_dia is not None:
+        if bp_current_sys >= 140 or bp_current_dia >= 90:
+            _add_point(
+                rule_id="bp-critical",
+                icon="🔴",
+                message=f"血圧が高めです（{int(round(bp_current_sys))}/{int(round(bp_current_dia))}）",
+                severity="critical",
+                category="threshold",
+                tab="health",
+                subtab="vital",
+                data_source="blood_pressure",
+            )
+        elif bp_current_sys >= 130 or bp_current_dia >= 85:
+            _add_point(
+                rule_id="bp-warning",
+                icon="⚠️",
+                message=f"血圧がやや高めです（{int(round(bp_current_sys))}/{int(round(bp_current_dia))}）",
+                severity="warning",
+                category="threshold",
+                tab="health",
+                subtab="vital",
+                data_source="blood_pressure",
+            )
+
+    if spo2_current is not None:
+        if spo2_current < 90:
+            _add_point(
+                rule_id="spo2-critical-low",
+                icon="🔴",
+                message=f"酸素飽和度が著しく低下しています（{round(spo2_current, 1)}%）",
+                severity="critical",
+                category="threshold",
+                tab="health",
+                subtab="vital",
+                data_source="spo2",
+            )
+        elif spo2_current < 95:
+            _add_point(
+                rule_id="spo2-warning-low",
+                icon="⚠️",
+                message=f"酸素飽和度が低めです（{round(spo2_current, 1)}%）",
+                severity="warning",
+                category="threshold",
+                tab="health",
+                subtab="vital",
+                data_source="spo2",
+            )
+
+    if hr_current is not None and hr_values:
+        hr_avg_30 = _series_avg(hr_values)
+        if hr_avg_30 is not None and hr_avg_30 > 0:
+            deviation = abs(hr_current - hr_avg_30) / hr_avg_30
+            if deviation >= 0.20:
+                _add_point(
+                    rule_id="rhr-deviation",
+                    icon="⚠️",
+                    message=f"安静時心拍が通常と異なります（{int(round(hr_current))}bpm）",
+                    severity="warning",
+                    category="threshold",
+                    tab="health",
+                    subtab="vital",
+                    data_source="resting_hr",
+                )
+
+    last7_days = _last_n_days(7)
+    sleep_last7 = [sleep_by_day.get(day) for day in last7_days]
+    sleep_target_deficit = int(sleep_target_min * SLEEP_DEFICIT_PCT)
+    sleep_target_weekly = int(sleep_target_min * SLEEP_WEEKLY_PCT)
+    sleep_last3 = sleep_last7[-3:]
+    if len([v for v in sleep_last3 if v is not None]) == 3 and all(
+        (v or 0) < sleep_target_deficit for v in sleep_last3
+    ):
+        _add_point(
+            rule_id="sleep-deficit-3d",
+            icon="⚠️",
+            message="睡眠不足が3日連続しています",
+            severity="warning",
+            category="trend",
+            tab="health",
+            subtab="sleep",
+            data_source="sleep",
+        )
+
+    sleep_recorded = [v for v in sleep_last7 if v is not None]
+    if len(sleep_recorded) >= 4:
+        sleep_avg_7 = _series_avg(sleep_recorded)
+        if sleep_avg_7 is not None and sleep_avg_7 < sleep_target_weekly:
+            _add_point(
+                rule_id="sleep-weekly-low",
+                icon="📉",
+                message=f"今週の平均睡眠が短めです（平均{_fmt_sleep(int(round(sleep_avg_7)))})",
+                severity="info",
+                category="trend",
+                tab="health",
+                subtab="sleep",
+                data_source="sleep",
+            )
+
+    steps_last7 = [steps_by_day.get(day) for day in last7_days]
+    steps_recorded = [v for v in steps_last7 if v is not None]
+    steps_avg_7 = _series_avg(steps_recorded)
+    if steps_avg_7 is not None and steps_avg_7 > 0:
+        low_threshold = steps_avg_7 * 0.5
+        last2 = steps_last7[-2:]
+        if len([v for v in last2 if v is not None]) == 2 and all((v or 0) < low_threshold for v in last2):
+            _add_point(
+                rule_id="steps-low-2d",
+                icon="📉",
+                message="活動量が低下しています。軽い運動を心がけましょう",
+                severity="info",
+                category="trend",
+                tab="exercise",
+                subtab=None,
+                data_source="steps",
+            )
+
+    # 歩数達成ストリーク（最新日から連続）
+    streak = 0
+    for day in reversed(last7_days):
+        v = steps_by_day.get(day)
+        if v is not None and v >= steps_target:
+            streak += 1
+        else:
+            break
+    if streak >= 3:
+        _add_point(
+            rule_id="steps-achievement",
+            icon="✅",
+            message=f"歩数目標を{streak}日連続達成中",
+            severity="positive",
+            category="achievement",
+            tab="exercise",
+            subtab=None,
+            data_source="steps",
+        )
+
+    # 睡眠達成率
+    if sleep_recorded:
+        sleep_goal_days = sum(1 for v in sleep_recorded if v >= sleep_target_min)
+        sleep_goal_rate = sleep_goal_days / len(sleep_recorded)
+        if len(sleep_recorded) >= 5 and sleep_goal_rate >= 0.80:
+            _add_point(
+                rule_id="sleep-achievement",
+                icon="✅",
+                message=f"今週の睡眠目標達成率{int(round(sleep_goal_rate * 100))}%",
+                severity="positive",
+                category="achievement",
+                tab="health",
+                subtab="sleep",
+                data_source="sleep",
+            )
+
+    # 体重トレンド（7日平均 vs 前週7日平均）
+    week_days = _last_n_days(14)
+    prev_week = week_days[:7]
+    this_week = week_days[7:]
+    prev_vals = [weight_by_day.get(day) for day in prev_week if weight_by_day.get(day) is not None]
+    this_vals = [weight_by_day.get(day) for day in this_week if weight_by_day.get(day) is not None]
+    prev_avg = _series_avg(prev_vals)
+    this_avg = _series_avg(this_vals)
+    goal_weight = (
+        float(profile_row["goal_weight_kg"])
+        if profile_row and profile_row["goal_weight_kg"] is not None
+        else None
+    )
+    if prev_avg is not None and this_avg is not None:
+        diff = round(this_avg - prev_avg, 1)
+        if abs(diff) >= 0.2:
+            if goal_weight is not None and latest_weight_kg is not None and goal_weight < latest_weight_kg:
+                if diff < 0:
+                    _add_point(
+                        rule_id="weight-trend-positive",
+                        icon="📉",
+                        message=f"体重が先週比{diff}kg、減量ペース維持中",
+                        severity="positive",
+                        category="trend",
+                        tab="health",
+                        subtab="composition",
+                        data_source="weight",
+                    )
+                else:
+                    _add_point(
+                        rule_id="weight-trend-up",
+                        icon="📈",
+                        message=f"体重が先週比+{diff}kg。食事と活動量を確認しましょう",
+                        severity="info",
+                        category="trend",
+                        tab="health",
+                        subtab="composition",
+                        data_source="weight",
+                    )
+            elif diff < 0:
+                _add_point(
+                    rule_id="weight-trend-down",
+                    icon="📉",
+                    message=f"体重が先週比{diff}kg、良い傾向です",
+                    severity="positive",
+                    category="trend",
+                    tab="health",
+                    subtab="composition",
+                    data_source="weight",
+                )
+
+    # 血圧の週次高め判定
+    if bp_by_day:
+        recent_bp_days = [bp_by_day.get(day) for day in last7_days]
+        high_days = 0
+        for row in recent_bp_days:
+            if row is None:
+                continue
+            sys, dia = row
+            if sys >= 130 or dia >= 85:
+                high_days += 1
+        if high_days >= 3:
+            _add_point(
+                rule_id="bp-high-week",
+                icon="⚠️",
+                message=f"今週、血圧が高めの日が{high_days}日あります",
+                severity="warning",
+                category="trend",
+                tab="health",
+                subtab="vital",
+                data_source="blood_pressure",
+            )
+
+    attention_points = sorted(
+        points_by_source.values(),
+        key=lambda p: (-SEVERITY_RANK[p["severity"]], CATEGORY_RANK[p["category"]], p["id"]),
+    )
+
+    # ── 互換用: 根拠データリスト（データがあるものだけ）
+    evidences = []
+    if sleep_ok and sleep_label:
+        evidences.append(
+            {
+                "type": "sleep",
+                "label": "睡眠",
+                "value": sleep_label,
+                "tab": "health",
+                "innerTab": "sleep",
+            }
+        )
+    if steps_ok and steps_label:
+        evidences.append(
+            {
+                "type": "steps",
+                "label": "歩数",
+                "value": f"{steps_label}歩" if steps_label else "",
+                "tab": "exercise",
+            }
+        )
+    if weight_ok and weight_label:
+        evidences.append(
+            {
+                "type": "weight",
+                "label": "体重",
+                "value": weight_label,
+                "tab": "health",
+                "innerTab": "composition",
+            }
+        )
+    if meal_ok:
+        evidences.append(
+            {
+                "type": "meal",
+                "label": "食事",
+                "value": meal_label if meal_label else f"{meal_count}件",
+                "tab": "meal",
+            }
+        )
+
+    return {
+        "date": date_s,
+        "sufficiency": {
+            "sleep": sleep_ok,
+            "steps": steps_ok,
+            "weight": weight_ok,
+            "meal": meal_ok,
+            "bp": bp_ok if bp_linked else False,
+        },
+        "statusItems": status_items,
+        "attentionPoints": attention_points,
+        "evidences": evidences,
+    }
+
+
+def load_report_refs(
+    conn: sqlite3.Connection, start: date, end: date
+) -> dict[str, tuple[dict[str, Any] | None, dict[str, Any] | None]]:
+    """day -> (that day's daily AI report, previous daily report reference) for [start, end].
+
+    Daily reports are unique per date, so two indexed reads cover any span.
+    """
+    start_s = start.isoformat()
+    in_range = conn.execute(
+        """SELECT report_date, content, created_at FROM ai_reports
+           WHERE report_type = 'daily' AND report_date BETWEEN ? AND ?
+           ORDER BY report_date""",
+        (start_s, end.isoformat()),
+    ).fetchall()
+    before = conn.execute(
+        """SELECT report_date, created_at
+           FROM ai_reports
+           WHERE report_type = 'daily' AND report_date < ?
+           ORDER BY report_date DESC, created_at DESC LIMIT 1""",
+        (start_s,),
+    ).fetchone()
+
+    by_day = {r["report_date"]: r for r in in_range}
+    previous = {"date": before["report_date"], "created_at": before["created_at"]} if before else None
+    out: dict[str, tuple[dict[str, Any] | None, dict[str, Any] | None]] = {}
+    day = start
+    while day <= end:
+        day_s = day.isoformat()
+        row = by_day.get(day_s)
+        report = {"content": row["content"], "created_at": row["created_at"]} if row else None
+        out[day_s] = (report, previous)
+        if row:
+            previous = {"date": row["report_date"], "created_at": row["created_at"]}
+        day += timedelta(days=1)
+    return out
+
+
+def assemble_home_summary(
+    date_s: str,
+    core: dict[str, Any],
+    report: dict[str, Any] | None,
+    previous_report: dict[str, Any] | None,
+) -> dict[str, Any]:
+    """Merge the computed core with the live report fields, in response key order."""
+    return {
+        "date": date_s,
+        "report": report,
+        "sufficiency": core["sufficiency"],
+        "statusItems": core["statusItems"],
+        "attentionPoints": core["attentionPoints"],
+        "previousReport": previous_report,
+        "evidences": core["evidences"],
+    }
+
+
+def attach_home_reports(conn: sqlite3.Connection, day: date, core: dict[str, Any]) -> dict[str, Any]:
+    """Add the day's AI report and the previous daily report reference."""
+    report, previous_report = load_report_refs(conn, day, day)[day.isoformat()]
+    return assemble_home_summary(day.isoformat(), core, report, previous_report)
+
+
+def build_home_summary(conn: sqlite3.Connection, target_date: date) -> dict[str, Any]:
+    """Live computation of the full /api/home-summary payload for one day."""
+    inputs = load_home_inputs(conn, target_date, target_date)
+    core = compute_home_summary(inputs, target_date)
+    return attach_home_reports(conn, target_date, core)
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator
+
+from .db import db, init_db
+from .openclaw_ingest import PreparedPayload, ingest_prepared_many, normalize_legacy_line, prepare_payload
+
+# Lines handed to a parser worker at a time.
+CHUNK_LINES = 2000
+# Parsed chunks allowed in flight, which bounds memory on large files.
+MAX_PENDING_CHUNKS = 8
+# Events written per transaction.
+BATCH_SIZE = 20000
+
+_DEFAULT_PENDING_DIR = Path(__file__).resolve().parents[1] / ".." / "pending"
+
+ParsedLine = tuple[int, PreparedPayload | None, str | None]
+
+
+@dataclass
+class FileResult:
+    path: Path
+    lines: int = 0
+    ingested: int = 0
+    duplicate: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+def _parse_line(file_name: str, line_no: int, raw_line: str) -> PreparedPayload:
+    return prepare_payload(normalize_legacy_line(file_name, line_no, raw_line))
+
+
+def parse_chunk(file_name: str, lines: list[tuple[int, str]]) -> list[ParsedLine]:
+    """Parse and validate JSONL lines (runs in a worker process)."""
+    out: list[ParsedLine] = []
+    for line_no, raw_line in lines:
+        try:
+            out.append((line_no, _parse_line(file_name, line_no, raw_line), None))
+        except Exception as exc:
+            out.append((line_no, None, str(exc)))
+    return out
+
+
+def _read_chunks(path: Path) -> Iterator[list[tuple[int, str]]]:
+    chunk: list[tuple[int, str]] = []
+    with path.open(encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.rstrip("\r\n")
+            if not line.strip():
+                continue
+            chunk.append((line_no, line))
+            if len(chunk) >= CHUNK_LINES:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def _parsed_chunks(path: Path, executor: Executor | None) -> Iterator[list[ParsedLine]]:
+    """Parse chunks in order, keeping at most MAX_PENDING_CHUNKS in flight."""
+    if executor is None:
+        for chunk in _read_chunks(path):
+            yield parse_chunk(path.name, chunk)
+        return
+    pending: deque[Future[list[ParsedLine]]] = deque()
+    for chunk in _read_chunks(path):
+        pending.append(executor.submit(parse_chunk, path.name, chunk))
+        if len(pending) >= MAX_PENDING_CHUNKS:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def import_file(
+    path: Path,
+    *,
+    executor: Executor | None = None,
+    batch_size: int = BATCH_SIZE,
+    progress: Callable[[FileResult], None] | None = None,
+) -> FileResult:
+    """Import one JSONL file; each batch of `batch_size` events is one transaction."""
+    result = FileResult(path=path)
+    batch: list[PreparedPayload] = []
+
+    def flush() -> None:
+        if not batch:
+            return
+        with db() as conn:
+            flags = ingest_prepared_many(conn, batch)
+        new = sum(flags)
+        result.ingested += new
+        result.duplicate += len(flags) - new
+        batch.clear()
+        if progress is not None:
+            progress(result)
+
+    for parsed in _parsed_chunks(path, executor):
+        for line_no, prepared, error in parsed:
+            result.lines += 1
+            if prepared is None:
+                result.errors.append(f"line {line_no}: {error}")
+            else:
+                batch.append(prepared)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return result
+
+
+# ── pending ディレクトリ ──
+
+def candidate_files(pending_dir: Path) -> list[Path]:
+    files: list[Path] = []
+    inbox = pending_dir / "inbox"
+    if inbox.exists():
+        files.extend(sorted(inbox.glob("*.jsonl")))
+
+    # Backward compatibility: old location pending/*.jsonl
+    for p in sorted(pending_dir.glob("*.jsonl")):
+        if p.is_file():
+            files.append(p)
+    return files
+
+
+def _unique_path(path: Path) -> Path:
+    if not path.exists():
+        return path
+    idx = 1
+    while True:
+        cand = path.parent / f"{path.stem}_{idx}{path.suffix}"
+        if not cand.exists():
+            return cand
+        idx += 1
+
+
+def _move(path: Path, dest_dir: Path) -> Path:
+    """Rename into `dest_dir` (same filesystem, so the move is atomic)."""
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    dest = _unique_path(dest_dir / path.name.replace(":", "_"))
+    os.replace(path, dest)
+    return dest
+
+
+def archive_file(path: Path, pending_dir: Path) -> Path:
+    return _move(path, pending_dir / "archive" / datetime.now().date().isoformat())
+
+
+def error_file(path: Path, pending_dir: Path, errors: list[str]) -> Path:
+    # Write the .err next to its final name first, then move the file itself,
+    # so an interrupted run never leaves an error file without its report.
+    error_dir = pending_dir / "error"
+    error_dir.mkdir(parents=True, exist_ok=True)
+    dest = _unique_path(error_dir / path.name.replace(":", "_"))
+    err_path = dest.with_suffix(dest.suffix + ".err")
+    tmp = err_path.with_suffix(".err.tmp")
+    tmp.write_text("\n".join(errors) + "\n", encoding="utf-8")
+    os.replace(tmp, err_path)
+    os.replace(path, dest)
+    return dest
+
+
+def _after_import() -> None:
+    """Let the server see the new data (it only invalidates on its own writes)."""
+    from .snapshots import refresh_home_snapshots
+    from .summary import invalidate_summary_cache
+
+    with db() as conn:
+        invalidate_summary_cache(conn)
+    refresh_home_snapshots()
+
+
+def import_pending(
+    pending_dir: Path,
+    *,
+    workers: int = 1,
+    batch_size: int = BATCH_SIZE,
+    log: Callable[[str], None] = print,
+) -> int:
+    """Import every pending file; returns the number of files with errors."""
+    files = candidate_files(pending_dir)
+    if not files:
+        log(f"[importer] no jsonl files in {pending_dir}")
+        return 0
+
+    def progress(r: FileResult) -> None:
+        log(f"[importer]   {r.path.name}: {r.lines} lines, ingested={r.ingested} duplicate={r.duplicate}")
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    file_errors = 0
+    ingested = 0
+    try:
+        for path in files:
+            started = time.perf_counter()
+            r = import_file(path, executor=executor, batch_size=batch_size, progress=progress)
+            elapsed = time.perf_counter() - started
+            ingested += r.ingested
+            summary = (
+                f"{path.name} lines={r.lines} ingested={r.ingested} duplicate={r.duplicate} "
+                f"errors={len(r.errors)} ({elapsed:.2f}s)"
+            )
+            if r.errors:
+                file_errors += 1
+                error_file(path, pending_dir, r.errors)
+                log(f"[importer] error: {summary}")
+            else:
+                archive_file(path, pending_dir)
+                log(f"[importer] imported: {summary}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if ingested:
+        _after_import()
+    log(f"[importer] done files={len(files)} error_files={file_errors} ingested={ingested}")
+    return file_errors
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.importer",
+        description="Import pending OpenClaw nutrition JSONL files directly into the database.",
+    )
+    parser.add_argument("--pending-dir", default=str(_DEFAULT_PENDING_DIR), help="Pending dir path")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="Parser processes")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Events per transaction")
+    args = parser.parse_args(argv)
+
+    pending_dir = Path(args.pending_dir).resolve()
+    pending_dir.mkdir(parents=True, exist_ok=True)
+    init_db()
+    file_errors = import_pending(pending_dir, workers=args.workers, batch_size=max(args.batch_size, 1))
+    return 1 if file_errors > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time as _time
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from typing import Any, Callable, Iterable
+
+from .db import db, now_iso
+
+log = logging.getLogger(__name__)
+
+# Jobs running at once (each runs in a worker thread).
+MAX_CONCURRENT_JOBS = 2
+# Syncs arrive in bursts of batches; on-sync jobs run this long after the first one.
+SYNC_DELAY_S = 30.0
+# A daily run missed while the server was down is caught up this long after start.
+CATCH_UP_DELAY_S = 60.0
+
+
+@dataclass(frozen=True)
+class Job:
+    """A background job: `run` is a blocking callable executed in a thread.
+
+    `at` lists local "HH:MM" times it fires every day; `on_sync` also fires it
+    after each sync. Each firing waits a random 0..`jitter_s` seconds first.
+    """
+
+    name: str
+    run: Callable[[], Any]
+    at: tuple[str, ...] = ()
+    on_sync: bool = False
+    jitter_s: float = 60.0
+
+
+def next_fire(at: Iterable[str], now: datetime) -> datetime | None:
+    """Next local datetime strictly after `now` matching one of the "HH:MM" times."""
+    best: datetime | None = None
+    for hhmm in at:
+        t = time.fromisoformat(hhmm)
+        for day in (now.date(), now.date() + timedelta(days=1)):
+            candidate = datetime.combine(day, t).astimezone()
+            if candidate > now:
+                if best is None or candidate < best:
+                    best = candidate
+                break
+    return best
+
+
+def _last_fire(at: Iterable[str], now: datetime) -> datetime | None:
+    """Latest local datetime at or before `now` matching one of the "HH:MM" times."""
+    best: datetime | None = None
+    for hhmm in at:
+        t = time.fromisoformat(hhmm)
+        for day in (now.date(), now.date() - timedelta(days=1)):
+            candidate = datetime.combine(day, t).astimezone()
+            if candidate <= now:
+                if best is None or candidate > best:
+                    best = candidate
+                break
+    return best
+
+
+# ── 実行履歴（job_runs） ──
+
+def _mark_interrupted() -> None:
+    """Runs still marked running were cut short by the last shutdown."""
+    with db() as conn:
+        conn.execute("UPDATE job_runs SET last_status = 'interrupted' WHERE last_status = 'running'")
+
+
+def _load_runs() -> dict[str, dict[str, Any]]:
+    with db() as conn:
+        return {str(r["name"]): dict(r) for r in conn.execute("SELECT * FROM job_runs")}
+
+
+def _record_start(name: str, reason: str) -> None:
+    with db() as conn:
+        conn.execute(
+            """
+            INSERT INTO job_runs(name, last_started_at, last_reason, last_status)
+            VALUES(?,?,?,'running')
+            ON CONFLICT(name) DO UPDATE SET
+              last_started_at=excluded.last_started_at,
+              last_reason=excluded.last_reason,
+              last_status='running'
+            """,
+            (name, now_iso(), reason),
+        )
+
+
+def _record_finish(name: str, error: str | None, duration_ms: int) -> None:
+    with db() as conn:
+        conn.execute(
+            """
+            UPDATE job_runs SET
+              last_finished_at=?,
+              last_status=?,
+              last_error=?,
+              last_duration_ms=?,
+              runs=runs + 1,
+              failures=failures + ?
+            WHERE name = ?
+            """,
+            (now_iso(), "error" if error else "ok", error, duration_ms, 1 if error else 0, name),
+        )
+
+
+class Scheduler:
+    """Runs Jobs on the event loop: daily local-time triggers, after syncs,
+    or on demand, with jitter and a concurrency limit.
+
+    A job never overlaps itself; a trigger that arrives while it runs queues
+    one more run after it finishes.
+    """
+
+    def __init__(self, jobs: Iterable[Job], *, max_concurrency: int = MAX_CONCURRENT_JOBS) -> None:
+        self.jobs = {job.name: job for job in jobs}
+        self._max_concurrency = max_concurrency
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+        self._wake: asyncio.Event | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._next: dict[str, datetime] = {}
+        self._sync_due: datetime | None = None
+        self._running: set[str] = set()
+        self._rerun: dict[str, str] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        await asyncio.to_thread(_mark_interrupted)
+        runs = await asyncio.to_thread(_load_runs)
+        now = datetime.now().astimezone()
+        for job in self.jobs.values():
+            nxt = next_fire(job.at, now)
+            if nxt is None:
+                continue
+            last = _last_fire(job.at, now)
+            started = runs.get(job.name, {}).get("last_started_at")
+            if last is not None and (started is None or datetime.fromisoformat(started) < last):
+                nxt = now + timedelta(seconds=CATCH_UP_DELAY_S)
+            self._next[job.name] = nxt
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        tasks = [t for t in (self._task, *self._tasks) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._tasks.clear()
+
+    def notify_sync(self) -> None:
+        """Schedule the on-sync jobs (safe to call from any thread)."""
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._arm_sync)
+
+    def _arm_sync(self) -> None:
+        if self._sync_due is None:
+            self._sync_due = datetime.now().astimezone() + timedelta(seconds=SYNC_DELAY_S)
+            self._wake.set()
+
+    def run_now(self, name: str) -> bool:
+        """Fire a job immediately, without jitter (safe to call from any thread)."""
+        if name not in self.jobs or self._loop is None or self._loop.is_closed():
+            return False
+        self._loop.call_soon_threadsafe(self._spawn, self.jobs[name], "manual", 0.0)
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            now = datetime.now().astimezone()
+            for name, due in list(self._next.items()):
+                if due <= now:
+                    job = self.jobs[name]
+                    self._spawn(job, "schedule", job.jitter_s)
+                    self._next[name] = next_fire(job.at, now) or now + timedelta(days=1)
+            if self._sync_due is not None and self._sync_due <= now:
+                self._sync_due = None
+                for job in self.jobs.values():
+                    if job.on_sync:
+                        self._spawn(job, "sync", job.jitter_s)
+
+            dues = [*self._next.values(), *([self._sync_due] if self._sync_due else [])]
+            timeout = max((min(dues) - now).total_seconds(), 0.0) if dues else None
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _spawn(self, job: Job, reason: str, jitter_s: float) -> None:
+        if job.name in self._running:
+            self._rerun[job.name] = reason
+            return
+        self._running.add(job.name)
+        task = asyncio.create_task(self._execute(job, reason, jitter_s))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, job: Job, reason: str, jitter_s: float) -> None:
+        try:
+            while True:
+                if jitter_s > 0:
+                    await asyncio.sleep(random.uniform(0.0, jitter_s))
+                async with self._semaphore:
+                    await asyncio.to_thread(_record_start, job.name, reason)
+                    started = _time.perf_counter()
+                    error = None
+                    try:
+                        await asyncio.to_thread(job.run)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as exc:
+                        log.exception("job %s failed", job.name)
+                        error = f"{type(exc).__name__}: {exc}"
+                    duration_ms = int((_time.perf_counter() - started) * 1000)
+                    await asyncio.to_thread(_record_finish, job.name, error, duration_ms)
+                if job.name not in self._rerun:
+                    break
+                reason = self._rerun.pop(job.name)
+                jitter_s = 0.0
+        finally:
+            self._running.discard(job.name)
+            self._rerun.pop(job.name, None)
+
+    def status(self) -> list[dict[str, Any]]:
+        runs = _load_runs()
+        out = []
+        for name, job in self.jobs.items():
+            run = runs.get(name, {})
+            nxt = self._next.get(name)
+            out.append(
+                {
+                    "name": name,
+                    "at": list(job.at),
+                    "onSync": job.on_sync,
+                    "running": name in self._running,
+                    "nextRunAt": nxt.isoformat() if nxt else None,
+                    "lastStartedAt": run.get("last_started_at"),
+                    "lastFinishedAt": run.get("last_finished_at"),
+                    "lastReason": run.get("last_reason"),
+                    "lastStatus": run.get("last_status"),
+                    "lastError": run.get("last_error"),
+                    "lastDurationMs": run.get("last_duration_ms"),
+                    "runs": int(run.get("runs") or 0),
+                    "failures": int(run.get("failures") or 0),
+                }
+            )
+        return out
@@ -1,21 +1,21 @@
 ﻿from __future__ import annotations
 
-import csv
 import datetime as _dt
 import hashlib
-import io
 import json
 import os
+import sqlite3
 from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
-from fastapi import Depends, FastAPI, HTTPException, Response
+from fastapi import BackgroundTasks, Depends, FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from .db import DB_PATH, db, dumps_payload, init_db, iso, now_iso
+from .db import DB_PATH, LOCAL_TZ, db, dumps_payload, init_db, iso, now_iso, run_backfills
+from .counters import has_records, list_record_counters, reconcile_record_counters, total_record_count
 from .discovery import start_discovery_thread
 from .models import (
     IntakeCaloriesUpsertRequest,
@@ -25,25 +25,102 @@ from .models import (
     SyncResponse,
     ProfileUpdateRequest,
     ReportSaveRequest,
+    ReportGenerateRequest,
 )
 from .security import require_api_key
-from .summary import build_summary
-from .report import build_yesterday_report
-from .nutrition import log_alias, log_event
+from .summary import SUMMARY_CACHE_KEY, build_summary, invalidate_summary_cache
+from .report import get_daily_report, refresh_yesterday_report
+from .nutrition import NutritionEvent, alias_event, log_events
+from .foods import food_event, get_food, suggest_foods
 from .openclaw_ingest import ingest_openclaw_payload
 from .profile import get_profile, upsert_profile
-from .reports import save_report, list_reports, get_report, delete_report
+from .reports import (
+    REPORT_SECTIONS,
+    decode_cursor,
+    delete_report,
+    encode_cursor,
+    get_report,
+    get_report_section,
+    list_reports,
+    save_report,
+)
 from .prompt_gen import build_prompt, calc_nutrient_targets
+from .prompt_compact import DEFAULT_TOKEN_BUDGET, estimate_tokens
+from .snapshots import get_home_summaries, get_home_summary, refresh_home_snapshots
+from .columnar import parse_fields, project_fields, to_columnar
+from .section_cache import cached_section
+from .memo import flush_memo_usage, memo_stats, memoized
+from .versions import current_version, scope_version, window_version
+from .window import materialize_health_window
+from .encoding import EncodingMiddleware, NegotiatedResponse
+from .timing import TimingMiddleware, mark_sync, record_cache
+from .events import event_stream, publish_changes
+from .jobs import Job, Scheduler
+from .generation import ReportGenerator, backend_from_env
+
+
+# ── バックグラウンドジョブ ──
+
+def _precompute_prompts() -> None:
+    for prompt_type in ("daily", "weekly", "monthly"):
+        build_prompt(prompt_type)
+
+
+def _precompute_nutrient_targets() -> None:
+    today = _dt.date.today()
+    with db() as conn:
+        for day in (today - _dt.timedelta(days=1), today):
+            _memoized_nutrient_targets(conn, day.isoformat())
+
+
+# LLM_BACKEND 未設定ならサーバー側のレポート生成は無効（従来どおり外部から POST）。
+_llm_backend = backend_from_env()
+report_generator = ReportGenerator(_llm_backend) if _llm_backend else None
+
+
+def _generate_ai_reports() -> None:
+    results = report_generator.generate_all()
+    failed = [r for r in results if r.status == "error"]
+    if failed:
+        raise RuntimeError("; ".join(f"{r.report_type}: {r.error}" for r in failed))
+
+
+# 日付が変わった直後と同期のあとに、初回リクエストで重くなる成果物を作っておく。
+scheduler = Scheduler(
+    [
+        Job("homeSnapshots", refresh_home_snapshots, at=("00:05",), on_sync=True),
+        Job("yesterdayReport", refresh_yesterday_report, at=("00:10",), on_sync=True),
+        Job("prompts", _precompute_prompts, at=("00:10",), on_sync=True),
+        Job("nutrientTargets", _precompute_nutrient_targets, at=("00:10",), on_sync=True),
+        *([Job("aiReports", _generate_ai_reports, at=("00:30",))] if report_generator else []),
+        # マイグレーションが積んだ大きなバックフィル（起動時に残っていれば実行、中断しても続きから）。
+        Job("schemaBackfill", run_backfills, jitter_s=0.0),
+    ]
+)
 
 
 @asynccontextmanager
 async def _lifespan(_: FastAPI):
-    init_db()
+    pending_backfills = init_db()
     start_discovery_thread()
-    yield
-
-
-app = FastAPI(title="Health Connect Sync Bridge (Local PC)", version="0.1.0", lifespan=_lifespan)
+    await scheduler.start()
+    if pending_backfills:
+        scheduler.run_now("schemaBackfill")
+    try:
+        yield
+    finally:
+        await scheduler.stop()
+        # メモキャッシュのヒット数・最終利用時刻はメモリに溜めているので書き戻す。
+        with db() as conn:
+            flush_memo_usage(conn)
+
+
+app = FastAPI(
+    title="Health Connect Sync Bridge (Local PC)",
+    version="0.1.0",
+    lifespan=_lifespan,
+    default_response_class=NegotiatedResponse,
+)
 _CF_ACCESS_EMAIL = os.getenv("CF_ACCESS_EMAIL", "").strip().lower()
 
 app.add_middleware(
@@ -52,6 +129,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Accept: application/msgpack|cbor and Accept-Encoding: br|gzip negotiation
+app.add_middleware(EncodingMiddleware)
 
 @app.middleware("http")
 async def _enforce_cf_access_email(request, call_next):
@@ -68,6 +147,10 @@ async def _enforce_cf_access_email(request, call_next):
     return await call_next(request)
 
 
+# Outermost, so Server-Timing covers every other middleware (compression included).
+app.add_middleware(TimingMiddleware)
+
+
 def _stable_json(obj: Any) -> str:
     return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
 
@@ -98,7 +181,7 @@ def compute_record_key(device_id: str, r: dict[str, Any]) -> str:
 @app.get("/api/status", response_model=StatusResponse)
 def status(_: None = Depends(require_api_key)) -> StatusResponse:
     with db() as conn:
-        total = conn.execute("SELECT COUNT(*) AS c FROM health_records").fetchone()["c"]
+        total = total_record_count(conn)
         last = conn.execute(
             "SELECT received_at, sync_id FROM sync_runs ORDER BY received_at DESC LIMIT 1"
         ).fetchone()
@@ -117,14 +200,13 @@ def healthz() -> dict[str, bool]:
     return {"ok": True}
 
 
-_SUMMARY_CACHE_KEY = "summary_v1"
 _SUMMARY_TTL = 300  # 5分
 
 
 def _get_cached_summary(conn) -> dict | None:
     row = conn.execute(
         "SELECT data, cached_at FROM summary_cache WHERE cache_key = ?",
-        (_SUMMARY_CACHE_KEY,),
+        (SUMMARY_CACHE_KEY,),
     ).fetchone()
     if row is None:
         return None
@@ -139,74 +221,77 @@ def _set_cached_summary(conn, data: dict) -> None:
     conn.execute(
         "INSERT OR REPLACE INTO summary_cache (cache_key, data, cached_at) VALUES (?, ?, ?)",
         (
-            _SUMMARY_CACHE_KEY,
+            SUMMARY_CACHE_KEY,
             json.dumps(data, ensure_ascii=False),
             _dt.datetime.now(_dt.timezone.utc).isoformat(),
         ),
     )
 
 
-def _invalidate_summary_cache(conn) -> None:
-    conn.execute("DELETE FROM summary_cache WHERE cache_key = ?", (_SUMMARY_CACHE_KEY,))
-
-
 @app.get("/api/summary")
 def summary(
     date: str | None = None,
+    format: str = "json",
+    fields: str | None = None,
     _: None = Depends(require_api_key),
-) -> dict[str, Any]:
+) -> Response:
+    """全期間サマリー。
+
+    format=columnar で日付軸を共有した列形式、fields=a,b でトップレベルキーを絞り込む。
+    """
+    if format not in ("json", "columnar"):
+        raise HTTPException(status_code=400, detail="format は json | columnar")
+    field_list = parse_fields(fields)
+
     # When date is specified, use date-specific cache key
-    cache_key = f"summary_v1_{date}" if date else _SUMMARY_CACHE_KEY
+    cache_key = f"{SUMMARY_CACHE_KEY}_{date}" if date else SUMMARY_CACHE_KEY
     with db() as conn:
         row = conn.execute(
             "SELECT data, cached_at FROM summary_cache WHERE cache_key = ?",
             (cache_key,),
         ).fetchone()
+        result = None
         if row is not None:
             cached_at = _dt.datetime.fromisoformat(row["cached_at"])
             age = (_dt.datetime.now(_dt.timezone.utc) - cached_at).total_seconds()
             if age <= _SUMMARY_TTL:
-                return json.loads(row["data"])
+                result = json.loads(row["data"])
+
+        record_cache("summary", hit=result is not None)
+        if result is None:
+            result = build_summary()
+            conn.execute(
+                "INSERT OR REPLACE INTO summary_cache (cache_key, data, cached_at) VALUES (?, ?, ?)",
+                (cache_key, json.dumps(result, ensure_ascii=False),
+                 _dt.datetime.now(_dt.timezone.utc).isoformat()),
+            )
 
-        result = build_summary()
-        conn.execute(
-            "INSERT OR REPLACE INTO summary_cache (cache_key, data, cached_at) VALUES (?, ?, ?)",
-            (cache_key, json.dumps(result, ensure_ascii=False),
-             _dt.datetime.now(_dt.timezone.utc).isoformat()),
-        )
-        return result
+    result = project_fields(result, field_list)
+    if format == "columnar":
+        result = to_columnar(result)
+    # 大きなペイロードなので jsonable_encoder を通さず直接エンコードする
+    return NegotiatedResponse(result)
 
 
 @app.get("/api/report/yesterday")
 def report_yesterday(_: None = Depends(require_api_key)) -> dict[str, Any]:
-    return {"text": build_yesterday_report()}
+    yday = datetime.now().astimezone(LOCAL_TZ).date() - _dt.timedelta(days=1)
+    with db() as conn:
+        return {"text": get_daily_report(conn, yday)}
 
 
 @app.get("/api/nutrition/day")
 def nutrition_day(date: str, _: None = Depends(require_api_key)) -> dict[str, Any]:
     from .nutrition import get_day_events, get_day_totals
-    import re as _re
 
     events = get_day_events(date)
     totals = get_day_totals(date)
 
     ai_comment = None
     with db() as conn:
-        report_row = conn.execute(
-            """SELECT content FROM ai_reports
-               WHERE report_date = ? AND report_type = 'daily'
-               ORDER BY created_at DESC LIMIT 1""",
-            (date,),
-        ).fetchone()
-
-    if report_row:
-        content = str(report_row["content"] or "")
-        m = _re.search(r"<!--NUTRITIONIST-->([\s\S]*?)<!--/NUTRITIONIST-->", content, _re.IGNORECASE)
-        if m:
-            ai_comment = m.group(1).strip() or None
-        else:
-            fallback = content.strip()
-            ai_comment = fallback[:200] if fallback else None
+        report = get_report_section(conn, date, "daily", "nutritionist")
+    if report:
+        ai_comment = report["body"] or report["preview"] or None
 
     return {
         "date": date,
@@ -216,8 +301,142 @@ def nutrition_day(date: str, _: None = Depends(require_api_key)) -> dict[str, An
     }
 
 
+# Year charts on the meal tab read at most this many days per request.
+_NUTRITION_RANGE_MAX_DAYS = 366
+
+
+@app.get("/api/nutrition/range")
+def nutrition_range(
+    from_: str | None = Query(default=None, alias="from"),
+    to: str | None = None,
+    keys: str | None = None,
+    _: None = Depends(require_api_key),
+) -> dict[str, Any]:
+    """日別×栄養素の合計（nutrition_daily_totals から1クエリ）。
+
+    values[i][j] は dates[i] の keys[j] 合計（記録なしは null）。
+    keys 省略時は期間内に記録のある栄養素すべて。
+    """
+    from .nutrition import get_range_totals
+
+    dates = _validate_date_span(from_, to, max_days=_NUTRITION_RANGE_MAX_DAYS)
+    key_list = parse_fields(keys)
+    totals = get_range_totals(dates[0], dates[-1], key_list)
+    if key_list is None:
+        key_list = sorted({k for day in totals.values() for k in day})
+    return {
+        "from": dates[0],
+        "to": dates[-1],
+        "dates": dates,
+        "keys": key_list,
+        "values": [[totals.get(d, {}).get(k) for k in key_list] for d in dates],
+    }
+
+
+@app.get("/api/foods/suggest")
+def foods_suggest(
+    q: str = "",
+    limit: int = Query(default=10, ge=1, le=50),
+    _: None = Depends(require_api_key),
+) -> dict[str, Any]:
+    """食品・サプリのオートコンプリート（使用回数×最近さで順位付け）。
+
+    返した id は /api/nutrition/log の {"food_id": id} でそのまま再記録できる（再推定なし）。
+    """
+    with db() as conn:
+        return {"q": q, "items": suggest_foods(conn, q, limit)}
+
+
+def _parse_consumed_at(obj: dict[str, Any]) -> datetime | None:
+    """consumed_at (ISO8601) or local_date (YYYY-MM-DD, logged at 12:00 local)."""
+    from .db import LOCAL_TZ
+
+    ca = obj.get("consumed_at") or obj.get("consumedAt")
+    if isinstance(ca, str) and ca:
+        try:
+            return datetime.fromisoformat(ca.replace("Z", "+00:00")).astimezone(LOCAL_TZ)
+        except Exception:
+            return None
+    ld = obj.get("local_date") or obj.get("localDate")
+    if isinstance(ld, str) and ld:
+        try:
+            d = datetime.fromisoformat(ld)
+            # put it at noon local time
+            return d.replace(hour=12, minute=0, second=0, microsecond=0, tzinfo=LOCAL_TZ)
+        except Exception:
+            return None
+    return None
+
+
+def _nutrition_event(obj: dict[str, Any], consumed_at: datetime | None) -> NutritionEvent | None:
+    """Build one event from a food_id, alias or label item (None if it has none)."""
+    count = float(obj.get("count") or 1)
+    note = obj.get("note")
+
+    food_id = obj.get("food_id")
+    if food_id is not None:
+        with db() as conn:
+            food = get_food(conn, int(food_id))
+        if food is None:
+            raise ValueError(f"Unknown food_id: {food_id}")
+        return food_event(food, consumed_at=consumed_at, count=count, note=note)
+
+    alias = obj.get("alias")
+    if alias:
+        return alias_event(str(alias), consumed_at=consumed_at, count=count, note=note)
+
+    label = obj.get("label")
+    if not label:
+        return None
+    kcal = obj.get("kcal")
+    protein_g = obj.get("protein_g")
+    fat_g = obj.get("fat_g")
+    carbs_g = obj.get("carbs_g")
+
+    k2 = float(kcal) if kcal is not None else None
+    p2 = float(protein_g) if protein_g is not None else None
+    f2 = float(fat_g) if fat_g is not None else None
+    c2 = float(carbs_g) if carbs_g is not None else None
+
+    # Estimate micronutrients first, then let provided values override.
+    from .estimator import merge_micros_with_estimate
+
+    micros2 = merge_micros_with_estimate(
+        str(label),
+        kcal=k2,
+        protein_g=p2,
+        fat_g=f2,
+        carbs_g=c2,
+        provided_micros=obj.get("micros"),
+    )
+    return NutritionEvent(
+        consumed_at=consumed_at,
+        alias=None,
+        label=str(label),
+        count=count,
+        kcal=k2,
+        protein_g=p2,
+        fat_g=f2,
+        carbs_g=c2,
+        micros=micros2,
+        note=note,
+    )
+
+
+def _log_nutrition_events(events: list[NutritionEvent]) -> list[int]:
+    # Events, nutrients and the summary cache invalidation share one commit.
+    with db() as conn:
+        ids = log_events(events, conn)
+        invalidate_summary_cache(conn)
+    return ids
+
+
 @app.post("/api/nutrition/log")
-def nutrition_log(payload: dict[str, Any], _: None = Depends(require_api_key)) -> dict[str, Any]:
+def nutrition_log(
+    payload: dict[str, Any],
+    background_tasks: BackgroundTasks,
+    _: None = Depends(require_api_key),
+) -> dict[str, Any]:
     """Log manual nutrition/supplements.
 
     Supports backfilling by specifying either:
@@ -228,132 +447,28 @@ def nutrition_log(payload: dict[str, Any], _: None = Depends(require_api_key)) -
     - {"alias":"protein", "count":1}
     - {"items":[{"alias":"protein","count":1},{"alias":"vitamin_d","count":1}]}
     - {"label":"something", "count":1, "kcal":300, "protein_g":6, "fat_g":1, "carbs_g":70}
+    - {"food_id":12, "count":1}  (entry from /api/foods/suggest)
     """
 
-    from datetime import datetime
-    from .db import LOCAL_TZ
-
-    def parse_consumed_at(obj: dict[str, Any]) -> datetime | None:
-        ca = obj.get("consumed_at") or obj.get("consumedAt")
-        if isinstance(ca, str) and ca:
-            try:
-                return datetime.fromisoformat(ca.replace("Z", "+00:00")).astimezone(LOCAL_TZ)
-            except Exception:
-                return None
-        ld = obj.get("local_date") or obj.get("localDate")
-        if isinstance(ld, str) and ld:
-            try:
-                d = datetime.fromisoformat(ld)
-                # put it at noon local time
-                return d.replace(hour=12, minute=0, second=0, microsecond=0, tzinfo=LOCAL_TZ)
-            except Exception:
-                return None
-        return None
+    background_tasks.add_task(refresh_home_snapshots)
+    background_tasks.add_task(publish_changes)
 
     try:
         items = payload.get("items")
         if isinstance(items, list):
+            events = []
             for it in items:
                 if not isinstance(it, dict):
                     continue
-                consumed_at = parse_consumed_at(it) or parse_consumed_at(payload)
-                alias = it.get("alias")
-                label = it.get("label")
-                count = float(it.get("count") or 1)
-                note = it.get("note")
-                kcal = it.get("kcal")
-                protein_g = it.get("protein_g")
-                fat_g = it.get("fat_g")
-                carbs_g = it.get("carbs_g")
-                micros = it.get("micros")
-
-                if alias:
-                    log_alias(str(alias), consumed_at=consumed_at, count=count, note=note)
-                elif label:
-                    k2 = float(kcal) if kcal is not None else None
-                    p2 = float(protein_g) if protein_g is not None else None
-                    f2 = float(fat_g) if fat_g is not None else None
-                    c2 = float(carbs_g) if carbs_g is not None else None
-
-                    # Estimate micronutrients first, then let provided values override.
-                    from .estimator import merge_micros_with_estimate
-
-                    micros2 = merge_micros_with_estimate(
-                        str(label),
-                        kcal=k2,
-                        protein_g=p2,
-                        fat_g=f2,
-                        carbs_g=c2,
-                        provided_micros=micros,
-                    )
-
-                    log_event(
-                        consumed_at=consumed_at,
-                        alias=None,
-                        label=str(label),
-                        count=count,
-                        kcal=k2,
-                        protein_g=p2,
-                        fat_g=f2,
-                        carbs_g=c2,
-                        micros=micros2,
-                        note=note,
-                    )
-            with db() as conn:
-                _invalidate_summary_cache(conn)
+                ev = _nutrition_event(it, _parse_consumed_at(it) or _parse_consumed_at(payload))
+                if ev is not None:
+                    events.append(ev)
+            _log_nutrition_events(events)
             return {"ok": True, "count": len(items)}
 
-        consumed_at = parse_consumed_at(payload)
-
-        alias = payload.get("alias")
-        if alias:
-            count = float(payload.get("count") or 1)
-            note = payload.get("note")
-            log_alias(str(alias), consumed_at=consumed_at, count=count, note=note)
-            with db() as conn:
-                _invalidate_summary_cache(conn)
-            return {"ok": True}
-
-        label = payload.get("label")
-        if label:
-            count = float(payload.get("count") or 1)
-            note = payload.get("note")
-            kcal = payload.get("kcal")
-            protein_g = payload.get("protein_g")
-            fat_g = payload.get("fat_g")
-            carbs_g = payload.get("carbs_g")
-            micros = payload.get("micros")
-
-            k2 = float(kcal) if kcal is not None else None
-            p2 = float(protein_g) if protein_g is not None else None
-            f2 = float(fat_g) if fat_g is not None else None
-            c2 = float(carbs_g) if carbs_g is not None else None
-
-            from .estimator import merge_micros_with_estimate
-
-            micros2 = merge_micros_with_estimate(
-                str(label),
-                kcal=k2,
-                protein_g=p2,
-                fat_g=f2,
-                carbs_g=c2,
-                provided_micros=micros,
-            )
-
-            log_event(
-                consumed_at=consumed_at,
-                alias=None,
-                label=str(label),
-                count=count,
-                kcal=k2,
-                protein_g=p2,
-                fat_g=f2,
-                carbs_g=c2,
-                micros=micros2,
-                note=note,
-            )
-            with db() as conn:
-                _invalidate_summary_cache(conn)
+        ev = _nutrition_event(payload, _parse_consumed_at(payload))
+        if ev is not None:
+            _log_nutrition_events([ev])
             return {"ok": True}
 
         raise HTTPException(status_code=400, detail="Invalid payload")
@@ -361,9 +476,42 @@ def nutrition_log(payload: dict[str, Any], _: None = Depends(require_api_key)) -
         raise HTTPException(status_code=400, detail=f"Invalid payload: {exc}") from exc
 
 
+@app.post("/api/nutrition/log/bulk")
+def nutrition_log_bulk(
+    payload: dict[str, Any],
+    background_tasks: BackgroundTasks,
+    _: None = Depends(require_api_key),
+) -> dict[str, Any]:
+    """複数アイテムを1トランザクションで記録する。
+
+    {"items":[...], "local_date"|"consumed_at": 既定値} 。各アイテムは /api/nutrition/log と同じ形。
+    1件でも不正なら何も記録せず 400。作成したイベントIDを入力順で返す。
+    """
+    items = payload.get("items")
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail="items は1件以上の配列で指定してください")
+
+    default_at = _parse_consumed_at(payload)
+    events = []
+    for i, it in enumerate(items):
+        try:
+            ev = _nutrition_event(it, _parse_consumed_at(it) or default_at) if isinstance(it, dict) else None
+        except (ValueError, TypeError) as exc:
+            raise HTTPException(status_code=400, detail=f"items[{i}] が不正です: {exc}") from exc
+        if ev is None:
+            raise HTTPException(status_code=400, detail=f"items[{i}] には alias か label が必要です")
+        events.append(ev)
+
+    ids = _log_nutrition_events(events)
+    background_tasks.add_task(refresh_home_snapshots)
+    background_tasks.add_task(publish_changes)
+    return {"ok": True, "count": len(ids), "ids": ids}
+
+
 @app.delete("/api/nutrition/log/{event_id}")
 def nutrition_log_delete(
     event_id: int,
+    background_tasks: BackgroundTasks,
     _: None = Depends(require_api_key),
 ) -> dict:
     from .nutrition import delete_event
@@ -372,21 +520,69 @@ def nutrition_log_delete(
     if not ok:
         raise HTTPException(status_code=404, detail="Event not found")
     with db() as conn:
-        _invalidate_summary_cache(conn)
+        invalidate_summary_cache(conn)
+    background_tasks.add_task(refresh_home_snapshots)
+    background_tasks.add_task(publish_changes)
     return {"ok": True, "deleted_id": event_id}
 
 
 @app.post("/api/openclaw/ingest")
-def openclaw_ingest(payload: dict[str, Any], _: None = Depends(require_api_key)) -> dict[str, Any]:
+def openclaw_ingest(
+    payload: dict[str, Any],
+    background_tasks: BackgroundTasks,
+    _: None = Depends(require_api_key),
+) -> dict[str, Any]:
     try:
-        return ingest_openclaw_payload(payload)
+        result = ingest_openclaw_payload(payload)
     except (ValueError, TypeError) as exc:
         raise HTTPException(status_code=400, detail=f"Invalid payload: {exc}") from exc
+    background_tasks.add_task(refresh_home_snapshots)
+    background_tasks.add_task(publish_changes)
+    return result
+
+
+_OPENCLAW_BULK_MAX_EVENTS = 5000
+
+
+@app.post("/api/openclaw/ingest/bulk")
+def openclaw_ingest_bulk(
+    payload: dict[str, Any],
+    background_tasks: BackgroundTasks,
+    _: None = Depends(require_api_key),
+) -> dict[str, Any]:
+    """複数の OpenClaw イベントを1トランザクションで取り込む。
+
+    {"events":[<ingest と同じ形>, ...]} 。イベントごとに ingested/duplicate を返し、
+    不正なイベントは ok=false と error を付けてスキップする（他のイベントは取り込む）。
+    """
+    from .openclaw_ingest import ingest_openclaw_bulk
+
+    events = payload.get("events")
+    if not isinstance(events, list) or not events:
+        raise HTTPException(status_code=400, detail="events は1件以上の配列で指定してください")
+    if len(events) > _OPENCLAW_BULK_MAX_EVENTS:
+        raise HTTPException(status_code=400, detail=f"events は最大 {_OPENCLAW_BULK_MAX_EVENTS} 件です")
+
+    results = ingest_openclaw_bulk(events)
+    ingested = sum(r["ingested"] for r in results)
+    if ingested:
+        with db() as conn:
+            invalidate_summary_cache(conn)
+        background_tasks.add_task(refresh_home_snapshots)
+        background_tasks.add_task(publish_changes)
+    return {
+        "ok": all(r["ok"] for r in results),
+        "ingested": ingested,
+        "duplicate": sum(r["duplicate"] for r in results),
+        "failed": sum(1 for r in results if not r["ok"]),
+        "results": results,
+    }
 
 
 @app.post("/api/intake", response_model=IntakeCaloriesUpsertResponse)
 def upsert_intake(
     req: IntakeCaloriesUpsertRequest,
+    background_tasks: BackgroundTasks,
     _: None = Depends(require_api_key),
 ) -> IntakeCaloriesUpsertResponse:
     source = (req.source or "openclaw").strip() or "openclaw"
@@ -404,7 +600,9 @@ def upsert_intake(
             """,
             (req.day.isoformat(), float(req.intakeKcal), source, req.note, updated_at),
         )
-        _invalidate_summary_cache(conn)
+        invalidate_summary_cache(conn)
+    background_tasks.add_task(refresh_home_snapshots)
+    background_tasks.add_task(publish_changes)
 
     return IntakeCaloriesUpsertResponse(
         ok=True,
@@ -423,7 +621,11 @@ def ui() -> Response:
 
 
 @app.post("/api/sync", response_model=SyncResponse)
-def sync(req: SyncRequest, _: None = Depends(require_api_key)) -> SyncResponse:
+def sync(
+    req: SyncRequest,
+    background_tasks: BackgroundTasks,
+    _: None = Depends(require_api_key),
+) -> SyncResponse:
     upserted = 0
     skipped = 0
 
@@ -486,43 +688,71 @@ def sync(req: SyncRequest, _: None = Depends(require_api_key)) -> SyncResponse:
             "UPDATE sync_runs SET upserted_count=?, skipped_count=? WHERE sync_id=?",
             (upserted, skipped, req.syncId),
         )
-        _invalidate_summary_cache(conn)
+        invalidate_summary_cache(conn)
 
+    background_tasks.add_task(refresh_home_snapshots)
+    background_tasks.add_task(publish_changes)
+    scheduler.notify_sync()
+    mark_sync()
     return SyncResponse(accepted=True, upsertedCount=upserted, skippedCount=skipped)
 
 
-@app.get("/api/export.csv")
-def export_csv(type: str | None = None, _: None = Depends(require_api_key)) -> Response:
-    with db() as conn:
-        if type:
-            rows = conn.execute(
-                "SELECT * FROM health_records WHERE type=? ORDER BY ingested_at ASC", (type,)
-            ).fetchall()
-        else:
-            rows = conn.execute("SELECT * FROM health_records ORDER BY ingested_at ASC").fetchall()
-
-    out = io.StringIO()
-    w = csv.writer(out)
-    w.writerow(
-        [
-            "record_key",
-            "device_id",
-            "type",
-            "record_id",
-            "source",
-            "start_time",
-            "end_time",
-            "time",
-            "last_modified_time",
-            "unit",
-            "payload_json",
-            "ingested_at",
-        ]
+def _export_response(
+    fmt: str,
+    type: str | None,
+    device: str | None,
+    from_: str | None,
+    to: str | None,
+    gzip: bool,
+) -> StreamingResponse:
+    from .export import FORMATS, parquet_available, stream_export
+
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail="format は csv | ndjson | parquet")
+    if fmt == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="parquet 出力には pyarrow のインストールが必要です")
+    try:
+        from_date = _dt.date.fromisoformat(from_) if from_ else None
+        to_date = _dt.date.fromisoformat(to) if to else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="from / to は YYYY-MM-DD 形式") from exc
+
+    media_type, ext = FORMATS[fmt]
+    filename = f"health_records.{ext}" + (".gz" if gzip else "")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        media_type = "application/gzip"
+    return StreamingResponse(
+        stream_export(fmt, type=type, device=device, from_date=from_date, to_date=to_date, gzip=gzip),
+        media_type=media_type,
+        headers=headers,
     )
-    for r in rows:
-        w.writerow([r[c] for c in r.keys()])
 
-    return Response(content=out.getvalue(), media_type="text/csv")
+
+@app.get("/api/export.csv")
+def export_csv(
+    type: str | None = None,
+    device: str | None = None,
+    from_: str | None = Query(default=None, alias="from"),
+    to: str | None = None,
+    gzip: bool = False,
+    _: None = Depends(require_api_key),
+) -> StreamingResponse:
+    return _export_response("csv", type, device, from_, to, gzip)
+
+
+@app.get("/api/export")
+def export_records(
+    format: str = "csv",
+    type: str | None = None,
+    device: str | None = None,
+    from_: str | None = Query(default=None, alias="from"),
+    to: str | None = None,
+    gzip: bool = False,
+    _: None = Depends(require_api_key),
+) -> StreamingResponse:
+    """health_records をストリーミングで書き出す（csv | ndjson | parquet、gzip 任意）。"""
+    return _export_response(format, type, device, from_, to, gzip)
 
 # ── プロフィール ──────────────────────────────────────────────
 
@@ -534,8 +764,11 @@ def profile_get(_: None = Depends(require_api_key)) -> dict:
 @app.put("/api/profile")
 def profile_put(
     req: ProfileUpdateRequest,
+    background_tasks: BackgroundTasks,
     _: None = Depends(require_api_key),
 ) -> dict:
+    background_tasks.add_task(refresh_home_snapshots)
+    background_tasks.add_task(publish_changes)
     return upsert_profile(**req.model_dump())
 
 
@@ -543,6 +776,10 @@ def profile_put(
 
 @app.get("/api/supplements")
 def supplements_get(_: None = Depends(require_api_key)) -> dict:
+    return _supplements_payload()
+
+
+def _supplements_payload() -> dict:
     from .nutrition import CATALOG
     return {
         "supplements": [
@@ -564,15 +801,41 @@ def supplements_get(_: None = Depends(require_api_key)) -> dict:
 @app.get("/api/prompt")
 def prompt_get(
     type: str = "daily",
+    compact: bool = False,
+    budget: int = Query(default=DEFAULT_TOKEN_BUDGET, ge=100, le=50000),
     _: None = Depends(require_api_key),
 ) -> dict:
+    """compact=true で表形式・差分のみの圧縮版（budget は推定トークン数の上限）。"""
     if type not in ("daily", "weekly", "monthly"):
         raise HTTPException(status_code=400, detail="type must be daily | weekly | monthly")
     try:
-        prompt = build_prompt(type)
+        prompt = build_prompt(type, compact=compact, token_budget=budget)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
-    return {"type": type, "prompt": prompt}
+    return {"type": type, "prompt": prompt, "estimatedTokens": estimate_tokens(prompt)}
+
+
+@app.get("/api/cache/stats")
+def cache_stats(_: None = Depends(require_api_key)) -> dict[str, Any]:
+    """プロンプト・栄養素ターゲットのメモ化キャッシュの件数とヒット率。"""
+    with db() as conn:
+        return memo_stats(conn)
+
+
+# ── バックグラウンドジョブ状態 ────────────────────────────────
+
+@app.get("/api/jobs")
+def jobs_status(_: None = Depends(require_api_key)) -> dict[str, Any]:
+    return {"jobs": scheduler.status()}
+
+
+@app.post("/api/jobs/{name}/run")
+def jobs_run(name: str, _: None = Depends(require_api_key)) -> dict[str, Any]:
+    if name not in scheduler.jobs:
+        raise HTTPException(status_code=404, detail="ジョブが見つかりません")
+    if not scheduler.run_now(name):
+        raise HTTPException(status_code=503, detail="スケジューラが起動していません")
+    return {"ok": True, "name": name}
 
 
 # ── AIレポート CRUD ───────────────────────────────────────────
@@ -590,12 +853,56 @@ def reports_create(
     )
 
 
+@app.post("/api/reports/generate")
+def reports_generate(
+    req: ReportGenerateRequest | None = None,
+    _: None = Depends(require_api_key),
+) -> dict:
+    """build_prompt → LLM → save_report をサーバー側で実行（同じプロンプトなら再利用）。"""
+    if report_generator is None:
+        raise HTTPException(status_code=503, detail="LLM_BACKEND が設定されていません")
+    req = req or ReportGenerateRequest()
+    results = report_generator.generate_all(tuple(dict.fromkeys(req.types)), force=req.force)
+    return {
+        "ok": all(r.status != "error" for r in results),
+        "backend": report_generator.backend.name,
+        "results": [r.to_dict() for r in results],
+    }
+
+
 @app.get("/api/reports")
 def reports_list(
     report_type: str | None = None,
+    q: str | None = None,
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: str | None = None,
+    _: None = Depends(require_api_key),
+) -> dict:
+    """新しい順（report_date, id）。続きは nextCursor を cursor に渡して取得。"""
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="cursor が不正です")
+    reports = list_reports(report_type=report_type, limit=limit + 1, q=q, after=after)
+    next_cursor = encode_cursor(reports[limit - 1]) if len(reports) > limit else None
+    return {"reports": reports[:limit], "nextCursor": next_cursor}
+
+
+@app.get("/api/reports/section")
+def reports_section(
+    date: str,
+    section: str,
+    report_type: str = "daily",
     _: None = Depends(require_api_key),
 ) -> dict:
-    return {"reports": list_reports(report_type=report_type)}
+    """レポートの専門家セクション1つだけ（保存時に分割済み）。"""
+    if section not in REPORT_SECTIONS:
+        raise HTTPException(status_code=400, detail=f"section は {' / '.join(REPORT_SECTIONS)} のいずれか")
+    with db() as conn:
+        data = get_report_section(conn, date, report_type, section)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return data
 
 
 @app.get("/api/reports/{report_id}")
@@ -631,33 +938,72 @@ def nutrients_targets(
         except ValueError as exc:
             raise HTTPException(status_code=400, detail="date は YYYY-MM-DD 形式で指定してください") from exc
 
-    profile = get_profile() or {}
-    height = float(profile.get("height_cm") or 172.0)
-    birth_year = int(profile.get("birth_year") or 1985)
-    sex = str(profile.get("sex") or "male")
-
-    # 最新体重を health_records から直接取得（build_summary() の呼び出しを避ける）
-    latest_weight = 70.0  # fallback
     with db() as conn:
-        row = conn.execute(
-            "SELECT payload_json FROM health_records WHERE type='WeightRecord' ORDER BY time DESC LIMIT 1"
-        ).fetchone()
+        return _memoized_nutrient_targets(conn, date or _dt.date.today().isoformat())
+
+
+def _memoized_nutrient_targets(conn: sqlite3.Connection, day: str) -> dict:
+    profile = get_profile(conn) or {}
+    inputs = {
+        "date": day,
+        "today": _dt.date.today().isoformat(),  # age
+        "profileUpdatedAt": profile.get("updated_at"),
+        "version": scope_version(conn, "type:WeightRecord", f"day:{day}"),
+    }
+    return memoized(conn, "nutrientTargets", inputs, lambda: _nutrients_targets_payload(conn, day, profile))
+
+
+# 最新値として読むレコード種別と、payload 内の値のキー（先に見つかったもの）。
+_LATEST_VALUE_KEYS: dict[str, tuple[str, ...]] = {
+    "WeightRecord": ("inKilograms", "kilograms", "kg"),
+    "BodyFatRecord": ("percentage", "pct", "value"),
+    "BasalMetabolicRateRecord": ("inKilocaloriesPerDay", "kcalPerDay", "value"),
+}
+
+
+def _latest_value(
+    conn: sqlite3.Connection,
+    record_type: str,
+    on_or_before: str | None = None,
+    *,
+    table: str = "health_records",
+) -> float | None:
+    """最新値（on_or_before 指定時はその日以前で最新）。栄養目標・身体タブ共通。"""
+    sql = f"SELECT payload_json FROM {table} WHERE type = ?"
+    params: tuple[Any, ...] = (record_type,)
+    if on_or_before is not None:
+        sql += " AND date(time) <= ?"
+        params += (on_or_before,)
+    row = conn.execute(sql + " ORDER BY time DESC LIMIT 1", params).fetchone()
     if row:
         try:
             payload = json.loads(row["payload_json"])
-            for key in ("inKilograms", "kilograms", "kg"):
-                if key in payload and payload[key] is not None:
-                    latest_weight = float(payload[key])
-                    break
+            for key in _LATEST_VALUE_KEYS[record_type]:
+                if payload.get(key) is not None:
+                    return float(payload[key])
         except Exception:
             pass
+    return None
+
+
+def _latest_weight_kg(conn: sqlite3.Connection) -> float | None:
+    """最新体重を health_records から直接取得（build_summary() の呼び出しを避ける）。"""
+    return _latest_value(conn, "WeightRecord")
+
+
+def _nutrients_targets_payload(conn: sqlite3.Connection, date: str | None, profile: dict) -> dict:
+    height = float(profile.get("height_cm") or 172.0)
+    birth_year = int(profile.get("birth_year") or 1985)
+    sex = str(profile.get("sex") or "male")
+    latest_weight = _latest_weight_kg(conn)
 
     targets = calc_nutrient_targets(
         height_cm=height,
-        weight_kg=latest_weight,
+        weight_kg=latest_weight if latest_weight is not None else 70.0,  # fallback
         birth_year=birth_year,
         sex=sex,
         local_date=date,
+        conn=conn,
     )
     return {"targets": targets}
 
@@ -698,137 +1044,147 @@ def _validate_date_period(date: str | None, period: str) -> str:
     return date
 
 
+_MAX_RANGE_DAYS = 31
+
+_BODY_TYPES = ("WeightRecord", "BodyFatRecord", "BasalMetabolicRateRecord")
+_ACTIVITY_TYPES = (
+    "StepsRecord",
+    "ActiveCaloriesBurnedRecord",
+    "DistanceRecord",
+    "TotalCaloriesBurnedRecord",
+    "ExerciseSessionRecord",
+)
+_SLEEP_TYPES = ("SleepSessionRecord", "OxygenSaturationRecord")
+_VITALS_TYPES = ("BloodPressureRecord", "RestingHeartRateRecord")
+
+
+def _validate_date_span(from_: str | None, to: str | None, max_days: int = _MAX_RANGE_DAYS) -> list[str]:
+    """Validate from/to (both YYYY-MM-DD, inclusive). Returns every date in the span."""
+    if from_ is None or to is None:
+        raise HTTPException(status_code=400, detail="from と to は両方指定してください")
+    try:
+        start = _dt2.date.fromisoformat(from_)
+        end = _dt2.date.fromisoformat(to)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="from / to は YYYY-MM-DD 形式") from exc
+    if start > end:
+        raise HTTPException(status_code=400, detail="from は to 以前の日付を指定してください")
+    n_days = (end - start).days + 1
+    if n_days > max_days:
+        raise HTTPException(status_code=400, detail=f"from〜to は最大{max_days}日")
+    return [(start + _dt2.timedelta(days=i)).isoformat() for i in range(n_days)]
+
+
+def _tab_response(
+    build: Callable[..., dict[str, Any]],
+    types: tuple[str, ...],
+    date: str | None,
+    period: str,
+    from_: str | None,
+    to: str | None,
+) -> dict[str, Any]:
+    """Single-date tab payload, or a {date: payload} map when from/to is given.
+
+    Range mode reads the union of all requested windows once into a temp table
+    (see materialize_health_window) and evaluates each date against it.
+    """
+    if from_ is None and to is None:
+        base_date = _validate_date_period(date, period)
+        with db() as conn:
+            return build(conn, base_date, period)
+
+    _validate_date_period(None, period)
+    days = _validate_date_span(from_, to)
+    window_start, _ = _date_range(days[0], period)
+    with db() as conn:
+        window = materialize_health_window(conn, types, window_start, days[-1])
+        return {
+            "from": days[0],
+            "to": days[-1],
+            "period": period,
+            "days": {d: build(conn, d, period, window) for d in days},
+        }
+
+
 @app.get("/api/body-data")
 def body_data(
     date: str | None = None,
     period: str = "week",
+    from_: str | None = Query(default=None, alias="from"),
+    to: str | None = None,
     _: None = Depends(require_api_key),
 ) -> dict[str, Any]:
-    base_date = _validate_date_period(date, period)
-    start_date, end_date = _date_range(base_date, period)
-
-    with db() as conn:
-        # Latest weight/body fat on or before base_date
-        latest_w = conn.execute(
-            """SELECT payload_json, time FROM health_records
-               WHERE type='WeightRecord' AND date(time) <= ?
-               ORDER BY time DESC LIMIT 1""",
-            (base_date,),
-        ).fetchone()
+    return _tab_response(_body_data_payload, _BODY_TYPES, date, period, from_, to)
 
-        latest_bf = conn.execute(
-            """SELECT payload_json, time FROM health_records
-               WHERE type='BodyFatRecord' AND date(time) <= ?
-               ORDER BY time DESC LIMIT 1""",
-            (base_date,),
-        ).fetchone()
-
-        latest_bmr = conn.execute(
-            """SELECT payload_json, time FROM health_records
-               WHERE type='BasalMetabolicRateRecord' AND date(time) <= ?
-               ORDER BY time DESC LIMIT 1""",
-            (base_date,),
-        ).fetchone()
 
-        # Series data
-        if period == "year":
-            # Monthly averages
-            weight_rows = conn.execute(
-                """SELECT strftime('%Y-%m', time) AS month,
-                          AVG(
-                            COALESCE(
-                              CAST(json_extract(payload_json,'$.inKilograms') AS REAL),
-                              CAST(json_extract(payload_json,'$.kilograms') AS REAL),
-                              CAST(json_extract(payload_json,'$.kg') AS REAL),
-                              CAST(json_extract(payload_json,'$.weight') AS REAL),
-                              CAST(json_extract(payload_json,'$.value') AS REAL)
-                            )
-                          ) AS weight_kg
-                   FROM health_records
-                   WHERE type='WeightRecord' AND date(time) BETWEEN ? AND ?
-                   GROUP BY month ORDER BY month""",
-                (start_date, end_date),
-            ).fetchall()
-            bf_rows = conn.execute(
-                """SELECT strftime('%Y-%m', time) AS month,
-                          AVG(CAST(json_extract(payload_json,'$.percentage') AS REAL)) AS body_fat_pct
-                   FROM health_records
-                   WHERE type='BodyFatRecord' AND date(time) BETWEEN ? AND ?
-                   GROUP BY month ORDER BY month""",
-                (start_date, end_date),
-            ).fetchall()
-        else:
-            weight_rows = conn.execute(
-                """SELECT date(time) AS d,
-                          AVG(
-                            COALESCE(
-                              CAST(json_extract(payload_json,'$.inKilograms') AS REAL),
-                              CAST(json_extract(payload_json,'$.kilograms') AS REAL),
-                              CAST(json_extract(payload_json,'$.kg') AS REAL),
-                              CAST(json_extract(payload_json,'$.weight') AS REAL),
-                              CAST(json_extract(payload_json,'$.value') AS REAL)
-                            )
-                          ) AS weight_kg
-                   FROM health_records
-                   WHERE type='WeightRecord' AND date(time) BETWEEN ? AND ?
-                   GROUP BY d ORDER BY d""",
-                (start_date, end_date),
-            ).fetchall()
-            bf_rows = conn.execute(
-                """SELECT date(time) AS d,
-                          AVG(CAST(json_extract(payload_json,'$.percentage') AS REAL)) AS body_fat_pct
-                   FROM health_records
-                   WHERE type='BodyFatRecord' AND date(time) BETWEEN ? AND ?
-                   GROUP BY d ORDER BY d""",
-                (start_date, end_date),
-            ).fetchall()
-
-        # Profile（height, goal_weight）
-        profile_row = conn.execute(
-            "SELECT height_cm, goal_weight_kg FROM user_profile LIMIT 1"
-        ).fetchone()
-        goal_weight = profile_row["goal_weight_kg"] if profile_row else None
+def _body_data_payload(
+    conn: sqlite3.Connection, base_date: str, period: str, table: str = "health_records"
+) -> dict[str, Any]:
+    start_date, end_date = _date_range(base_date, period)
 
-    # Parse current values
-    def _parse_weight(row) -> float | None:
-        if not row:
-            return None
-        try:
-            p = json.loads(row["payload_json"])
-            for k in ("inKilograms", "kilograms", "kg"):
-                if p.get(k) is not None:
-                    return float(p[k])
-        except Exception:
-            pass
-        return None
+    # Latest weight/body fat/BMR on or before base_date
+    cur_weight = _latest_value(conn, "WeightRecord", base_date, table=table)
+    cur_bf = _latest_value(conn, "BodyFatRecord", base_date, table=table)
+    cur_bmr = _latest_value(conn, "BasalMetabolicRateRecord", base_date, table=table)
 
-    def _parse_bf(row) -> float | None:
-        if not row:
-            return None
-        try:
-            p = json.loads(row["payload_json"])
-            for k in ("percentage", "pct", "value"):
-                if p.get(k) is not None:
-                    return float(p[k])
-        except Exception:
-            pass
-        return None
-
-    def _parse_bmr(row) -> float | None:
-        if not row:
-            return None
-        try:
-            p = json.loads(row["payload_json"])
-            for k in ("inKilocaloriesPerDay", "kcalPerDay", "value"):
-                if p.get(k) is not None:
-                    return float(p[k])
-        except Exception:
-            pass
-        return None
+    # Series data
+    if period == "year":
+        # Monthly averages
+        weight_rows = conn.execute(
+            f"""SELECT strftime('%Y-%m', time) AS month,
+                      AVG(
+                        COALESCE(
+                          CAST(json_extract(payload_json,'$.inKilograms') AS REAL),
+                          CAST(json_extract(payload_json,'$.kilograms') AS REAL),
+                          CAST(json_extract(payload_json,'$.kg') AS REAL),
+                          CAST(json_extract(payload_json,'$.weight') AS REAL),
+                          CAST(json_extract(payload_json,'$.value') AS REAL)
+                        )
+                      ) AS weight_kg
+               FROM {table}
+               WHERE type='WeightRecord' AND date(time) BETWEEN ? AND ?
+               GROUP BY month ORDER BY month""",
+            (start_date, end_date),
+        ).fetchall()
+        bf_rows = conn.execute(
+            f"""SELECT strftime('%Y-%m', time) AS month,
+                      AVG(CAST(json_extract(payload_json,'$.percentage') AS REAL)) AS body_fat_pct
+               FROM {table}
+               WHERE type='BodyFatRecord' AND date(time) BETWEEN ? AND ?
+               GROUP BY month ORDER BY month""",
+            (start_date, end_date),
+        ).fetchall()
+    else:
+        weight_rows = conn.execute(
+            f"""SELECT date(time) AS d,
+                      AVG(
+                        COALESCE(
+                          CAST(json_extract(payload_json,'$.inKilograms') AS REAL),
+                          CAST(json_extract(payload_json,'$.kilograms') AS REAL),
+                          CAST(json_extract(payload_json,'$.kg') AS REAL),
+                          CAST(json_extract(payload_json,'$.weight') AS REAL),
+                          CAST(json_extract(payload_json,'$.value') AS REAL)
+                        )
+                      ) AS weight_kg
+               FROM {table}
+               WHERE type='WeightRecord' AND date(time) BETWEEN ? AND ?
+               GROUP BY d ORDER BY d""",
+            (start_date, end_date),
+        ).fetchall()
+        bf_rows = conn.execute(
+            f"""SELECT date(time) AS d,
+                      AVG(CAST(json_extract(payload_json,'$.percentage') AS REAL)) AS body_fat_pct
+               FROM {table}
+               WHERE type='BodyFatRecord' AND date(time) BETWEEN ? AND ?
+               GROUP BY d ORDER BY d""",
+            (start_date, end_date),
+        ).fetchall()
 
-    cur_weight = _parse_weight(latest_w)
-    cur_bf = _parse_bf(latest_bf)
-    cur_bmr = _parse_bmr(latest_bmr)
+    # Profile（height, goal_weight）
+    profile_row = conn.execute(
+        "SELECT height_cm, goal_weight_kg FROM user_profile LIMIT 1"
+    ).fetchone()
+    goal_weight = profile_row["goal_weight_kg"] if profile_row else None
 
     # BMI from weight + profile height
     bmi = None
@@ -890,9 +1246,16 @@ def body_data(
 def activity_data(
     date: str | None = None,
     period: str = "week",
+    from_: str | None = Query(default=None, alias="from"),
+    to: str | None = None,
     _: None = Depends(require_api_key),
 ) -> dict[str, Any]:
-    base_date = _validate_date_period(date, period)
+    return _tab_response(_activity_data_payload, _ACTIVITY_TYPES, date, period, from_, to)
+
+
+def _activity_data_payload(
+    conn: sqlite3.Connection, base_date: str, period: str, table: str = "health_records"
+) -> dict[str, Any]:
     start_date, end_date = _date_range(base_date, period)
 
     EXERCISE_LABELS: dict[int, str] = {
@@ -915,85 +1278,84 @@ def activity_data(
         87: "ウォーキング", 97: "エリプティカル",
     }
 
-    with db() as conn:
-        # Steps
-        if period == "year":
-            steps_rows = conn.execute(
-                """SELECT strftime('%Y-%m', start_time) AS d,
-                          SUM(CAST(json_extract(payload_json,'$.count') AS REAL)) AS steps
-                   FROM health_records WHERE type='StepsRecord' AND date(start_time) BETWEEN ? AND ?
-                   GROUP BY d ORDER BY d""",
-                (start_date, end_date),
-            ).fetchall()
-        else:
-            steps_rows = conn.execute(
-                """SELECT date(start_time) AS d,
-                          SUM(CAST(json_extract(payload_json,'$.count') AS REAL)) AS steps
-                   FROM health_records WHERE type='StepsRecord' AND date(start_time) BETWEEN ? AND ?
-                   GROUP BY d ORDER BY d""",
-                (start_date, end_date),
-            ).fetchall()
-
-        # Active calories
-        if period == "year":
-            active_cal_rows = conn.execute(
-                """SELECT strftime('%Y-%m', start_time) AS d,
-                          SUM(CAST(json_extract(payload_json,'$.inKilocalories') AS REAL)) AS active_kcal
-                   FROM health_records WHERE type='ActiveCaloriesBurnedRecord' AND date(start_time) BETWEEN ? AND ?
-                   GROUP BY d ORDER BY d""",
-                (start_date, end_date),
-            ).fetchall()
-        else:
-            active_cal_rows = conn.execute(
-                """SELECT date(start_time) AS d,
-                          SUM(CAST(json_extract(payload_json,'$.inKilocalories') AS REAL)) AS active_kcal
-                   FROM health_records WHERE type='ActiveCaloriesBurnedRecord' AND date(start_time) BETWEEN ? AND ?
-                   GROUP BY d ORDER BY d""",
-                (start_date, end_date),
-            ).fetchall()
-
-        # Today's steps/calories
-        today_steps_row = conn.execute(
-            """SELECT SUM(CAST(json_extract(payload_json,'$.count') AS REAL)) AS steps
-               FROM health_records WHERE type='StepsRecord' AND date(start_time) = ?""",
-            (base_date,),
-        ).fetchone()
-        today_active_row = conn.execute(
-            """SELECT SUM(CAST(json_extract(payload_json,'$.inKilocalories') AS REAL)) AS kcal
-               FROM health_records WHERE type='ActiveCaloriesBurnedRecord' AND date(start_time) = ?""",
-            (base_date,),
-        ).fetchone()
-        today_dist_row = conn.execute(
-            """SELECT SUM(
-                        COALESCE(
-                          CAST(json_extract(payload_json,'$.inMeters') AS REAL),
-                          CAST(json_extract(payload_json,'$.meters') AS REAL),
-                          0
-                        )
-                      ) AS meters
-               FROM health_records WHERE type='DistanceRecord' AND date(start_time) = ?""",
-            (base_date,),
-        ).fetchone()
-        today_total_row = conn.execute(
-            """SELECT SUM(CAST(json_extract(payload_json,'$.inKilocalories') AS REAL)) AS kcal
-               FROM health_records WHERE type='TotalCaloriesBurnedRecord' AND date(start_time) = ?""",
-            (base_date,),
-        ).fetchone()
+    # Steps
+    if period == "year":
+        steps_rows = conn.execute(
+            f"""SELECT strftime('%Y-%m', start_time) AS d,
+                      SUM(CAST(json_extract(payload_json,'$.count') AS REAL)) AS steps
+               FROM {table} WHERE type='StepsRecord' AND date(start_time) BETWEEN ? AND ?
+               GROUP BY d ORDER BY d""",
+            (start_date, end_date),
+        ).fetchall()
+    else:
+        steps_rows = conn.execute(
+            f"""SELECT date(start_time) AS d,
+                      SUM(CAST(json_extract(payload_json,'$.count') AS REAL)) AS steps
+               FROM {table} WHERE type='StepsRecord' AND date(start_time) BETWEEN ? AND ?
+               GROUP BY d ORDER BY d""",
+            (start_date, end_date),
+        ).fetchall()
 
-        # Exercise sessions for the period (last 7 days for week, base_date for others)
-        ex_start = start_date if period == "week" else base_date
-        exercise_rows = conn.execute(
-            """SELECT date(start_time) AS d, start_time, end_time,
-                      json_extract(payload_json,'$.exerciseType') AS etype,
-                      json_extract(payload_json,'$.title') AS title,
-                      json_extract(payload_json,'$.totalDistance.inMeters') AS dist_m,
-                      json_extract(payload_json,'$.energy.inKilocalories') AS kcal
-               FROM health_records WHERE type='ExerciseSessionRecord'
-               AND date(start_time) BETWEEN ? AND ?
-               ORDER BY start_time DESC LIMIT 20""",
-            (ex_start, base_date),
+    # Active calories
+    if period == "year":
+        active_cal_rows = conn.execute(
+            f"""SELECT strftime('%Y-%m', start_time) AS d,
+                      SUM(CAST(json_extract(payload_json,'$.inKilocalories') AS REAL)) AS active_kcal
+               FROM {table} WHERE type='ActiveCaloriesBurnedRecord' AND date(start_time) BETWEEN ? AND ?
+               GROUP BY d ORDER BY d""",
+            (start_date, end_date),
+        ).fetchall()
+    else:
+        active_cal_rows = conn.execute(
+            f"""SELECT date(start_time) AS d,
+                      SUM(CAST(json_extract(payload_json,'$.inKilocalories') AS REAL)) AS active_kcal
+               FROM {table} WHERE type='ActiveCaloriesBurnedRecord' AND date(start_time) BETWEEN ? AND ?
+               GROUP BY d ORDER BY d""",
+            (start_date, end_date),
         ).fetchall()
 
+    # Today's steps/calories
+    today_steps_row = conn.execute(
+        f"""SELECT SUM(CAST(json_extract(payload_json,'$.count') AS REAL)) AS steps
+           FROM {table} WHERE type='StepsRecord' AND date(start_time) = ?""",
+        (base_date,),
+    ).fetchone()
+    today_active_row = conn.execute(
+        f"""SELECT SUM(CAST(json_extract(payload_json,'$.inKilocalories') AS REAL)) AS kcal
+           FROM {table} WHERE type='ActiveCaloriesBurnedRecord' AND date(start_time) = ?""",
+        (base_date,),
+    ).fetchone()
+    today_dist_row = conn.execute(
+        f"""SELECT SUM(
+                    COALESCE(
+                      CAST(json_extract(payload_json,'$.inMeters') AS REAL),
+                      CAST(json_extract(payload_json,'$.meters') AS REAL),
+                      0
+                    )
+                  ) AS meters
+           FROM {table} WHERE type='DistanceRecord' AND date(start_time) = ?""",
+        (base_date,),
+    ).fetchone()
+    today_total_row = conn.execute(
+        f"""SELECT SUM(CAST(json_extract(payload_json,'$.inKilocalories') AS REAL)) AS kcal
+           FROM {table} WHERE type='TotalCaloriesBurnedRecord' AND date(start_time) = ?""",
+        (base_date,),
+    ).fetchone()
+
+    # Exercise sessions for the period (last 7 days for week, base_date for others)
+    ex_start = start_date if period == "week" else base_date
+    exercise_rows = conn.execute(
+        f"""SELECT date(start_time) AS d, start_time, end_time,
+                  json_extract(payload_json,'$.exerciseType') AS etype,
+                  json_extract(payload_json,'$.title') AS title,
+                  json_extract(payload_json,'$.totalDistance.inMeters') AS dist_m,
+                  json_extract(payload_json,'$.energy.inKilocalories') AS kcal
+           FROM {table} WHERE type='ExerciseSessionRecord'
+           AND date(start_time) BETWEEN ? AND ?
+           ORDER BY start_time DESC LIMIT 20""",
+        (ex_start, base_date),
+    ).fetchall()
+
     steps_by = {r["d"]: r["steps"] for r in steps_rows}
     active_by = {r["d"]: r["active_kcal"] for r in active_cal_rows}
 
@@ -1061,32 +1423,38 @@ def activity_data(
 def sleep_data(
     date: str | None = None,
     period: str = "week",
+    from_: str | None = Query(default=None, alias="from"),
+    to: str | None = None,
     _: None = Depends(require_api_key),
 ) -> dict[str, Any]:
-    base_date = _validate_date_period(date, period)
+    return _tab_response(_sleep_data_payload, _SLEEP_TYPES, date, period, from_, to)
+
+
+def _sleep_data_payload(
+    conn: sqlite3.Connection, base_date: str, period: str, table: str = "health_records"
+) -> dict[str, Any]:
     start_date, end_date = _date_range(base_date, period)
 
     SLEEP_STAGES = {1: "awake", 2: "sleep", 3: "out", 4: "light", 5: "deep", 6: "rem", 7: "awake"}
     SLEEP_TYPES = {"sleep", "light", "deep", "rem"}
 
-    with db() as conn:
-        sleep_rows = conn.execute(
-            """SELECT date(start_time) AS d, start_time, end_time, payload_json
-               FROM health_records WHERE type='SleepSessionRecord'
-               AND date(start_time) BETWEEN ? AND ?
-               ORDER BY start_time""",
-            (start_date, end_date),
-        ).fetchall()
-
-        spo2_rows = conn.execute(
-            """SELECT date(time) AS d,
-                      AVG(CAST(json_extract(payload_json,'$.percentage') AS REAL)) AS avg_spo2,
-                      MIN(CAST(json_extract(payload_json,'$.percentage') AS REAL)) AS min_spo2
-               FROM health_records WHERE type='OxygenSaturationRecord'
-               AND date(time) BETWEEN ? AND ?
-               GROUP BY d""",
-            (start_date, end_date),
-        ).fetchall()
+    sleep_rows = conn.execute(
+        f"""SELECT date(start_time) AS d, start_time, end_time, payload_json
+           FROM {table} WHERE type='SleepSessionRecord'
+           AND date(start_time) BETWEEN ? AND ?
+           ORDER BY start_time""",
+        (start_date, end_date),
+    ).fetchall()
+
+    spo2_rows = conn.execute(
+        f"""SELECT date(time) AS d,
+                  AVG(CAST(json_extract(payload_json,'$.percentage') AS REAL)) AS avg_spo2,
+                  MIN(CAST(json_extract(payload_json,'$.percentage') AS REAL)) AS min_spo2
+           FROM {table} WHERE type='OxygenSaturationRecord'
+           AND date(time) BETWEEN ? AND ?
+           GROUP BY d""",
+        (start_date, end_date),
+    ).fetchall()
 
     # Parse sleep sessions
     from datetime import datetime as _datetime
@@ -1212,91 +1580,97 @@ def sleep_data(
 def vitals_data(
     date: str | None = None,
     period: str = "week",
+    from_: str | None = Query(default=None, alias="from"),
+    to: str | None = None,
     _: None = Depends(require_api_key),
 ) -> dict[str, Any]:
-    base_date = _validate_date_period(date, period)
+    return _tab_response(_vitals_data_payload, _VITALS_TYPES, date, period, from_, to)
+
+
+def _vitals_data_payload(
+    conn: sqlite3.Connection, base_date: str, period: str, table: str = "health_records"
+) -> dict[str, Any]:
     start_date, end_date = _date_range(base_date, period)
 
-    with db() as conn:
-        # Blood pressure
-        if period == "year":
-            bp_rows = conn.execute(
-                """SELECT strftime('%Y-%m', time) AS d,
-                          AVG(
-                            COALESCE(
-                              CAST(json_extract(payload_json,'$.systolic.inMillimetersOfMercury') AS REAL),
-                              CAST(json_extract(payload_json,'$.systolic') AS REAL)
-                            )
-                          ) AS systolic,
-                          AVG(
-                            COALESCE(
-                              CAST(json_extract(payload_json,'$.diastolic.inMillimetersOfMercury') AS REAL),
-                              CAST(json_extract(payload_json,'$.diastolic') AS REAL)
-                            )
-                          ) AS diastolic
-                   FROM health_records WHERE type='BloodPressureRecord' AND date(time) BETWEEN ? AND ?
-                   GROUP BY d ORDER BY d""",
-                (start_date, end_date),
-            ).fetchall()
-        else:
-            bp_rows = conn.execute(
-                """SELECT date(time) AS d,
-                          AVG(
-                            COALESCE(
-                              CAST(json_extract(payload_json,'$.systolic.inMillimetersOfMercury') AS REAL),
-                              CAST(json_extract(payload_json,'$.systolic') AS REAL)
-                            )
-                          ) AS systolic,
-                          AVG(
-                            COALESCE(
-                              CAST(json_extract(payload_json,'$.diastolic.inMillimetersOfMercury') AS REAL),
-                              CAST(json_extract(payload_json,'$.diastolic') AS REAL)
-                            )
-                          ) AS diastolic
-                   FROM health_records WHERE type='BloodPressureRecord' AND date(time) BETWEEN ? AND ?
-                   GROUP BY d ORDER BY d""",
-                (start_date, end_date),
-            ).fetchall()
-
-        # Resting HR
-        if period == "year":
-            hr_rows = conn.execute(
-                """SELECT strftime('%Y-%m', time) AS d,
-                          AVG(CAST(json_extract(payload_json,'$.beatsPerMinute') AS REAL)) AS rhr
-                   FROM health_records WHERE type='RestingHeartRateRecord' AND date(time) BETWEEN ? AND ?
-                   GROUP BY d ORDER BY d""",
-                (start_date, end_date),
-            ).fetchall()
-        else:
-            hr_rows = conn.execute(
-                """SELECT date(time) AS d,
-                          AVG(CAST(json_extract(payload_json,'$.beatsPerMinute') AS REAL)) AS rhr
-                   FROM health_records WHERE type='RestingHeartRateRecord' AND date(time) BETWEEN ? AND ?
-                   GROUP BY d ORDER BY d""",
-                (start_date, end_date),
-            ).fetchall()
-
-        # Today's values
-        today_bp = conn.execute(
-            """SELECT COALESCE(
-                        json_extract(payload_json,'$.systolic.inMillimetersOfMercury'),
-                        json_extract(payload_json,'$.systolic')
-                      ) AS sys,
-                      COALESCE(
-                        json_extract(payload_json,'$.diastolic.inMillimetersOfMercury'),
-                        json_extract(payload_json,'$.diastolic')
-                      ) AS dia
-               FROM health_records WHERE type='BloodPressureRecord' AND date(time) <= ?
-               ORDER BY time DESC LIMIT 1""",
-            (base_date,),
-        ).fetchone()
+    # Blood pressure
+    if period == "year":
+        bp_rows = conn.execute(
+            f"""SELECT strftime('%Y-%m', time) AS d,
+                      AVG(
+                        COALESCE(
+                          CAST(json_extract(payload_json,'$.systolic.inMillimetersOfMercury') AS REAL),
+                          CAST(json_extract(payload_json,'$.systolic') AS REAL)
+                        )
+                      ) AS systolic,
+                      AVG(
+                        COALESCE(
+                          CAST(json_extract(payload_json,'$.diastolic.inMillimetersOfMercury') AS REAL),
+                          CAST(json_extract(payload_json,'$.diastolic') AS REAL)
+                        )
+                      ) AS diastolic
+               FROM {table} WHERE type='BloodPressureRecord' AND date(time) BETWEEN ? AND ?
+               GROUP BY d ORDER BY d""",
+            (start_date, end_date),
+        ).fetchall()
+    else:
+        bp_rows = conn.execute(
+            f"""SELECT date(time) AS d,
+                      AVG(
+                        COALESCE(
+                          CAST(json_extract(payload_json,'$.systolic.inMillimetersOfMercury') AS REAL),
+                          CAST(json_extract(payload_json,'$.systolic') AS REAL)
+                        )
+                      ) AS systolic,
+                      AVG(
+                        COALESCE(
+                          CAST(json_extract(payload_json,'$.diastolic.inMillimetersOfMercury') AS REAL),
+                          CAST(json_extract(payload_json,'$.diastolic') AS REAL)
+                        )
+                      ) AS diastolic
+               FROM {table} WHERE type='BloodPressureRecord' AND date(time) BETWEEN ? AND ?
+               GROUP BY d ORDER BY d""",
+            (start_date, end_date),
+        ).fetchall()
 
-        today_hr = conn.execute(
-            """SELECT json_extract(payload_json,'$.beatsPerMinute') AS bpm
-               FROM health_records WHERE type='RestingHeartRateRecord' AND date(time) <= ?
-               ORDER BY time DESC LIMIT 1""",
-            (base_date,),
-        ).fetchone()
+    # Resting HR
+    if period == "year":
+        hr_rows = conn.execute(
+            f"""SELECT strftime('%Y-%m', time) AS d,
+                      AVG(CAST(json_extract(payload_json,'$.beatsPerMinute') AS REAL)) AS rhr
+               FROM {table} WHERE type='RestingHeartRateRecord' AND date(time) BETWEEN ? AND ?
+               GROUP BY d ORDER BY d""",
+            (start_date, end_date),
+        ).fetchall()
+    else:
+        hr_rows = conn.execute(
+            f"""SELECT date(time) AS d,
+                      AVG(CAST(json_extract(payload_json,'$.beatsPerMinute') AS REAL)) AS rhr
+               FROM {table} WHERE type='RestingHeartRateRecord' AND date(time) BETWEEN ? AND ?
+               GROUP BY d ORDER BY d""",
+            (start_date, end_date),
+        ).fetchall()
+
+    # Today's values
+    today_bp = conn.execute(
+        f"""SELECT COALESCE(
+                    json_extract(payload_json,'$.systolic.inMillimetersOfMercury'),
+                    json_extract(payload_json,'$.systolic')
+                  ) AS sys,
+                  COALESCE(
+                    json_extract(payload_json,'$.diastolic.inMillimetersOfMercury'),
+                    json_extract(payload_json,'$.diastolic')
+                  ) AS dia
+           FROM {table} WHERE type='BloodPressureRecord' AND date(time) <= ?
+           ORDER BY time DESC LIMIT 1""",
+        (base_date,),
+    ).fetchone()
+
+    today_hr = conn.execute(
+        f"""SELECT json_extract(payload_json,'$.beatsPerMinute') AS bpm
+           FROM {table} WHERE type='RestingHeartRateRecord' AND date(time) <= ?
+           ORDER BY time DESC LIMIT 1""",
+        (base_date,),
+    ).fetchone()
 
     bp_by = {r["d"]: r for r in bp_rows}
     hr_by = {r["d"]: r["rhr"] for r in hr_rows}
@@ -1348,776 +1722,169 @@ def vitals_data(
 @app.get("/api/home-summary")
 def home_summary(
     date: str | None = None,
+    from_: str | None = Query(default=None, alias="from"),
+    to: str | None = None,
     _: None = Depends(require_api_key),
 ) -> dict[str, Any]:
     """ホーム画面専用の軽量エンドポイント。
 
     AI レポート + 数値付き充足ステータス + 注目ポイント + 後方互換データを返す。
+    日別スナップショット（home_snapshots）が最新ならそのまま返し、古い場合のみ再計算する。
+    from/to 指定時は期間内の各日を1回の読み込みから計算し、日付をキーにしたマップで返す。
     """
-    import datetime as _dt3
-    from .db import LOCAL_TZ
-
-    DEFAULT_SLEEP_TARGET_MIN = 420
-    SLEEP_DEFICIT_PCT = 0.70
-    SLEEP_WEEKLY_PCT = 0.80
-    DEFAULT_STEPS_TARGET = 8000
-
-    severity_rank = {"critical": 4, "warning": 3, "info": 2, "positive": 1}
-    category_rank = {"threshold": 1, "trend": 2, "achievement": 3}
+    if from_ is not None or to is not None:
+        days = _validate_date_span(from_, to)
+        with db() as conn:
+            summaries = get_home_summaries(
+                conn, _dt.date.fromisoformat(days[0]), _dt.date.fromisoformat(days[-1])
+            )
+        return {"from": days[0], "to": days[-1], "days": summaries}
 
     if date is None:
-        target_date = _dt3.date.today()
-        date = target_date.isoformat()
+        target_date = _dt.date.today()
     else:
         try:
-            target_date = _dt3.date.fromisoformat(date)
+            target_date = _dt.date.fromisoformat(date)
         except ValueError as exc:
             raise HTTPException(status_code=400, detail="date は YYYY-MM-DD 形式") from exc
 
-    prev_date = (target_date - _dt3.timedelta(days=1)).isoformat()
-    next_date = (target_date + _dt3.timedelta(days=1)).isoformat()
-    trend_14_start = (target_date - _dt3.timedelta(days=13)).isoformat()
-    trend_30_start = (target_date - _dt3.timedelta(days=30)).isoformat()
-    sleep_window_start = (target_date - _dt3.timedelta(days=8)).isoformat()
-
-    def _parse_iso_dt(value: Any) -> _dt3.datetime | None:
-        if not isinstance(value, str) or not value:
-            return None
-        try:
-            dt = _dt3.datetime.fromisoformat(value.replace("Z", "+00:00"))
-        except ValueError:
-            return None
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=_dt3.timezone.utc)
-        return dt
-
-    def _to_local_day(value: Any) -> str | None:
-        dt = _parse_iso_dt(value)
-        if dt is None:
-            return None
-        return dt.astimezone(LOCAL_TZ).date().isoformat()
-
-    def _to_float(value: Any) -> float | None:
-        if isinstance(value, bool) or value is None:
-            return None
-        if isinstance(value, (int, float)):
-            return float(value)
-        if isinstance(value, str):
-            try:
-                return float(value)
-            except ValueError:
-                return None
-        return None
-
-    def _find_number(value: Any, key_candidates: set[str], depth: int = 0) -> float | None:
-        if depth > 6 or value is None:
-            return None
-        if isinstance(value, dict):
-            for key in key_candidates:
-                if key in value:
-                    num = _to_float(value.get(key))
-                    if num is not None:
-                        return num
-            for nested in value.values():
-                hit = _find_number(nested, key_candidates, depth + 1)
-                if hit is not None:
-                    return hit
-            return None
-        if isinstance(value, list):
-            for nested in value:
-                hit = _find_number(nested, key_candidates, depth + 1)
-                if hit is not None:
-                    return hit
-            return None
-        return _to_float(value)
-
-    def _extract_weight_kg(payload_json: str) -> float | None:
-        try:
-            payload = json.loads(payload_json)
-        except Exception:
-            return None
-        return _find_number(
-            payload,
-            {
-                "inKilograms",
-                "kilograms",
-                "kg",
-                "weight",
-                "value",
-                "inGrams",
-                "grams",
-            },
-        )
+    with db() as conn:
+        return get_home_summary(conn, target_date)
 
-    def _extract_bp(payload_json: str) -> tuple[float | None, float | None]:
-        try:
-            payload = json.loads(payload_json)
-        except Exception:
-            return (None, None)
-        sys = _find_number(payload, {"systolic", "inMillimetersOfMercury", "sys"})
-        dia = _find_number(payload, {"diastolic", "inMillimetersOfMercury", "dia"})
-        return (sys, dia)
 
-    def _extract_spo2_pct(payload_json: str) -> float | None:
-        try:
-            payload = json.loads(payload_json)
-        except Exception:
-            return None
-        return _find_number(payload, {"percentage", "pct", "spo2"})
+@app.get("/api/connection-status")
+def connection_status(_: None = Depends(require_api_key)) -> dict[str, Any]:
+    """Health Connect 連携状況を返す。マイ画面用。"""
+    with db() as conn:
+        return _connection_status_payload(conn)
 
-    def _extract_bpm(payload_json: str) -> float | None:
-        try:
-            payload = json.loads(payload_json)
-        except Exception:
-            return None
-        return _find_number(payload, {"beatsPerMinute", "bpm"})
 
-    def _fmt_sleep(value_min: int | None) -> str | None:
-        if value_min is None or value_min <= 0:
-            return None
-        h, m = divmod(value_min, 60)
-        return f"{h}h{m:02d}m"
+def _connection_status_payload(conn: sqlite3.Connection) -> dict[str, Any]:
+    last_sync_row = conn.execute(
+        "SELECT received_at FROM sync_runs ORDER BY received_at DESC LIMIT 1"
+    ).fetchone()
+    total = total_record_count(conn)
+    has_weight = has_records(conn, "WeightRecord")
+    has_sleep = has_records(conn, "SleepSessionRecord")
+    has_activity = has_records(conn, "StepsRecord")
+    has_vitals = has_records(conn, "BloodPressureRecord", "RestingHeartRateRecord")
 
-    def _last_n_days(n: int) -> list[str]:
-        return [(target_date - _dt3.timedelta(days=i)).isoformat() for i in range(n - 1, -1, -1)]
+    return {
+        "last_sync_at": last_sync_row["received_at"] if last_sync_row else None,
+        "total_records": total,
+        "has_weight_data": has_weight,
+        "has_sleep_data": has_sleep,
+        "has_activity_data": has_activity,
+        "has_vitals_data": has_vitals,
+    }
 
-    def _series_avg(values: list[float | int | None]) -> float | None:
-        nums = [float(v) for v in values if isinstance(v, (int, float))]
-        if not nums:
-            return None
-        return sum(nums) / len(nums)
 
+@app.get("/api/counters")
+def counters_get(_: None = Depends(require_api_key)) -> dict[str, Any]:
+    """type/device 別のレコード件数と初回・最終受信時刻。"""
     with db() as conn:
-        # ── AI レポート（当日の daily レポート）
-        report_row = conn.execute(
-            """SELECT content, created_at FROM ai_reports
-               WHERE report_date = ? AND report_type = 'daily'
-               ORDER BY created_at DESC LIMIT 1""",
-            (date,),
-        ).fetchone()
-        previous_report_row = conn.execute(
-            """SELECT report_date, created_at
-               FROM ai_reports
-               WHERE report_type = 'daily' AND report_date < ?
-               ORDER BY report_date DESC, created_at DESC LIMIT 1""",
-            (date,),
-        ).fetchone()
-
-        # 食事データ（nutrition_events + intake_calories_daily）
-        meal_row = conn.execute(
-            "SELECT COUNT(*) AS c, SUM(kcal) AS kcal FROM nutrition_events WHERE local_date = ?",
-            (date,),
-        ).fetchone()
-        intake_row = conn.execute(
-            "SELECT intake_kcal FROM intake_calories_daily WHERE day = ?",
-            (date,),
-        ).fetchone()
+        return {"counters": list_record_counters(conn)}
 
-        # 睡眠候補（トレンド判定のため8日+α）
-        sleep_rows = conn.execute(
-            """SELECT start_time, end_time FROM health_records
-               WHERE type='SleepSessionRecord'
-                 AND (
-                   (start_time IS NOT NULL AND date(start_time) BETWEEN ? AND ?)
-                   OR
-                   (end_time IS NOT NULL AND date(end_time) BETWEEN ? AND ?)
-                 )
-               ORDER BY COALESCE(end_time, start_time) DESC""",
-            (sleep_window_start, next_date, sleep_window_start, next_date),
-        ).fetchall()
-
-        # 歩数候補（14日）
-        steps_rows = conn.execute(
-            """SELECT start_time, payload_json FROM health_records
-               WHERE type='StepsRecord'
-                 AND start_time IS NOT NULL
-                 AND date(start_time) BETWEEN ? AND ?""",
-            (trend_14_start, next_date),
-        ).fetchall()
-
-        # 体重候補（30日）
-        weight_rows = conn.execute(
-            """SELECT time, payload_json FROM health_records
-               WHERE type='WeightRecord'
-                 AND time IS NOT NULL
-                 AND date(time) BETWEEN ? AND ?
-               ORDER BY time DESC
-               LIMIT 2000""",
-            (trend_30_start, next_date),
-        ).fetchall()
 
-        # バイタル候補（30日）
-        bp_linked_row = conn.execute(
-            "SELECT COUNT(*) AS c FROM health_records WHERE type='BloodPressureRecord'",
-        ).fetchone()
-        bp_rows = conn.execute(
-            """SELECT time, payload_json FROM health_records
-               WHERE type='BloodPressureRecord'
-                 AND time IS NOT NULL
-                 AND date(time) BETWEEN ? AND ?
-               ORDER BY time DESC
-               LIMIT 4000""",
-            (trend_30_start, date),
-        ).fetchall()
-        spo2_rows = conn.execute(
-            """SELECT time, payload_json FROM health_records
-               WHERE type='OxygenSaturationRecord'
-                 AND time IS NOT NULL
-                 AND date(time) BETWEEN ? AND ?
-               ORDER BY time DESC
-               LIMIT 4000""",
-            (trend_30_start, date),
-        ).fetchall()
-        hr_rows = conn.execute(
-            """SELECT time, payload_json FROM health_records
-               WHERE type='RestingHeartRateRecord'
-                 AND time IS NOT NULL
-                 AND date(time) BETWEEN ? AND ?
-               ORDER BY time DESC
-               LIMIT 4000""",
-            (trend_30_start, date),
-        ).fetchall()
+@app.post("/api/counters/reconcile")
+def counters_reconcile(fix: bool = True, _: None = Depends(require_api_key)) -> dict[str, Any]:
+    """カウンタと実件数を突き合わせ、ずれがあれば再構築する。"""
+    result = reconcile_record_counters(fix=fix)
+    if result["fixed"]:
+        with db() as conn:
+            invalidate_summary_cache(conn)
+    return result
 
-        profile_row = conn.execute(
-            "SELECT goal_weight_kg, sleep_goal_minutes, steps_goal FROM user_profile LIMIT 1"
-        ).fetchone()
 
-    # ── 睡眠集計（起床日のローカル日付で当日判定）
-    sleep_by_day: dict[str, int] = {}
-    for row in sleep_rows:
-        start_dt = _parse_iso_dt(row["start_time"])
-        end_dt = _parse_iso_dt(row["end_time"])
-        anchor_dt = end_dt or start_dt
-        if anchor_dt is None or start_dt is None or end_dt is None or end_dt <= start_dt:
-            continue
-        local_day = anchor_dt.astimezone(LOCAL_TZ).date().isoformat()
-        if local_day > date:
-            continue
-        total_min = int((end_dt - start_dt).total_seconds() / 60)
-        if total_min <= 0:
-            continue
-        sleep_by_day[local_day] = sleep_by_day.get(local_day, 0) + total_min
-
-    sleep_today_min = sleep_by_day.get(date)
-    sleep_ok = bool(sleep_today_min and sleep_today_min > 0)
-    sleep_label = _fmt_sleep(sleep_today_min)
-
-    # ── 歩数集計（ローカル日付で合算）
-    steps_by_day: dict[str, float] = {}
-    for row in steps_rows:
-        local_day = _to_local_day(row["start_time"])
-        if local_day is None or local_day > date:
-            continue
-        try:
-            payload = json.loads(row["payload_json"])
-        except Exception:
-            continue
-        count = _find_number(payload, {"count", "steps", "inCount"})
-        if count is None or count <= 0:
-            continue
-        steps_by_day[local_day] = steps_by_day.get(local_day, 0.0) + count
-
-    steps_val = steps_by_day.get(date)
-    steps_ok = bool(steps_val and steps_val >= 1000)
-    steps_label = f"{int(round(steps_val)):,}" if steps_val else None
-
-    # ── 体重集計（最新 <= 当日）
-    latest_weight_kg: float | None = None
-    weight_by_day: dict[str, float] = {}
-    for row in weight_rows:
-        local_day = _to_local_day(row["time"])
-        if local_day is None or local_day > date:
-            continue
-        kg = _extract_weight_kg(row["payload_json"])
-        if kg is None:
-            continue
-        if kg > 500:
-            kg = kg / 1000.0
-        if kg <= 0 or kg > 400:
-            continue
-        if latest_weight_kg is None:
-            latest_weight_kg = kg
-        if local_day not in weight_by_day:
-            weight_by_day[local_day] = kg
-
-    weight_ok = latest_weight_kg is not None
-    weight_label = f"{float(latest_weight_kg):.1f}kg" if latest_weight_kg is not None else None
-
-    # ── 食事充足（カロリー優先）
-    intake_kcal = float(intake_row["intake_kcal"]) if intake_row and intake_row["intake_kcal"] is not None else None
-    meal_kcal = float(meal_row["kcal"]) if meal_row and meal_row["kcal"] is not None else None
-    meal_count = int(meal_row["c"]) if meal_row and meal_row["c"] is not None else 0
-    meal_total_kcal = intake_kcal if intake_kcal is not None else meal_kcal
-    meal_ok = bool((meal_total_kcal is not None and meal_total_kcal > 0) or meal_count > 0)
-    meal_label = f"{int(round(meal_total_kcal)):,}kcal" if meal_total_kcal is not None and meal_total_kcal > 0 else None
-
-    # ── バイタル（BP, SpO2, Resting HR）
-    bp_linked = bool(bp_linked_row and bp_linked_row["c"] > 0)
-    bp_current_sys: float | None = None
-    bp_current_dia: float | None = None
-    bp_by_day: dict[str, tuple[float, float]] = {}
-    for row in bp_rows:
-        local_day = _to_local_day(row["time"])
-        if local_day is None or local_day > date:
-            continue
-        sys, dia = _extract_bp(row["payload_json"])
-        if sys is None or dia is None:
-            continue
-        if bp_current_sys is None and bp_current_dia is None:
-            bp_current_sys, bp_current_dia = sys, dia
-        if local_day not in bp_by_day:
-            bp_by_day[local_day] = (sys, dia)
-
-    bp_ok = bp_current_sys is not None and bp_current_dia is not None
-    bp_label = f"{int(round(bp_current_sys))}/{int(round(bp_current_dia))}" if bp_ok else None
-    bp_warning = bool(bp_ok and (bp_current_sys >= 130 or bp_current_dia >= 85))
-
-    spo2_current: float | None = None
-    for row in spo2_rows:
-        local_day = _to_local_day(row["time"])
-        if local_day is None or local_day > date:
-            continue
-        pct = _extract_spo2_pct(row["payload_json"])
-        if pct is None:
-            continue
-        spo2_current = pct
-        break
-
-    hr_current: float | None = None
-    hr_values: list[float] = []
-    for row in hr_rows:
-        local_day = _to_local_day(row["time"])
-        if local_day is None or local_day > date:
-            continue
-        bpm = _extract_bpm(row["payload_json"])
-        if bpm is None or bpm <= 0:
-            continue
-        if hr_current is None:
-            hr_current = bpm
-        hr_values.append(bpm)
-
-    sleep_target_min = DEFAULT_SLEEP_TARGET_MIN
-    steps_target = DEFAULT_STEPS_TARGET
-    if profile_row:
-        if profile_row["sleep_goal_minutes"] is not None:
-            try:
-                val = int(profile_row["sleep_goal_minutes"])
-                if 120 <= val <= 720:
-                    sleep_target_min = val
-            except (TypeError, ValueError):
-                pass
-        if profile_row["steps_goal"] is not None:
-            try:
-                val = int(profile_row["steps_goal"])
-                if 1000 <= val <= 50000:
-                    steps_target = val
-            except (TypeError, ValueError):
-                pass
-
-    # ── 新UI: 充足ステータス（固定順）
-    status_items: list[dict[str, Any]] = [
-        {
-            "key": "sleep",
-            "label": "睡眠",
-            "value": sleep_label,
-            "ok": sleep_ok,
-            "tab": "health",
-            "innerTab": "sleep",
-            "tone": "normal",
-        },
-        {
-            "key": "steps",
-            "label": "歩数",
-            "value": steps_label,
-            "ok": steps_ok,
-            "tab": "exercise",
-            "tone": "normal",
-        },
-        {
-            "key": "meal",
-            "label": "食事",
-            "value": meal_label,
-            "ok": meal_ok,
-            "tab": "meal",
-            "tone": "normal",
-        },
-        {
-            "key": "weight",
-            "label": "体重",
-            "value": weight_label,
-            "ok": weight_ok,
-            "tab": "health",
-            "innerTab": "composition",
-            "tone": "normal",
-        },
-    ]
-    if bp_linked:
-        status_items.append(
-            {
-                "key": "bp",
-                "label": "BP",
-                "value": bp_label,
-                "ok": bp_ok,
-                "tab": "health",
-                "innerTab": "vital",
-                "tone": "warning" if bp_warning else "normal",
-            }
-        )
+# ── 起動時バンドル ────────────────────────────────────────────
 
-    # ── 新UI: 注目ポイント（ルールベース）
-    points_by_source: dict[str, dict[str, Any]] = {}
-
-    def _add_point(
-        *,
-        rule_id: str,
-        icon: str,
-        message: str,
-        severity: str,
-        category: str,
-        tab: str,
-        subtab: str | None,
-        data_source: str,
-    ) -> None:
-        point = {
-            "id": f"{rule_id}-{date}",
-            "icon": icon,
-            "message": message[:60],
-            "severity": severity,
-            "category": category,
-            "navigateTo": {"tab": tab, **({"subTab": subtab} if subtab else {})},
-            "dataSource": data_source,
-        }
-        prev = points_by_source.get(data_source)
-        if prev is None:
-            points_by_source[data_source] = point
-            return
-        prev_score = (severity_rank[prev["severity"]], -category_rank[prev["category"]])
-        new_score = (severity_rank[severity], -category_rank[category])
-        if new_score > prev_score:
-            points_by_source[data_source] = point
-
-    if bp_ok and bp_current_sys is not None and bp_current_dia is not None:
-        if bp_current_sys >= 140 or bp_current_dia >= 90:
-            _add_point(
-                rule_id="bp-critical",
-                icon="🔴",
-                message=f"血圧が高めです（{int(round(bp_current_sys))}/{int(round(bp_current_dia))}）",
-                severity="critical",
-                category="threshold",
-                tab="health",
-                subtab="vital",
-                data_source="blood_pressure",
-            )
-        elif bp_current_sys >= 130 or bp_current_dia >= 85:
-            _add_point(
-                rule_id="bp-warning",
-                icon="⚠️",
-                message=f"血圧がやや高めです（{int(round(bp_current_sys))}/{int(round(bp_current_dia))}）",
-                severity="warning",
-                category="threshold",
-                tab="health",
-                subtab="vital",
-                data_source="blood_pressure",
-            )
+# Non-day scopes each tab's "latest on or before" lookups depend on.
+_TAB_LATEST_SCOPES: dict[str, tuple[str, ...]] = {
+    "bodyData": ("profile", *(f"type:{t}" for t in _BODY_TYPES)),
+    "activityData": (),
+    "sleepData": (),
+    "vitalsData": tuple(f"type:{t}" for t in _VITALS_TYPES),
+}
 
-    if spo2_current is not None:
-        if spo2_current < 90:
-            _add_point(
-                rule_id="spo2-critical-low",
-                icon="🔴",
-                message=f"酸素飽和度が著しく低下しています（{round(spo2_current, 1)}%）",
-                severity="critical",
-                category="threshold",
-                tab="health",
-                subtab="vital",
-                data_source="spo2",
-            )
-        elif spo2_current < 95:
-            _add_point(
-                rule_id="spo2-warning-low",
-                icon="⚠️",
-                message=f"酸素飽和度が低めです（{round(spo2_current, 1)}%）",
-                severity="warning",
-                category="threshold",
-                tab="health",
-                subtab="vital",
-                data_source="spo2",
-            )
 
-    if hr_current is not None and hr_values:
-        hr_avg_30 = _series_avg(hr_values)
-        if hr_avg_30 is not None and hr_avg_30 > 0:
-            deviation = abs(hr_current - hr_avg_30) / hr_avg_30
-            if deviation >= 0.20:
-                _add_point(
-                    rule_id="rhr-deviation",
-                    icon="⚠️",
-                    message=f"安静時心拍が通常と異なります（{int(round(hr_current))}bpm）",
-                    severity="warning",
-                    category="threshold",
-                    tab="health",
-                    subtab="vital",
-                    data_source="resting_hr",
-                )
+@app.get("/api/bootstrap")
+def bootstrap(
+    date: str | None = None,
+    period: str = "week",
+    _: None = Depends(require_api_key),
+) -> Response:
+    """アプリ起動時に必要なデータを1リクエスト・1接続でまとめて返す。
 
-    last7_days = _last_n_days(7)
-    sleep_last7 = [sleep_by_day.get(day) for day in last7_days]
-    sleep_target_deficit = int(sleep_target_min * SLEEP_DEFICIT_PCT)
-    sleep_target_weekly = int(sleep_target_min * SLEEP_WEEKLY_PCT)
-    sleep_last3 = sleep_last7[-3:]
-    if len([v for v in sleep_last3 if v is not None]) == 3 and all(
-        (v or 0) < sleep_target_deficit for v in sleep_last3
-    ):
-        _add_point(
-            rule_id="sleep-deficit-3d",
-            icon="⚠️",
-            message="睡眠不足が3日連続しています",
-            severity="warning",
-            category="trend",
-            tab="health",
-            subtab="sleep",
-            data_source="sleep",
-        )
+    各セクションは個別エンドポイント（/api/profile, /api/connection-status,
+    /api/supplements, /api/nutrients/targets, /api/home-summary, 各タブ）の
+    レスポンスと同じ形。セクションごとにデータバージョンでキャッシュする。
+    """
+    base_date = _validate_date_period(date, period)
+    day = _dt.date.fromisoformat(base_date)
+    tab_builders = {
+        "bodyData": _body_data_payload,
+        "activityData": _activity_data_payload,
+        "sleepData": _sleep_data_payload,
+        "vitalsData": _vitals_data_payload,
+    }
 
-    sleep_recorded = [v for v in sleep_last7 if v is not None]
-    if len(sleep_recorded) >= 4:
-        sleep_avg_7 = _series_avg(sleep_recorded)
-        if sleep_avg_7 is not None and sleep_avg_7 < sleep_target_weekly:
-            _add_point(
-                rule_id="sleep-weekly-low",
-                icon="📉",
-                message=f"今週の平均睡眠が短めです（平均{_fmt_sleep(int(round(sleep_avg_7)))})",
-                severity="info",
-                category="trend",
-                tab="health",
-                subtab="sleep",
-                data_source="sleep",
+    with db() as conn:
+        profile = get_profile(conn)
+        out: dict[str, Any] = {
+            "date": base_date,
+            "profile": profile,
+            "connectionStatus": cached_section(
+                conn, "connectionStatus", "-", current_version(conn),
+                lambda: _connection_status_payload(conn),
+            ),
+            "supplements": _supplements_payload(),
+            "nutrientTargets": cached_section(
+                conn, "nutrientTargets", base_date,
+                scope_version(conn, "profile", "type:WeightRecord", f"day:{base_date}"),
+                lambda: _nutrients_targets_payload(conn, base_date, profile or {}),
+            ),
+            "homeSummary": get_home_summary(conn, day),
+        }
+        start_date, end_date = _date_range(base_date, period)
+        for section, build in tab_builders.items():
+            version = window_version(
+                conn,
+                _dt.date.fromisoformat(start_date),
+                _dt.date.fromisoformat(end_date),
+                *_TAB_LATEST_SCOPES[section],
             )
-
-    steps_last7 = [steps_by_day.get(day) for day in last7_days]
-    steps_recorded = [v for v in steps_last7 if v is not None]
-    steps_avg_7 = _series_avg(steps_recorded)
-    if steps_avg_7 is not None and steps_avg_7 > 0:
-        low_threshold = steps_avg_7 * 0.5
-        last2 = steps_last7[-2:]
-        if len([v for v in last2 if v is not None]) == 2 and all((v or 0) < low_threshold for v in last2):
-            _add_point(
-                rule_id="steps-low-2d",
-                icon="📉",
-                message="活動量が低下しています。軽い運動を心がけましょう",
-                severity="info",
-                category="trend",
-                tab="exercise",
-                subtab=None,
-                data_source="steps",
+            out[section] = cached_section(
+                conn, section, f"{base_date}:{period}", version,
+                lambda build=build: build(conn, base_date, period),
             )
+    return NegotiatedResponse(out)
 
-    # 歩数達成ストリーク（最新日から連続）
-    streak = 0
-    for day in reversed(last7_days):
-        v = steps_by_day.get(day)
-        if v is not None and v >= steps_target:
-            streak += 1
-        else:
-            break
-    if streak >= 3:
-        _add_point(
-            rule_id="steps-achievement",
-            icon="✅",
-            message=f"歩数目標を{streak}日連続達成中",
-            severity="positive",
-            category="achievement",
-            tab="exercise",
-            subtab=None,
-            data_source="steps",
-        )
 
-    # 睡眠達成率
-    if sleep_recorded:
-        sleep_goal_days = sum(1 for v in sleep_recorded if v >= sleep_target_min)
-        sleep_goal_rate = sleep_goal_days / len(sleep_recorded)
-        if len(sleep_recorded) >= 5 and sleep_goal_rate >= 0.80:
-            _add_point(
-                rule_id="sleep-achievement",
-                icon="✅",
-                message=f"今週の睡眠目標達成率{int(round(sleep_goal_rate * 100))}%",
-                severity="positive",
-                category="achievement",
-                tab="health",
-                subtab="sleep",
-                data_source="sleep",
-            )
+# ── 変更通知（SSE） ────────────────────────────────────────────
 
-    # 体重トレンド（7日平均 vs 前週7日平均）
-    week_days = _last_n_days(14)
-    prev_week = week_days[:7]
-    this_week = week_days[7:]
-    prev_vals = [weight_by_day.get(day) for day in prev_week if weight_by_day.get(day) is not None]
-    this_vals = [weight_by_day.get(day) for day in this_week if weight_by_day.get(day) is not None]
-    prev_avg = _series_avg(prev_vals)
-    this_avg = _series_avg(this_vals)
-    goal_weight = float(profile_row["goal_weight_kg"]) if profile_row and profile_row["goal_weight_kg"] is not None else None
-    if prev_avg is not None and this_avg is not None:
-        diff = round(this_avg - prev_avg, 1)
-        if abs(diff) >= 0.2:
-            if goal_weight is not None and latest_weight_kg is not None and goal_weight < latest_weight_kg:
-                if diff < 0:
-                    _add_point(
-                        rule_id="weight-trend-positive",
-                        icon="📉",
-                        message=f"体重が先週比{diff}kg、減量ペース維持中",
-                        severity="positive",
-                        category="trend",
-                        tab="health",
-                        subtab="composition",
-                        data_source="weight",
-                    )
-                else:
-                    _add_point(
-                        rule_id="weight-trend-up",
-                        icon="📈",
-                        message=f"体重が先週比+{diff}kg。食事と活動量を確認しましょう",
-                        severity="info",
-                        category="trend",
-                        tab="health",
-                        subtab="composition",
-                        data_source="weight",
-                    )
-            elif diff < 0:
-                _add_point(
-                    rule_id="weight-trend-down",
-                    icon="📉",
-                    message=f"体重が先週比{diff}kg、良い傾向です",
-                    severity="positive",
-                    category="trend",
-                    tab="health",
-                    subtab="composition",
-                    data_source="weight",
-                )
-
-    # 血圧の週次高め判定
-    if bp_by_day:
-        recent_bp_days = [bp_by_day.get(day) for day in last7_days]
-        high_days = 0
-        for row in recent_bp_days:
-            if row is None:
-                continue
-            sys, dia = row
-            if sys >= 130 or dia >= 85:
-                high_days += 1
-        if high_days >= 3:
-            _add_point(
-                rule_id="bp-high-week",
-                icon="⚠️",
-                message=f"今週、血圧が高めの日が{high_days}日あります",
-                severity="warning",
-                category="trend",
-                tab="health",
-                subtab="vital",
-                data_source="blood_pressure",
-            )
+@app.get("/api/events")
+async def events(
+    request: Request,
+    include: str | None = None,
+    last_event_id: str | None = Header(default=None, alias="Last-Event-ID"),
+    _: None = Depends(require_api_key),
+) -> StreamingResponse:
+    """書き込みのたびに変更通知を送る Server-Sent Events ストリーム。
 
-    attention_points = sorted(
-        points_by_source.values(),
-        key=lambda p: (-severity_rank[p["severity"]], category_rank[p["category"]], p["id"]),
+    change イベントは {version, types, days, scopes}。include=home で今日の
+    ホームサマリーの変更キーも添える。再接続時は Last-Event-ID 以降の変更を
+    1件にまとめて先に送る。
+    """
+    if include not in (None, "home"):
+        raise HTTPException(status_code=400, detail="include は home のみ指定可能")
+    since: int | None = None
+    if last_event_id:
+        try:
+            since = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Last-Event-ID が不正です")
+    return StreamingResponse(
+        event_stream(request.is_disconnected, last_event_id=since, include_home=include == "home"),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-
-    # ── 互換用: 根拠データリスト（データがあるものだけ）
-    evidences = []
-    if sleep_ok and sleep_label:
-        evidences.append(
-            {
-                "type": "sleep",
-                "label": "睡眠",
-                "value": sleep_label,
-                "tab": "health",
-                "innerTab": "sleep",
-            }
-        )
-    if steps_ok and steps_label:
-        evidences.append(
-            {
-                "type": "steps",
-                "label": "歩数",
-                "value": f"{steps_label}歩" if steps_label else "",
-                "tab": "exercise",
-            }
-        )
-    if weight_ok and weight_label:
-        evidences.append(
-            {
-                "type": "weight",
-                "label": "体重",
-                "value": weight_label,
-                "tab": "health",
-                "innerTab": "composition",
-            }
-        )
-    if meal_ok:
-        evidences.append(
-            {
-                "type": "meal",
-                "label": "食事",
-                "value": meal_label if meal_label else f"{meal_count}件",
-                "tab": "meal",
-            }
-        )
-
-    return {
-        "date": date,
-        "report": (
-            {"content": report_row["content"], "created_at": report_row["created_at"]}
-            if report_row
-            else None
-        ),
-        "sufficiency": {
-            "sleep": sleep_ok,
-            "steps": steps_ok,
-            "weight": weight_ok,
-            "meal": meal_ok,
-            "bp": bp_ok if bp_linked else False,
-        },
-        "statusItems": status_items,
-        "attentionPoints": attention_points,
-        "previousReport": (
-            {
-                "date": previous_report_row["report_date"],
-                "created_at": previous_report_row["created_at"],
-            }
-            if previous_report_row
-            else None
-        ),
-        "evidences": evidences,
-    }
-
-
-@app.get("/api/connection-status")
-def connection_status(_: None = Depends(require_api_key)) -> dict[str, Any]:
-    """Health Connect 連携状況を返す。マイ画面用。"""
-    with db() as conn:
-        last_sync_row = conn.execute(
-            "SELECT received_at FROM sync_runs ORDER BY received_at DESC LIMIT 1"
-        ).fetchone()
-        total_row = conn.execute("SELECT COUNT(*) AS c FROM health_records").fetchone()
-        weight_row = conn.execute(
-            "SELECT COUNT(*) AS c FROM health_records WHERE type='WeightRecord' LIMIT 1"
-        ).fetchone()
-        sleep_row = conn.execute(
-            "SELECT COUNT(*) AS c FROM health_records WHERE type='SleepSessionRecord' LIMIT 1"
-        ).fetchone()
-        activity_row = conn.execute(
-            "SELECT COUNT(*) AS c FROM health_records WHERE type='StepsRecord' LIMIT 1"
-        ).fetchone()
-        vitals_row = conn.execute(
-            """SELECT COUNT(*) AS c FROM health_records
-               WHERE type IN ('BloodPressureRecord', 'RestingHeartRateRecord') LIMIT 1"""
-        ).fetchone()
-
-    return {
-        "last_sync_at": last_sync_row["received_at"] if last_sync_row else None,
-        "total_records": int(total_row["c"]) if total_row else 0,
-        "has_weight_data": bool(weight_row and weight_row["c"] > 0),
-        "has_sleep_data": bool(sleep_row and sleep_row["c"] > 0),
-        "has_activity_data": bool(activity_row and activity_row["c"] > 0),
-        "has_vitals_data": bool(vitals_row and vitals_row["c"] > 0),
-    }
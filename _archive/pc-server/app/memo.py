@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+from typing import Any, Callable
+
+from .db import dumps_payload, now_iso
+from .timing import record_cache
+
+# Entries kept in memo_cache; the least recently used ones beyond this are evicted.
+MEMO_MAX_ENTRIES = 256
+# Part of every key. Bump when a memoised builder or its output format
+# changes, so entries stored by older code are no longer addressed.
+MEMO_FORMAT_VERSION = 2
+# Buffered hits written back to memo_cache in one batch (see flush_memo_usage).
+MEMO_FLUSH_HITS = 64
+
+
+def memo_key(kind: str, inputs: dict[str, Any]) -> str:
+    """Content address of a result: sha256 over its kind, exact inputs and MEMO_FORMAT_VERSION."""
+    payload = {"format": MEMO_FORMAT_VERSION, "kind": kind, "inputs": inputs}
+    return hashlib.sha256(dumps_payload(payload).encode("utf-8")).hexdigest()
+
+
+class MemoStats:
+    """Hit/miss counters per kind since the process started."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: dict[str, list[int]] = {}
+
+    def record(self, kind: str, hit: bool) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(kind, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def snapshot(self) -> dict[str, tuple[int, int]]:
+        with self._lock:
+            return {kind: (hits, misses) for kind, (hits, misses) in self._counts.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+stats = MemoStats()
+
+
+class _UsageBuffer:
+    """Hit counts and last-use times not yet written to memo_cache.
+
+    A hit is served without writing; the buffer is written back by the next
+    miss (before eviction, so recency is current), every MEMO_FLUSH_HITS
+    hits, and at shutdown.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: dict[str, tuple[str, int, str]] = {}
+        self._hits = 0
+
+    def hit(self, key: str, kind: str, now: str) -> bool:
+        """Buffer one hit. True when enough hits are pending to flush."""
+        with self._lock:
+            _, hits, _ = self._pending.get(key, (kind, 0, now))
+            self._pending[key] = (kind, hits + 1, now)
+            self._hits += 1
+            return self._hits >= MEMO_FLUSH_HITS
+
+    def take(self) -> list[tuple[int, str, str]]:
+        with self._lock:
+            pending, self._pending, self._hits = self._pending, {}, 0
+        return [(hits, last_used_at, key) for key, (_, hits, last_used_at) in pending.items()]
+
+    def hits_by_kind(self) -> dict[str, int]:
+        with self._lock:
+            out: dict[str, int] = {}
+            for kind, hits, _ in self._pending.values():
+                out[kind] = out.get(kind, 0) + hits
+            return out
+
+
+_usage = _UsageBuffer()
+
+
+def flush_memo_usage(conn: sqlite3.Connection) -> int:
+    """Write buffered hits and last-use times to memo_cache. Returns the entries updated."""
+    rows = _usage.take()
+    if rows:
+        conn.executemany(
+            "UPDATE memo_cache SET hits = hits + ?, last_used_at = MAX(last_used_at, ?) WHERE key = ?",
+            rows,
+        )
+    return len(rows)
+
+
+def memoized(
+    conn: sqlite3.Connection,
+    kind: str,
+    inputs: dict[str, Any],
+    build: Callable[[], Any],
+) -> Any:
+    """Return the stored result for (kind, inputs), building and storing it on a miss.
+
+    `inputs` must name everything the result depends on (data versions read
+    before calling, profile updated_at, dates...), so a stored entry is never
+    stale: changed inputs simply address a different entry. Hits do not
+    write; their counts and recency are buffered (see _UsageBuffer).
+    """
+    key = memo_key(kind, inputs)
+    now = now_iso()
+    row = conn.execute("SELECT data FROM memo_cache WHERE key = ?", (key,)).fetchone()
+    if row is not None:
+        if _usage.hit(key, kind, now):
+            flush_memo_usage(conn)
+        stats.record(kind, hit=True)
+        record_cache(f"memo:{kind}", hit=True)
+        return json.loads(row["data"])
+
+    data = build()
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO memo_cache(key, kind, data, hits, created_at, last_used_at)
+        VALUES(?,?,?,0,?,?)
+        """,
+        (key, kind, json.dumps(data, ensure_ascii=False), now, now),
+    )
+    flush_memo_usage(conn)
+    conn.execute(
+        """
+        DELETE FROM memo_cache WHERE key IN (
+          SELECT key FROM memo_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+        )
+        """,
+        (MEMO_MAX_ENTRIES,),
+    )
+    stats.record(kind, hit=False)
+    record_cache(f"memo:{kind}", hit=False)
+    return data
+
+
+def memo_stats(conn: sqlite3.Connection) -> dict[str, Any]:
+    """Entries on disk and hit rate since start, per kind (read-only)."""
+    stored = {
+        str(r["kind"]): (int(r["entries"]), int(r["hits"]))
+        for r in conn.execute(
+            "SELECT kind, COUNT(*) AS entries, COALESCE(SUM(hits), 0) AS hits FROM memo_cache GROUP BY kind"
+        )
+    }
+    counts = stats.snapshot()
+    buffered = _usage.hits_by_kind()
+    kinds: dict[str, Any] = {}
+    for kind in sorted(set(stored) | set(counts)):
+        hits, misses = counts.get(kind, (0, 0))
+        entries, stored_hits = stored.get(kind, (0, 0))
+        kinds[kind] = {
+            "entries": entries,
+            "storedHits": stored_hits + buffered.get(kind, 0),
+            "hits": hits,
+            "misses": misses,
+            "hitRate": hits / (hits + misses) if hits + misses else None,
+        }
+    return {
+        "maxEntries": MEMO_MAX_ENTRIES,
+        "entries": sum(entries for entries, _ in stored.values()),
+        "kinds": kinds,
+    }
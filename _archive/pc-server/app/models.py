@@ -76,3 +76,8 @@ class ReportSaveRequest(BaseModel):
     prompt_used: str
     content: str
 
+
+class ReportGenerateRequest(BaseModel):
+    types: list[Literal["daily", "weekly", "monthly"]] = Field(default_factory=lambda: ["daily", "weekly", "monthly"])
+    force: bool = False
+
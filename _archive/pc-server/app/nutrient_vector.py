@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from array import array
+from math import isnan, nan
+from typing import Mapping
+
+from .nutrient_keys import SEED_KEYS
+
+# Fixed slot per seed nutrient key. Keys outside the seed list (rare, e.g.
+# ad-hoc micros from OpenClaw) ride along in NutrientVector.extra.
+NUTRIENT_KEYS: tuple[str, ...] = tuple(nk.key for nk in SEED_KEYS)
+NUTRIENT_INDEX: dict[str, int] = {key: i for i, key in enumerate(NUTRIENT_KEYS)}
+
+_SIZE = len(NUTRIENT_KEYS)
+
+
+class NutrientVector:
+    """Nutrient amounts in a fixed-index array('d'); NaN marks "not recorded".
+
+    Absent differs from 0 (targets treat a missing nutrient as not consumed),
+    so ratio() leaves a slot absent when either side is.
+    """
+
+    __slots__ = ("values", "extra")
+
+    def __init__(self, values: array | None = None, extra: dict[str, float] | None = None) -> None:
+        self.values = values if values is not None else array("d", [nan]) * _SIZE
+        self.extra = extra if extra is not None else {}
+
+    @classmethod
+    def from_dict(cls, d: Mapping[str, float]) -> NutrientVector:
+        vec = cls()
+        for key, value in d.items():
+            vec[key] = float(value)
+        return vec
+
+    def to_dict(self) -> dict[str, float]:
+        out = {NUTRIENT_KEYS[i]: v for i, v in enumerate(self.values) if not isnan(v)}
+        out.update(self.extra)
+        return out
+
+    def get(self, key: str) -> float | None:
+        i = NUTRIENT_INDEX.get(key)
+        if i is None:
+            return self.extra.get(key)
+        v = self.values[i]
+        return None if isnan(v) else v
+
+    def __getitem__(self, key: str) -> float:
+        v = self.get(key)
+        if v is None:
+            raise KeyError(key)
+        return v
+
+    def __setitem__(self, key: str, value: float) -> None:
+        i = NUTRIENT_INDEX.get(key)
+        if i is None:
+            self.extra[key] = value
+        else:
+            self.values[i] = value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return sum(1 for v in self.values if not isnan(v)) + len(self.extra)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, NutrientVector):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def ratio(self, targets: NutrientVector) -> NutrientVector:
+        """Element-wise self / targets; absent where either side is absent, 0 where the target is <= 0."""
+        out = NutrientVector()
+        for i, (a, t) in enumerate(zip(self.values, targets.values)):
+            if not isnan(a) and not isnan(t):
+                out.values[i] = a / t if t > 0 else 0.0
+        for k, t in targets.extra.items():
+            if k in self.extra:
+                out.extra[k] = self.extra[k] / t if t > 0 else 0.0
+        return out
+
+    def __repr__(self) -> str:
+        return f"NutrientVector({self.to_dict()!r})"
+
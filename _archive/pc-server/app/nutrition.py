@@ -2,9 +2,10 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any
+from typing import Any, Iterable
 
 import json
+import sqlite3
 
 from .db import LOCAL_TZ, db
 from .nutrient_keys import SEED_KEYS
@@ -96,25 +97,114 @@ def local_date_of(dt: datetime) -> str:
     return dt.astimezone(LOCAL_TZ).date().isoformat()
 
 
-def _seed_nutrient_keys(conn) -> None:
-    for nk in SEED_KEYS:
-        conn.execute(
-            """
-            INSERT OR IGNORE INTO nutrient_keys(key, unit, display_name, category)
-            VALUES(?,?,?,?)
-            """,
-            (nk.key, nk.unit, nk.display_name, nk.category),
-        )
+def seed_nutrient_keys(conn: sqlite3.Connection) -> None:
+    """Insert the seed nutrient keys (called once from init_db)."""
+    conn.executemany(
+        """
+        INSERT OR IGNORE INTO nutrient_keys(key, unit, display_name, category)
+        VALUES(?,?,?,?)
+        """,
+        [(nk.key, nk.unit, nk.display_name, nk.category) for nk in SEED_KEYS],
+    )
+
 
+_MACRO_UNITS = {"energy_kcal": "kcal", "protein_g": "g", "fat_g": "g", "carbs_g": "g"}
 
-def _ensure_nutrient_key(conn, key: str, unit: str | None) -> None:
-    conn.execute(
+
+@dataclass
+class NutritionEvent:
+    label: str
+    consumed_at: datetime | None = None
+    alias: str | None = None
+    count: float = 1.0
+    unit: str | None = None
+    kcal: float | None = None
+    protein_g: float | None = None
+    fat_g: float | None = None
+    carbs_g: float | None = None
+    micros: dict[str, float] | None = None
+    note: str | None = None
+
+    def nutrients(self) -> dict[str, tuple[float, str | None]]:
+        """Absolute amounts for nutrition_nutrients (already multiplied by count)."""
+        count = float(self.count)
+        out: dict[str, tuple[float, str | None]] = {}
+        for key, value in (
+            ("energy_kcal", self.kcal),
+            ("protein_g", self.protein_g),
+            ("fat_g", self.fat_g),
+            ("carbs_g", self.carbs_g),
+        ):
+            if value is not None:
+                out[key] = (float(value) * count, _MACRO_UNITS[key])
+        if self.micros:
+            for k, v in self.micros.items():
+                if isinstance(v, (int, float)):
+                    out[k] = (float(v) * count, None)
+        return out
+
+
+def log_events(events: Iterable[NutritionEvent], conn: sqlite3.Connection | None = None) -> list[int]:
+    """Write events and their nutrition_nutrients rows in one transaction.
+
+    Returns the new event ids in input order. With `conn`, the caller owns the
+    transaction (and the commit).
+    """
+    if conn is None:
+        with db() as own:
+            return log_events(events, own)
+
+    events = list(events)
+    if not events:
+        return []
+    now = datetime.now().astimezone(LOCAL_TZ)
+    rows = []
+    for ev in events:
+        dt = (ev.consumed_at or now).astimezone(LOCAL_TZ)
+        rows.append(
+            (
+                dt.isoformat(),
+                dt.date().isoformat(),
+                ev.alias,
+                ev.label,
+                float(ev.count),
+                ev.unit,
+                ev.kcal,
+                ev.protein_g,
+                ev.fat_g,
+                ev.carbs_g,
+                json.dumps(ev.micros, ensure_ascii=False) if ev.micros else None,
+                ev.note,
+            )
+        )
+    conn.executemany(
         """
-        INSERT OR IGNORE INTO nutrient_keys(key, unit)
-        VALUES(?,?)
+        INSERT INTO nutrition_events(
+          consumed_at, local_date, alias, label, count, unit, kcal, protein_g, fat_g, carbs_g, micros_json, note
+        ) VALUES(?,?,?,?,?,?,?,?,?,?,?,?)
         """,
-        (key, unit),
+        rows,
     )
+    # The transaction holds the write lock, so the batch got consecutive ids.
+    last_id = int(conn.execute("SELECT last_insert_rowid()").fetchone()[0])
+    ids = list(range(last_id - len(events) + 1, last_id + 1))
+
+    keys: dict[str, str | None] = {}
+    nutrient_rows = []
+    for event_id, row, ev in zip(ids, rows, events):
+        for k, (v, u) in ev.nutrients().items():
+            keys.setdefault(k, u)
+            nutrient_rows.append((event_id, row[1], k, v, u))
+    # One statement per distinct key in the batch; existing keys are ignored.
+    conn.executemany("INSERT OR IGNORE INTO nutrient_keys(key, unit) VALUES(?,?)", keys.items())
+    conn.executemany(
+        """
+        INSERT INTO nutrition_nutrients(event_id, local_date, nutrient_key, value, unit)
+        VALUES(?,?,?,?,?)
+        """,
+        nutrient_rows,
+    )
+    return ids
 
 
 def log_event(
@@ -131,62 +221,28 @@ def log_event(
     micros: dict[str, float] | None = None,
     note: str | None = None,
 ) -> None:
-    dt = consumed_at or datetime.now().astimezone(LOCAL_TZ)
-    local_date = local_date_of(dt)
-    with db() as conn:
-        _seed_nutrient_keys(conn)
-
-        cur = conn.execute(
-            """
-            INSERT INTO nutrition_events(
-              consumed_at, local_date, alias, label, count, unit, kcal, protein_g, fat_g, carbs_g, micros_json, note
-            ) VALUES(?,?,?,?,?,?,?,?,?,?,?,?)
-            """,
-            (
-                dt.astimezone(LOCAL_TZ).isoformat(),
-                local_date,
-                alias,
-                label,
-                float(count),
-                unit,
-                kcal,
-                protein_g,
-                fat_g,
-                carbs_g,
-                json.dumps(micros, ensure_ascii=False) if micros else None,
-                note,
-            ),
-        )
-        event_id = cur.lastrowid
-
-        # Dual-write nutrients (absolute amounts per event, already multiplied by count)
-        nutrients: dict[str, tuple[float, str | None]] = {}
-        if kcal is not None:
-            nutrients["energy_kcal"] = (float(kcal) * float(count), "kcal")
-        if protein_g is not None:
-            nutrients["protein_g"] = (float(protein_g) * float(count), "g")
-        if fat_g is not None:
-            nutrients["fat_g"] = (float(fat_g) * float(count), "g")
-        if carbs_g is not None:
-            nutrients["carbs_g"] = (float(carbs_g) * float(count), "g")
-
-        if micros:
-            for k, v in micros.items():
-                if isinstance(v, (int, float)):
-                    nutrients[k] = (float(v) * float(count), None)
-
-        for k, (v, u) in nutrients.items():
-            _ensure_nutrient_key(conn, k, u)
-            conn.execute(
-                """
-                INSERT INTO nutrition_nutrients(event_id, local_date, nutrient_key, value, unit)
-                VALUES(?,?,?,?,?)
-                """,
-                (event_id, local_date, k, v, u),
+    log_events(
+        [
+            NutritionEvent(
+                consumed_at=consumed_at,
+                alias=alias,
+                label=label,
+                count=count,
+                unit=unit,
+                kcal=kcal,
+                protein_g=protein_g,
+                fat_g=fat_g,
+                carbs_g=carbs_g,
+                micros=micros,
+                note=note,
             )
+        ]
+    )
 
 
-def log_alias(alias: str, *, consumed_at: datetime | None = None, count: float = 1.0, note: str | None = None) -> None:
+def alias_event(
+    alias: str, *, consumed_at: datetime | None = None, count: float = 1.0, note: str | None = None
+) -> NutritionEvent:
     item = CATALOG.get(alias)
     if item is None:
         raise ValueError(f"Unknown alias: {alias}")
@@ -204,7 +260,7 @@ def log_alias(alias: str, *, consumed_at: datetime | None = None, count: float =
             carbs_g=item.carbs_g,
         )
 
-    log_event(
+    return NutritionEvent(
         consumed_at=consumed_at,
         alias=item.alias,
         label=item.label,
@@ -219,17 +275,24 @@ def log_alias(alias: str, *, consumed_at: datetime | None = None, count: float =
     )
 
 
-def get_day_events(local_date: str) -> list[dict[str, Any]]:
-    with db() as conn:
-        rows = conn.execute(
-            """
-            SELECT id, consumed_at, alias, label, count, unit, kcal, protein_g, fat_g, carbs_g, micros_json, note
-            FROM nutrition_events
-            WHERE local_date = ?
-            ORDER BY consumed_at ASC
-            """,
-            (local_date,),
-        ).fetchall()
+def log_alias(alias: str, *, consumed_at: datetime | None = None, count: float = 1.0, note: str | None = None) -> None:
+    log_events([alias_event(alias, consumed_at=consumed_at, count=count, note=note)])
+
+
+def get_day_events(local_date: str, conn: sqlite3.Connection | None = None) -> list[dict[str, Any]]:
+    if conn is None:
+        with db() as own:
+            return get_day_events(local_date, own)
+
+    rows = conn.execute(
+        """
+        SELECT id, consumed_at, alias, label, count, unit, kcal, protein_g, fat_g, carbs_g, micros_json, note
+        FROM nutrition_events
+        WHERE local_date = ?
+        ORDER BY consumed_at ASC
+        """,
+        (local_date,),
+    ).fetchall()
 
     out: list[dict[str, Any]] = []
     for r in rows:
@@ -263,20 +326,39 @@ def delete_event(event_id: int) -> bool:
     return cur.rowcount > 0
 
 
-def get_day_totals(local_date: str) -> dict[str, Any]:
-    # Preferred: sum from normalized table
-    with db() as conn:
-        rows = conn.execute(
-            """
-            SELECT nutrient_key, SUM(value) AS total
-            FROM nutrition_nutrients
-            WHERE local_date = ?
-            GROUP BY nutrient_key
-            """,
-            (local_date,),
-        ).fetchall()
-
-    totals = {r["nutrient_key"]: float(r["total"]) for r in rows}
+def get_range_totals(
+    start: str,
+    end: str,
+    keys: Iterable[str] | None = None,
+    conn: sqlite3.Connection | None = None,
+) -> dict[str, dict[str, float]]:
+    """{local_date: {nutrient_key: total}} for [start, end] from nutrition_daily_totals.
+
+    Days without any logged nutrient are omitted. `keys` restricts the nutrients.
+    """
+    if conn is None:
+        with db() as own:
+            return get_range_totals(start, end, keys, own)
+
+    sql = """
+        SELECT local_date, nutrient_key, total
+        FROM nutrition_daily_totals
+        WHERE local_date BETWEEN ? AND ?
+    """
+    params: list[Any] = [start, end]
+    if keys is not None:
+        keys = list(keys)
+        sql += f" AND nutrient_key IN ({','.join('?' for _ in keys) or 'NULL'})"
+        params.extend(keys)
+    out: dict[str, dict[str, float]] = {}
+    for r in conn.execute(sql + " ORDER BY local_date, nutrient_key", params):
+        out.setdefault(r["local_date"], {})[r["nutrient_key"]] = float(r["total"])
+    return out
+
+
+def get_day_totals(local_date: str, conn: sqlite3.Connection | None = None) -> dict[str, Any]:
+    # Preferred: the per-day rollup of the normalized table
+    totals = get_range_totals(local_date, local_date, conn=conn).get(local_date, {})
 
     return {
         "kcal": totals.get("energy_kcal"),
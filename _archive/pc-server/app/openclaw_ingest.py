@@ -3,12 +3,13 @@ from __future__ import annotations
 import hashlib
 import json
 import sqlite3
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any
+from typing import Any, Iterable
 
 from .db import LOCAL_TZ, db, now_iso
 from .estimator import merge_micros_with_estimate
-from .nutrition import CATALOG, log_alias, log_event
+from .nutrition import CATALOG, NutritionEvent, alias_event, log_events
 
 
 def build_legacy_event_id(file_name: str, line_no: int, raw_line: str) -> str:
@@ -16,6 +17,20 @@ def build_legacy_event_id(file_name: str, line_no: int, raw_line: str) -> str:
     return f"legacy:{file_name}:{line_no}:{digest}"
 
 
+def normalize_legacy_line(file_name: str, line_no: int, raw_line: str) -> dict[str, Any]:
+    """Turn one pending JSONL line into an ingest payload (legacy event_id, default source)."""
+    obj = json.loads(raw_line)
+    if not isinstance(obj, dict):
+        raise ValueError("line is not a JSON object")
+    payload = dict(obj)
+    event_id = payload.get("event_id") or payload.get("eventId")
+    if not isinstance(event_id, str) or not event_id.strip():
+        payload["event_id"] = build_legacy_event_id(file_name, line_no, raw_line)
+    if "source" not in payload:
+        payload["source"] = "openclaw"
+    return payload
+
+
 def _payload_hash(payload: dict[str, Any]) -> str:
     s = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
@@ -131,43 +146,21 @@ def _normalize_item(raw: Any, fallback_local_date: str | None) -> dict[str, Any]
     }
 
 
-def _upsert_intake(local_date: str, intake_kcal: float, source: str, note: str | None) -> None:
-    with db() as conn:
-        conn.execute(
-            """
-            INSERT INTO intake_calories_daily(day, intake_kcal, source, note, updated_at)
-            VALUES(?,?,?,?,?)
-            ON CONFLICT(day) DO UPDATE SET
-              intake_kcal=excluded.intake_kcal,
-              source=excluded.source,
-              note=excluded.note,
-              updated_at=excluded.updated_at
-            """,
-            (local_date, float(intake_kcal), source, note, now_iso()),
-        )
-
+@dataclass
+class PreparedPayload:
+    """A validated OpenClaw payload, ready to be written."""
 
-def _event_exists(event_id: str) -> bool:
-    with db() as conn:
-        row = conn.execute(
-            "SELECT event_id FROM openclaw_ingest_events WHERE event_id = ?",
-            (event_id,),
-        ).fetchone()
-    return row is not None
+    event_id: str
+    source: str
+    payload_hash: str
+    items: list[dict[str, Any]] = field(default_factory=list)
+    intake_day: str | None = None
+    intake_kcal: float | None = None
+    intake_note: str | None = None
 
 
-def _insert_event(event_id: str, source: str | None, payload_hash: str) -> None:
-    with db() as conn:
-        conn.execute(
-            """
-            INSERT INTO openclaw_ingest_events(event_id, ingested_at, source, payload_hash)
-            VALUES(?,?,?,?)
-            """,
-            (event_id, now_iso(), source, payload_hash),
-        )
-
-
-def ingest_openclaw_payload(payload: dict[str, Any]) -> dict[str, Any]:
+def prepare_payload(payload: dict[str, Any]) -> PreparedPayload:
+    """Validate and normalise a payload without touching the database."""
     if not isinstance(payload, dict):
         raise ValueError("Payload must be an object")
 
@@ -204,45 +197,193 @@ def ingest_openclaw_payload(payload: dict[str, Any]) -> dict[str, Any]:
     if intake_kcal is not None and not intake_day:
         raise ValueError("local_date is required when intake_kcal is provided")
 
-    if _event_exists(event_id):
-        return {"ok": True, "ingested": 0, "duplicate": 1, "eventId": event_id}
-
-    for item in normalized_items:
-        if item["kind"] == "alias":
-            log_alias(
-                str(item["alias"]),
-                consumed_at=item.get("consumed_at"),
-                count=float(item["count"]),
-                note=item.get("note"),
-            )
-        else:
-            micros = merge_micros_with_estimate(
-                str(item["label"]),
-                kcal=item.get("kcal"),
-                protein_g=item.get("protein_g"),
-                fat_g=item.get("fat_g"),
-                carbs_g=item.get("carbs_g"),
-                provided_micros=item.get("micros"),
-            )
-            log_event(
-                consumed_at=item.get("consumed_at"),
-                alias=None,
-                label=str(item["label"]),
-                count=float(item["count"]),
-                kcal=item.get("kcal"),
-                protein_g=item.get("protein_g"),
-                fat_g=item.get("fat_g"),
-                carbs_g=item.get("carbs_g"),
-                micros=micros,
-                note=item.get("note"),
-            )
+    return PreparedPayload(
+        event_id=event_id,
+        source=source,
+        payload_hash=_payload_hash(payload),
+        items=normalized_items,
+        intake_day=intake_day,
+        intake_kcal=intake_kcal,
+        intake_note=intake_note,
+    )
+
+
+def _item_event(item: dict[str, Any]) -> NutritionEvent:
+    if item["kind"] == "alias":
+        return alias_event(
+            str(item["alias"]),
+            consumed_at=item.get("consumed_at"),
+            count=float(item["count"]),
+            note=item.get("note"),
+        )
+    micros = merge_micros_with_estimate(
+        str(item["label"]),
+        kcal=item.get("kcal"),
+        protein_g=item.get("protein_g"),
+        fat_g=item.get("fat_g"),
+        carbs_g=item.get("carbs_g"),
+        provided_micros=item.get("micros"),
+    )
+    return NutritionEvent(
+        consumed_at=item.get("consumed_at"),
+        label=str(item["label"]),
+        count=float(item["count"]),
+        kcal=item.get("kcal"),
+        protein_g=item.get("protein_g"),
+        fat_g=item.get("fat_g"),
+        carbs_g=item.get("carbs_g"),
+        micros=micros,
+        note=item.get("note"),
+    )
+
+
+def _upsert_intake(
+    conn: sqlite3.Connection, local_date: str, intake_kcal: float, source: str, note: str | None
+) -> None:
+    conn.execute(
+        """
+        INSERT INTO intake_calories_daily(day, intake_kcal, source, note, updated_at)
+        VALUES(?,?,?,?,?)
+        ON CONFLICT(day) DO UPDATE SET
+          intake_kcal=excluded.intake_kcal,
+          source=excluded.source,
+          note=excluded.note,
+          updated_at=excluded.updated_at
+        """,
+        (local_date, float(intake_kcal), source, note, now_iso()),
+    )
+
+
+def _claim_event(conn: sqlite3.Connection, prepared: PreparedPayload) -> bool:
+    """Insert the ledger row first; False if another delivery already owns it.
+
+    The claim takes the write lock, so a concurrent delivery of the same
+    event_id blocks here and then sees the row instead of racing past a
+    separate existence check.
+    """
+    cur = conn.execute(
+        """
+        INSERT OR IGNORE INTO openclaw_ingest_events(event_id, ingested_at, source, payload_hash)
+        VALUES(?,?,?,?)
+        """,
+        (prepared.event_id, now_iso(), prepared.source, prepared.payload_hash),
+    )
+    return cur.rowcount > 0
+
+
+def ingest_prepared(conn: sqlite3.Connection, prepared: PreparedPayload) -> bool:
+    """Write one prepared payload on `conn` (the caller owns the transaction).
+
+    Returns False when the event_id was already ingested.
+    """
+    if not _claim_event(conn, prepared):
+        return False
+    log_events([_item_event(item) for item in prepared.items], conn)
+    if prepared.intake_kcal is not None and prepared.intake_day is not None:
+        _upsert_intake(conn, prepared.intake_day, prepared.intake_kcal, prepared.source, prepared.intake_note)
+    return True
+
+
+def _result(event_id: str | None, ingested: bool) -> dict[str, Any]:
+    return {"ok": True, "ingested": int(ingested), "duplicate": int(not ingested), "eventId": event_id}
 
-    if intake_kcal is not None and intake_day is not None:
-        _upsert_intake(intake_day, intake_kcal, source, intake_note)
 
-    try:
-        _insert_event(event_id, source, _payload_hash(payload))
-    except sqlite3.IntegrityError:
-        return {"ok": True, "ingested": 0, "duplicate": 1, "eventId": event_id}
+def ingest_openclaw_payload(payload: dict[str, Any]) -> dict[str, Any]:
+    prepared = prepare_payload(payload)
+    with db() as conn:
+        ingested = ingest_prepared(conn, prepared)
+    return _result(prepared.event_id, ingested)
+
+
+def ingest_prepared_many(conn: sqlite3.Connection, prepared: list[PreparedPayload]) -> list[bool]:
+    """Write many prepared payloads on `conn`; True for each one that was new.
+
+    Duplicates (against the ledger, and repeats within the batch) are found
+    with one set lookup, then the ledger rows, events and intake upserts are
+    written with executemany. The lookup is only race-free while the write
+    lock is held, so this opens an IMMEDIATE transaction when none is active.
+    """
+    if not prepared:
+        return []
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+
+    ids = list({p.event_id for p in prepared})
+    seen: set[str] = set()
+    for start in range(0, len(ids), 1000):
+        rows = conn.execute(
+            "SELECT event_id FROM openclaw_ingest_events WHERE event_id IN (SELECT value FROM json_each(?))",
+            (json.dumps(ids[start : start + 1000], ensure_ascii=False),),
+        ).fetchall()
+        seen.update(str(r["event_id"]) for r in rows)
+
+    flags: list[bool] = []
+    fresh: list[PreparedPayload] = []
+    for p in prepared:
+        new = p.event_id not in seen
+        if new:
+            seen.add(p.event_id)
+            fresh.append(p)
+        flags.append(new)
+    if not fresh:
+        return flags
+
+    ingested_at = now_iso()
+    conn.executemany(
+        "INSERT INTO openclaw_ingest_events(event_id, ingested_at, source, payload_hash) VALUES(?,?,?,?)",
+        [(p.event_id, ingested_at, p.source, p.payload_hash) for p in fresh],
+    )
+    log_events([_item_event(item) for p in fresh for item in p.items], conn)
+    # executemany keeps input order, so the last intake for a day wins as it
+    # would with one request per event.
+    conn.executemany(
+        """
+        INSERT INTO intake_calories_daily(day, intake_kcal, source, note, updated_at)
+        VALUES(?,?,?,?,?)
+        ON CONFLICT(day) DO UPDATE SET
+          intake_kcal=excluded.intake_kcal,
+          source=excluded.source,
+          note=excluded.note,
+          updated_at=excluded.updated_at
+        """,
+        [
+            (p.intake_day, float(p.intake_kcal), p.source, p.intake_note, ingested_at)
+            for p in fresh
+            if p.intake_kcal is not None and p.intake_day is not None
+        ],
+    )
+    return flags
+
+
+def _event_id_of(payload: Any) -> str | None:
+    if not isinstance(payload, dict):
+        return None
+    raw = payload.get("event_id") or payload.get("eventId")
+    return raw.strip() if isinstance(raw, str) else None
+
+
+def ingest_openclaw_bulk(payloads: Iterable[Any], conn: sqlite3.Connection | None = None) -> list[dict[str, Any]]:
+    """Ingest many payloads in one transaction; one result per payload, in order.
+
+    Invalid payloads are reported with ok=false and skipped; the valid ones
+    are still written.
+    """
+    if conn is None:
+        with db() as own:
+            return ingest_openclaw_bulk(payloads, own)
+
+    results: list[dict[str, Any] | None] = []
+    valid: list[tuple[int, PreparedPayload]] = []
+    for payload in payloads:
+        try:
+            valid.append((len(results), prepare_payload(payload)))
+            results.append(None)
+        except (ValueError, TypeError) as exc:
+            results.append(
+                {"ok": False, "ingested": 0, "duplicate": 0, "eventId": _event_id_of(payload), "error": str(exc)}
+            )
 
-    return {"ok": True, "ingested": 1, "duplicate": 0, "eventId": event_id}
+    flags = ingest_prepared_many(conn, [p for _, p in valid])
+    for (i, p), ingested in zip(valid, flags):
+        results[i] = _result(p.event_id, ingested)
+    return results  # type: ignore[return-value]
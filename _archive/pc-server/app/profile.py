@@ -1,14 +1,21 @@
 ﻿from __future__ import annotations
 
+import sqlite3
+
 from .db import db, now_iso
 
 
-def get_profile() -> dict:
-    """id=1 のプロフィールを返す。未設定時はゴール初期値を返す。"""
-    with db() as conn:
-        row = conn.execute(
-            "SELECT * FROM user_profile WHERE id = 1"
-        ).fetchone()
+def get_profile(conn: sqlite3.Connection | None = None) -> dict:
+    """id=1 のプロフィールを返す。未設定時はゴール初期値を返す。
+
+    conn を渡すと呼び出し側の接続で読む（bootstrap など複数セクションで共有する場合）。
+    """
+    if conn is None:
+        with db() as own:
+            return get_profile(own)
+    row = conn.execute(
+        "SELECT * FROM user_profile WHERE id = 1"
+    ).fetchone()
     if row is None:
         return {
             "sleep_goal_minutes": 420,
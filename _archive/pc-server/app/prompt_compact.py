@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any
+
+from .nutrition import CATALOG
+from .prompt_context import SECTION_MARKER_LINES, PromptContext
+
+# Estimated-token budget for compact prompts (see estimate_tokens).
+DEFAULT_TOKEN_BUDGET = 1200
+# Days before the period whose average is the user's baseline.
+BASELINE_DAYS = 14
+# Food log lines kept when trimming to the budget.
+MIN_FOOD_LINES = 3
+
+# (label, summary series, field, decimals)
+_HC_METRICS = (
+    ("体重kg", "weightByDate", "kg", 1),
+    ("歩数", "stepsByDate", "steps", 0),
+    ("睡眠h", "sleepHoursByDate", "hours", 1),
+    ("活動kcal", "activeCaloriesByDate", "kcal", 0),
+    ("総消費kcal", "totalCaloriesByDate", "kcal", 0),
+    ("安静時心拍", "restingHeartRateBpmByDate", "bpm", 0),
+)
+_MACRO_KEYS = ("energy_kcal", "protein_g", "fat_g", "carbs_g")
+_MACRO_LABELS = {"energy_kcal": "E", "protein_g": "P", "fat_g": "F", "carbs_g": "C"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count: about one per non-ASCII (Japanese) character
+    and one per four ASCII characters."""
+    ascii_chars = sum(1 for ch in text if ch < "\x80")
+    return (len(text) - ascii_chars) + math.ceil(ascii_chars / 4)
+
+
+def _num(value: float | None, digits: int) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.{digits}f}" if digits else f"{value:.0f}"
+
+
+def _signed(value: float | None, digits: int) -> str:
+    if value is None:
+        return "-"
+    text = _num(value, digits)
+    return text if text.startswith("-") else f"+{text}"
+
+
+def _avg(values: list[float]) -> float | None:
+    return sum(values) / len(values) if values else None
+
+
+def hc_table(summary: dict[str, Any], days: int, today: date) -> list[str]:
+    """One row per metric: latest, period average, baseline average and their delta."""
+    cutoff = (today - timedelta(days=days)).isoformat()
+    baseline_start = (today - timedelta(days=days + BASELINE_DAYS)).isoformat()
+    rows = ["指標|最新|期間平均|基準|Δ"]
+    for label, key, fld, digits in _HC_METRICS:
+        points = [(x.get("date", ""), x[fld]) for x in summary.get(key, []) if x.get(fld) is not None]
+        if not points:
+            continue
+        period = _avg([v for d, v in points if d >= cutoff][-days:])
+        baseline = _avg([v for d, v in points if baseline_start <= d < cutoff])
+        delta = period - baseline if period is not None and baseline is not None else None
+        rows.append(f"{label}|{_num(points[-1][1], digits)}|{_num(period, digits)}|{_num(baseline, digits)}|{_signed(delta, digits)}")
+    diet = summary.get("diet") or {}
+    if diet.get("trend"):
+        ma7 = diet.get("ma7Delta7d")
+        rows.append(f"体重トレンド: {diet['trend']} (MA7 Δ7d={_signed(ma7, 2) if ma7 is not None else 'N/A'}kg)")
+    return rows
+
+
+def _food_line(e: dict[str, Any]) -> str:
+    parts = [str(e.get("label", "不明"))]
+    if e.get("kcal") is not None:
+        parts.append(f"{e['kcal']:.0f}kcal")
+    for key, mark in (("protein_g", "P"), ("fat_g", "F"), ("carbs_g", "C")):
+        if e.get(key) is not None:
+            parts.append(f"{mark}{e[key]:.0f}")
+    return "・" + " ".join(parts)
+
+
+def nutrient_lines(targets: list[dict[str, Any]], recorded_keys: set[str]) -> list[str]:
+    """Macros against target, then only the nutrients outside their range
+    (red first); in-range and unassessed nutrients are dropped."""
+    by_key = {t["key"]: t for t in targets}
+    macros = []
+    for key in _MACRO_KEYS:
+        t = by_key.get(key)
+        if t is not None:
+            macros.append(f"{_MACRO_LABELS[key]} {_num(t['actual'], 0)}/{_num(t['target'], 0)}{t['unit']}")
+    lines = ["マクロ(実績/目標): " + " ".join(macros)] if macros else []
+
+    flagged = [t for t in targets if t["key"] not in _MACRO_KEYS and t["status"] != "green"]
+    flagged.sort(key=lambda t: (t["status"] != "red", t["key"]))
+    missing = [t["name"] for t in flagged if t["actual"] is None]
+    for t in flagged:
+        if t["actual"] is None:
+            continue
+        pct = t["actual"] / t["target"] * 100 if t["target"] else 0.0
+        limit = "上限" if t.get("rule") == "max" else "目標"
+        lines.append(f"- {t['name']} {_num(t['actual'], 1)}/{limit}{_num(t['target'], 1)}{t['unit']} ({pct:.0f}%)")
+    if missing:
+        lines.append("- 未記録: " + "、".join(missing))
+
+    unassessed = len(recorded_keys - set(by_key))
+    in_range = sum(1 for t in targets if t["key"] not in _MACRO_KEYS and t["status"] == "green")
+    if in_range or unassessed:
+        lines.append(f"（基準内{in_range}項目・基準なし{unassessed}項目は省略）")
+    return lines
+
+
+def supplement_line(events: list[dict[str, Any]]) -> str:
+    checked = {e["alias"] for e in events if e.get("alias")}
+    taken = [item.label for alias, item in CATALOG.items() if alias in checked]
+    skipped = [item.label for alias, item in CATALOG.items() if alias not in checked]
+    return f"✓ {'、'.join(taken) or 'なし'} / ✗ {'、'.join(skipped) or 'なし'}"
+
+
+@dataclass
+class _Block:
+    head: list[str]
+    lines: list[str] = field(default_factory=list)
+    # Blocks are trimmed from the end in ascending order; None is never trimmed.
+    trim_order: int | None = None
+    min_lines: int = 0
+    omitted: int = 0
+
+    def render(self) -> list[str]:
+        tail = [f"…他{self.omitted}行省略"] if self.omitted else []
+        return [*self.head, *self.lines, *tail]
+
+
+def _render(blocks: list[_Block]) -> str:
+    return "\n".join(line for b in blocks for line in b.render()) + "\n"
+
+
+def fit_to_budget(blocks: list[_Block], token_budget: int) -> str:
+    """Drop trailing lines of the trimmable blocks until the estimate fits.
+
+    Best effort: the fixed parts are never cut, so the result can still
+    exceed a budget smaller than them.
+    """
+    text = _render(blocks)
+    for block in sorted((b for b in blocks if b.trim_order is not None), key=lambda b: b.trim_order):
+        while estimate_tokens(text) > token_budget and len(block.lines) > block.min_lines:
+            block.lines.pop()
+            block.omitted += 1
+            text = _render(blocks)
+    return text
+
+
+def render_compact_prompt(
+    ctx: PromptContext,
+    targets: list[dict[str, Any]],
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+) -> str:
+    """The prompt as dense tables and deltas, trimmed to `token_budget`."""
+    profile = ctx.profile
+    name = profile.get("name") or "ユーザー"
+    height = profile.get("height_cm") or 172
+    birth_year = profile.get("birth_year") or 1985
+    goal_weight = profile.get("goal_weight_kg") or 75
+    sex_ja = {"male": "男性", "female": "女性", "other": "その他"}.get(profile.get("sex") or "male", "不明")
+    recorded = set((ctx.totals.get("micros") or {}).keys())
+    nutrients = nutrient_lines(targets, recorded) if ctx.food_events else ["（記録なし）"]
+
+    blocks = [
+        _Block(
+            [
+                "# 依頼",
+                "医師・フィジカルトレーナー・管理栄養士の視点で、知識のある優しい友人として助言してください。命令せず励まし、数値根拠を示すこと。",
+                f"# ユーザー: {name} {sex_ja} {ctx.today.year - birth_year}歳 {height}cm 目標{goal_weight}kg",
+                f"# 期間: {ctx.period_label}（基準=直前{BASELINE_DAYS}日平均）",
+                "## Health Connect",
+                *hc_table(ctx.summary, ctx.days, ctx.today),
+            ]
+        ),
+        _Block(
+            [f"## 食事（{ctx.target_date}）"],
+            [_food_line(e) for e in ctx.food_events] or ["（記録なし）"],
+            trim_order=0,
+            min_lines=MIN_FOOD_LINES,
+        ),
+        _Block([f"## 栄養（{ctx.target_date}・範囲外のみ）"], nutrients, trim_order=1, min_lines=1),
+        _Block([f"## サプリ: {supplement_line(ctx.food_events)}"]),
+        _Block(
+            [
+                "# 出力（Markdown・3セクション）",
+                *SECTION_MARKER_LINES,
+                "## 1. 体重・ダイエット視点（フィジカルトレーナー）: カロリー収支・体重トレンド・活動量",
+                "## 2. 健康・医療視点（医師）: バイタル・睡眠・心拍・SpO2。異常があれば受診を促す",
+                "## 3. 栄養・サプリ視点（管理栄養士）: マクロ・マイクロ栄養素の過不足・サプリの適切さ",
+            ]
+        ),
+    ]
+    return fit_to_budget(blocks, token_budget)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from .db import db
+from .nutrition import get_day_events, get_day_totals
+from .profile import get_profile
+from .summary import build_summary
+from .versions import window_version
+from .window import materialize_health_window
+
+# prompt_type -> (期間ラベル, スニペットの日数, 対象日が昨日か)
+PROMPT_PERIODS: dict[str, tuple[str, int, bool]] = {
+    "daily": ("昨日", 1, True),
+    "weekly": ("過去7日間", 7, False),
+    "monthly": ("過去30日間", 30, False),
+}
+
+# Health Connect types behind the prompt's HC snippet.
+PROMPT_HC_TYPES = (
+    "StepsRecord",
+    "WeightRecord",
+    "SleepSessionRecord",
+    "ActiveCaloriesBurnedRecord",
+    "TotalCaloriesBurnedRecord",
+    "RestingHeartRateRecord",
+)
+
+# Summary markers the model must open its reply with: reports.split_sections
+# reads them into report_sections (the app's expert cards, nutrition ai_comment).
+SECTION_MARKER_LINES = (
+    "回答の先頭に専門家カード用の要約（各100字以内、マーカーはそのまま）:",
+    "<!--DOCTOR-->医師 <!--TRAINER-->トレーナー <!--NUTRITIONIST-->管理栄養士 <!--END-->",
+)
+
+# The weight trend (MA7 Δ7d) compares 7-day averages a week apart, so the
+# window reaches two weeks (plus a day of UTC/local slack) before the period.
+TREND_LOOKBACK_DAYS = 15
+
+
+@dataclass
+class PromptContext:
+    """Everything build_prompt formats, read on one connection."""
+
+    prompt_type: str
+    today: date
+    period_label: str
+    days: int
+    target_date: str
+    profile: dict[str, Any]
+    summary: dict[str, Any]
+    food_events: list[dict[str, Any]]
+    totals: dict[str, Any]
+
+
+def prompt_window(prompt_type: str, today: date) -> tuple[str, str]:
+    """[start, end] dates of the health records a prompt of this type reads."""
+    _, days, _ = PROMPT_PERIODS[prompt_type]
+    start = today - timedelta(days=days + TREND_LOOKBACK_DAYS)
+    # Late-evening local records can carry the next UTC date.
+    end = today + timedelta(days=1)
+    return start.isoformat(), end.isoformat()
+
+
+def _extend_weight_window(conn: sqlite3.Connection, window: str, start: str, end: str) -> None:
+    """Add the weigh-ins the trend needs when the latest one predates the window.
+
+    The full-history trend is taken over the two weeks up to the latest
+    weigh-in (however old), carried forward from the one before them; copy
+    exactly those rows so the windowed summary reports the same trend.
+    """
+    day_expr = "COALESCE(date(time), date(start_time))"
+    last = conn.execute(
+        f"SELECT MAX({day_expr}) AS d FROM main.health_records WHERE type = 'WeightRecord' AND {day_expr} <= ?",
+        (end,),
+    ).fetchone()["d"]
+    if last is None:
+        return
+    trend_start = (date.fromisoformat(last) - timedelta(days=TREND_LOOKBACK_DAYS)).isoformat()
+    if trend_start >= start:
+        return
+    seed = conn.execute(
+        f"SELECT MAX({day_expr}) AS d FROM main.health_records WHERE type = 'WeightRecord' AND {day_expr} < ?",
+        (trend_start,),
+    ).fetchone()["d"]
+    conn.execute(
+        f"""
+        INSERT INTO {window}
+        SELECT * FROM main.health_records
+        WHERE type = 'WeightRecord' AND {day_expr} >= ? AND {day_expr} < ?
+          AND record_key NOT IN (SELECT record_key FROM {window})
+        """,
+        (seed or trend_start, start),
+    )
+
+
+def prompt_inputs(conn: sqlite3.Connection, prompt_type: str, today: date) -> dict[str, Any]:
+    """What a prompt depends on, for memoisation: any write to a day in its
+    window or to one of its record types, or a profile change, changes this."""
+    start, end = prompt_window(prompt_type, today)
+    profile = get_profile(conn) or {}
+    return {
+        "type": prompt_type,
+        "today": today.isoformat(),
+        "profileUpdatedAt": profile.get("updated_at"),
+        "version": window_version(
+            conn,
+            date.fromisoformat(start),
+            date.fromisoformat(end),
+            *(f"type:{t}" for t in PROMPT_HC_TYPES),
+        ),
+    }
+
+
+def build_prompt_context(
+    prompt_type: str,
+    *,
+    today: date | None = None,
+    conn: sqlite3.Connection | None = None,
+) -> PromptContext:
+    """Fetch the prompt's inputs: the summary over its window only, plus the
+    target day's events and nutrient totals.
+
+    The window is a TEMP table on the connection (replaced by the next call).
+    """
+    if prompt_type not in PROMPT_PERIODS:
+        raise ValueError(f"Invalid prompt_type: {prompt_type}")
+    if conn is None:
+        with db() as own:
+            return build_prompt_context(prompt_type, today=today, conn=own)
+
+    today = today or datetime.now().astimezone().date()
+    period_label, days, yesterday = PROMPT_PERIODS[prompt_type]
+    target_date = (today - timedelta(days=1) if yesterday else today).isoformat()
+
+    start, end = prompt_window(prompt_type, today)
+    profile = get_profile(conn) or {}
+    window = materialize_health_window(conn, PROMPT_HC_TYPES, start, end)
+    _extend_weight_window(conn, window, start, end)
+    summary = build_summary(conn, table=window)
+    food_events = get_day_events(target_date, conn)
+    totals = get_day_totals(target_date, conn)
+
+    return PromptContext(
+        prompt_type=prompt_type,
+        today=today,
+        period_label=period_label,
+        days=days,
+        target_date=target_date,
+        profile=profile,
+        summary=summary,
+        food_events=food_events,
+        totals=totals,
+    )
@@ -1,12 +1,15 @@
 ﻿from __future__ import annotations
 
+import sqlite3
 from datetime import date, datetime, timedelta
 
 from .db import db
-from .profile import get_profile
-from .nutrition import get_day_events, get_day_totals, CATALOG
+from .nutrition import get_range_totals, CATALOG
+from .nutrient_vector import NutrientVector
 from .nutrient_keys import SEED_KEYS
-from .summary import build_summary
+from .memo import memoized
+from .prompt_context import SECTION_MARKER_LINES, PromptContext, build_prompt_context, prompt_inputs
+from .prompt_compact import DEFAULT_TOKEN_BUDGET, render_compact_prompt
 
 
 def _today_local() -> date:
@@ -35,9 +38,8 @@ def _format_food_events(events: list[dict]) -> str:
     return "\n".join(lines)
 
 
-def _format_supplement_status(today_str: str) -> str:
-    """今日チェック済みのサプリ一覧を返す。"""
-    events = get_day_events(today_str)
+def _format_supplement_status(events: list[dict]) -> str:
+    """その日の食事イベントからチェック済みのサプリ一覧を返す。"""
     checked_aliases = {e["alias"] for e in events if e.get("alias")}
     lines = []
     for alias, item in CATALOG.items():
@@ -46,9 +48,9 @@ def _format_supplement_status(today_str: str) -> str:
     return "\n".join(lines) if lines else "（サプリ記録なし）"
 
 
-def _get_hc_snippet(summary: dict, days: int) -> str:
+def _get_hc_snippet(summary: dict, days: int, today: date | None = None) -> str:
     """build_summary() の結果から指定日数分の概要テキストを生成。"""
-    today = _today_local()
+    today = today or _today_local()
     cutoff = (today - timedelta(days=days)).isoformat()
 
     def tail(series: list[dict], key: str, n: int) -> list[float]:
@@ -162,15 +164,51 @@ def _format_all_nutrients(totals: dict) -> str:
     return "\n".join(lines)
 
 
-def build_prompt(prompt_type: str) -> str:
+def build_prompt(prompt_type: str, *, compact: bool = False, token_budget: int = DEFAULT_TOKEN_BUDGET) -> str:
     """
     prompt_type: "daily" | "weekly" | "monthly"
+    compact: 表形式・基準との差分・範囲外の栄養素のみに圧縮し、token_budget（推定トークン数）に収める
+
+    入力（期間内のデータバージョン・プロフィール更新日時・日付）が同じなら
+    memo_cache に保存済みのプロンプトを返す。
     """
     if prompt_type not in ("daily", "weekly", "monthly"):
         raise ValueError(f"Invalid prompt_type: {prompt_type}")
 
     today = _today_local()
-    profile = get_profile() or {}
+    with db() as conn:
+        inputs = prompt_inputs(conn, prompt_type, today)
+        if not compact:
+            return memoized(
+                conn,
+                "prompt",
+                inputs,
+                lambda: _render_prompt(build_prompt_context(prompt_type, today=today, conn=conn)),
+            )
+        return memoized(
+            conn,
+            "promptCompact",
+            {**inputs, "tokenBudget": token_budget},
+            lambda: _render_compact(build_prompt_context(prompt_type, today=today, conn=conn), conn, token_budget),
+        )
+
+
+def _render_compact(ctx: PromptContext, conn: sqlite3.Connection, token_budget: int) -> str:
+    weights = [x["kg"] for x in ctx.summary.get("weightByDate", []) if x.get("kg") is not None]
+    targets = calc_nutrient_targets(
+        height_cm=float(ctx.profile.get("height_cm") or 172.0),
+        weight_kg=float(weights[-1]) if weights else 70.0,  # fallback
+        birth_year=int(ctx.profile.get("birth_year") or 1985),
+        sex=str(ctx.profile.get("sex") or "male"),
+        local_date=ctx.target_date,
+        conn=conn,
+    )
+    return render_compact_prompt(ctx, targets, token_budget)
+
+
+def _render_prompt(ctx: PromptContext) -> str:
+    today = ctx.today
+    profile = ctx.profile
 
     name = profile.get("name") or "ユーザー"
     height = profile.get("height_cm") or 172
@@ -181,28 +219,15 @@ def build_prompt(prompt_type: str) -> str:
 
     sex_ja = {"male": "男性", "female": "女性", "other": "その他"}.get(sex, "不明")
 
-    # 期間設定
-    if prompt_type == "daily":
-        period_label = "昨日"
-        target_date = (today - timedelta(days=1)).isoformat()
-        days = 1
-    elif prompt_type == "weekly":
-        period_label = "過去7日間"
-        target_date = today.isoformat()
-        days = 7
-    else:
-        period_label = "過去30日間"
-        target_date = today.isoformat()
-        days = 30
-
-    summary = build_summary()
-    hc_snippet = _get_hc_snippet(summary, days)
+    period_label = ctx.period_label
+    target_date = ctx.target_date
+    hc_snippet = _get_hc_snippet(ctx.summary, ctx.days, today)
 
-    food_events = get_day_events(target_date)
-    food_text = _format_food_events(food_events)
-    totals = get_day_totals(target_date)
+    food_text = _format_food_events(ctx.food_events)
+    totals = ctx.totals
     all_nutrients_text = _format_all_nutrients(totals)
-    suppl_text = _format_supplement_status(target_date)
+    suppl_text = _format_supplement_status(ctx.food_events)
+    markers = "\n".join(SECTION_MARKER_LINES)
 
     prompt = f"""# お願い
 知識のある優しい友人として、医師・フィジカルトレーナー・管理栄養士の視点でアドバイスをください。
@@ -234,7 +259,9 @@ def build_prompt(prompt_type: str) -> str:
 {suppl_text}
 
 # 出力フォーマット
-以下の3セクションで回答してください（Markdown形式）:
+{markers}
+
+続けて、以下の3セクションで回答してください（Markdown形式）:
 
 ## 1. 体重・ダイエット視点（フィジカルトレーナー）
 （カロリー収支・体重トレンド・活動量の評価と提案）
@@ -254,6 +281,7 @@ def calc_nutrient_targets(
     birth_year: int,
     sex: str,
     local_date: str | None = None,
+    conn: sqlite3.Connection | None = None,
 ) -> list[dict]:
     """
     Harris-Benedict式でTDEEを算出し、各栄養素の推奨量を返す。
@@ -305,24 +333,37 @@ def calc_nutrient_targets(
 
     # 実績値を取得（指定日があればそれを優先）
     target_day = local_date or today.isoformat()
-    with db() as conn:
-        rows = conn.execute(
-            """
-            SELECT nutrient_key, SUM(value) AS total
-            FROM nutrition_nutrients
-            WHERE local_date = ?
-            GROUP BY nutrient_key
-            """,
-            (target_day,),
-        ).fetchall()
-    actuals = {r["nutrient_key"]: float(r["total"]) for r in rows}
-
-    def status(actual: float | None, target: float, rule: str = "range") -> str:
-        if actual is None:
+    if conn is None:
+        with db() as own:
+            return calc_nutrient_targets(height_cm, weight_kg, birth_year, sex, local_date, conn=own)
+    actuals = NutrientVector.from_dict(get_range_totals(target_day, target_day, conn=conn).get(target_day, {}))
+
+    # 上限あり栄養素（摂りすぎると問題になるもの）
+    max_rule_targets = {
+        "alcohol_g":       (20.0,   "g",  "アルコール"),
+        "saturated_fat_g": (16.0,   "g",  "飽和脂肪酸"),
+        "sodium_mg":       (2000.0, "mg", "ナトリウム"),
+        "trans_fat_g":     (2.0,    "g",  "トランス脂肪酸"),
+    }
+
+    # 実績/目標 の比を全栄養素まとめて計算（記録なしは None）
+    targets = NutrientVector.from_dict(
+        {
+            "energy_kcal": target_kcal,
+            "protein_g": protein_target,
+            "fat_g": fat_target,
+            "carbs_g": carbs_target,
+            **{key: t for key, (t, _, _) in micro_targets.items()},
+            **{key: t for key, (t, _, _) in max_rule_targets.items()},
+        }
+    )
+    ratios = actuals.ratio(targets)
+
+    def status(key: str, rule: str = "range") -> str:
+        ratio = ratios.get(key)
+        if ratio is None:
             return "red" if rule in ("min", "range") else "green"
-        
-        ratio = actual / target if target > 0 else 0
-        
+
         if rule == "range":
             if 0.80 <= ratio <= 1.20:
                 return "green"
@@ -353,7 +394,7 @@ def calc_nutrient_targets(
             "unit": "kcal",
             "target": round(target_kcal, 0),
             "actual": actuals.get("energy_kcal"),
-            "status": status(actuals.get("energy_kcal"), target_kcal, "range"),
+            "status": status("energy_kcal", "range"),
             "rule": "range",
         },
         {
@@ -362,7 +403,7 @@ def calc_nutrient_targets(
             "unit": "g",
             "target": round(protein_target, 1),
             "actual": actuals.get("protein_g"),
-            "status": status(actuals.get("protein_g"), protein_target, "min"),
+            "status": status("protein_g", "min"),
             "rule": "min",
         },
         {
@@ -371,7 +412,7 @@ def calc_nutrient_targets(
             "unit": "g",
             "target": round(fat_target, 1),
             "actual": actuals.get("fat_g"),
-            "status": status(actuals.get("fat_g"), fat_target, "max"),
+            "status": status("fat_g", "max"),
             "rule": "max",
         },
         {
@@ -380,7 +421,7 @@ def calc_nutrient_targets(
             "unit": "g",
             "target": round(carbs_target, 1),
             "actual": actuals.get("carbs_g"),
-            "status": status(actuals.get("carbs_g"), carbs_target, "range"),
+            "status": status("carbs_g", "range"),
             "rule": "range",
         },
     ]
@@ -392,19 +433,11 @@ def calc_nutrient_targets(
             "unit": unit,
             "target": target_val,
             "actual": actuals.get(key),
-            "status": status(actuals.get(key), target_val, "min"),
+            "status": status(key, "min"),
             "rule": "min",
         })
 
-    # 上限あり栄養素（摂りすぎると問題になるもの）
-    # actual が None の日（記録なし）はスキップして表示しない
-    max_rule_targets = {
-        "alcohol_g":       (20.0,   "g",  "アルコール"),
-        "saturated_fat_g": (16.0,   "g",  "飽和脂肪酸"),
-        "sodium_mg":       (2000.0, "mg", "ナトリウム"),
-        "trans_fat_g":     (2.0,    "g",  "トランス脂肪酸"),
-    }
-
+    # 上限あり栄養素: actual が None の日（記録なし）はスキップして表示しない
     for key, (target_val, unit, name) in max_rule_targets.items():
         actual_val = actuals.get(key)
         if actual_val is None:
@@ -415,7 +448,7 @@ def calc_nutrient_targets(
             "unit": unit,
             "target": target_val,
             "actual": actual_val,
-            "status": status(actual_val, target_val, "max"),
+            "status": status(key, "max"),
             "rule": "max",
         })
 
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+import sqlite3
+from datetime import date, datetime, time, timedelta
 from typing import Any
 
-from .db import LOCAL_TZ
+from .db import LOCAL_TZ, db, now_iso
 from .nutrition import get_day_events, get_day_totals
 from .summary import build_summary
+from .timing import record_cache
+from .versions import current_version, window_version
 
 
 def _fmt(n: float | None, digits: int = 1) -> str:
@@ -14,35 +17,44 @@ def _fmt(n: float | None, digits: int = 1) -> str:
     return f"{n:.{digits}f}"
 
 
-def _find_series_value(series: list[dict[str, Any]], date_str: str, field: str) -> float | None:
-    for x in series:
-        if x.get("date") == date_str:
-            v = x.get(field)
-            if v is None:
-                return None
-            return float(v)
-    return None
+def _on_date(series: list[dict[str, Any]], day: str, field: str) -> float | None:
+    """`field` of the summary series entry for `day` (series are one entry per
+    date in date order, so the search starts from the recent end)."""
+    entry = next((x for x in reversed(series) if x.get("date") == day), None)
+    v = None if entry is None else entry.get(field)
+    return None if v is None else float(v)
+
+
+def _yesterday() -> date:
+    return datetime.now().astimezone(LOCAL_TZ).date() - timedelta(days=1)
 
 
 def build_yesterday_report() -> str:
-    today = datetime.now().astimezone(LOCAL_TZ).date()
-    yday = (today - timedelta(days=1)).isoformat()
+    return build_daily_report(_yesterday())
+
 
-    s = build_summary()
+def build_daily_report(day: date, conn: sqlite3.Connection | None = None) -> str:
+    """Report text for one local day (the "yesterday" report, for `day`)."""
+    if conn is None:
+        with db() as own:
+            return build_daily_report(day, own)
 
-    weight = _find_series_value(s.get("weightByDate", []), yday, "kg")
-    steps = _find_series_value(s.get("stepsByDate", []), yday, "steps")
-    active_kcal = _find_series_value(s.get("activeCaloriesByDate", []), yday, "kcal")
-    total_kcal = _find_series_value(s.get("totalCaloriesByDate", []), yday, "kcal")
-    sleep_min = _find_series_value(s.get("sleepMinutesByDate", []), yday, "minutes")
+    yday = day.isoformat()
+    s = build_summary(conn)
+
+    weight = _on_date(s.get("weightByDate", []), yday, "kg")
+    steps = _on_date(s.get("stepsByDate", []), yday, "steps")
+    active_kcal = _on_date(s.get("activeCaloriesByDate", []), yday, "kcal")
+    total_kcal = _on_date(s.get("totalCaloriesByDate", []), yday, "kcal")
+    sleep_min = _on_date(s.get("sleepMinutesByDate", []), yday, "minutes")
 
     diet = s.get("diet") or {}
     ma7d = diet.get("ma7Delta7d")
     est_def = diet.get("estimatedDeficitKcalPerDay")
     trend = diet.get("trend")
 
-    events = get_day_events(yday)
-    totals = get_day_totals(yday)
+    events = get_day_events(yday, conn)
+    totals = get_day_totals(yday, conn)
 
     lines: list[str] = []
     lines.append(f"【前日レポート】{yday}")
@@ -97,3 +109,68 @@ def build_yesterday_report() -> str:
             lines.append(f"- {it.get('message')}")
 
     return "\n".join(lines)
+
+
+# ── 保存済みレポート（daily_text_reports） ──
+
+def report_input_version(conn: sqlite3.Connection, day: date) -> int:
+    """Latest write that can change the report for local `day` (or the profile).
+
+    Health records are versioned by their UTC date, so the records of a local
+    day also land on one neighbouring UTC day: the day before east of UTC,
+    the day after west of it. Only that one day is added, so most of today's
+    syncs leave yesterday's report alone. Writes further away (which can
+    still nudge the trend line) do not regenerate it.
+    """
+    offset = datetime.combine(day, time(12), LOCAL_TZ).utcoffset() or timedelta(0)
+    start = day - timedelta(days=1) if offset > timedelta(0) else day
+    end = day + timedelta(days=1) if offset < timedelta(0) else day
+    return window_version(conn, start, end, "profile")
+
+
+def _store(conn: sqlite3.Connection, day: date, version: int, text: str) -> None:
+    conn.execute(
+        """
+        INSERT INTO daily_text_reports(local_day, data_version, text, generated_at)
+        VALUES(?,?,?,?)
+        ON CONFLICT(local_day) DO UPDATE SET
+          data_version=excluded.data_version,
+          text=excluded.text,
+          generated_at=excluded.generated_at
+        """,
+        (day.isoformat(), version, text, now_iso()),
+    )
+
+
+def _fresh_report(conn: sqlite3.Connection, day: date) -> str | None:
+    row = conn.execute(
+        "SELECT data_version, text FROM daily_text_reports WHERE local_day = ?",
+        (day.isoformat(),),
+    ).fetchone()
+    fresh = row is not None and int(row["data_version"]) >= report_input_version(conn, day)
+    record_cache("dailyReport", hit=fresh)
+    return str(row["text"]) if fresh else None
+
+
+def get_daily_report(conn: sqlite3.Connection, day: date) -> str:
+    """Serve the stored report for `day`, generating it only when missing or stale."""
+    text = _fresh_report(conn, day)
+    if text is None:
+        # Version first: a concurrent write can only make the row look stale early.
+        version = current_version(conn)
+        text = build_daily_report(day, conn)
+        _store(conn, day, version, text)
+    return text
+
+
+def refresh_yesterday_report(*, today: date | None = None) -> bool:
+    """Generate yesterday's report if missing or stale (background job).
+
+    Returns True if it was (re)generated.
+    """
+    day = (today - timedelta(days=1)) if today else _yesterday()
+    with db() as conn:
+        if _fresh_report(conn, day) is not None:
+            return False
+        get_daily_report(conn, day)
+    return True
@@ -1,7 +1,47 @@
 ﻿from __future__ import annotations
 
+import re
+import sqlite3
+from typing import Any
+
 from .db import db, now_iso
 
+# Expert sections of a report, marked <!--DOCTOR--> ... (closing tag optional).
+REPORT_SECTIONS = ("doctor", "trainer", "nutritionist")
+PREVIEW_CHARS = 200
+
+_MARKER_RE = re.compile(r"<!--\s*(/?)\s*([A-Za-z]+)\s*-->")
+
+
+def split_sections(content: str) -> dict[str, str]:
+    """section -> body; a body runs to the next marker of any kind (or the end)."""
+    markers = list(_MARKER_RE.finditer(content))
+    out: dict[str, str] = {}
+    for i, m in enumerate(markers):
+        name = m.group(2).lower()
+        if m.group(1) or name not in REPORT_SECTIONS or name in out:
+            continue
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(content)
+        body = content[m.end():end].strip()
+        if body:
+            out[name] = body
+    return out
+
+
+def index_report(conn: sqlite3.Connection, report_id: int, content: str) -> dict[str, str]:
+    """Store the report's sections and preview (once, at save time)."""
+    sections = split_sections(content)
+    conn.execute("DELETE FROM report_sections WHERE report_id = ?", (report_id,))
+    conn.executemany(
+        "INSERT INTO report_sections(report_id, section, body) VALUES(?,?,?)",
+        [(report_id, section, body) for section, body in sections.items()],
+    )
+    conn.execute(
+        "UPDATE ai_reports SET preview = ? WHERE id = ?",
+        (content.strip()[:PREVIEW_CHARS], report_id),
+    )
+    return sections
+
 
 def save_report(
     *,
@@ -50,37 +90,156 @@ def save_report(
                 (report_date, report_type, prompt_used, content, now_iso()),
             )
             report_id = int(cur.lastrowid)
+        index_report(conn, report_id, content)
 
     return get_report(report_id)  # type: ignore[return-value]
 
 
-def list_reports(*, report_type: str | None = None, limit: int = 50) -> list[dict]:
-    """content は先頭200文字のプレビューのみ返す。"""
+# Length of search snippets, in trigram tokens (about one character each).
+SNIPPET_CONTEXT = 32
+
+_LIST_COLUMNS = """r.id, r.report_date, r.report_type, r.created_at,
+                   COALESCE(r.preview, SUBSTR(r.content, 1, 200)) AS preview"""
+
+
+def encode_cursor(report: dict) -> str:
+    """Opaque position after `report` in newest-first order."""
+    return f"{report['report_date']}:{report['id']}"
+
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    report_date, sep, report_id = cursor.rpartition(":")
+    if not sep or not report_date:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return report_date, int(report_id)
+
+
+def _snippet(content: str, q: str) -> str:
+    """Context around the first case-insensitive match, marked like FTS5 snippet()."""
+    pos = content.casefold().find(q.casefold())
+    if pos < 0:
+        return content[: SNIPPET_CONTEXT * 2]
+    start = max(pos - SNIPPET_CONTEXT // 2, 0)
+    end = pos + len(q) + SNIPPET_CONTEXT // 2
+    return (
+        ("…" if start > 0 else "")
+        + content[start:pos]
+        + "<mark>" + content[pos:pos + len(q)] + "</mark>"
+        + content[pos + len(q):end]
+        + ("…" if end < len(content) else "")
+    )
+
+
+def list_reports(
+    *,
+    report_type: str | None = None,
+    limit: int = 50,
+    q: str | None = None,
+    after: tuple[str, int] | None = None,
+) -> list[dict]:
+    """Newest first (report_date, id); `after` is a decoded cursor.
+
+    content は先頭200文字のプレビューのみ返す。`q` を指定すると本文を全文検索し、
+    一致箇所を <mark> で囲んだ snippet を付ける。
+    """
+    where: list[str] = []
+    params: list[object] = []
+    if report_type:
+        where.append("r.report_type = ?")
+        params.append(report_type)
+    if after is not None:
+        where.append("(r.report_date, r.id) < (?, ?)")
+        params.extend(after)
+    q = (q or "").strip()
+
     with db() as conn:
-        if report_type:
-            rows = conn.execute(
-                """
-                SELECT id, report_date, report_type, created_at,
-                       SUBSTR(content, 1, 200) AS preview
-                FROM ai_reports
-                WHERE report_type = ?
-                ORDER BY report_date DESC, created_at DESC
-                LIMIT ?
-                """,
-                (report_type, limit),
-            ).fetchall()
-        else:
+        if not q:
+            conditions = " AND ".join(where) or "1"
             rows = conn.execute(
-                """
-                SELECT id, report_date, report_type, created_at,
-                       SUBSTR(content, 1, 200) AS preview
-                FROM ai_reports
-                ORDER BY report_date DESC, created_at DESC
+                f"""
+                SELECT {_LIST_COLUMNS}
+                FROM ai_reports r
+                WHERE {conditions}
+                ORDER BY r.report_date DESC, r.id DESC
                 LIMIT ?
                 """,
-                (limit,),
+                (*params, limit),
             ).fetchall()
-    return [dict(r) for r in rows]
+            return [dict(r) for r in rows]
+
+        try:
+            if len(q) >= 3:  # trigram tokens
+                conditions = " AND ".join(["ai_reports_fts MATCH ?", *where])
+                rows = conn.execute(
+                    f"""
+                    SELECT {_LIST_COLUMNS},
+                           snippet(ai_reports_fts, 0, '<mark>', '</mark>', '…', {SNIPPET_CONTEXT}) AS snippet
+                    FROM ai_reports_fts
+                    JOIN ai_reports r ON r.id = ai_reports_fts.rowid
+                    WHERE {conditions}
+                    ORDER BY r.report_date DESC, r.id DESC
+                    LIMIT ?
+                    """,
+                    ('"' + q.replace('"', '""') + '"', *params, limit),
+                ).fetchall()
+                return [dict(r) for r in rows]
+        except sqlite3.OperationalError:
+            pass
+        # Short queries (and builds without FTS5) scan with LIKE.
+        escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        conditions = " AND ".join(["r.content LIKE ? ESCAPE '\\'", *where])
+        rows = conn.execute(
+            f"""
+            SELECT {_LIST_COLUMNS}, r.content
+            FROM ai_reports r
+            WHERE {conditions}
+            ORDER BY r.report_date DESC, r.id DESC
+            LIMIT ?
+            """,
+            (f"%{escaped}%", *params, limit),
+        ).fetchall()
+    out = []
+    for r in rows:
+        item = dict(r)
+        item["snippet"] = _snippet(str(item.pop("content") or ""), q)
+        out.append(item)
+    return out
+
+
+def get_report_section(
+    conn: sqlite3.Connection, report_date: str, report_type: str, section: str
+) -> dict[str, Any] | None:
+    """One section of the (date, type) report via the report_sections index.
+
+    Returns None without a report; `body` is None when it has no such section.
+    Reports written around save_report are indexed on first read.
+    """
+    row = conn.execute(
+        """
+        SELECT r.id, r.preview, s.body
+        FROM ai_reports r
+        LEFT JOIN report_sections s ON s.report_id = r.id AND s.section = ?
+        WHERE r.report_date = ? AND r.report_type = ?
+        ORDER BY r.created_at DESC LIMIT 1
+        """,
+        (section, report_date, report_type),
+    ).fetchone()
+    if row is None:
+        return None
+    report_id = int(row["id"])
+    preview, body = row["preview"], row["body"]
+    if preview is None:
+        content = conn.execute("SELECT content FROM ai_reports WHERE id = ?", (report_id,)).fetchone()["content"]
+        body = index_report(conn, report_id, str(content or "")).get(section)
+        preview = str(content or "").strip()[:PREVIEW_CHARS]
+    return {
+        "id": report_id,
+        "report_date": report_date,
+        "report_type": report_type,
+        "section": section,
+        "body": body,
+        "preview": preview,
+    }
 
 
 def get_report(report_id: int) -> dict | None:
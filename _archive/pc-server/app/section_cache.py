@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from typing import Any, Callable
+
+from .db import now_iso
+from .timing import record_cache
+
+# Entries kept in section_cache; the least recently built ones beyond this are evicted.
+SECTION_CACHE_MAX_ENTRIES = 512
+
+
+def cached_section(
+    conn: sqlite3.Connection,
+    section: str,
+    cache_key: str,
+    version: int,
+    build: Callable[[], Any],
+) -> Any:
+    """Return the cached value for (section, cache_key) if built at `version` or later.
+
+    `version` must be read before calling so that writes racing with `build`
+    leave the stored entry stale rather than wrongly fresh.
+    """
+    row = conn.execute(
+        "SELECT data_version, data FROM section_cache WHERE section = ? AND cache_key = ?",
+        (section, cache_key),
+    ).fetchone()
+    if row is not None and int(row["data_version"]) >= version:
+        record_cache(f"section:{section}", hit=True)
+        return json.loads(row["data"])
+
+    record_cache(f"section:{section}", hit=False)
+
+    data = build()
+    conn.execute(
+        """
+        INSERT INTO section_cache(section, cache_key, data_version, data, cached_at)
+        VALUES(?,?,?,?,?)
+        ON CONFLICT(section, cache_key) DO UPDATE SET
+          data_version=excluded.data_version,
+          data=excluded.data,
+          cached_at=excluded.cached_at
+        """,
+        (section, cache_key, version, json.dumps(data, ensure_ascii=False), now_iso()),
+    )
+    conn.execute(
+        """
+        DELETE FROM section_cache WHERE rowid IN (
+          SELECT rowid FROM section_cache ORDER BY cached_at DESC LIMIT -1 OFFSET ?
+        )
+        """,
+        (SECTION_CACHE_MAX_ENTRIES,),
+    )
+    return data
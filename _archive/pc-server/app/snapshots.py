@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import date, timedelta
+from typing import Any
+
+from .db import db, now_iso
+from .home import (
+    LOOKBACK_DAYS,
+    assemble_home_summary,
+    attach_home_reports,
+    compute_home_summary,
+    load_home_inputs,
+    load_report_refs,
+)
+from .timing import record_cache
+from .versions import current_version, window_version
+
+# Days (ending today) kept warm by refresh_home_snapshots().
+REFRESH_DAYS = 7
+
+# Non-day scopes the home rules read: profile goals and the all-time BP "linked" flag.
+_HOME_SCOPES = ("profile", "type:BloodPressureRecord")
+
+
+def home_input_version(conn: sqlite3.Connection, day: date) -> int:
+    """Latest data version that can change the home summary for `day`."""
+    return window_version(
+        conn,
+        day - timedelta(days=LOOKBACK_DAYS),
+        day + timedelta(days=1),
+        *_HOME_SCOPES,
+    )
+
+
+def _store(conn: sqlite3.Connection, day: date, version: int, core: dict[str, Any]) -> None:
+    conn.execute(
+        """
+        INSERT INTO home_snapshots(local_day, data_version, json, computed_at)
+        VALUES(?,?,?,?)
+        ON CONFLICT(local_day) DO UPDATE SET
+          data_version=excluded.data_version,
+          json=excluded.json,
+          computed_at=excluded.computed_at
+        """,
+        (day.isoformat(), version, json.dumps(core, ensure_ascii=False), now_iso()),
+    )
+
+
+def _fresh_snapshot(conn: sqlite3.Connection, day: date) -> dict[str, Any] | None:
+    row = conn.execute(
+        "SELECT data_version, json FROM home_snapshots WHERE local_day = ?",
+        (day.isoformat(),),
+    ).fetchone()
+    fresh = row is not None and int(row["data_version"]) >= home_input_version(conn, day)
+    record_cache("homeSnapshot", hit=fresh)
+    return json.loads(row["json"]) if fresh else None
+
+
+def get_home_summary(conn: sqlite3.Connection, day: date) -> dict[str, Any]:
+    """Serve the home summary from its snapshot, recomputing only when stale.
+
+    AI report fields are always read live (two indexed lookups).
+    """
+    core = _fresh_snapshot(conn, day)
+    if core is None:
+        # Read the version before computing: a concurrent write then only makes
+        # the stored snapshot look stale early, never fresh when it is not.
+        version = current_version(conn)
+        core = compute_home_summary(load_home_inputs(conn, day, day), day)
+        _store(conn, day, version, core)
+    return attach_home_reports(conn, day, core)
+
+
+def get_home_summaries(conn: sqlite3.Connection, start: date, end: date) -> dict[str, dict[str, Any]]:
+    """Home summaries for every day in [start, end], keyed by ISO date.
+
+    Fresh snapshots are reused; the remaining days are computed from a single
+    shared load of the widened window and stored.
+    """
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    cores = {day: _fresh_snapshot(conn, day) for day in days}
+    stale = [day for day, core in cores.items() if core is None]
+    if stale:
+        version = current_version(conn)
+        inputs = load_home_inputs(conn, stale[0], stale[-1])
+        for day in stale:
+            cores[day] = compute_home_summary(inputs, day)
+            _store(conn, day, version, cores[day])
+
+    refs = load_report_refs(conn, start, end)
+    return {
+        day.isoformat(): assemble_home_summary(day.isoformat(), cores[day], *refs[day.isoformat()])
+        for day in days
+    }
+
+
+def refresh_home_snapshots(days: int = REFRESH_DAYS, *, today: date | None = None) -> list[str]:
+    """Recompute stale snapshots for the most recent `days` days from one shared scan.
+
+    Intended to run as a background task after writes. Returns the refreshed days.
+    """
+    end = today or date.today()
+    start = end - timedelta(days=days - 1)
+    with db() as conn:
+        targets = [
+            start + timedelta(days=i)
+            for i in range(days)
+            if _fresh_snapshot(conn, start + timedelta(days=i)) is None
+        ]
+        if not targets:
+            return []
+        version = current_version(conn)
+        inputs = load_home_inputs(conn, targets[0], targets[-1])
+        for day in targets:
+            _store(conn, day, version, compute_home_summary(inputs, day))
+    return [d.isoformat() for d in targets]
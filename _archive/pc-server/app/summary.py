@@ -1,15 +1,27 @@
 from __future__ import annotations
 
 import json
+import sqlite3
 from collections import defaultdict
+from contextlib import nullcontext
 from datetime import date, datetime, timedelta, timezone
 from typing import Any, Iterable
 
+from .counters import record_counts_by_type, total_record_count
 from .db import db
 from .profile import get_profile
 
 LOCAL_TZ = datetime.now().astimezone().tzinfo
 
+# summary_cache row of the full /api/summary (dated variants append _{date}).
+SUMMARY_CACHE_KEY = "summary_v1"
+
+
+def invalidate_summary_cache(conn: sqlite3.Connection) -> None:
+    """Drop the cached /api/summary after a write (server endpoints and the importer)."""
+    conn.execute("DELETE FROM summary_cache WHERE cache_key = ?", (SUMMARY_CACHE_KEY,))
+
+
 # Diet heuristics
 PLATEAU_THRESHOLD_KG_PER_7D = -0.1  # MA7 Δ7d > -0.1kg => plateau-ish
 GAIN_THRESHOLD_KG_PER_7D = 0.1  # MA7 Δ7d > 0.1kg => gain-ish
@@ -484,18 +496,19 @@ def _diet_from_weight_daily(weight_daily: list[dict[str, Any]]) -> dict[str, Any
     }
 
 
-def build_summary() -> dict[str, Any]:
-    with db() as conn:
-        total = int(conn.execute("SELECT COUNT(*) AS c FROM health_records").fetchone()["c"])
+def build_summary(conn: sqlite3.Connection | None = None, *, table: str = "health_records") -> dict[str, Any]:
+    """Summary over the health records in `table`.
 
-        by_type_rows = conn.execute(
-            "SELECT type, COUNT(*) AS c FROM health_records GROUP BY type ORDER BY c DESC"
-        ).fetchall()
-        by_type = {r["type"]: int(r["c"]) for r in by_type_rows}
+    Pass a window materialised on `conn` (see window.materialize_health_window)
+    to limit the scan to that window.
+    """
+    with nullcontext(conn) if conn is not None else db() as conn:
+        total = total_record_count(conn)
+        by_type = record_counts_by_type(conn)
 
         # Steps (dedupe by source, then per-day max)
         steps_rows = conn.execute(
-            "SELECT start_time, source, payload_json FROM health_records WHERE type='StepsRecord'"
+            f"SELECT start_time, source, payload_json FROM {table} WHERE type='StepsRecord'"
         ).fetchall()
         steps_by_day_source: dict[tuple[str, str], float] = defaultdict(float)
         for r in steps_rows:
@@ -516,7 +529,7 @@ def build_summary() -> dict[str, Any]:
 
         # Distance (km, sum by day)
         dist_rows = conn.execute(
-            "SELECT start_time, source, payload_json FROM health_records WHERE type='DistanceRecord'"
+            f"SELECT start_time, source, payload_json FROM {table} WHERE type='DistanceRecord'"
         ).fetchall()
         distance_km_by_day_source: dict[tuple[str, str], float] = defaultdict(float)
         for r in dist_rows:
@@ -537,7 +550,7 @@ def build_summary() -> dict[str, Any]:
 
         # Weight (latest per day)
         weight_rows = conn.execute(
-            "SELECT time, start_time, end_time, payload_json FROM health_records WHERE type='WeightRecord'"
+            f"SELECT time, start_time, end_time, payload_json FROM {table} WHERE type='WeightRecord'"
         ).fetchall()
         weight_points: list[tuple[datetime, float]] = []
         for r in weight_rows:
@@ -556,7 +569,7 @@ def build_summary() -> dict[str, Any]:
 
         # Active calories (sum by day)
         active_rows = conn.execute(
-            "SELECT start_time, source, payload_json FROM health_records WHERE type='ActiveCaloriesBurnedRecord'"
+            f"SELECT start_time, source, payload_json FROM {table} WHERE type='ActiveCaloriesBurnedRecord'"
         ).fetchall()
         active_kcal_by_day_source: dict[tuple[str, str], float] = defaultdict(float)
         for r in active_rows:
@@ -577,7 +590,7 @@ def build_summary() -> dict[str, Any]:
 
         # Total calories burned (sum by day)
         total_rows = conn.execute(
-            "SELECT start_time, source, payload_json FROM health_records WHERE type='TotalCaloriesBurnedRecord'"
+            f"SELECT start_time, source, payload_json FROM {table} WHERE type='TotalCaloriesBurnedRecord'"
         ).fetchall()
         total_kcal_by_day_source: dict[tuple[str, str], float] = defaultdict(float)
         for r in total_rows:
@@ -603,7 +616,7 @@ def build_summary() -> dict[str, Any]:
 
         # Sleep minutes (dedupe overlaps by source/day; assign to wake-up day)
         sleep_rows = conn.execute(
-            "SELECT start_time, end_time, source, payload_json FROM health_records WHERE type='SleepSessionRecord'"
+            f"SELECT start_time, end_time, source, payload_json FROM {table} WHERE type='SleepSessionRecord'"
         ).fetchall()
         sleep_intervals_by_day_source: dict[tuple[str, str], list[tuple[datetime, datetime]]] = (
             defaultdict(list)
@@ -652,7 +665,7 @@ def build_summary() -> dict[str, Any]:
 
         # Speed (km/h, daily average from samples)
         speed_rows = conn.execute(
-            "SELECT start_time, source, payload_json FROM health_records WHERE type='SpeedRecord'"
+            f"SELECT start_time, source, payload_json FROM {table} WHERE type='SpeedRecord'"
         ).fetchall()
         speed_sum_by_day_source: dict[tuple[str, str], float] = defaultdict(float)
         speed_cnt_by_day_source: dict[tuple[str, str], int] = defaultdict(int)
@@ -695,7 +708,7 @@ def build_summary() -> dict[str, Any]:
 
         # Heart rate (bpm, daily average from samples)
         hr_rows = conn.execute(
-            "SELECT start_time, source, payload_json FROM health_records WHERE type='HeartRateRecord'"
+            f"SELECT start_time, source, payload_json FROM {table} WHERE type='HeartRateRecord'"
         ).fetchall()
         hr_sum_by_day_source: dict[tuple[str, str], float] = defaultdict(float)
         hr_cnt_by_day_source: dict[tuple[str, str], int] = defaultdict(int)
@@ -738,7 +751,7 @@ def build_summary() -> dict[str, Any]:
 
         # Resting heart rate (bpm, latest per day)
         rhr_rows = conn.execute(
-            "SELECT time, start_time, end_time, payload_json FROM health_records WHERE type='RestingHeartRateRecord'"
+            f"SELECT time, start_time, end_time, payload_json FROM {table} WHERE type='RestingHeartRateRecord'"
         ).fetchall()
         rhr_points: list[tuple[datetime, float]] = []
         for r in rhr_rows:
@@ -757,7 +770,7 @@ def build_summary() -> dict[str, Any]:
 
         # Blood pressure (latest per day)
         bp_rows = conn.execute(
-            "SELECT time, start_time, end_time, payload_json FROM health_records WHERE type='BloodPressureRecord'"
+            f"SELECT time, start_time, end_time, payload_json FROM {table} WHERE type='BloodPressureRecord'"
         ).fetchall()
         bp_best: dict[str, tuple[datetime, float, float]] = {}
         for r in bp_rows:
@@ -782,7 +795,7 @@ def build_summary() -> dict[str, Any]:
 
         # Oxygen saturation (% , latest per day)
         spo2_rows = conn.execute(
-            "SELECT time, start_time, end_time, payload_json FROM health_records WHERE type='OxygenSaturationRecord'"
+            f"SELECT time, start_time, end_time, payload_json FROM {table} WHERE type='OxygenSaturationRecord'"
         ).fetchall()
         spo2_points: list[tuple[datetime, float]] = []
         for r in spo2_rows:
@@ -804,7 +817,7 @@ def build_summary() -> dict[str, Any]:
         # Some data sources emit implausibly small values (e.g., ~35 kcal/day).
         # If any plausible values exist, ignore implausible ones.
         bmr_rows = conn.execute(
-            "SELECT time, start_time, end_time, payload_json FROM health_records WHERE type='BasalMetabolicRateRecord'"
+            f"SELECT time, start_time, end_time, payload_json FROM {table} WHERE type='BasalMetabolicRateRecord'"
         ).fetchall()
         bmr_candidates: list[tuple[datetime, float]] = []
         for r in bmr_rows:
@@ -830,7 +843,7 @@ def build_summary() -> dict[str, Any]:
 
         # Body fat (% , latest per day)
         bf_rows = conn.execute(
-            "SELECT time, start_time, end_time, payload_json FROM health_records WHERE type='BodyFatRecord'"
+            f"SELECT time, start_time, end_time, payload_json FROM {table} WHERE type='BodyFatRecord'"
         ).fetchall()
         bf_points: list[tuple[datetime, float]] = []
         for r in bf_rows:
@@ -850,7 +863,7 @@ def build_summary() -> dict[str, Any]:
 
         # Height (m, latest per day + latest value)
         height_rows = conn.execute(
-            "SELECT time, start_time, end_time, payload_json FROM health_records WHERE type='HeightRecord'"
+            f"SELECT time, start_time, end_time, payload_json FROM {table} WHERE type='HeightRecord'"
         ).fetchall()
         height_points: list[tuple[datetime, float]] = []
         for r in height_rows:
@@ -870,13 +883,13 @@ def build_summary() -> dict[str, Any]:
             height_m_latest = sorted(height_points, key=lambda x: x[0])[-1][1]
         # Fallback: use height_cm from user_profile if no HeightRecord in Health Connect
         if height_m_latest is None:
-            profile = get_profile()
+            profile = get_profile(conn)
             if profile and profile.get("height_cm"):
                 height_m_latest = profile["height_cm"] / 100.0
 
         # Exercise sessions (latest 30)
         exercise_rows = conn.execute(
-            "SELECT start_time, end_time, payload_json FROM health_records WHERE type='ExerciseSessionRecord'"
+            f"SELECT start_time, end_time, payload_json FROM {table} WHERE type='ExerciseSessionRecord'"
         ).fetchall()
         exercise_sessions_raw: list[tuple[datetime, dict[str, Any]]] = []
         for r in exercise_rows:
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+log = logging.getLogger(__name__)
+
+# Requests taking at least this long (wall ms) are logged as one JSON line.
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+
+
+@dataclass
+class RequestTimings:
+    """What one request spent its time on, filled in as it runs."""
+
+    started: float = field(default_factory=time.perf_counter)
+    db_ms: float = 0.0
+    queries: int = 0
+    encode_ms: float = 0.0
+    cache_hits: dict[str, int] = field(default_factory=dict)
+    cache_misses: dict[str, int] = field(default_factory=dict)
+    # Set when the response is complete; later work (background tasks) is not counted.
+    total_ms: float | None = None
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self, total_ms: float) -> str:
+        hits = sum(self.cache_hits.values())
+        misses = sum(self.cache_misses.values())
+        return ", ".join(
+            [
+                f"total;dur={total_ms:.1f}",
+                f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"',
+                f"encode;dur={self.encode_ms:.1f}",
+                f'cache;desc="{hits} hit {misses} miss"',
+            ]
+        )
+
+
+# Timings of the current request, set by TimingMiddleware. Sync endpoints run
+# in worker threads with a copy of the context, so they share the same object.
+_current: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+# perf_counter() of the last sync received by this process (see mark_sync).
+_last_sync: float | None = None
+
+
+def _active() -> RequestTimings | None:
+    timings = _current.get()
+    return timings if timings is not None and timings.total_ms is None else None
+
+
+def record_cache(name: str, hit: bool) -> None:
+    """Count a hit or miss of a named cache (memo, section, homeSnapshot...)."""
+    timings = _active()
+    if timings is not None:
+        counts = timings.cache_hits if hit else timings.cache_misses
+        counts[name] = counts.get(name, 0) + 1
+
+
+def timed_encode(encode: Callable[..., bytes], *args: Any) -> bytes:
+    timings = _active()
+    if timings is None:
+        return encode(*args)
+    start = time.perf_counter()
+    try:
+        return encode(*args)
+    finally:
+        timings.encode_ms += (time.perf_counter() - start) * 1000
+
+
+def mark_sync() -> None:
+    """Remember when data last arrived, so slow requests show how long after a sync they ran."""
+    global _last_sync
+    _last_sync = time.perf_counter()
+
+
+# ── DB time ──
+
+def _timed_db(query: bool, call: Callable[..., Any], *args: Any) -> Any:
+    timings = _active()
+    if timings is None:
+        return call(*args)
+    start = time.perf_counter()
+    try:
+        return call(*args)
+    finally:
+        timings.db_ms += (time.perf_counter() - start) * 1000
+        timings.queries += query
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Times statements and fetch calls. Rows read by iterating the cursor
+    are not timed (that would cost a Python call per row)."""
+
+    def execute(self, sql: str, parameters: Any = (), /) -> TimedCursor:
+        return _timed_db(True, super().execute, sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any, /) -> TimedCursor:
+        return _timed_db(True, super().executemany, sql, seq_of_parameters)
+
+    def fetchone(self) -> Any:
+        return _timed_db(False, super().fetchone)
+
+    def fetchmany(self, size: int | None = None) -> list[Any]:
+        return _timed_db(False, super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self) -> list[Any]:
+        return _timed_db(False, super().fetchall)
+
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3 connection factory counting queries and DB time of the current request."""
+
+    def cursor(self, factory: type[sqlite3.Cursor] = TimedCursor) -> sqlite3.Cursor:  # type: ignore[override]
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = (), /) -> sqlite3.Cursor:  # type: ignore[override]
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any, /) -> sqlite3.Cursor:  # type: ignore[override]
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script: str, /) -> sqlite3.Cursor:
+        return _timed_db(True, super().executescript, sql_script)
+
+    def commit(self) -> None:
+        _timed_db(False, super().commit)
+
+
+# ── Middleware ──
+
+class TimingMiddleware:
+    """Add a Server-Timing header (total, db, encode, cache) to every HTTP
+    response and log requests slower than `slow_ms` as one JSON line.
+
+    Streamed responses (text/event-stream, or a body sent in several chunks,
+    e.g. exports) are never logged: they last as long as the client keeps
+    reading, which says nothing about the server.
+    """
+
+    def __init__(self, app: ASGIApp, slow_ms: float = SLOW_REQUEST_MS) -> None:
+        self.app = app
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings()
+        token = _current.set(timings)
+        status = 500
+        streamed = False
+
+        async def send_timed(message: Message) -> None:
+            nonlocal status, streamed
+            if message["type"] == "http.response.start":
+                status = int(message["status"])
+                headers = MutableHeaders(scope=message)
+                ctype = headers.get("content-type", "").split(";")[0].strip().lower()
+                streamed = ctype == "text/event-stream"
+                headers.append("Server-Timing", timings.server_timing(timings.elapsed_ms()))
+            elif message["type"] == "http.response.body":
+                if message.get("more_body", False):
+                    streamed = True
+                else:
+                    timings.total_ms = timings.elapsed_ms()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            _current.reset(token)
+            if timings.total_ms is None:
+                timings.total_ms = timings.elapsed_ms()
+            if timings.total_ms >= self.slow_ms and not streamed:
+                log.warning(json.dumps(_slow_entry(scope, status, timings), ensure_ascii=False))
+
+
+def _slow_entry(scope: Scope, status: int, timings: RequestTimings) -> dict[str, Any]:
+    route = scope.get("route")
+    return {
+        "event": "slow_request",
+        "at": datetime.now(timezone.utc).isoformat(),
+        "method": scope.get("method"),
+        "path": scope.get("path"),
+        "route": getattr(route, "path", None),
+        "query": scope.get("query_string", b"").decode("latin-1") or None,
+        "status": status,
+        "totalMs": round(timings.total_ms or 0.0, 1),
+        "dbMs": round(timings.db_ms, 1),
+        "queries": timings.queries,
+        "encodeMs": round(timings.encode_ms, 1),
+        "cacheHits": timings.cache_hits,
+        "cacheMisses": timings.cache_misses,
+        "sinceSyncS": round(time.perf_counter() - _last_sync, 1) if _last_sync is not None else None,
+    }
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import date
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """Global data version (bumped by triggers on every tracked write)."""
+    row = conn.execute("SELECT version FROM data_versions WHERE scope = 'seq'").fetchone()
+    return int(row["version"]) if row else 0
+
+
+def window_version(conn: sqlite3.Connection, start: date, end: date, *scopes: str) -> int:
+    """Latest version touching any day in [start, end] or any of the extra scopes."""
+    placeholders = ",".join("?" for _ in scopes) or "NULL"
+    row = conn.execute(
+        f"""
+        SELECT COALESCE(MAX(version), 0) AS v
+        FROM data_versions
+        WHERE scope BETWEEN ? AND ?
+           OR scope IN ({placeholders})
+        """,
+        (f"day:{start.isoformat()}", f"day:{end.isoformat()}", *scopes),
+    ).fetchone()
+    return int(row["v"]) if row else 0
+
+
+def scope_version(conn: sqlite3.Connection, *scopes: str) -> int:
+    """Latest version among the given scopes (0 if none were ever written)."""
+    placeholders = ",".join("?" for _ in scopes) or "NULL"
+    row = conn.execute(
+        f"SELECT COALESCE(MAX(version), 0) AS v FROM data_versions WHERE scope IN ({placeholders})",
+        scopes,
+    ).fetchone()
+    return int(row["v"]) if row else 0
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Iterable
+
+# TEMP table holding a materialised window of health_records (see below).
+HEALTH_WINDOW = "temp.health_window"
+
+
+def materialize_health_window(
+    conn: sqlite3.Connection,
+    types: Iterable[str],
+    start_date: str,
+    end_date: str,
+) -> str:
+    """Copy the health_records rows a multi-day request needs into a TEMP table
+    and return its name, for readers that take a `table` argument.
+
+    Each per-day evaluation then scans only the shared window instead of every
+    record of its type, while other queries on the connection still see the
+    full main table. Besides rows whose date(start_time) or date(time) falls in
+    [start_date, end_date], the latest row of each type before start_date is
+    kept so "latest on or before base_date" lookups stay correct.
+    """
+    type_list = list(types)
+    placeholders = ",".join("?" for _ in type_list)
+    conn.execute(f"DROP TABLE IF EXISTS {HEALTH_WINDOW}")
+    conn.execute(
+        f"""
+        CREATE TABLE {HEALTH_WINDOW} AS
+        SELECT * FROM main.health_records
+        WHERE type IN ({placeholders})
+          AND (date(start_time) BETWEEN ? AND ? OR date(time) BETWEEN ? AND ?)
+        UNION
+        SELECT * FROM main.health_records
+        WHERE rowid IN (
+          SELECT rid FROM (
+            SELECT rowid AS rid, MAX(time)
+            FROM main.health_records
+            WHERE type IN ({placeholders}) AND date(time) < ?
+            GROUP BY type
+          )
+        )
+        """,
+        (*type_list, start_date, end_date, start_date, end_date, *type_list, start_date),
+    )
+    conn.execute("CREATE INDEX temp.idx_health_window_type ON health_window(type)")
+    return HEALTH_WINDOW
@@ -0,0 +1,99 @@
+"""Payload size / encode time per endpoint and encoding.
+
+    API_KEY=... DB_PATH=... python bench_encodings.py [--repeat N] [--date YYYY-MM-DD]
+
+Fetches each endpoint once as JSON through the app (in-process, no server
+needed), then times serialisation (stdlib json, dumps_json, msgpack, CBOR)
+and compression (gzip, brotli) of that payload.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+from typing import Any, Callable
+
+sys.path.append(".")
+
+from fastapi.testclient import TestClient
+
+from app import encoding
+from app.main import app
+
+
+def _endpoints(date: str) -> list[tuple[str, dict[str, str]]]:
+    return [
+        ("/api/summary", {}),
+        ("/api/summary", {"format": "columnar"}),
+        ("/api/bootstrap", {"date": date}),
+        ("/api/home-summary", {"date": date}),
+        ("/api/body-data", {"date": date, "period": "month"}),
+        ("/api/activity-data", {"date": date, "period": "month"}),
+        ("/api/sleep-data", {"date": date, "period": "month"}),
+        ("/api/vitals-data", {"date": date, "period": "month"}),
+        ("/api/nutrients/targets", {"date": date}),
+    ]
+
+
+def _timed(fn: Callable[[], bytes], repeat: int) -> tuple[bytes, float]:
+    out = b""
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return out, (time.perf_counter() - t0) / repeat * 1000
+
+
+def _encoders(payload: Any) -> dict[str, Callable[[], bytes]]:
+    out: dict[str, Callable[[], bytes]] = {
+        "json(stdlib)": lambda: json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        "json": lambda: encoding.dumps_json(payload),
+    }
+    if encoding.msgpack is not None:
+        out["msgpack"] = lambda: encoding.encode(payload, encoding.MSGPACK)
+    if encoding.cbor2 is not None:
+        out["cbor"] = lambda: encoding.encode(payload, encoding.CBOR)
+    return out
+
+
+def _compressors() -> dict[str, Callable[[bytes], bytes]]:
+    out: dict[str, Callable[[bytes], bytes]] = {
+        "identity": lambda b: b,
+        "gzip": lambda b: zlib.compress(b, 6, wbits=31),
+    }
+    if encoding.brotli is not None:
+        out["br"] = lambda b: encoding.brotli.compress(b, quality=5)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--date", default=time.strftime("%Y-%m-%d"))
+    args = parser.parse_args()
+
+    headers = {"X-Api-Key": os.getenv("API_KEY", ""), "Accept-Encoding": "identity"}
+    compressors = _compressors()
+    print(f"{'endpoint':<42} {'encoding':<13} {'coding':<9} {'bytes':>9} {'encode ms':>10} {'total ms':>9}")
+    with TestClient(app) as client:
+        for path, params in _endpoints(args.date):
+            r = client.get(path, params=params, headers=headers)
+            label = path + ("?" + "&".join(f"{k}={v}" for k, v in params.items()) if params else "")
+            if r.status_code != 200:
+                print(f"{label:<42} HTTP {r.status_code}")
+                continue
+            payload = r.json()
+            for enc_name, enc in _encoders(payload).items():
+                body, enc_ms = _timed(enc, args.repeat)
+                for coding, compress in compressors.items():
+                    data, comp_ms = _timed(lambda: compress(body), args.repeat)
+                    print(
+                        f"{label[:42]:<42} {enc_name:<13} {coding:<9} {len(data):>9} "
+                        f"{enc_ms:>10.3f} {enc_ms + comp_ms:>9.3f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
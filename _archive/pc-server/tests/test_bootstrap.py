@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import tempfile
+import unittest
+
+from fastapi.testclient import TestClient
+
+
+class BootstrapEndpointTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, "test_bootstrap.db")
+        self._old_db_path = os.environ.get("DB_PATH")
+        self._old_api_key = os.environ.get("API_KEY")
+        os.environ["DB_PATH"] = self.db_path
+        os.environ["API_KEY"] = "test-api-key"
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        db_mod.init_db()
+        self.db_mod = db_mod
+
+        import app.main as main_mod
+        importlib.reload(main_mod)
+        main_mod.start_discovery_thread = lambda: None  # type: ignore[assignment]
+
+        self.client_ctx = TestClient(main_mod.app)
+        self.client = self.client_ctx.__enter__()
+        self.headers = {"X-Api-Key": "test-api-key"}
+        self._seq = 0
+
+    def tearDown(self) -> None:
+        self.client_ctx.__exit__(None, None, None)
+        if self._old_db_path is None:
+            os.environ.pop("DB_PATH", None)
+        else:
+            os.environ["DB_PATH"] = self._old_db_path
+        if self._old_api_key is None:
+            os.environ.pop("API_KEY", None)
+        else:
+            os.environ["API_KEY"] = self._old_api_key
+        self._tmp.cleanup()
+
+    def _insert_weight(self, time: str, kg: float) -> None:
+        self._seq += 1
+        with self.db_mod.db() as conn:
+            conn.execute(
+                """
+                INSERT INTO health_records(record_key, device_id, type, time, payload_json, ingested_at)
+                VALUES(?,?,?,?,?,?)
+                """,
+                (f"w-{self._seq}", "dev-1", "WeightRecord", time, json.dumps({"inKilograms": kg}), time),
+            )
+
+    def _get(self, path: str, **params) -> dict:
+        r = self.client.get(path, params=params, headers=self.headers)
+        self.assertEqual(r.status_code, 200, r.text)
+        return r.json()
+
+    def test_sections_match_individual_endpoints(self) -> None:
+        self._insert_weight("2026-02-24T22:00:00+00:00", 71.0)
+        self.client.put("/api/profile", json={"height_cm": 170.0, "birth_year": 1985, "sex": "male"}, headers=self.headers)
+
+        boot = self._get("/api/bootstrap", date="2026-02-25")
+        day = {"date": "2026-02-25"}
+        self.assertEqual(boot["profile"], self._get("/api/profile"))
+        self.assertEqual(boot["connectionStatus"], self._get("/api/connection-status"))
+        self.assertEqual(boot["supplements"], self._get("/api/supplements"))
+        self.assertEqual(boot["nutrientTargets"], self._get("/api/nutrients/targets", **day))
+        self.assertEqual(boot["homeSummary"], self._get("/api/home-summary", **day))
+        for section, path in (
+            ("bodyData", "/api/body-data"),
+            ("activityData", "/api/activity-data"),
+            ("sleepData", "/api/sleep-data"),
+            ("vitalsData", "/api/vitals-data"),
+        ):
+            self.assertEqual(boot[section], self._get(path, **day), section)
+
+    def test_cached_sections_follow_writes(self) -> None:
+        self._insert_weight("2026-02-20T22:00:00+00:00", 72.0)
+        first = self._get("/api/bootstrap", date="2026-02-25")
+        self.assertEqual(first["bodyData"]["current"]["weight_kg"], 72.0)
+        self.assertEqual(self._get("/api/bootstrap", date="2026-02-25"), first)
+
+        with self.db_mod.db() as conn:
+            cached = conn.execute(
+                "SELECT COUNT(*) AS c FROM section_cache WHERE cache_key LIKE '2026-02-25%'"
+            ).fetchone()["c"]
+        self.assertGreaterEqual(cached, 5)
+
+        self._insert_weight("2026-02-25T01:00:00+00:00", 71.4)
+        second = self._get("/api/bootstrap", date="2026-02-25")
+        self.assertEqual(second["bodyData"]["current"]["weight_kg"], 71.4)
+        self.assertEqual(second["connectionStatus"]["total_records"], 2)
+
+    def test_section_cache_is_bounded(self) -> None:
+        import app.section_cache as section_cache_mod
+
+        old_max = section_cache_mod.SECTION_CACHE_MAX_ENTRIES
+        section_cache_mod.SECTION_CACHE_MAX_ENTRIES = 3
+        try:
+            with self.db_mod.db() as conn:
+                conn.execute("DELETE FROM section_cache")
+                for i in range(5):
+                    section_cache_mod.cached_section(conn, "test", f"k{i}", 1, lambda i=i: i)
+                    conn.execute("UPDATE section_cache SET cached_at = ? WHERE cache_key = ?", (f"2026-02-0{i + 1}", f"k{i}"))
+                keys = [r["cache_key"] for r in conn.execute("SELECT cache_key FROM section_cache ORDER BY cache_key")]
+        finally:
+            section_cache_mod.SECTION_CACHE_MAX_ENTRIES = old_max
+        self.assertEqual(keys, ["k2", "k3", "k4"])
+
+    def test_invalid_date_returns_400(self) -> None:
+        r = self.client.get("/api/bootstrap", params={"date": "2026/02/25"}, headers=self.headers)
+        self.assertEqual(r.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import unittest
+from datetime import date, timedelta
+
+from app.columnar import parse_fields, project_fields, to_columnar
+
+
+def _decode(col: dict, key: str) -> list[dict]:
+    """Rebuild the row-wise series from the columnar payload (client-side logic)."""
+    s = col["series"][key]
+    if "alias" in s:
+        return _decode(col, s["alias"])
+    start = date.fromisoformat(col["axis"]["start"])
+    names = [n for n in s if n not in ("from", "offsets")]
+    n = len(s[names[0]]) if names else len(s.get("offsets", []))
+    offsets = s["offsets"] if "offsets" in s else list(range(s["from"], s["from"] + n))
+    return [
+        {"date": (start + timedelta(days=o)).isoformat(), **{name: s[name][i] for name in names}}
+        for i, o in enumerate(offsets)
+    ]
+
+
+class ColumnarEncodingTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.summary = {
+            "totalRecords": 12,
+            "stepsByDate": [{"date": "2026-02-02", "steps": 4000.0}, {"date": "2026-02-03", "steps": 5200.0}],
+            "weightDaily": [
+                {"date": "2026-02-01", "kg": 71.0, "measured": True},
+                {"date": "2026-02-02", "kg": 71.0, "measured": False},
+            ],
+            "bloodPressureByDate": [
+                {"date": "2026-02-01", "systolic": 120, "diastolic": 80},
+                {"date": "2026-02-05", "systolic": 125, "diastolic": 82},
+            ],
+            "restingHeartRateByDate": [{"date": "2026-02-04", "bpm": 58}],
+            "restingHeartRateBpmByDate": [{"date": "2026-02-04", "bpm": 58}],
+            "distanceByDate": [],
+            "insights": [{"level": "info", "message": "x"}],
+        }
+
+    def test_round_trip(self) -> None:
+        col = to_columnar(self.summary)
+        self.assertEqual(col["axis"], {"start": "2026-02-01", "unit": "day"})
+        for key in ("stepsByDate", "weightDaily", "bloodPressureByDate", "restingHeartRateBpmByDate"):
+            self.assertEqual(_decode(col, key), self.summary[key], key)
+        self.assertEqual(col["series"]["distanceByDate"], {"offsets": []})
+        self.assertEqual(col["totalRecords"], 12)
+        self.assertEqual(col["insights"], self.summary["insights"])
+
+    def test_contiguous_series_use_from_and_duplicates_alias(self) -> None:
+        col = to_columnar(self.summary)
+        self.assertEqual(col["series"]["stepsByDate"], {"from": 1, "steps": [4000.0, 5200.0]})
+        self.assertEqual(col["series"]["bloodPressureByDate"]["offsets"], [0, 4])
+        self.assertEqual(col["series"]["restingHeartRateBpmByDate"], {"alias": "restingHeartRateByDate"})
+
+    def test_fields_projection(self) -> None:
+        fields = parse_fields(" stepsByDate, unknown ,")
+        self.assertEqual(fields, ["stepsByDate", "unknown"])
+        projected = project_fields(self.summary, fields)
+        self.assertEqual(list(projected), ["stepsByDate"])
+        self.assertEqual(project_fields(self.summary, parse_fields(None)), self.summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import importlib
+import os
+import tempfile
+import unittest
+
+
+class RecordCountersTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, "test_counters.db")
+        self._old_db_path = os.environ.get("DB_PATH")
+        os.environ["DB_PATH"] = self.db_path
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        import app.counters as counters_mod
+        importlib.reload(counters_mod)
+
+        db_mod.init_db()
+        self.db_mod = db_mod
+        self.counters_mod = counters_mod
+        self._seq = 0
+
+    def tearDown(self) -> None:
+        if self._old_db_path is None:
+            os.environ.pop("DB_PATH", None)
+        else:
+            os.environ["DB_PATH"] = self._old_db_path
+        self._tmp.cleanup()
+
+    def _insert(self, conn, rec_type: str, device_id: str = "dev-1", ingested_at: str = "2026-02-25T00:00:00+00:00") -> str:
+        self._seq += 1
+        key = f"rk-{self._seq}"
+        conn.execute(
+            """
+            INSERT INTO health_records(record_key, device_id, type, payload_json, ingested_at)
+            VALUES(?,?,?,?,?)
+            """,
+            (key, device_id, rec_type, "{}", ingested_at),
+        )
+        return key
+
+    def test_counters_follow_insert_and_delete(self) -> None:
+        with self.db_mod.db() as conn:
+            self._insert(conn, "StepsRecord", ingested_at="2026-02-20T00:00:00+00:00")
+            key = self._insert(conn, "StepsRecord", ingested_at="2026-02-25T00:00:00+00:00")
+            self._insert(conn, "WeightRecord", device_id="dev-2")
+
+        with self.db_mod.db() as conn:
+            self.assertEqual(self.counters_mod.total_record_count(conn), 3)
+            self.assertEqual(
+                self.counters_mod.record_counts_by_type(conn),
+                {"StepsRecord": 2, "WeightRecord": 1},
+            )
+            self.assertTrue(self.counters_mod.has_records(conn, "WeightRecord"))
+            self.assertFalse(self.counters_mod.has_records(conn, "SleepSessionRecord"))
+            steps = [c for c in self.counters_mod.list_record_counters(conn) if c["type"] == "StepsRecord"][0]
+            self.assertEqual(steps["first_seen_at"], "2026-02-20T00:00:00+00:00")
+            self.assertEqual(steps["last_seen_at"], "2026-02-25T00:00:00+00:00")
+
+            conn.execute("DELETE FROM health_records WHERE record_key = ?", (key,))
+
+        with self.db_mod.db() as conn:
+            self.assertEqual(self.counters_mod.record_counts_by_type(conn)["StepsRecord"], 1)
+
+    def test_reconcile_repairs_drift(self) -> None:
+        with self.db_mod.db() as conn:
+            self._insert(conn, "StepsRecord")
+            self._insert(conn, "StepsRecord")
+            conn.execute("UPDATE health_record_counters SET record_count = 7 WHERE type = 'StepsRecord'")
+
+        result = self.counters_mod.reconcile_record_counters(fix=True)
+        self.assertFalse(result["ok"])
+        self.assertTrue(result["fixed"])
+        self.assertEqual(result["drift"][0]["counted"], 7)
+        self.assertEqual(result["drift"][0]["actual"], 2)
+
+        again = self.counters_mod.reconcile_record_counters(fix=True)
+        self.assertTrue(again["ok"])
+        with self.db_mod.db() as conn:
+            self.assertEqual(self.counters_mod.total_record_count(conn), 2)
+
+    def test_init_db_backfills_counters_for_existing_records(self) -> None:
+        with self.db_mod.db() as conn:
+            self._insert(conn, "StepsRecord")
+            conn.execute("DELETE FROM health_record_counters")
+            conn.execute("DROP TABLE schema_version")  # created before versioned migrations
+
+        self.db_mod.init_db()
+        with self.db_mod.db() as conn:
+            self.assertEqual(self.counters_mod.total_record_count(conn), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import tempfile
+import unittest
+
+from fastapi.testclient import TestClient
+
+from app import encoding
+
+
+class ResponseEncodingTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, "test_encoding.db")
+        self._old_db_path = os.environ.get("DB_PATH")
+        self._old_api_key = os.environ.get("API_KEY")
+        os.environ["DB_PATH"] = self.db_path
+        os.environ["API_KEY"] = "test-api-key"
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        db_mod.init_db()
+        with db_mod.db() as conn:
+            for i in range(60):
+                t = f"2026-02-{1 + i % 28:02d}T{i % 24:02d}:00:00+00:00"
+                conn.execute(
+                    """
+                    INSERT INTO health_records(record_key, device_id, type, start_time, end_time, payload_json, ingested_at)
+                    VALUES(?,?,?,?,?,?,?)
+                    """,
+                    (f"rk-{i}", "dev-1", "StepsRecord", t, t, json.dumps({"count": 1000 + i}), t),
+                )
+
+        import app.main as main_mod
+        importlib.reload(main_mod)
+        main_mod.start_discovery_thread = lambda: None  # type: ignore[assignment]
+
+        self.client_ctx = TestClient(main_mod.app)
+        self.client = self.client_ctx.__enter__()
+
+    def tearDown(self) -> None:
+        self.client_ctx.__exit__(None, None, None)
+        if self._old_db_path is None:
+            os.environ.pop("DB_PATH", None)
+        else:
+            os.environ["DB_PATH"] = self._old_db_path
+        if self._old_api_key is None:
+            os.environ.pop("API_KEY", None)
+        else:
+            os.environ["API_KEY"] = self._old_api_key
+        self._tmp.cleanup()
+
+    def _get(self, path: str, accept: str = "application/json", accept_encoding: str = "identity", **params):
+        headers = {"X-Api-Key": "test-api-key", "Accept": accept, "Accept-Encoding": accept_encoding}
+        r = self.client.get(path, params=params, headers=headers)
+        self.assertEqual(r.status_code, 200, r.text)
+        return r
+
+    def test_json_is_default_and_uncompressed_without_accept_encoding(self) -> None:
+        r = self._get("/api/summary")
+        self.assertEqual(r.headers["content-type"], "application/json")
+        self.assertNotIn("content-encoding", r.headers)
+        self.assertIn("Accept", r.headers["vary"])
+        self.assertEqual(r.json()["totalRecords"], 60)
+
+    def test_gzip_above_threshold_only(self) -> None:
+        big = self._get("/api/summary", accept_encoding="gzip")
+        self.assertEqual(big.headers["content-encoding"], "gzip")
+        self.assertIn("Accept-Encoding", big.headers["vary"])
+        self.assertEqual(big.json(), self._get("/api/summary").json())
+
+        small = self._get("/healthz", accept_encoding="gzip")
+        self.assertNotIn("content-encoding", small.headers)
+
+    def test_streaming_export_is_compressed(self) -> None:
+        plain = self._get("/api/export.csv").content
+        gz = self._get("/api/export.csv", accept_encoding="gzip")
+        self.assertEqual(gz.headers["content-encoding"], "gzip")
+        self.assertEqual(gz.content, plain)
+
+    @unittest.skipIf(encoding.brotli is None, "brotli not installed")
+    def test_brotli_preferred_when_accepted(self) -> None:
+        r = self._get("/api/summary", accept_encoding="gzip, br")
+        self.assertEqual(r.headers["content-encoding"], "br")
+        self.assertEqual(r.json()["totalRecords"], 60)
+
+    def test_coding_respects_q_values(self) -> None:
+        negotiate = encoding.negotiate_coding
+        self.assertEqual(negotiate("br;q=0, gzip"), "gzip")
+        self.assertIsNone(negotiate("gzip;q=0"))
+        self.assertIsNone(negotiate("*;q=0, identity"))
+        self.assertIsNone(negotiate("gzip;q=abc"))
+        self.assertEqual(negotiate("*"), "br" if encoding.brotli is not None else "gzip")
+        if encoding.brotli is not None:
+            self.assertEqual(negotiate("br;q=0.5, gzip;q=0.8"), "gzip")
+            self.assertEqual(negotiate("gzip;q=0.5, br"), "br")
+
+        r = self._get("/api/summary", accept_encoding="br;q=0, gzip")
+        self.assertEqual(r.headers["content-encoding"], "gzip")
+        r = self._get("/api/summary", accept_encoding="gzip;q=0")
+        self.assertNotIn("content-encoding", r.headers)
+
+    @unittest.skipIf(encoding.msgpack is None, "msgpack not installed")
+    def test_msgpack(self) -> None:
+        r = self._get("/api/summary", accept="application/msgpack")
+        self.assertEqual(r.headers["content-type"], "application/msgpack")
+        self.assertEqual(encoding.msgpack.unpackb(r.content), self._get("/api/summary").json())
+
+    @unittest.skipIf(encoding.cbor2 is None, "cbor2 not installed")
+    def test_cbor_on_regular_endpoint(self) -> None:
+        r = self._get("/api/status", accept="application/cbor")
+        self.assertEqual(r.headers["content-type"], "application/cbor")
+        self.assertEqual(encoding.cbor2.loads(r.content), self._get("/api/status").json())
+
+    def test_dumps_json_matches_stdlib(self) -> None:
+        obj = {"名前": "体重", "kg": 71.25, "n": [1, None, True]}
+        self.assertEqual(json.loads(encoding.dumps_json(obj)), obj)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import unittest
 
-from app.estimator import merge_micros_with_estimate
+from app.estimator import KeywordMatcher, estimate_micros, merge_micros_with_estimate
 
 
 class EstimatorTests(unittest.TestCase):
@@ -26,6 +26,18 @@ class EstimatorTests(unittest.TestCase):
         self.assertEqual(float(out["sodium_mg"]), 10.0)
         self.assertEqual(float(out["vitamin_c_mg"]), 1.25)
 
+    def test_keyword_matcher_finds_overlapping_and_prefix_keywords(self) -> None:
+        matcher = KeywordMatcher([(["fish", "fishy"], {"a_mg": 1.0}), (["shy"], {"b_mg": 1.0}), (["tea"], {"c_mg": 1.0})])
+        self.assertEqual(matcher.rows("fishy steak"), [0, 1, 2])
+        self.assertEqual(matcher.rows("rice"), [])
+
+    def test_estimates_are_memoised_copies(self) -> None:
+        first = estimate_micros("Salmon Sashimi ", kcal=400, fat_g=10)
+        first["sodium_mg"] = -1.0
+        again = estimate_micros("salmon sashimi", kcal=400, fat_g=10)
+        self.assertGreater(again["sodium_mg"], 0.0)
+        self.assertGreater(again["omega3_mg"], 400 / 1000 * 180)
+
 
 if __name__ == "__main__":
     unittest.main()
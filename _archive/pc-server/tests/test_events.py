@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import json
+import os
+import tempfile
+import unittest
+from datetime import date
+
+
+class EventStreamTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, "test_events.db")
+        self._old_db_path = os.environ.get("DB_PATH")
+        os.environ["DB_PATH"] = self.db_path
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        import app.home as home_mod
+        importlib.reload(home_mod)
+        import app.snapshots as snapshots_mod
+        importlib.reload(snapshots_mod)
+        import app.events as events_mod
+        importlib.reload(events_mod)
+
+        db_mod.init_db()
+        self.db_mod = db_mod
+        self.events_mod = events_mod
+        self._seq = 0
+
+    def tearDown(self) -> None:
+        if self._old_db_path is None:
+            os.environ.pop("DB_PATH", None)
+        else:
+            os.environ["DB_PATH"] = self._old_db_path
+        self._tmp.cleanup()
+
+    def _insert_weight(self, time: str, kg: float) -> None:
+        self._seq += 1
+        with self.db_mod.db() as conn:
+            conn.execute(
+                """
+                INSERT INTO health_records(record_key, device_id, type, time, payload_json, ingested_at)
+                VALUES(?,?,?,?,?,?)
+                """,
+                (f"w-{self._seq}", "dev-1", "WeightRecord", time, json.dumps({"weight": {"inKilograms": kg}}), time),
+            )
+
+    @staticmethod
+    def _parse(chunk: str) -> tuple[str, dict]:
+        fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+        return fields["event"], json.loads(fields["data"])
+
+    async def _next_event(self, gen) -> tuple[str, dict]:
+        while True:
+            chunk = await asyncio.wait_for(gen.__anext__(), timeout=5)
+            if not chunk.startswith(":"):
+                return self._parse(chunk)
+
+    def test_change_notice_after_write(self) -> None:
+        async def scenario() -> None:
+            async def connected() -> bool:
+                return False
+
+            gen = self.events_mod.event_stream(connected, heartbeat=0.05)
+            event, hello = await self._next_event(gen)
+            self.assertEqual((event, hello), ("hello", {"version": 0}))
+            self.assertEqual(self.events_mod.broker.subscriber_count(), 1)
+
+            # Nothing changed: publishing is a no-op.
+            self.assertIsNone(await asyncio.to_thread(self.events_mod.broker.publish_changes))
+
+            await asyncio.to_thread(self._insert_weight, "2026-02-24T21:00:00+00:00", 71.2)
+            await asyncio.to_thread(self.events_mod.publish_changes)
+            event, notice = await self._next_event(gen)
+            self.assertEqual(event, "change")
+            self.assertEqual(notice["version"], 1)
+            self.assertEqual(notice["types"], ["WeightRecord"])
+            self.assertIn("2026-02-24", notice["days"])
+            self.assertNotIn("homeSummary", notice)
+
+            await gen.aclose()
+            self.assertEqual(self.events_mod.broker.subscriber_count(), 0)
+
+        asyncio.run(scenario())
+
+    def test_subscribe_is_not_blocked_while_publishing(self) -> None:
+        import threading
+
+        em = self.events_mod
+        broker = em.EventBroker()
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        first = broker.subscribe(loop, want_home=True)
+        self._insert_weight(f"{date.today().isoformat()}T00:00:00+00:00", 71.2)
+
+        computing, release = threading.Event(), threading.Event()
+        real_home = em.get_home_summary
+
+        def slow_home(conn, day):
+            computing.set()
+            release.wait(5)
+            return real_home(conn, day)
+
+        em.get_home_summary = slow_home
+        try:
+            publisher = threading.Thread(target=broker.publish_changes)
+            publisher.start()
+            self.assertTrue(computing.wait(5))
+            # The home summary is still being computed; (un)subscribing must not wait for it.
+            second = broker.subscribe(loop)
+            broker.unsubscribe(second)
+            self.assertEqual(broker.subscriber_count(), 1)
+            self.assertTrue(publisher.is_alive())
+            release.set()
+            publisher.join(5)
+        finally:
+            em.get_home_summary = real_home
+        self.assertFalse(publisher.is_alive())
+        self.assertEqual(broker._published, 1)
+        broker.unsubscribe(first)
+
+    def test_last_event_id_catch_up_and_home_delta(self) -> None:
+        today = date.today()
+        self._insert_weight(f"{today.isoformat()}T00:00:00+00:00", 70.0)
+
+        async def scenario() -> None:
+            async def connected() -> bool:
+                return False
+
+            gen = self.events_mod.event_stream(connected, last_event_id=0, include_home=True, heartbeat=0.05)
+            self.assertEqual(await self._next_event(gen), ("hello", {"version": 1}))
+            event, missed = await self._next_event(gen)
+            self.assertEqual((event, missed["version"], missed["types"]), ("change", 1, ["WeightRecord"]))
+            event, home = await self._next_event(gen)
+            self.assertEqual(event, "home")
+            self.assertEqual(home["homeSummary"]["date"], today.isoformat())
+
+            await asyncio.to_thread(self._insert_weight, f"{today.isoformat()}T01:00:00+00:00", 69.0)
+            await asyncio.to_thread(self.events_mod.publish_changes)
+            event, notice = await self._next_event(gen)
+            self.assertEqual(event, "change")
+            delta = notice["homeSummary"]
+            self.assertNotIn("date", delta)
+            self.assertTrue(delta)
+            await gen.aclose()
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
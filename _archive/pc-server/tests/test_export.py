@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import importlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from fastapi.testclient import TestClient
+
+
+class ExportEndpointTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, "test_export.db")
+        self._old_db_path = os.environ.get("DB_PATH")
+        self._old_api_key = os.environ.get("API_KEY")
+        os.environ["DB_PATH"] = self.db_path
+        os.environ["API_KEY"] = "test-api-key"
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        db_mod.init_db()
+        with db_mod.db() as conn:
+            for i, (rec_type, device, time) in enumerate(
+                [
+                    ("WeightRecord", "dev-1", "2026-02-10T22:00:00+00:00"),
+                    ("WeightRecord", "dev-2", "2026-02-12T22:00:00+00:00"),
+                    ("StepsRecord", "dev-1", "2026-02-11T03:00:00+00:00"),
+                ]
+            ):
+                start = time if rec_type == "StepsRecord" else None
+                point = None if rec_type == "StepsRecord" else time
+                conn.execute(
+                    """
+                    INSERT INTO health_records(record_key, device_id, type, start_time, time, payload_json, ingested_at)
+                    VALUES(?,?,?,?,?,?,?)
+                    """,
+                    (f"rk-{i}", device, rec_type, start, point, json.dumps({"v": i}), f"2026-02-2{i}T00:00:00+00:00"),
+                )
+
+        import app.export as export_mod
+        importlib.reload(export_mod)
+        self.export_mod = export_mod
+        import app.main as main_mod
+        importlib.reload(main_mod)
+        main_mod.start_discovery_thread = lambda: None  # type: ignore[assignment]
+
+        self.client_ctx = TestClient(main_mod.app)
+        self.client = self.client_ctx.__enter__()
+        self.headers = {"X-Api-Key": "test-api-key"}
+
+    def tearDown(self) -> None:
+        self.client_ctx.__exit__(None, None, None)
+        if self._old_db_path is None:
+            os.environ.pop("DB_PATH", None)
+        else:
+            os.environ["DB_PATH"] = self._old_db_path
+        if self._old_api_key is None:
+            os.environ.pop("API_KEY", None)
+        else:
+            os.environ["API_KEY"] = self._old_api_key
+        self._tmp.cleanup()
+
+    def _get(self, path: str, **params):
+        r = self.client.get(path, params=params, headers=self.headers)
+        self.assertEqual(r.status_code, 200, r.text)
+        return r
+
+    def test_csv_export_keeps_columns_and_order(self) -> None:
+        rows = list(csv.reader(io.StringIO(self._get("/api/export.csv").text)))
+        self.assertEqual(rows[0], list(self.export_mod.EXPORT_COLUMNS))
+        self.assertEqual([r[0] for r in rows[1:]], ["rk-0", "rk-1", "rk-2"])
+
+    def test_filters(self) -> None:
+        rows = list(csv.reader(io.StringIO(self._get("/api/export.csv", type="WeightRecord", device="dev-2").text)))
+        self.assertEqual([r[0] for r in rows[1:]], ["rk-1"])
+
+        ranged = self._get("/api/export", format="ndjson", **{"from": "2026-02-11", "to": "2026-02-11"})
+        lines = [json.loads(line) for line in ranged.text.splitlines()]
+        self.assertEqual([o["record_key"] for o in lines], ["rk-2"])
+        self.assertEqual(lines[0]["payload"], {"v": 2})
+
+    def test_gzip_and_batches(self) -> None:
+        plain = self._get("/api/export", format="csv").content
+        gz = self._get("/api/export", format="csv", gzip="true")
+        self.assertEqual(gz.headers["content-type"], "application/gzip")
+        self.assertEqual(gzip.decompress(gz.content), plain)
+
+        batches = list(self.export_mod.iter_record_batches(batch_size=2))
+        self.assertEqual([len(b) for b in batches], [2, 1])
+
+    def test_invalid_params(self) -> None:
+        r = self.client.get("/api/export", params={"format": "xml"}, headers=self.headers)
+        self.assertEqual(r.status_code, 400)
+        r = self.client.get("/api/export", params={"from": "02/11/2026"}, headers=self.headers)
+        self.assertEqual(r.status_code, 400)
+
+    def test_parquet_export(self) -> None:
+        if not self.export_mod.parquet_available():
+            r = self.client.get("/api/export", params={"format": "parquet"}, headers=self.headers)
+            self.assertEqual(r.status_code, 501)
+            return
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(io.BytesIO(self._get("/api/export", format="parquet").content))
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(table.column_names, list(self.export_mod.EXPORT_COLUMNS))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import importlib
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+
+class FoodCatalogTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, "test_foods.db")
+        self._old_db_path = os.environ.get("DB_PATH")
+        self._old_api_key = os.environ.get("API_KEY")
+        os.environ["DB_PATH"] = self.db_path
+        os.environ["API_KEY"] = "test-api-key"
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        import app.nutrition as nutrition_mod
+        importlib.reload(nutrition_mod)
+        import app.foods as foods_mod
+        importlib.reload(foods_mod)
+        import app.main as main_mod
+        importlib.reload(main_mod)
+        main_mod.start_discovery_thread = lambda: None  # type: ignore[assignment]
+
+        db_mod.init_db()
+        self.db_mod = db_mod
+        self.nutrition_mod = nutrition_mod
+        self.client_ctx = TestClient(main_mod.app)
+        self.client = self.client_ctx.__enter__()
+        self.headers = {"X-Api-Key": "test-api-key"}
+
+    def tearDown(self) -> None:
+        self.client_ctx.__exit__(None, None, None)
+        if self._old_db_path is None:
+            os.environ.pop("DB_PATH", None)
+        else:
+            os.environ["DB_PATH"] = self._old_db_path
+        if self._old_api_key is None:
+            os.environ.pop("API_KEY", None)
+        else:
+            os.environ["API_KEY"] = self._old_api_key
+        self._tmp.cleanup()
+
+    def _log(self, label: str, days_ago: int, kcal: float = 500.0) -> None:
+        nm = self.nutrition_mod
+        at = datetime.now().astimezone() - timedelta(days=days_ago)
+        nm.log_events([nm.NutritionEvent(label=label, consumed_at=at, kcal=kcal, micros={"sodium_mg": 800.0})])
+
+    def _suggest(self, q: str) -> list[dict]:
+        r = self.client.get("/api/foods/suggest", params={"q": q}, headers=self.headers)
+        self.assertEqual(r.status_code, 200, r.text)
+        return r.json()["items"]
+
+    def test_catalog_is_seeded(self) -> None:
+        items = self._suggest("ザバス")
+        self.assertEqual([i["alias"] for i in items], ["protein"])
+        self.assertEqual(items[0]["source"], "catalog")
+
+    def test_history_ranked_by_frequency_and_recency(self) -> None:
+        for _ in range(3):
+            self._log("鶏むね肉 定食", days_ago=120)
+        self._log("鶏そぼろ丼", days_ago=0)
+        self._log("鶏そぼろ丼", days_ago=1)
+
+        labels = [i["label"] for i in self._suggest("鶏")]
+        self.assertEqual(labels, ["鶏そぼろ丼", "鶏むね肉 定食"])
+        # Word prefix and infix (full-text) matches.
+        self.assertEqual([i["label"] for i in self._suggest("定食")], ["鶏むね肉 定食"])
+        self.assertEqual([i["label"] for i in self._suggest("そぼろ")], ["鶏そぼろ丼"])
+
+        # The index refreshes incrementally after new logs.
+        self._log("鶏ハム", days_ago=0)
+        self.assertIn("鶏ハム", [i["label"] for i in self._suggest("鶏")])
+
+    def test_relog_by_food_id_reuses_stored_nutrients(self) -> None:
+        self._log("カレーライス", days_ago=2, kcal=750.0)
+        food = self._suggest("カレー")[0]
+        self.assertEqual(food["useCount"], 1)
+
+        r = self.client.post(
+            "/api/nutrition/log",
+            headers=self.headers,
+            json={"food_id": food["id"], "count": 2, "local_date": "2026-02-22"},
+        )
+        self.assertEqual(r.status_code, 200, r.text)
+        totals = self.nutrition_mod.get_day_totals("2026-02-22")
+        self.assertEqual(totals["kcal"], 1500.0)
+        self.assertEqual(totals["micros"], {"sodium_mg": 1600.0})
+        self.assertEqual(self._suggest("カレー")[0]["useCount"], 2)
+
+        r = self.client.post("/api/nutrition/log", headers=self.headers, json={"food_id": 999999})
+        self.assertEqual(r.status_code, 400)
+
+    def test_backfill_from_existing_events(self) -> None:
+        self._log("味噌ラーメン", days_ago=3)
+        self._log("味噌ラーメン", days_ago=1)
+        with self.db_mod.db() as conn:
+            conn.execute("DELETE FROM food_catalog")
+            conn.execute("DROP TABLE schema_version")  # created before versioned migrations
+        self.db_mod.init_db()
+        items = self._suggest("味噌")
+        self.assertEqual([(i["label"], i["useCount"]) for i in items], [("味噌ラーメン", 2)])
+        with self.db_mod.db() as conn:
+            ids = {int(r["id"]) for r in conn.execute("SELECT id FROM food_catalog")}
+        self.assertIn(items[0]["id"], ids)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from fastapi.testclient import TestClient
+
+
+class _CountingBackend:
+    name = "counting"
+
+    def __init__(self, gate: threading.Event | None = None, fail: bool = False) -> None:
+        self.gate = gate
+        self.fail = fail
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str) -> str:
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            if self.gate is not None:
+                self.gate.wait(5)
+            else:
+                time.sleep(0.02)
+            if self.fail:
+                raise RuntimeError("backend down")
+            return f"<!--DOCTOR-->call {self.calls}"
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class _PromptFollowingBackend:
+    """Answers the way the prompt's output format asks, as a real model would."""
+
+    name = "prompt-following"
+
+    def __init__(self) -> None:
+        self.prompts: list[str] = []
+
+    def generate(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        if "<!--DOCTOR-->" not in prompt:
+            return "## 1. 体重・ダイエット視点（フィジカルトレーナー）\n順調です。\n## 2. 健康・医療視点（医師）\n問題なし。\n"
+        return (
+            "<!--DOCTOR-->睡眠は足りています。\n"
+            "<!--TRAINER-->歩数をあと2000歩。\n"
+            "<!--NUTRITIONIST-->タンパク質を一品追加。\n"
+            "<!--END-->\n\n"
+            "## 1. 体重・ダイエット視点（フィジカルトレーナー）\n順調です。\n"
+            "## 2. 健康・医療視点（医師）\n問題なし。\n"
+            "## 3. 栄養・サプリ視点（管理栄養士）\nバランス良好。\n"
+        )
+
+
+class ReportGeneratorTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_db_path = os.environ.get("DB_PATH")
+        os.environ["DB_PATH"] = os.path.join(self._tmp.name, "test_generation.db")
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        import app.nutrition as nutrition_mod
+        importlib.reload(nutrition_mod)
+        import app.memo as memo_mod
+        importlib.reload(memo_mod)
+        import app.prompt_context as prompt_context_mod
+        importlib.reload(prompt_context_mod)
+        import app.prompt_gen as prompt_gen_mod
+        importlib.reload(prompt_gen_mod)
+        import app.reports as reports_mod
+        importlib.reload(reports_mod)
+        import app.generation as generation_mod
+        importlib.reload(generation_mod)
+
+        db_mod.init_db()
+        self.db_mod = db_mod
+        self.nutrition_mod = nutrition_mod
+        self.reports_mod = reports_mod
+        self.gen = generation_mod
+
+    def tearDown(self) -> None:
+        if self._old_db_path is None:
+            os.environ.pop("DB_PATH", None)
+        else:
+            os.environ["DB_PATH"] = self._old_db_path
+        self._tmp.cleanup()
+
+    def test_stub_backend_is_deterministic(self) -> None:
+        stub = self.gen.StubBackend()
+        self.assertEqual(stub.generate("prompt"), stub.generate("prompt"))
+        self.assertNotEqual(stub.generate("prompt"), stub.generate("other"))
+        self.assertEqual(
+            set(self.reports_mod.split_sections(stub.generate("prompt"))),
+            {"doctor", "trainer", "nutritionist"},
+        )
+
+    def test_generate_all_then_reuse_until_prompt_changes(self) -> None:
+        backend = _CountingBackend()
+        generator = self.gen.ReportGenerator(backend)
+
+        results = generator.generate_all()
+        self.assertEqual([r.status for r in results], ["generated"] * 3)
+        self.assertLessEqual(backend.peak, self.gen.MAX_CONCURRENT_GENERATIONS)
+        report = self.reports_mod.get_report(results[0].report_id)
+        self.assertEqual(report["report_type"], "daily")
+        self.assertEqual(report["prompt_used"], self.gen.build_prompt("daily", compact=True))
+
+        again = generator.generate_all()
+        self.assertEqual([r.status for r in again], ["reused"] * 3)
+        self.assertEqual([r.report_id for r in again], [r.report_id for r in results])
+        self.assertEqual(backend.calls, 3)
+
+        # A meal logged yesterday changes the daily prompt.
+        nm = self.nutrition_mod
+        at = datetime.now().astimezone() - timedelta(days=1)
+        nm.log_events([nm.NutritionEvent(label="カレー", consumed_at=at, kcal=700.0)])
+        changed = generator.generate_all(("daily",))
+        self.assertEqual([r.status for r in changed], ["generated"])
+        self.assertEqual(changed[0].report_id, results[0].report_id)  # one row per (date, type)
+
+        forced = generator.generate_all(("weekly",), force=True)
+        self.assertEqual([r.status for r in forced], ["generated"])
+        self.assertEqual(backend.calls, 5)
+
+    def test_reply_to_the_generation_prompt_has_expert_sections(self) -> None:
+        for compact in (True, False):
+            backend = _PromptFollowingBackend()
+            generator = self.gen.ReportGenerator(backend, compact=compact)
+            (result,) = generator.generate_all(("daily",), force=True)
+            self.assertEqual(result.status, "generated", result.error)
+            with self.db_mod.db() as conn:
+                sections = {
+                    name: self.reports_mod.get_report_section(conn, result.report_date, "daily", name)["body"]
+                    for name in self.reports_mod.REPORT_SECTIONS
+                }
+            self.assertEqual(
+                sections,
+                {"doctor": "睡眠は足りています。", "trainer": "歩数をあと2000歩。", "nutritionist": "タンパク質を一品追加。"},
+                backend.prompts[0][-600:],
+            )
+
+    def test_in_flight_requests_are_deduplicated(self) -> None:
+        gate = threading.Event()
+        backend = _CountingBackend(gate=gate)
+        generator = self.gen.ReportGenerator(backend)
+
+        first = generator.submit("daily")
+        second = generator.submit("daily")
+        self.assertIs(first, second)
+        gate.set()
+        self.assertEqual(first.result(5).status, "generated")
+        self.assertEqual(backend.calls, 1)
+
+    def test_forced_request_reruns_after_a_non_forced_run(self) -> None:
+        gate = threading.Event()
+        backend = _CountingBackend(gate=gate)
+        generator = self.gen.ReportGenerator(backend)
+
+        plain = generator.submit("daily")
+        forced = generator.submit("daily", force=True)
+        self.assertIsNot(plain, forced)
+        # Later requests, forced or not, join the forced rerun.
+        self.assertIs(generator.submit("daily", force=True), forced)
+        self.assertIs(generator.submit("daily"), forced)
+        gate.set()
+        self.assertEqual(plain.result(5).status, "generated")
+        result = forced.result(5)
+        self.assertEqual(result.status, "generated")
+        self.assertEqual(backend.calls, 2)
+        self.assertEqual(backend.peak, 1)  # never alongside the run it follows
+        self.assertEqual(self.reports_mod.get_report(result.report_id)["content"], "<!--DOCTOR-->call 2")
+
+    def test_backend_errors_are_reported_not_saved(self) -> None:
+        generator = self.gen.ReportGenerator(_CountingBackend(fail=True))
+        (result,) = generator.generate_all(("monthly",))
+        self.assertEqual(result.status, "error")
+        self.assertIn("backend down", result.error)
+        self.assertEqual(self.reports_mod.list_reports(), [])
+
+    def test_openai_compatible_backend(self) -> None:
+        seen: list[dict] = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                seen.append({"path": self.path, "auth": self.headers.get("Authorization"), "body": body})
+                out = json.dumps({"choices": [{"message": {"content": "<!--DOCTOR-->ok"}}]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        server = HTTPServer(("127.0.0.1", 0), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            backend = self.gen.OpenAICompatibleBackend(
+                f"http://127.0.0.1:{server.server_port}/v1/", "test-model", api_key="secret"
+            )
+            self.assertEqual(backend.generate("こんにちは"), "<!--DOCTOR-->ok")
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(seen[0]["path"], "/v1/chat/completions")
+        self.assertEqual(seen[0]["auth"], "Bearer secret")
+        self.assertEqual(seen[0]["body"]["model"], "test-model")
+        self.assertEqual(seen[0]["body"]["messages"][0]["content"], "こんにちは")
+
+
+class GenerateEndpointTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_env = {k: os.environ.get(k) for k in ("DB_PATH", "API_KEY", "LLM_BACKEND")}
+        os.environ["DB_PATH"] = os.path.join(self._tmp.name, "test_generation_api.db")
+        os.environ["API_KEY"] = "test-api-key"
+        self.headers = {"X-Api-Key": "test-api-key"}
+
+    def tearDown(self) -> None:
+        self.client_ctx.__exit__(None, None, None)
+        for key, value in self._old_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        self._tmp.cleanup()
+
+    def _client(self, backend: str | None) -> TestClient:
+        if backend is None:
+            os.environ.pop("LLM_BACKEND", None)
+        else:
+            os.environ["LLM_BACKEND"] = backend
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        import app.main as main_mod
+        importlib.reload(main_mod)
+        main_mod.start_discovery_thread = lambda: None  # type: ignore[assignment]
+        db_mod.init_db()
+        self.main_mod = main_mod
+        self.client_ctx = TestClient(main_mod.app)
+        return self.client_ctx.__enter__()
+
+    def test_generate_with_stub_backend(self) -> None:
+        client = self._client("stub")
+        res = client.post("/api/reports/generate", headers=self.headers, json={"types": ["daily", "weekly"]})
+        self.assertEqual(res.status_code, 200)
+        body = res.json()
+        self.assertTrue(body["ok"])
+        self.assertEqual(body["backend"], "stub")
+        self.assertEqual([r["status"] for r in body["results"]], ["generated", "generated"])
+
+        res = client.post("/api/reports/generate", headers=self.headers)
+        self.assertEqual([r["status"] for r in res.json()["results"]], ["reused", "reused", "generated"])
+
+        section = client.get(
+            "/api/reports/section",
+            headers=self.headers,
+            params={"date": body["results"][0]["report_date"], "section": "nutritionist"},
+        )
+        self.assertIn("[stub ", section.json()["body"])
+        self.assertIn("aiReports", {j["name"] for j in client.get("/api/jobs", headers=self.headers).json()["jobs"]})
+
+    def test_generate_without_backend_is_unavailable(self) -> None:
+        client = self._client(None)
+        res = client.post("/api/reports/generate", headers=self.headers)
+        self.assertEqual(res.status_code, 503)
+        self.assertNotIn("aiReports", {j["name"] for j in client.get("/api/jobs", headers=self.headers).json()["jobs"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import tempfile
+import unittest
+from datetime import date
+
+
+class HomeSnapshotTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, "test_home_snapshots.db")
+        self._old_db_path = os.environ.get("DB_PATH")
+        os.environ["DB_PATH"] = self.db_path
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        import app.home as home_mod
+        importlib.reload(home_mod)
+        import app.snapshots as snapshots_mod
+        importlib.reload(snapshots_mod)
+
+        db_mod.init_db()
+        self.db_mod = db_mod
+        self.home_mod = home_mod
+        self.snapshots_mod = snapshots_mod
+        self.day = date(2026, 2, 25)
+        self._seq = 0
+
+    def tearDown(self) -> None:
+        if self._old_db_path is None:
+            os.environ.pop("DB_PATH", None)
+        else:
+            os.environ["DB_PATH"] = self._old_db_path
+        self._tmp.cleanup()
+
+    def _insert_weight(self, conn, time: str, kg: float) -> None:
+        self._seq += 1
+        conn.execute(
+            """
+            INSERT INTO health_records(record_key, device_id, type, time, payload_json, ingested_at)
+            VALUES(?,?,?,?,?,?)
+            """,
+            (f"w-{self._seq}", "dev-1", "WeightRecord", time, json.dumps({"weight": {"inKilograms": kg}}), time),
+        )
+
+    def _snapshot_version(self, conn) -> int | None:
+        row = conn.execute(
+            "SELECT data_version FROM home_snapshots WHERE local_day = ?",
+            (self.day.isoformat(),),
+        ).fetchone()
+        return None if row is None else int(row["data_version"])
+
+    def test_snapshot_is_served_until_window_changes(self) -> None:
+        with self.db_mod.db() as conn:
+            self._insert_weight(conn, "2026-02-24T21:00:00+00:00", 71.2)
+
+        with self.db_mod.db() as conn:
+            first = self.snapshots_mod.get_home_summary(conn, self.day)
+            stored = self._snapshot_version(conn)
+            self.assertEqual(first, self.home_mod.build_home_summary(conn, self.day))
+
+            # Writes outside the 30-day lookback do not invalidate the snapshot.
+            self._insert_weight(conn, "2025-12-01T00:00:00+00:00", 80.0)
+            self.snapshots_mod.get_home_summary(conn, self.day)
+            self.assertEqual(self._snapshot_version(conn), stored)
+
+            self._insert_weight(conn, "2026-02-25T01:00:00+00:00", 70.4)
+            second = self.snapshots_mod.get_home_summary(conn, self.day)
+            self.assertGreater(self._snapshot_version(conn), stored)
+            self.assertEqual(second, self.home_mod.build_home_summary(conn, self.day))
+
+    def test_profile_and_nutrition_writes_invalidate(self) -> None:
+        with self.db_mod.db() as conn:
+            self.snapshots_mod.get_home_summary(conn, self.day)
+            base = self._snapshot_version(conn)
+            conn.execute(
+                "INSERT INTO nutrition_events(consumed_at, local_date, label, kcal) VALUES(?,?,?,?)",
+                ("2026-02-25T12:00:00+09:00", "2026-02-25", "rice", 250),
+            )
+            summary = self.snapshots_mod.get_home_summary(conn, self.day)
+            self.assertTrue(summary["sufficiency"]["meal"])
+            after_meal = self._snapshot_version(conn)
+            self.assertGreater(after_meal, base)
+
+            conn.execute("INSERT INTO user_profile(id, steps_goal, updated_at) VALUES(1, 5000, 'x')")
+            self.snapshots_mod.get_home_summary(conn, self.day)
+            self.assertGreater(self._snapshot_version(conn), after_meal)
+
+    def test_report_fields_are_live(self) -> None:
+        with self.db_mod.db() as conn:
+            self.assertIsNone(self.snapshots_mod.get_home_summary(conn, self.day)["report"])
+            conn.execute(
+                """
+                INSERT INTO ai_reports(report_date, report_type, prompt_used, content, created_at)
+                VALUES(?,?,?,?,?)
+                """,
+                ("2026-02-25", "daily", "p", "report body", "2026-02-25T10:00:00+00:00"),
+            )
+            summary = self.snapshots_mod.get_home_summary(conn, self.day)
+            self.assertEqual(summary["report"]["content"], "report body")
+
+    def test_refresh_recomputes_stale_days_from_one_scan(self) -> None:
+        with self.db_mod.db() as conn:
+            for i in range(10, 26):
+                self._insert_weight(conn, f"2026-02-{i:02d}T21:00:00+00:00", 72.0 - i * 0.1)
+
+        refreshed = self.snapshots_mod.refresh_home_snapshots(7, today=self.day)
+        self.assertEqual(refreshed[0], "2026-02-19")
+        self.assertEqual(refreshed[-1], "2026-02-25")
+        self.assertEqual(self.snapshots_mod.refresh_home_snapshots(7, today=self.day), [])
+
+        with self.db_mod.db() as conn:
+            for iso_day in refreshed:
+                row = conn.execute(
+                    "SELECT json FROM home_snapshots WHERE local_day = ?", (iso_day,)
+                ).fetchone()
+                live = self.home_mod.build_home_summary(conn, date.fromisoformat(iso_day))
+                snap = json.loads(row["json"])
+                self.assertEqual(snap["attentionPoints"], live["attentionPoints"])
+                self.assertEqual(snap["statusItems"], live["statusItems"])
+
+
+if __name__ == "__main__":
+    unittest.main()
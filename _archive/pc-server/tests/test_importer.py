@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+
+class ImporterTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, "test_importer.db")
+        self._old_db_path = os.environ.get("DB_PATH")
+        os.environ["DB_PATH"] = self.db_path
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        import app.nutrition as nutrition_mod
+        importlib.reload(nutrition_mod)
+        import app.openclaw_ingest as ingest_mod
+        importlib.reload(ingest_mod)
+        import app.importer as importer_mod
+        importlib.reload(importer_mod)
+
+        db_mod.init_db()
+        self.db_mod = db_mod
+        self.ingest_mod = ingest_mod
+        self.importer = importer_mod
+        self.pending = Path(self._tmp.name) / "pending"
+        (self.pending / "inbox").mkdir(parents=True)
+
+    def tearDown(self) -> None:
+        if self._old_db_path is None:
+            os.environ.pop("DB_PATH", None)
+        else:
+            os.environ["DB_PATH"] = self._old_db_path
+        self._tmp.cleanup()
+
+    def _write(self, name: str, lines: list[object]) -> Path:
+        path = self.pending / "inbox" / name
+        path.write_text(
+            "\n".join(x if isinstance(x, str) else json.dumps(x) for x in lines) + "\n",
+            encoding="utf-8",
+        )
+        return path
+
+    def _count(self, table: str) -> int:
+        with self.db_mod.db() as conn:
+            return int(conn.execute(f"SELECT COUNT(*) AS c FROM {table}").fetchone()["c"])
+
+    def test_imports_dedupes_and_archives(self) -> None:
+        self.ingest_mod.ingest_openclaw_payload(
+            {"event_id": "e:0", "local_date": "2026-02-18", "items": [{"alias": "protein"}]}
+        )
+        self._write(
+            "a.jsonl",
+            [
+                {"event_id": "e:0", "local_date": "2026-02-18", "items": [{"alias": "protein"}]},
+                {"event_id": "e:1", "local_date": "2026-02-18", "intake_kcal": 1800, "items": [{"alias": "protein"}]},
+                "",
+                {"local_date": "2026-02-19", "items": [{"label": "rice bowl", "kcal": 550}]},
+                {"event_id": "e:1", "local_date": "2026-02-18", "items": [{"alias": "protein"}]},
+            ],
+        )
+        logs: list[str] = []
+        errors = self.importer.import_pending(self.pending, batch_size=2, log=logs.append)
+
+        self.assertEqual(errors, 0)
+        self.assertEqual(self._count("nutrition_events"), 3)
+        self.assertEqual(self._count("openclaw_ingest_events"), 3)
+        self.assertEqual(list((self.pending / "inbox").iterdir()), [])
+        self.assertEqual(len(list((self.pending / "archive").glob("*/a.jsonl"))), 1)
+        self.assertTrue(any("ingested=2 duplicate=2" in line for line in logs), logs)
+
+        with self.db_mod.db() as conn:
+            legacy = conn.execute(
+                "SELECT event_id FROM openclaw_ingest_events WHERE event_id LIKE 'legacy:a.jsonl:4:%'"
+            ).fetchone()
+        self.assertIsNotNone(legacy)
+
+    def test_bad_lines_move_file_to_error_with_report(self) -> None:
+        self._write(
+            "b.jsonl",
+            [
+                {"event_id": "b:1", "local_date": "2026-02-18", "items": [{"alias": "protein"}]},
+                "{not json",
+                {"event_id": "b:2", "items": [{"alias": "no_such_alias"}]},
+            ],
+        )
+        errors = self.importer.import_pending(self.pending, log=lambda _: None)
+
+        self.assertEqual(errors, 1)
+        self.assertEqual(self._count("nutrition_events"), 1)
+        report = (self.pending / "error" / "b.jsonl.err").read_text(encoding="utf-8")
+        self.assertIn("line 2:", report)
+        self.assertIn("line 3: Unknown alias", report)
+        self.assertTrue((self.pending / "error" / "b.jsonl").exists())
+
+    def test_worker_pool_matches_inline_parse(self) -> None:
+        lines = [
+            {"event_id": f"p:{i}", "local_date": "2026-02-18", "items": [{"label": f"meal {i}", "kcal": 400}]}
+            for i in range(50)
+        ]
+        path = self._write("c.jsonl", lines)
+        old_chunk = self.importer.CHUNK_LINES
+        self.importer.CHUNK_LINES = 7
+        try:
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                result = self.importer.import_file(path, executor=executor, batch_size=20)
+        finally:
+            self.importer.CHUNK_LINES = old_chunk
+
+        self.assertEqual((result.lines, result.ingested, result.duplicate, result.errors), (50, 50, 0, []))
+        with self.db_mod.db() as conn:
+            labels = [r["label"] for r in conn.execute("SELECT label FROM nutrition_events ORDER BY id")]
+        self.assertEqual(labels, [f"meal {i}" for i in range(50)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+
+class NextFireTests(unittest.TestCase):
+    def test_next_and_last_fire(self) -> None:
+        from app.jobs import _last_fire, next_fire
+
+        now = datetime(2026, 2, 20, 12, 0).astimezone()
+        self.assertEqual(next_fire(("00:10", "18:30"), now), datetime(2026, 2, 20, 18, 30).astimezone())
+        self.assertEqual(next_fire(("00:10",), now), datetime(2026, 2, 21, 0, 10).astimezone())
+        self.assertEqual(_last_fire(("00:10", "18:30"), now), datetime(2026, 2, 20, 0, 10).astimezone())
+        self.assertEqual(_last_fire(("18:30",), now), datetime(2026, 2, 19, 18, 30).astimezone())
+        self.assertIsNone(next_fire((), now))
+
+
+class SchedulerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_db_path = os.environ.get("DB_PATH")
+        os.environ["DB_PATH"] = os.path.join(self._tmp.name, "test_jobs.db")
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        import app.jobs as jobs_mod
+        importlib.reload(jobs_mod)
+
+        db_mod.init_db()
+        self.db_mod = db_mod
+        self.jobs_mod = jobs_mod
+
+    def tearDown(self) -> None:
+        if self._old_db_path is None:
+            os.environ.pop("DB_PATH", None)
+        else:
+            os.environ["DB_PATH"] = self._old_db_path
+        self._tmp.cleanup()
+
+    def _status(self, scheduler) -> dict[str, dict]:
+        return {s["name"]: s for s in scheduler.status()}
+
+    def test_run_now_records_runs_and_failures(self) -> None:
+        jm = self.jobs_mod
+        calls: list[str] = []
+
+        def boom() -> None:
+            raise RuntimeError("nope")
+
+        scheduler = jm.Scheduler([jm.Job("ok", lambda: calls.append("ok")), jm.Job("boom", boom)])
+
+        async def scenario() -> None:
+            await scheduler.start()
+            try:
+                self.assertTrue(scheduler.run_now("ok"))
+                self.assertTrue(scheduler.run_now("boom"))
+                self.assertFalse(scheduler.run_now("missing"))
+                for _ in range(200):
+                    await asyncio.sleep(0.01)
+                    status = self._status(scheduler)
+                    if status["ok"]["runs"] and status["boom"]["runs"]:
+                        break
+            finally:
+                await scheduler.stop()
+
+        asyncio.run(scenario())
+        status = self._status(scheduler)
+        self.assertEqual(calls, ["ok"])
+        self.assertEqual(status["ok"]["lastStatus"], "ok")
+        self.assertEqual(status["ok"]["lastReason"], "manual")
+        self.assertEqual((status["ok"]["runs"], status["ok"]["failures"]), (1, 0))
+        self.assertEqual(status["boom"]["lastStatus"], "error")
+        self.assertEqual(status["boom"]["lastError"], "RuntimeError: nope")
+        self.assertEqual((status["boom"]["runs"], status["boom"]["failures"]), (1, 1))
+
+    def test_trigger_while_running_queues_one_rerun(self) -> None:
+        jm = self.jobs_mod
+        release = threading.Event()
+        calls: list[int] = []
+
+        def slow() -> None:
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(5)
+
+        scheduler = jm.Scheduler([jm.Job("slow", slow)])
+
+        async def scenario() -> None:
+            await scheduler.start()
+            try:
+                scheduler.run_now("slow")
+                while not calls:
+                    await asyncio.sleep(0.01)
+                scheduler.run_now("slow")
+                scheduler.run_now("slow")
+                await asyncio.sleep(0.05)
+                self.assertTrue(self._status(scheduler)["slow"]["running"])
+                release.set()
+                for _ in range(200):
+                    await asyncio.sleep(0.01)
+                    if self._status(scheduler)["slow"]["runs"] == 2:
+                        break
+                await asyncio.sleep(0.05)
+            finally:
+                await scheduler.stop()
+
+        asyncio.run(scenario())
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self._status(scheduler)["slow"]["runs"], 2)
+
+    def test_concurrency_is_limited(self) -> None:
+        jm = self.jobs_mod
+        lock = threading.Lock()
+        active = [0, 0]  # current, peak
+
+        def work() -> None:
+            with lock:
+                active[0] += 1
+                active[1] = max(active[1], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+        scheduler = jm.Scheduler([jm.Job(f"j{i}", work) for i in range(4)], max_concurrency=2)
+
+        async def scenario() -> None:
+            await scheduler.start()
+            try:
+                for name in scheduler.jobs:
+                    scheduler.run_now(name)
+                for _ in range(200):
+                    await asyncio.sleep(0.01)
+                    if all(s["runs"] for s in scheduler.status()):
+                        break
+            finally:
+                await scheduler.stop()
+
+        asyncio.run(scenario())
+        self.assertEqual(active[1], 2)
+
+    def test_missed_daily_run_is_caught_up(self) -> None:
+        jm = self.jobs_mod
+        scheduler = jm.Scheduler([jm.Job("daily", lambda: None, at=("00:00",)), jm.Job("fresh", lambda: None, at=("00:00",))])
+        with self.db_mod.db() as conn:
+            conn.execute(
+                "INSERT INTO job_runs(name, last_started_at, last_status) VALUES('fresh', ?, 'running')",
+                (self.db_mod.now_iso(),),
+            )
+
+        async def scenario() -> None:
+            await scheduler.start()
+            await scheduler.stop()
+
+        asyncio.run(scenario())
+        status = self._status(scheduler)
+        now = datetime.now().astimezone()
+        self.assertLess(datetime.fromisoformat(status["daily"]["nextRunAt"]), now + timedelta(minutes=5))
+        self.assertGreater(datetime.fromisoformat(status["fresh"]["nextRunAt"]), now)
+        self.assertEqual(status["fresh"]["lastStatus"], "interrupted")
+
+
+class JobsEndpointTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_db_path = os.environ.get("DB_PATH")
+        self._old_api_key = os.environ.get("API_KEY")
+        os.environ["DB_PATH"] = os.path.join(self._tmp.name, "test_jobs_api.db")
+        os.environ["API_KEY"] = "test-api-key"
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        import app.main as main_mod
+        importlib.reload(main_mod)
+        main_mod.start_discovery_thread = lambda: None  # type: ignore[assignment]
+
+        db_mod.init_db()
+        self.main_mod = main_mod
+        self.client_ctx = TestClient(main_mod.app)
+        self.client = self.client_ctx.__enter__()
+        self.headers = {"X-Api-Key": "test-api-key"}
+
+    def tearDown(self) -> None:
+        self.client_ctx.__exit__(None, None, None)
+        if self._old_db_path is None:
+            os.environ.pop("DB_PATH", None)
+        else:
+            os.environ["DB_PATH"] = self._old_db_path
+        if self._old_api_key is None:
+            os.environ.pop("API_KEY", None)
+        else:
+            os.environ["API_KEY"] = self._old_api_key
+        self._tmp.cleanup()
+
+    def _job(self, name: str) -> dict:
+        res = self.client.get("/api/jobs", headers=self.headers)
+        self.assertEqual(res.status_code, 200)
+        return {j["name"]: j for j in res.json()["jobs"]}[name]
+
+    def test_list_and_run_jobs(self) -> None:
+        job = self._job("prompts")
+        self.assertEqual(job["at"], ["00:10"])
+        self.assertTrue(job["onSync"])
+        self.assertIsNotNone(job["nextRunAt"])
+
+        res = self.client.post("/api/jobs/prompts/run", headers=self.headers)
+        self.assertEqual(res.status_code, 200)
+        for _ in range(500):
+            if self._job("prompts")["runs"]:
+                break
+            time.sleep(0.01)
+        job = self._job("prompts")
+        self.assertEqual((job["runs"], job["lastStatus"], job["lastReason"]), (1, "ok", "manual"))
+
+        with self.main_mod.db() as conn:
+            kinds = {r["kind"] for r in conn.execute("SELECT kind FROM memo_cache")}
+        self.assertIn("prompt", kinds)
+
+        res = self.client.post("/api/jobs/unknown/run", headers=self.headers)
+        self.assertEqual(res.status_code, 404)
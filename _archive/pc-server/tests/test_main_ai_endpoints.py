@@ -132,6 +132,13 @@ class MainAiEndpointsTests(unittest.TestCase):
         reports = list_all.json()["reports"]
         self.assertEqual(len(reports), 1)
         self.assertIn("preview", reports[0])
+        self.assertIsNone(list_all.json()["nextCursor"])
+
+        search = self.client.get("/api/reports", headers=self.headers, params={"q": "updated"})
+        self.assertEqual(search.status_code, 200)
+        self.assertIn("<mark>updated</mark>", search.json()["reports"][0]["snippet"])
+        bad_cursor = self.client.get("/api/reports", headers=self.headers, params={"cursor": "nope"})
+        self.assertEqual(bad_cursor.status_code, 400)
 
         get_one = self.client.get(f"/api/reports/{report_id}", headers=self.headers)
         self.assertEqual(get_one.status_code, 200)
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import importlib
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+
+class MemoCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, "test_memo.db")
+        self._old_db_path = os.environ.get("DB_PATH")
+        self._old_api_key = os.environ.get("API_KEY")
+        os.environ["DB_PATH"] = self.db_path
+        os.environ["API_KEY"] = "test-api-key"
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        import app.nutrition as nutrition_mod
+        importlib.reload(nutrition_mod)
+        import app.memo as memo_mod
+        importlib.reload(memo_mod)
+        import app.prompt_gen as prompt_gen_mod
+        importlib.reload(prompt_gen_mod)
+        import app.main as main_mod
+        importlib.reload(main_mod)
+        main_mod.start_discovery_thread = lambda: None  # type: ignore[assignment]
+
+        db_mod.init_db()
+        self.db_mod = db_mod
+        self.memo_mod = memo_mod
+        self.nutrition_mod = nutrition_mod
+        self.prompt_gen_mod = prompt_gen_mod
+        self.client_ctx = TestClient(main_mod.app)
+        self.client = self.client_ctx.__enter__()
+        self.headers = {"X-Api-Key": "test-api-key"}
+
+    def tearDown(self) -> None:
+        self.client_ctx.__exit__(None, None, None)
+        if self._old_db_path is None:
+            os.environ.pop("DB_PATH", None)
+        else:
+            os.environ["DB_PATH"] = self._old_db_path
+        if self._old_api_key is None:
+            os.environ.pop("API_KEY", None)
+        else:
+            os.environ["API_KEY"] = self._old_api_key
+        self._tmp.cleanup()
+
+    def _log(self, label: str, days_ago: int) -> None:
+        nm = self.nutrition_mod
+        at = datetime.now().astimezone() - timedelta(days=days_ago)
+        nm.log_events([nm.NutritionEvent(label=label, consumed_at=at, kcal=300.0)])
+
+    def test_key_is_stable_and_input_sensitive(self) -> None:
+        key = self.memo_mod.memo_key
+        self.assertEqual(key("prompt", {"a": 1, "b": 2}), key("prompt", {"b": 2, "a": 1}))
+        self.assertNotEqual(key("prompt", {"a": 1}), key("prompt", {"a": 2}))
+        self.assertNotEqual(key("prompt", {"a": 1}), key("targets", {"a": 1}))
+
+        # Entries written by an older builder are not addressed after a format bump.
+        before = key("prompt", {"a": 1})
+        old_format = self.memo_mod.MEMO_FORMAT_VERSION
+        self.memo_mod.MEMO_FORMAT_VERSION = old_format + 1
+        try:
+            self.assertNotEqual(key("prompt", {"a": 1}), before)
+        finally:
+            self.memo_mod.MEMO_FORMAT_VERSION = old_format
+
+    def test_lru_eviction_and_stats(self) -> None:
+        memo = self.memo_mod
+        old_max = memo.MEMO_MAX_ENTRIES
+        memo.MEMO_MAX_ENTRIES = 2
+        calls: list[int] = []
+
+        def get(n: int) -> int:
+            with self.db_mod.db() as conn:
+                return memo.memoized(conn, "t", {"n": n}, lambda: calls.append(n) or n * 10)
+
+        try:
+            self.assertEqual([get(1), get(2), get(1), get(3)], [10, 20, 10, 30])
+            # 2 was least recently used when 3 arrived.
+            self.assertEqual(get(1), 10)
+            self.assertEqual(get(2), 20)
+        finally:
+            memo.MEMO_MAX_ENTRIES = old_max
+        self.assertEqual(calls, [1, 2, 3, 2])
+
+        with self.db_mod.db() as conn:
+            s = memo.memo_stats(conn)
+        self.assertEqual(s["entries"], 2)
+        self.assertEqual((s["kinds"]["t"]["hits"], s["kinds"]["t"]["misses"]), (2, 4))
+
+    def test_hits_are_buffered_and_written_in_batches(self) -> None:
+        memo = self.memo_mod
+        old_flush = memo.MEMO_FLUSH_HITS
+        memo.MEMO_FLUSH_HITS = 3
+
+        def get(statements: list[str]) -> int:
+            with self.db_mod.db() as conn:
+                conn.set_trace_callback(statements.append)
+                return memo.memoized(conn, "t", {"n": 1}, lambda: 10)
+
+        def stored_hits() -> int:
+            with self.db_mod.db() as conn:
+                return int(conn.execute("SELECT hits FROM memo_cache").fetchone()[0])
+
+        try:
+            get([])
+            for _ in range(2):
+                statements: list[str] = []
+                self.assertEqual(get(statements), 10)
+                self.assertFalse([s for s in statements if not s.lstrip().upper().startswith(("SELECT", "PRAGMA"))])
+            self.assertEqual(stored_hits(), 0)
+            with self.db_mod.db() as conn:
+                self.assertEqual(memo.memo_stats(conn)["kinds"]["t"]["storedHits"], 2)
+
+            get([])  # third hit: the batch is written
+            self.assertEqual(stored_hits(), 3)
+        finally:
+            memo.MEMO_FLUSH_HITS = old_flush
+
+    def test_prompt_is_reused_until_its_inputs_change(self) -> None:
+        p1 = self.prompt_gen_mod.build_prompt("daily")
+        p2 = self.prompt_gen_mod.build_prompt("daily")
+        self.assertEqual(p1, p2)
+
+        # An old day outside the daily window does not touch the prompt's inputs...
+        self._log("old meal", days_ago=200)
+        self.assertEqual(self.prompt_gen_mod.build_prompt("daily"), p1)
+        # ...yesterday's log does.
+        self._log("new meal", days_ago=1)
+        p3 = self.prompt_gen_mod.build_prompt("daily")
+        self.assertIn("new meal", p3)
+
+        r = self.client.get("/api/cache/stats", headers=self.headers)
+        self.assertEqual(r.status_code, 200, r.text)
+        prompt_stats = r.json()["kinds"]["prompt"]
+        self.assertEqual((prompt_stats["hits"], prompt_stats["misses"]), (2, 2))
+        self.assertEqual(prompt_stats["hitRate"], 0.5)
+
+    def test_targets_follow_profile_updates(self) -> None:
+        def targets() -> list[dict]:
+            r = self.client.get("/api/nutrients/targets", params={"date": "2026-02-20"}, headers=self.headers)
+            self.assertEqual(r.status_code, 200, r.text)
+            return r.json()["targets"]
+
+        t1 = targets()
+        self.assertEqual(targets(), t1)
+        r = self.client.put("/api/profile", headers=self.headers, json={"sex": "female"})
+        self.assertEqual(r.status_code, 200, r.text)
+        self.assertNotEqual(targets(), t1)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import importlib
+import os
+import tempfile
+import unittest
+
+
+class SchemaMigrationTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_db_path = os.environ.get("DB_PATH")
+        os.environ["DB_PATH"] = os.path.join(self._tmp.name, "test_migrations.db")
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        import app.reports as reports_mod
+        importlib.reload(reports_mod)
+
+        self.assertEqual(db_mod.init_db(), 0)
+        self.db_mod = db_mod
+
+    def tearDown(self) -> None:
+        if self._old_db_path is None:
+            os.environ.pop("DB_PATH", None)
+        else:
+            os.environ["DB_PATH"] = self._old_db_path
+        self._tmp.cleanup()
+
+    def _state(self) -> tuple[int, str | None, int]:
+        with self.db_mod.db() as conn:
+            return self.db_mod._schema_state(conn)
+
+    def test_up_to_date_database_is_a_single_select(self) -> None:
+        self.assertEqual(self._state()[0], self.db_mod.SCHEMA_VERSION)
+
+        statements: list[str] = []
+        connect = self.db_mod._connect
+
+        def traced(*args, **kwargs):
+            conn = connect(*args, **kwargs)
+            conn.set_trace_callback(statements.append)
+            return conn
+
+        self.db_mod._connect = traced
+        try:
+            self.assertEqual(self.db_mod.init_db(), 0)
+        finally:
+            self.db_mod._connect = connect
+        self.assertEqual(len(statements), 1, statements)
+        self.assertIn("FROM schema_version", statements[0])
+
+    def test_legacy_database_is_migrated_and_reports_backfilled_in_chunks(self) -> None:
+        # A database from before versioning: no schema tables, duplicate
+        # reports (no unique index yet) and reports without sections.
+        with self.db_mod.db() as conn:
+            conn.execute("DROP TABLE schema_version")
+            conn.execute("DROP TABLE schema_backfills")
+            conn.execute("DROP INDEX idx_ai_reports_date_type_unique")
+            conn.executemany(
+                """
+                INSERT INTO ai_reports(report_date, report_type, prompt_used, content, created_at)
+                VALUES(?, 'daily', 'p', ?, ?)
+                """,
+                [
+                    ("2026-02-01", "<!--DOCTOR-->old", "2026-02-01T08:00:00+00:00"),
+                    ("2026-02-01", "<!--DOCTOR-->new", "2026-02-01T09:00:00+00:00"),
+                    ("2026-02-02", "<!--DOCTOR-->two", "2026-02-02T09:00:00+00:00"),
+                    ("2026-02-03", "<!--DOCTOR-->three", "2026-02-03T09:00:00+00:00"),
+                ],
+            )
+
+        self.assertEqual(self.db_mod.init_db(), 1)
+        with self.db_mod.db() as conn:
+            kept = [r["content"] for r in conn.execute("SELECT content FROM ai_reports ORDER BY report_date")]
+        self.assertEqual(kept, ["<!--DOCTOR-->new", "<!--DOCTOR-->two", "<!--DOCTOR-->three"])
+
+        # Interrupted after two chunks of one row: the cursor keeps the progress...
+        self.assertEqual(self.db_mod.run_backfills(chunk_rows=1, max_chunks=2), 2)
+        with self.db_mod.db() as conn:
+            bodies = [r["body"] for r in conn.execute("SELECT body FROM report_sections ORDER BY report_id")]
+        self.assertEqual(bodies, ["new", "two"])
+        self.assertEqual(self.db_mod.init_db(), 1)
+
+        # ...and the next run finishes the rest.
+        self.assertEqual(self.db_mod.run_backfills(chunk_rows=1), 1)
+        self.assertEqual(self._state(), (self.db_mod.SCHEMA_VERSION, self.db_mod._seed_fingerprint(), 0))
+        with self.db_mod.db() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM ai_reports WHERE preview IS NULL").fetchone()[0], 0)
+
+    def test_seeds_are_reapplied_only_when_they_change(self) -> None:
+        with self.db_mod.db() as conn:
+            conn.execute("DELETE FROM nutrient_keys WHERE key = 'energy_kcal'")
+        self.db_mod.init_db()
+        with self.db_mod.db() as conn:
+            self.assertIsNone(conn.execute("SELECT 1 FROM nutrient_keys WHERE key = 'energy_kcal'").fetchone())
+            conn.execute("UPDATE schema_version SET seed_hash = 'stale'")
+
+        self.db_mod.init_db()
+        with self.db_mod.db() as conn:
+            self.assertIsNotNone(conn.execute("SELECT 1 FROM nutrient_keys WHERE key = 'energy_kcal'").fetchone())
+        self.assertEqual(self._state()[1], self.db_mod._seed_fingerprint())
+
+
+if __name__ == "__main__":
+    unittest.main()
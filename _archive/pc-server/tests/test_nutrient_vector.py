@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import unittest
+
+from app.nutrient_vector import NUTRIENT_INDEX, NutrientVector
+
+
+class NutrientVectorTests(unittest.TestCase):
+    def test_round_trip_and_extra_keys(self) -> None:
+        d = {"energy_kcal": 500.0, "zinc_mg": 0.0, "not_a_seed_key": 2.5}
+        vec = NutrientVector.from_dict(d)
+        self.assertEqual(vec.to_dict(), d)
+        self.assertIn("energy_kcal", NUTRIENT_INDEX)
+        self.assertEqual(vec.extra, {"not_a_seed_key": 2.5})
+        self.assertIsNone(vec.get("vitamin_c_mg"))
+        self.assertNotIn("vitamin_c_mg", vec)
+        self.assertEqual(len(vec), 3)
+
+    def test_ratio(self) -> None:
+        vec = NutrientVector.from_dict({"protein_g": 20.0, "vitamin_c_mg": 1.0, "x_mg": 3.0})
+        ratios = vec.ratio(NutrientVector.from_dict({"protein_g": 40.0, "zinc_mg": 10.0, "x_mg": 6.0}))
+        self.assertEqual(ratios.to_dict(), {"protein_g": 0.5, "x_mg": 0.5})
+        # A zero target gives ratio 0 (as calc_nutrient_targets always did), not "not recorded".
+        self.assertEqual(vec.ratio(NutrientVector.from_dict({"protein_g": 0.0})).to_dict(), {"protein_g": 0.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
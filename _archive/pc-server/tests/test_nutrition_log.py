@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import importlib
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+
+class NutritionBulkLogTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, "test_nutrition_log.db")
+        self._old_db_path = os.environ.get("DB_PATH")
+        self._old_api_key = os.environ.get("API_KEY")
+        os.environ["DB_PATH"] = self.db_path
+        os.environ["API_KEY"] = "test-api-key"
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        import app.nutrition as nutrition_mod
+        importlib.reload(nutrition_mod)
+        import app.main as main_mod
+        importlib.reload(main_mod)
+        main_mod.start_discovery_thread = lambda: None  # type: ignore[assignment]
+
+        db_mod.init_db()
+        self.db_mod = db_mod
+        self.nutrition_mod = nutrition_mod
+        self.client_ctx = TestClient(main_mod.app)
+        self.client = self.client_ctx.__enter__()
+        self.headers = {"X-Api-Key": "test-api-key"}
+
+    def tearDown(self) -> None:
+        self.client_ctx.__exit__(None, None, None)
+        if self._old_db_path is None:
+            os.environ.pop("DB_PATH", None)
+        else:
+            os.environ["DB_PATH"] = self._old_db_path
+        if self._old_api_key is None:
+            os.environ.pop("API_KEY", None)
+        else:
+            os.environ["API_KEY"] = self._old_api_key
+        self._tmp.cleanup()
+
+    def _count(self, table: str) -> int:
+        with self.db_mod.db() as conn:
+            return int(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0])
+
+    def test_log_events_single_transaction(self) -> None:
+        nm = self.nutrition_mod
+        at = datetime.fromisoformat("2026-02-22T12:00:00+09:00")
+        events = [
+            nm.NutritionEvent(label=f"item {i}", consumed_at=at, count=2, kcal=100.0, micros={"zinc_mg": 1.5, "new_key_mg": 1})
+            for i in range(10)
+        ]
+        with self.db_mod.db() as conn:
+            statements: list[str] = []
+            conn.set_trace_callback(statements.append)
+            ids = nm.log_events(events, conn)
+            conn.set_trace_callback(None)
+
+        self.assertEqual(len(ids), 10)
+        self.assertEqual(ids, list(range(ids[0], ids[0] + 10)))
+        self.assertFalse(any(s.strip().upper() == "COMMIT" for s in statements))
+        with self.db_mod.db() as conn:
+            rows = conn.execute(
+                "SELECT event_id, nutrient_key, value FROM nutrition_nutrients WHERE event_id = ? ORDER BY nutrient_key",
+                (ids[3],),
+            ).fetchall()
+            self.assertEqual(
+                [(r["nutrient_key"], r["value"]) for r in rows],
+                [("energy_kcal", 200.0), ("new_key_mg", 2.0), ("zinc_mg", 3.0)],
+            )
+            self.assertIsNotNone(conn.execute("SELECT 1 FROM nutrient_keys WHERE key = 'new_key_mg'").fetchone())
+            seeded = conn.execute("SELECT display_name FROM nutrient_keys WHERE key = 'energy_kcal'").fetchone()
+            self.assertEqual(seeded["display_name"], "Energy")
+
+    def test_rolled_back_batch_does_not_hide_new_keys(self) -> None:
+        nm = self.nutrition_mod
+        at = datetime.fromisoformat("2026-02-22T12:00:00+09:00")
+        event = nm.NutritionEvent(label="x", consumed_at=at, micros={"rolled_back_mg": 1.0})
+        with self.assertRaises(RuntimeError):
+            with self.db_mod.db() as conn:
+                nm.log_events([event], conn)
+                raise RuntimeError("abort before commit")
+
+        nm.log_events([event])
+        with self.db_mod.db() as conn:
+            self.assertIsNotNone(conn.execute("SELECT 1 FROM nutrient_keys WHERE key = 'rolled_back_mg'").fetchone())
+
+    def test_bulk_endpoint(self) -> None:
+        r = self.client.post(
+            "/api/nutrition/log/bulk",
+            headers=self.headers,
+            json={
+                "local_date": "2026-02-22",
+                "items": [
+                    {"alias": "protein", "count": 2},
+                    {"label": "おにぎり", "kcal": 180, "protein_g": 3, "fat_g": 1, "carbs_g": 39},
+                ],
+            },
+        )
+        self.assertEqual(r.status_code, 200, r.text)
+        body = r.json()
+        self.assertEqual(body["count"], 2)
+        day = self.client.get("/api/nutrition/day?date=2026-02-22", headers=self.headers).json()
+        self.assertEqual(sorted(e["id"] for e in day["events"]), body["ids"])
+
+    def test_bulk_endpoint_is_all_or_nothing(self) -> None:
+        before = self._count("nutrition_events")
+        r = self.client.post(
+            "/api/nutrition/log/bulk",
+            headers=self.headers,
+            json={"items": [{"alias": "protein"}, {"alias": "no_such_alias"}]},
+        )
+        self.assertEqual(r.status_code, 400)
+        r = self.client.post("/api/nutrition/log/bulk", headers=self.headers, json={"items": [{"count": 1}]})
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(self._count("nutrition_events"), before)
+
+    def test_daily_totals_follow_log_and_delete(self) -> None:
+        nm = self.nutrition_mod
+        at = datetime.fromisoformat("2026-02-22T12:00:00+09:00")
+        ids = nm.log_events(
+            [
+                nm.NutritionEvent(label="a", consumed_at=at, kcal=300.0, protein_g=10.0),
+                nm.NutritionEvent(label="b", consumed_at=at, kcal=200.0),
+            ]
+        )
+        self.assertEqual(nm.get_day_totals("2026-02-22")["kcal"], 500.0)
+
+        r = self.client.delete(f"/api/nutrition/log/{ids[0]}", headers=self.headers)
+        self.assertEqual(r.status_code, 200)
+        totals = nm.get_day_totals("2026-02-22")
+        self.assertEqual(totals["kcal"], 200.0)
+        self.assertIsNone(totals["protein_g"])
+        with self.db_mod.db() as conn:
+            expected = {
+                (r["local_date"], r["nutrient_key"]): r["total"]
+                for r in conn.execute(
+                    "SELECT local_date, nutrient_key, SUM(value) AS total FROM nutrition_nutrients GROUP BY 1, 2"
+                )
+            }
+            rollup = {
+                (r["local_date"], r["nutrient_key"]): r["total"]
+                for r in conn.execute("SELECT local_date, nutrient_key, total FROM nutrition_daily_totals")
+            }
+        self.assertEqual(rollup, expected)
+
+    def test_range_endpoint_matrix(self) -> None:
+        nm = self.nutrition_mod
+        nm.log_events(
+            [
+                nm.NutritionEvent(label="a", consumed_at=datetime(2026, 2, 20, 12).astimezone(), kcal=300.0),
+                nm.NutritionEvent(
+                    label="b", consumed_at=datetime(2026, 2, 22, 12).astimezone(), kcal=100.0, protein_g=5.0
+                ),
+            ]
+        )
+        r = self.client.get(
+            "/api/nutrition/range",
+            params={"from": "2026-02-20", "to": "2026-02-22", "keys": "energy_kcal,protein_g"},
+            headers=self.headers,
+        )
+        self.assertEqual(r.status_code, 200, r.text)
+        body = r.json()
+        self.assertEqual(body["dates"], ["2026-02-20", "2026-02-21", "2026-02-22"])
+        self.assertEqual(body["keys"], ["energy_kcal", "protein_g"])
+        self.assertEqual(body["values"], [[300.0, None], [None, None], [100.0, 5.0]])
+
+        r = self.client.get("/api/nutrition/range", params={"from": "2026-02-22", "to": "2026-02-20"}, headers=self.headers)
+        self.assertEqual(r.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
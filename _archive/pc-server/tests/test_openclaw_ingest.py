@@ -151,5 +151,62 @@ class OpenClawIngestTests(unittest.TestCase):
             self.ingest_mod.ingest_openclaw_payload(payload)
 
 
+    def test_failed_write_leaves_no_ledger_row(self) -> None:
+        payload = {
+            "event_id": "test:event:rollback",
+            "local_date": "2026-02-18",
+            "items": [{"alias": "protein", "count": 1}],
+        }
+        original = self.ingest_mod.log_events
+
+        def boom(events, conn=None):
+            raise RuntimeError("disk full")
+
+        self.ingest_mod.log_events = boom
+        try:
+            with self.assertRaises(RuntimeError):
+                self.ingest_mod.ingest_openclaw_payload(payload)
+        finally:
+            self.ingest_mod.log_events = original
+
+        # The claim rolled back with the failed write, so a retry is not a duplicate.
+        self.assertEqual(self.ingest_mod.ingest_openclaw_payload(payload)["ingested"], 1)
+
+    def test_bulk_reports_per_event_status(self) -> None:
+        self.ingest_mod.ingest_openclaw_payload(
+            {"event_id": "bulk:0", "local_date": "2026-02-18", "items": [{"alias": "protein"}]}
+        )
+        payloads = [
+            {"event_id": "bulk:0", "local_date": "2026-02-18", "items": [{"alias": "protein"}]},
+            {"event_id": "bulk:1", "local_date": "2026-02-18", "intake_kcal": 1900, "items": [{"alias": "protein"}]},
+            {"event_id": "bulk:2", "local_date": "2026-02-18", "items": [{"alias": "no_such_alias"}]},
+            {"event_id": "bulk:1", "local_date": "2026-02-18", "items": [{"alias": "protein"}]},
+            {"event_id": "bulk:3", "local_date": "2026-02-19", "items": [{"label": "rice bowl", "kcal": 550}]},
+        ]
+        results = self.ingest_mod.ingest_openclaw_bulk(payloads)
+
+        self.assertEqual(
+            [(r["eventId"], r["ok"], r["ingested"], r["duplicate"]) for r in results],
+            [
+                ("bulk:0", True, 0, 1),
+                ("bulk:1", True, 1, 0),
+                ("bulk:2", False, 0, 0),
+                ("bulk:1", True, 0, 1),
+                ("bulk:3", True, 1, 0),
+            ],
+        )
+        self.assertIn("Unknown alias", results[2]["error"])
+
+        with self.db_mod.db() as conn:
+            events = conn.execute("SELECT COUNT(*) AS c FROM nutrition_events").fetchone()["c"]
+            ledger = {r["event_id"] for r in conn.execute("SELECT event_id FROM openclaw_ingest_events")}
+            intake = conn.execute(
+                "SELECT intake_kcal FROM intake_calories_daily WHERE day = ?", ("2026-02-18",)
+            ).fetchone()
+        self.assertEqual(events, 3)
+        self.assertEqual(ledger, {"bulk:0", "bulk:1", "bulk:3"})
+        self.assertEqual(float(intake["intake_kcal"]), 1900.0)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, time, timedelta
+
+
+class PromptCompactTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_db_path = os.environ.get("DB_PATH")
+        os.environ["DB_PATH"] = os.path.join(self._tmp.name, "test_prompt_compact.db")
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        import app.nutrition as nutrition_mod
+        importlib.reload(nutrition_mod)
+        import app.memo as memo_mod
+        importlib.reload(memo_mod)
+        import app.prompt_context as prompt_context_mod
+        importlib.reload(prompt_context_mod)
+        import app.prompt_compact as prompt_compact_mod
+        importlib.reload(prompt_compact_mod)
+        import app.prompt_gen as prompt_gen_mod
+        importlib.reload(prompt_gen_mod)
+
+        db_mod.init_db()
+        self.db_mod = db_mod
+        self.nutrition_mod = nutrition_mod
+        self.compact_mod = prompt_compact_mod
+        self.prompt_gen_mod = prompt_gen_mod
+        self.today = datetime.now().astimezone().date()
+
+    def tearDown(self) -> None:
+        if self._old_db_path is None:
+            os.environ.pop("DB_PATH", None)
+        else:
+            os.environ["DB_PATH"] = self._old_db_path
+        self._tmp.cleanup()
+
+    def _seed(self) -> None:
+        """61 days of weight (dropping 0.1 kg a day) and steps, plus full meal logs."""
+        rows = []
+        for i in range(60, -1, -1):
+            day = self.today - timedelta(days=i)
+            at = datetime.combine(day, time(7, 0)).astimezone().isoformat()
+            weight = {"weight": {"inKilograms": round(80.0 - 0.1 * (60 - i), 1)}}
+            steps = {"count": 10000 if i < 7 else 6000}
+            rows.append((f"w{i}", "WeightRecord", at, at, at, weight))
+            rows.append((f"s{i}", "StepsRecord", at, at, None, steps))
+        with self.db_mod.db() as conn:
+            conn.executemany(
+                """
+                INSERT INTO health_records(record_key, device_id, type, start_time, end_time, time, payload_json, ingested_at)
+                VALUES(?, 'dev-1', ?, ?, ?, ?, ?, ?)
+                """,
+                [(key, rec_type, start, end, t, json.dumps(payload), start) for key, rec_type, start, end, t, payload in rows],
+            )
+
+        # Eight meals a day on yesterday and today, each carrying every seed
+        # nutrient (as estimated label items do): targeted ones add up to
+        # their target except sodium (too much) and vitamin C (too little).
+        from app.nutrient_keys import SEED_KEYS
+
+        on_target = {
+            "vitamin_d3_mcg": 15.0, "vitamin_e_mg": 6.0, "vitamin_b1_mg": 1.4, "vitamin_b2_mg": 1.6,
+            "folate_mcg": 240.0, "calcium_mg": 750.0, "magnesium_mg": 370.0, "zinc_mg": 11.0,
+            "omega3_mg": 2000.0,
+        }
+        micros = {k.key: 1.0 for k in SEED_KEYS if k.category != "macros"}
+        micros.update({key: target / 8 for key, target in on_target.items()})
+        micros.update({"sodium_mg": 900.0, "vitamin_c_mg": 5.0, "alcohol_g": 0.0, "saturated_fat_g": 1.0, "trans_fat_g": 0.0})
+        nm = self.nutrition_mod
+        events = []
+        for days_ago in (1, 0):
+            at = datetime.combine(self.today - timedelta(days=days_ago), time(12, 0)).astimezone()
+            events.extend(
+                nm.NutritionEvent(
+                    label=f"食事{i}",
+                    consumed_at=at,
+                    kcal=300.0,
+                    protein_g=15.0,
+                    fat_g=10.0,
+                    carbs_g=40.0,
+                    micros=micros,
+                )
+                for i in range(8)
+            )
+            events.append(nm.alias_event("vitamin_d", consumed_at=at))
+        nm.log_events(events)
+
+    def test_estimate_tokens(self) -> None:
+        estimate = self.compact_mod.estimate_tokens
+        self.assertEqual(estimate(""), 0)
+        self.assertEqual(estimate("abcd"), 1)
+        self.assertEqual(estimate("体重"), 2)
+        self.assertEqual(estimate("体重 72.5kg"), 2 + 2)
+
+    def test_compact_prompt_keeps_key_facts_and_is_much_smaller(self) -> None:
+        self._seed()
+        estimate = self.compact_mod.estimate_tokens
+        for prompt_type in ("daily", "weekly", "monthly"):
+            full = self.prompt_gen_mod.build_prompt(prompt_type)
+            compact = self.prompt_gen_mod.build_prompt(prompt_type, compact=True)
+            self.assertLess(estimate(compact), estimate(full) * 0.6, prompt_type)
+            self.assertLessEqual(estimate(compact), self.compact_mod.DEFAULT_TOKEN_BUDGET)
+
+            # Latest weight, the user's baseline delta and yesterday's meals survive.
+            self.assertIn("体重kg|74.0|", compact)
+            self.assertIn("歩数|10000|", compact)
+            self.assertIn("・食事0 300kcal P15 F10 C40", compact)
+            # Out-of-range nutrients stay, with actual vs target...
+            self.assertIn("ナトリウム 7200.0/上限2000.0mg (360%)", compact)
+            self.assertIn("ビタミンC 40.0/目標100.0mg (40%)", compact)
+            # ...in-range ones and those without a range are dropped.
+            self.assertNotIn("カルシウム", compact)
+            self.assertNotIn("copper", compact.lower())
+            self.assertIn("✓ ビタミンD3", compact)
+            self.assertIn("## 3. 栄養・サプリ視点", compact)
+
+        weekly = self.prompt_gen_mod.build_prompt("weekly", compact=True)
+        # 7-day average 10000 steps against 6000 over the 14 days before.
+        self.assertIn("歩数|10000|10000|6000|+4000", weekly)
+
+    def test_token_budget_trims_detail_first(self) -> None:
+        self._seed()
+        roomy = self.prompt_gen_mod.build_prompt("daily", compact=True, token_budget=5000)
+        # The fixed blocks (header, HC table, output format with section markers) take ~490.
+        tight = self.prompt_gen_mod.build_prompt("daily", compact=True, token_budget=500)
+        estimate = self.compact_mod.estimate_tokens
+        self.assertLess(estimate(tight), estimate(roomy))
+        self.assertLessEqual(estimate(tight), 500)
+        self.assertIn("行省略", tight)
+        self.assertIn("・食事2", tight)  # the first meals are kept
+        self.assertNotIn("・食事7", tight)
+        self.assertIn("体重kg|74.0|", tight)  # the HC table is never trimmed
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import importlib
+import json
 import os
 import tempfile
 import unittest
@@ -22,10 +23,15 @@ class PromptGenTests(unittest.TestCase):
         importlib.reload(summary_mod)
         import app.profile as profile_mod
         importlib.reload(profile_mod)
+        import app.prompt_context as prompt_context_mod
+        importlib.reload(prompt_context_mod)
         import app.prompt_gen as prompt_gen_mod
         importlib.reload(prompt_gen_mod)
 
         db_mod.init_db()
+        self.db_mod = db_mod
+        self.summary_mod = summary_mod
+        self.prompt_context_mod = prompt_context_mod
         self.nutrition_mod = nutrition_mod
         self.prompt_gen_mod = prompt_gen_mod
 
@@ -72,5 +78,49 @@ class PromptGenTests(unittest.TestCase):
         self.assertIn("Omega-3 (EPA+DHA) (omega3_mg): 900mg", text)
 
 
+    def _insert_history(self, days: int, weigh_in_every: int, skip_recent: int) -> None:
+        now = datetime.now().astimezone()
+        rows = []
+        for i in range(days):
+            at = (now - timedelta(days=i)).replace(hour=8, minute=0, second=0, microsecond=0)
+            start = at.isoformat()
+            rows.append((f"s{i}", "StepsRecord", start, start, None, {"count": 6000 + 37 * i}))
+            rows.append((f"a{i}", "ActiveCaloriesBurnedRecord", start, start, None, {"energy": {"inKilocalories": 200 + i}}))
+            rows.append((f"r{i}", "RestingHeartRateRecord", start, start, start, {"beatsPerMinute": 55 + i % 7}))
+            if i % weigh_in_every == 0 and i >= skip_recent:
+                rows.append((f"w{i}", "WeightRecord", start, start, start, {"weight": {"inKilograms": 80 - i * 0.05}}))
+            sleep_start = at - timedelta(hours=7, minutes=i % 50)
+            rows.append((f"z{i}", "SleepSessionRecord", sleep_start.isoformat(), start, None, {}))
+        with self.db_mod.db() as conn:
+            for key, rec_type, start_time, end_time, time, payload in rows:
+                conn.execute(
+                    """
+                    INSERT INTO health_records(record_key, device_id, type, start_time, end_time, time, payload_json, ingested_at)
+                    VALUES(?,?,?,?,?,?,?,?)
+                    """,
+                    (key, "dev-1", rec_type, start_time, end_time, time, json.dumps(payload), start_time),
+                )
+
+    def _assert_context_matches_full_history(self) -> None:
+        full = self.summary_mod.build_summary()
+        for prompt_type in ("daily", "weekly", "monthly"):
+            ctx = self.prompt_context_mod.build_prompt_context(prompt_type)
+            self.assertEqual(
+                self.prompt_gen_mod._get_hc_snippet(ctx.summary, ctx.days),
+                self.prompt_gen_mod._get_hc_snippet(full, ctx.days),
+                prompt_type,
+            )
+            # Only the window (plus the latest earlier row per type) was read.
+            self.assertLess(len(ctx.summary["stepsByDate"]), 50)
+
+    def test_window_context_matches_full_history_snippet(self) -> None:
+        self._insert_history(120, weigh_in_every=2, skip_recent=0)
+        self._assert_context_matches_full_history()
+
+    def test_window_context_keeps_trend_of_stale_weight(self) -> None:
+        # Weekly weigh-ins that stopped five weeks ago.
+        self._insert_history(120, weigh_in_every=7, skip_recent=35)
+        self._assert_context_matches_full_history()
+
 if __name__ == "__main__":
     unittest.main()
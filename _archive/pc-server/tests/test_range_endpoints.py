@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import tempfile
+import unittest
+
+from fastapi.testclient import TestClient
+
+
+class RangeEndpointsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp.name, "test_range_endpoints.db")
+        self._old_db_path = os.environ.get("DB_PATH")
+        self._old_api_key = os.environ.get("API_KEY")
+        os.environ["DB_PATH"] = self.db_path
+        os.environ["API_KEY"] = "test-api-key"
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        db_mod.init_db()
+        self._seed(db_mod)
+
+        import app.main as main_mod
+        importlib.reload(main_mod)
+        main_mod.start_discovery_thread = lambda: None  # type: ignore[assignment]
+
+        self.client_ctx = TestClient(main_mod.app)
+        self.client = self.client_ctx.__enter__()
+        self.headers = {"X-Api-Key": "test-api-key"}
+
+    def tearDown(self) -> None:
+        self.client_ctx.__exit__(None, None, None)
+        if self._old_db_path is None:
+            os.environ.pop("DB_PATH", None)
+        else:
+            os.environ["DB_PATH"] = self._old_db_path
+        if self._old_api_key is None:
+            os.environ.pop("API_KEY", None)
+        else:
+            os.environ["API_KEY"] = self._old_api_key
+        self._tmp.cleanup()
+
+    def _seed(self, db_mod) -> None:
+        rows = []
+        # Weight well before the requested range: "latest" lookups must still see it.
+        rows.append(("w-old", "WeightRecord", None, "2026-01-05T22:00:00+00:00", {"inKilograms": 72.5}))
+        for day in range(10, 21):
+            rows.append((f"s-{day}", "StepsRecord", f"2026-02-{day:02d}T03:00:00+00:00", None, {"count": 900 * day}))
+            rows.append((f"bp-{day}", "BloodPressureRecord", None, f"2026-02-{day:02d}T01:00:00+00:00",
+                         {"systolic": 120 + day, "diastolic": 80}))
+        with db_mod.db() as conn:
+            for key, rec_type, start_time, time, payload in rows:
+                conn.execute(
+                    """
+                    INSERT INTO health_records(record_key, device_id, type, start_time, end_time, time, payload_json, ingested_at)
+                    VALUES(?,?,?,?,?,?,?,?)
+                    """,
+                    (key, "dev-1", rec_type, start_time, start_time, time, json.dumps(payload), "2026-02-21T00:00:00+00:00"),
+                )
+            conn.execute(
+                """
+                INSERT INTO ai_reports(report_date, report_type, prompt_used, content, created_at)
+                VALUES('2026-02-14', 'daily', 'p', 'report', '2026-02-14T12:00:00+00:00')
+                """
+            )
+
+    def _get(self, path: str, **params) -> dict:
+        r = self.client.get(path, params=params, headers=self.headers)
+        self.assertEqual(r.status_code, 200, r.text)
+        return r.json()
+
+    def test_tab_ranges_match_single_day_requests(self) -> None:
+        for path in ("/api/body-data", "/api/activity-data", "/api/sleep-data", "/api/vitals-data"):
+            ranged = self._get(path, **{"from": "2026-02-12", "to": "2026-02-18", "period": "week"})
+            self.assertEqual(len(ranged["days"]), 7)
+            for day, payload in ranged["days"].items():
+                self.assertEqual(payload, self._get(path, date=day, period="week"), f"{path} {day}")
+
+        body = self._get("/api/body-data", **{"from": "2026-02-12", "to": "2026-02-12"})
+        self.assertEqual(body["days"]["2026-02-12"]["current"]["weight_kg"], 72.5)
+
+    def test_window_does_not_shadow_health_records(self) -> None:
+        from app.window import materialize_health_window
+
+        import app.db as db_mod
+
+        with db_mod.db() as conn:
+            window = materialize_health_window(conn, ("StepsRecord",), "2026-02-18", "2026-02-20")
+            self.assertEqual(conn.execute(f"SELECT COUNT(*) FROM {window}").fetchone()[0], 3)
+            # The rest of the connection still reads every record.
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM health_records").fetchone()[0], 23)
+
+    def test_home_summary_range_matches_single_day_requests(self) -> None:
+        ranged = self._get("/api/home-summary", **{"from": "2026-02-13", "to": "2026-02-16"})
+        self.assertEqual(list(ranged["days"]), ["2026-02-13", "2026-02-14", "2026-02-15", "2026-02-16"])
+        for day, payload in ranged["days"].items():
+            self.assertEqual(payload, self._get("/api/home-summary", date=day))
+        self.assertIsNone(ranged["days"]["2026-02-14"]["previousReport"])
+        self.assertEqual(ranged["days"]["2026-02-15"]["previousReport"]["date"], "2026-02-14")
+
+    def test_invalid_ranges_return_400(self) -> None:
+        for params in (
+            {"from": "2026-02-10"},
+            {"from": "2026-02-10", "to": "2026-02-01"},
+            {"from": "2026-01-01", "to": "2026-03-01"},
+            {"from": "2026/02/01", "to": "2026-02-02"},
+        ):
+            r = self.client.get("/api/home-summary", params=params, headers=self.headers)
+            self.assertEqual(r.status_code, 400, params)
+        r = self.client.get(
+            "/api/vitals-data", params={"from": "2026-02-01", "to": "2026-02-02", "period": "day"}, headers=self.headers
+        )
+        self.assertEqual(r.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
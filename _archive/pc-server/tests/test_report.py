@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import importlib
+import os
+import tempfile
+import time as time_mod
+import unittest
+from datetime import date, datetime, time, timedelta
+
+from fastapi.testclient import TestClient
+
+
+class DailyTextReportTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_db_path = os.environ.get("DB_PATH")
+        self._old_api_key = os.environ.get("API_KEY")
+        os.environ["DB_PATH"] = os.path.join(self._tmp.name, "test_report.db")
+        os.environ["API_KEY"] = "test-api-key"
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        import app.nutrition as nutrition_mod
+        importlib.reload(nutrition_mod)
+        import app.report as report_mod
+        importlib.reload(report_mod)
+        import app.main as main_mod
+        importlib.reload(main_mod)
+        main_mod.start_discovery_thread = lambda: None  # type: ignore[assignment]
+
+        db_mod.init_db()
+        self.db_mod = db_mod
+        self.nutrition_mod = nutrition_mod
+        self.report_mod = report_mod
+        self.client_ctx = TestClient(main_mod.app)
+        self.client = self.client_ctx.__enter__()
+        self.headers = {"X-Api-Key": "test-api-key"}
+        self.yday = date.today() - timedelta(days=1)
+
+    def tearDown(self) -> None:
+        self.client_ctx.__exit__(None, None, None)
+        if self._old_db_path is None:
+            os.environ.pop("DB_PATH", None)
+        else:
+            os.environ["DB_PATH"] = self._old_db_path
+        if self._old_api_key is None:
+            os.environ.pop("API_KEY", None)
+        else:
+            os.environ["API_KEY"] = self._old_api_key
+        self._tmp.cleanup()
+
+    def _log(self, label: str, day: date) -> None:
+        nm = self.nutrition_mod
+        at = datetime.combine(day, time(12, 0)).astimezone()
+        nm.log_events([nm.NutritionEvent(label=label, consumed_at=at, kcal=300.0)])
+
+    def _stored(self) -> tuple[int, str] | None:
+        with self.db_mod.db() as conn:
+            row = conn.execute(
+                "SELECT data_version, generated_at FROM daily_text_reports WHERE local_day = ?",
+                (self.yday.isoformat(),),
+            ).fetchone()
+        return None if row is None else (int(row["data_version"]), str(row["generated_at"]))
+
+    def test_on_date_reads_one_entry(self) -> None:
+        series = [{"date": "2026-02-20", "kg": 70}, {"date": "2026-02-21", "kg": None}]
+        on_date = self.report_mod._on_date
+        self.assertEqual(on_date(series, "2026-02-20", "kg"), 70.0)
+        self.assertIsNone(on_date(series, "2026-02-21", "kg"))
+        self.assertIsNone(on_date(series, "2026-02-22", "kg"))
+
+    def test_report_is_stored_and_regenerated_only_for_its_day(self) -> None:
+        self._log("おにぎり", self.yday)
+        self.assertTrue(self.report_mod.refresh_yesterday_report())
+        stored = self._stored()
+        self.assertIsNotNone(stored)
+
+        # Served from the table; the job has nothing to do.
+        res = self.client.get("/api/report/yesterday", headers=self.headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertIn("おにぎり", res.json()["text"])
+        self.assertFalse(self.report_mod.refresh_yesterday_report())
+        self.assertEqual(self._stored(), stored)
+
+        # A write to a day outside the report's window leaves it alone...
+        self._log("味噌汁", self.yday - timedelta(days=3))
+        self.assertFalse(self.report_mod.refresh_yesterday_report())
+        self.assertEqual(self._stored(), stored)
+
+        # ...a write to yesterday regenerates it.
+        self._log("サラダ", self.yday)
+        res = self.client.get("/api/report/yesterday", headers=self.headers)
+        self.assertIn("サラダ", res.json()["text"])
+        self.assertGreater(self._stored()[0], stored[0])
+
+    def test_build_daily_report_for_past_day(self) -> None:
+        day = self.yday - timedelta(days=3)
+        self._log("カレー", day)
+        text = self.report_mod.build_daily_report(day)
+        self.assertTrue(text.startswith(f"【前日レポート】{day.isoformat()}"))
+        self.assertIn("カレー", text)
+
+
+
+class DailyTextReportTimezoneTests(unittest.TestCase):
+    """Health records are versioned by UTC date; in JST a morning lands on the previous UTC day."""
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_env = {k: os.environ.get(k) for k in ("DB_PATH", "API_KEY", "TZ")}
+        os.environ["DB_PATH"] = os.path.join(self._tmp.name, "test_report_tz.db")
+        os.environ["API_KEY"] = "test-api-key"
+        os.environ["TZ"] = "Asia/Tokyo"
+        time_mod.tzset()
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        import app.summary as summary_mod
+        importlib.reload(summary_mod)
+        import app.nutrition as nutrition_mod
+        importlib.reload(nutrition_mod)
+        import app.report as report_mod
+        importlib.reload(report_mod)
+        import app.main as main_mod
+        importlib.reload(main_mod)
+        main_mod.start_discovery_thread = lambda: None  # type: ignore[assignment]
+
+        self.client_ctx = TestClient(main_mod.app)
+        self.client = self.client_ctx.__enter__()
+        self.headers = {"X-Api-Key": "test-api-key"}
+
+    def tearDown(self) -> None:
+        self.client_ctx.__exit__(None, None, None)
+        for key, value in self._old_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        time_mod.tzset()
+        # Modules reloaded above captured Asia/Tokyo as LOCAL_TZ.
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        import app.summary as summary_mod
+        importlib.reload(summary_mod)
+        self._tmp.cleanup()
+
+    def _sync(self, sync_id: str, at: datetime, steps: int, kg: float) -> None:
+        r = self.client.post(
+            "/api/sync",
+            headers=self.headers,
+            json={
+                "deviceId": "phone",
+                "syncId": sync_id,
+                "syncedAt": at.isoformat(),
+                "rangeStart": at.isoformat(),
+                "rangeEnd": (at + timedelta(hours=1)).isoformat(),
+                "records": [
+                    {
+                        "type": "StepsRecord",
+                        "recordId": f"steps-{sync_id}",
+                        "startTime": at.isoformat(),
+                        "endTime": (at + timedelta(minutes=30)).isoformat(),
+                        "payload": {"count": steps},
+                    },
+                    {
+                        "type": "WeightRecord",
+                        "recordId": f"weight-{sync_id}",
+                        "time": at.isoformat(),
+                        "payload": {"inKilograms": kg},
+                    },
+                ],
+            },
+        )
+        self.assertEqual(r.status_code, 200, r.text)
+
+    def _stored_version(self, day: date) -> int:
+        import app.db as db_mod
+
+        with db_mod.db() as conn:
+            row = conn.execute("SELECT data_version FROM daily_text_reports WHERE local_day = ?", (day.isoformat(),)).fetchone()
+        return int(row["data_version"])
+
+    def test_morning_sync_in_jst_refreshes_yesterdays_report(self) -> None:
+        yday = datetime.now().astimezone().date() - timedelta(days=1)
+        first = self.client.get("/api/report/yesterday", headers=self.headers)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("- 体重: - kg", first.json()["text"])
+
+        # 08:00 JST is 23:00 UTC the day before: the records are versioned under day:{yday - 1}.
+        self._sync("jst-morning", datetime.combine(yday, time(8, 0)).astimezone(), 12345, 71.5)
+
+        text = self.client.get("/api/report/yesterday", headers=self.headers).json()["text"]
+        self.assertIn("- 体重: 71.5 kg", text)
+        self.assertIn("- 歩数: 12345", text)
+
+    def test_sync_of_today_leaves_yesterdays_report_alone(self) -> None:
+        today = datetime.now().astimezone().date()
+        self.client.get("/api/report/yesterday", headers=self.headers)
+        stored = self._stored_version(today - timedelta(days=1))
+
+        # 12:00 JST today is 03:00 UTC today, outside yesterday's window (UTC yday-1..yday).
+        self._sync("jst-noon", datetime.combine(today, time(12, 0)).astimezone(), 500, 70.0)
+        self.client.get("/api/report/yesterday", headers=self.headers)
+        self.assertEqual(self._stored_version(today - timedelta(days=1)), stored)
+
+
+if __name__ == "__main__":
+    unittest.main()
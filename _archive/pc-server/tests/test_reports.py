@@ -19,6 +19,7 @@ class ReportsTests(unittest.TestCase):
         importlib.reload(reports_mod)
 
         db_mod.init_db()
+        self.db_mod = db_mod
         self.reports_mod = reports_mod
 
     def tearDown(self) -> None:
@@ -72,6 +73,130 @@ class ReportsTests(unittest.TestCase):
         self.assertTrue(deleted)
         self.assertIsNone(self.reports_mod.get_report(report_id))
 
+    def _sections(self, report_id: int) -> dict[str, str]:
+        with self.db_mod.db() as conn:
+            rows = conn.execute(
+                "SELECT section, body FROM report_sections WHERE report_id = ?", (report_id,)
+            ).fetchall()
+        return {r["section"]: r["body"] for r in rows}
+
+    def test_split_sections(self) -> None:
+        content = (
+            "見出し\n<!--DOCTOR-->医師\n<!--/DOCTOR-->\n<!--TRAINER-->トレーナー"
+            "<!--nutritionist-->栄養士<!--END-->末尾"
+        )
+        self.assertEqual(
+            self.reports_mod.split_sections(content),
+            {"doctor": "医師", "trainer": "トレーナー", "nutritionist": "栄養士"},
+        )
+        self.assertEqual(self.reports_mod.split_sections("<!--DOCTOR-->  <!--END-->"), {})
+
+    def test_save_report_stores_sections_and_preview(self) -> None:
+        report = self.reports_mod.save_report(
+            report_date="2026-02-21",
+            report_type="daily",
+            prompt_used="p",
+            content="<!--DOCTOR-->A<!--TRAINER-->B",
+        )
+        report_id = int(report["id"])
+        self.assertEqual(self._sections(report_id), {"doctor": "A", "trainer": "B"})
+        self.assertEqual(report["preview"], "<!--DOCTOR-->A<!--TRAINER-->B")
+
+        # Re-saving the same (date, type) replaces the sections.
+        self.reports_mod.save_report(
+            report_date="2026-02-21",
+            report_type="daily",
+            prompt_used="p",
+            content="<!--NUTRITIONIST-->C",
+        )
+        self.assertEqual(self._sections(report_id), {"nutritionist": "C"})
+
+        self.reports_mod.delete_report(report_id)
+        self.assertEqual(self._sections(report_id), {})
+
+    def test_get_report_section_indexes_direct_writes(self) -> None:
+        with self.db_mod.db() as conn:
+            conn.execute(
+                """
+                INSERT INTO ai_reports(report_date, report_type, prompt_used, content, created_at)
+                VALUES('2026-02-22', 'daily', 'p', '<!--TRAINER-->走る', '2026-02-22T08:00:00+00:00')
+                """
+            )
+            section = self.reports_mod.get_report_section(conn, "2026-02-22", "daily", "trainer")
+            self.assertEqual(section["body"], "走る")
+            self.assertIsNone(self.reports_mod.get_report_section(conn, "2026-02-22", "daily", "doctor")["body"])
+            self.assertIsNone(self.reports_mod.get_report_section(conn, "2026-02-23", "daily", "trainer"))
+
+            # Editing content outside save_report drops the stale sections.
+            conn.execute("UPDATE ai_reports SET content = '<!--TRAINER-->泳ぐ' WHERE report_date = '2026-02-22'")
+            section = self.reports_mod.get_report_section(conn, "2026-02-22", "daily", "trainer")
+            self.assertEqual(section["body"], "泳ぐ")
+
+    def _save_days(self, n: int, report_type: str = "daily") -> None:
+        for i in range(n):
+            self.reports_mod.save_report(
+                report_date=f"2025-01-{i + 1:02d}",
+                report_type=report_type,
+                prompt_used="p",
+                content=f"<!--DOCTOR-->{i + 1}日目: 睡眠は{'十分' if i % 2 else '不足気味'}です。",
+            )
+
+    def test_keyset_pagination_walks_every_report(self) -> None:
+        self._save_days(7)
+        self._save_days(3, report_type="weekly")
+        rm = self.reports_mod
+
+        seen: list[str] = []
+        after = None
+        while True:
+            page = rm.list_reports(report_type="daily", limit=3, after=after)
+            seen.extend(r["report_date"] for r in page)
+            if len(page) < 3:
+                break
+            after = rm.decode_cursor(rm.encode_cursor(page[-1]))
+        self.assertEqual(seen, [f"2025-01-{d:02d}" for d in range(7, 0, -1)])
+        self.assertEqual(len(rm.list_reports(limit=100)), 10)
+
+        with self.db_mod.db() as conn:
+            plan = " ".join(
+                str(r["detail"])
+                for r in conn.execute(
+                    """
+                    EXPLAIN QUERY PLAN
+                    SELECT id FROM ai_reports r
+                    WHERE r.report_type = 'daily' AND (r.report_date, r.id) < ('2025-01-05', 5)
+                    ORDER BY r.report_date DESC, r.id DESC LIMIT 3
+                    """
+                )
+            )
+        self.assertIn("idx_ai_reports_type_date_id", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_search_highlights_matches_and_follows_edits(self) -> None:
+        self._save_days(6)
+        rm = self.reports_mod
+
+        hits = rm.list_reports(q="不足気味")
+        self.assertEqual([r["report_date"] for r in hits], ["2025-01-05", "2025-01-03", "2025-01-01"])
+        self.assertIn("<mark>不足気味</mark>", hits[0]["snippet"])
+        page = rm.list_reports(q="不足気味", limit=1, after=("2025-01-05", hits[0]["id"]))
+        self.assertEqual([r["report_date"] for r in page], ["2025-01-03"])
+
+        # Short queries fall back to LIKE with the same snippet marking.
+        short = rm.list_reports(q="十分")
+        self.assertEqual(len(short), 3)
+        self.assertIn("<mark>十分</mark>", short[0]["snippet"])
+
+        rm.save_report(report_date="2025-01-05", report_type="daily", prompt_used="p", content="よく眠れました")
+        rm.delete_report(int(hits[-1]["id"]))
+        self.assertEqual([r["report_date"] for r in rm.list_reports(q="不足気味")], ["2025-01-03"])
+        self.assertEqual([r["report_date"] for r in rm.list_reports(q="よく眠れ")], ["2025-01-05"])
+
+    def test_decode_cursor_rejects_garbage(self) -> None:
+        for bad in ("", "2025-01-01", "2025-01-01:x"):
+            with self.assertRaises(ValueError):
+                self.reports_mod.decode_cursor(bad)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import re
+import tempfile
+import unittest
+
+from fastapi import BackgroundTasks, FastAPI
+from fastapi.testclient import TestClient
+
+
+def _server_timing(header: str) -> dict[str, dict[str, str]]:
+    out: dict[str, dict[str, str]] = {}
+    for metric in header.split(", "):
+        name, *params = metric.split(";")
+        out[name] = dict(p.split("=", 1) for p in params)
+    return out
+
+
+class TimingMiddlewareTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_env = {k: os.environ.get(k) for k in ("DB_PATH", "API_KEY")}
+        os.environ["DB_PATH"] = os.path.join(self._tmp.name, "test_timing.db")
+        os.environ["API_KEY"] = "test-api-key"
+        self.headers = {"X-Api-Key": "test-api-key"}
+
+        import app.db as db_mod
+        importlib.reload(db_mod)
+        import app.timing as timing_mod
+
+        db_mod.init_db()
+        self.db_mod = db_mod
+        self.timing_mod = timing_mod
+
+    def tearDown(self) -> None:
+        for key, value in self._old_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        self._tmp.cleanup()
+
+    def test_server_timing_header_on_app_responses(self) -> None:
+        import app.main as main_mod
+        importlib.reload(main_mod)
+        main_mod.start_discovery_thread = lambda: None  # type: ignore[assignment]
+
+        with TestClient(main_mod.app) as client:
+            first = client.get("/api/summary", headers=self.headers)
+            second = client.get("/api/summary", headers=self.headers)
+        self.assertEqual(first.status_code, 200)
+
+        timing = _server_timing(first.headers["Server-Timing"])
+        self.assertEqual(set(timing), {"total", "db", "encode", "cache"})
+        self.assertGreaterEqual(float(timing["total"]["dur"]), float(timing["db"]["dur"]))
+        self.assertGreater(int(re.match(r'"(\d+) queries"', timing["db"]["desc"]).group(1)), 0)
+        self.assertEqual(timing["cache"]["desc"], '"0 hit 1 miss"')
+        self.assertEqual(_server_timing(second.headers["Server-Timing"])["cache"]["desc"], '"1 hit 0 miss"')
+
+    def test_slow_requests_are_logged_as_json(self) -> None:
+        from app.encoding import NegotiatedResponse
+
+        tm = self.timing_mod
+        db = self.db_mod.db
+
+        def background_query() -> None:
+            with db() as conn:
+                conn.execute("SELECT COUNT(*) FROM health_records").fetchone()
+
+        app = FastAPI(default_response_class=NegotiatedResponse)
+        app.add_middleware(tm.TimingMiddleware, slow_ms=0.0)
+
+        @app.get("/items/{item_id}")
+        def item(item_id: int, background_tasks: BackgroundTasks) -> dict[str, int]:
+            with db() as conn:
+                conn.execute("SELECT 1").fetchone()
+            tm.record_cache("memo:test", hit=True)
+            tm.record_cache("homeSnapshot", hit=False)
+            background_tasks.add_task(background_query)  # runs after the response: not counted
+            return {"id": item_id}
+
+        tm.mark_sync()
+        with self.assertLogs("app.timing", level="WARNING") as logs:
+            res = TestClient(app).get("/items/7?full=1")
+        self.assertEqual(res.json(), {"id": 7})
+
+        entry = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(entry["event"], "slow_request")
+        self.assertEqual((entry["method"], entry["path"], entry["route"]), ("GET", "/items/7", "/items/{item_id}"))
+        self.assertEqual((entry["query"], entry["status"]), ("full=1", 200))
+        self.assertEqual(entry["queries"], 3)  # the connection's two PRAGMAs and the SELECT
+        self.assertEqual(entry["cacheHits"], {"memo:test": 1})
+        self.assertEqual(entry["cacheMisses"], {"homeSnapshot": 1})
+        self.assertGreaterEqual(entry["totalMs"], entry["dbMs"])
+        self.assertIsNotNone(entry["sinceSyncS"])
+
+    def test_streamed_responses_are_not_logged(self) -> None:
+        from fastapi.responses import StreamingResponse
+
+        tm = self.timing_mod
+        app = FastAPI()
+        app.add_middleware(tm.TimingMiddleware, slow_ms=0.0)
+
+        @app.get("/export")
+        def export() -> StreamingResponse:
+            return StreamingResponse(iter([b"a,b\n", b"1,2\n"]), media_type="text/csv")
+
+        @app.get("/events")
+        def events() -> StreamingResponse:
+            return StreamingResponse(iter(["event: hello\ndata: {}\n\n"]), media_type="text/event-stream")
+
+        @app.get("/plain")
+        def plain() -> dict[str, bool]:
+            return {"ok": True}
+
+        client = TestClient(app)
+        with self.assertNoLogs("app.timing", level="WARNING"):
+            self.assertEqual(client.get("/export").text, "a,b\n1,2\n")
+            res = client.get("/events")
+        self.assertIn("Server-Timing", res.headers)
+        with self.assertLogs("app.timing", level="WARNING"):
+            client.get("/plain")
+
+
+if __name__ == "__main__":
+    unittest.main()